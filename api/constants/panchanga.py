@@ -0,0 +1,103 @@
+"""
+Constants for the panchanga (the five limbs of the day) in Vedic astrology.
+"""
+
+from typing import List
+
+# Angular span of one element (degrees)
+TITHI_SPAN = 12.0           # Moon - Sun elongation
+KARANA_SPAN = 6.0           # half a tithi
+NAKSHATRA_SPAN = 360.0 / 27 # sidereal Moon
+YOGA_SPAN = 360.0 / 27      # sidereal Sun + Moon
+
+# Tithi names within a paksha (1-based index); the 15th tithi is Purnima in
+# Shukla paksha and Amavasya in Krishna paksha
+TITHI_NAMES: List[str] = [
+    "Pratipada",    # 1
+    "Dwitiya",      # 2
+    "Tritiya",      # 3
+    "Chaturthi",    # 4
+    "Panchami",     # 5
+    "Shashthi",     # 6
+    "Saptami",      # 7
+    "Ashtami",      # 8
+    "Navami",       # 9
+    "Dashami",      # 10
+    "Ekadashi",     # 11
+    "Dwadashi",     # 12
+    "Trayodashi",   # 13
+    "Chaturdashi",  # 14
+    "Purnima",      # 15
+]
+
+PAKSHA_NAMES: List[str] = ["Shukla", "Krishna"]
+
+# Yoga names (1-based index)
+YOGA_NAMES: List[str] = [
+    "Vishkambha",   # 1
+    "Priti",        # 2
+    "Ayushman",     # 3
+    "Saubhagya",    # 4
+    "Shobhana",     # 5
+    "Atiganda",     # 6
+    "Sukarma",      # 7
+    "Dhriti",       # 8
+    "Shula",        # 9
+    "Ganda",        # 10
+    "Vriddhi",      # 11
+    "Dhruva",       # 12
+    "Vyaghata",     # 13
+    "Harshana",     # 14
+    "Vajra",        # 15
+    "Siddhi",       # 16
+    "Vyatipata",    # 17
+    "Variyana",     # 18
+    "Parigha",      # 19
+    "Shiva",        # 20
+    "Siddha",       # 21
+    "Sadhya",       # 22
+    "Shubha",       # 23
+    "Shukla",       # 24
+    "Brahma",       # 25
+    "Indra",        # 26
+    "Vaidhriti",    # 27
+]
+
+# The seven movable (chara) karanas repeat eight times from the second half
+# of Shukla Pratipada; the four fixed (sthira) karanas take the remaining slots
+MOVABLE_KARANAS: List[str] = ["Bava", "Balava", "Kaulava", "Taitila", "Gara", "Vanija", "Vishti"]
+FIRST_KARANA = "Kimstughna"
+LAST_KARANAS: List[str] = ["Shakuni", "Chatushpada", "Naga"]
+
+# Weekdays from Sunday, with their lords
+VARA_NAMES: List[str] = [
+    "Ravivara", "Somavara", "Mangalavara", "Budhavara", "Guruvara", "Shukravara", "Shanivara"
+]
+VARA_LORDS: List[str] = ["Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn"]
+
+def tithi_name(number: int) -> str:
+    """Name of a tithi (1-30)"""
+    if number == 30:
+        return "Amavasya"
+    return TITHI_NAMES[(number - 1) % 15]
+
+def paksha_name(tithi_number: int) -> str:
+    """Paksha (lunar fortnight) of a tithi (1-30)"""
+    return PAKSHA_NAMES[(tithi_number - 1) // 15]
+
+def karana_name(number: int) -> str:
+    """Name of a karana (1-60, the half-tithis of the lunar month)"""
+    if number == 1:
+        return FIRST_KARANA
+    if number > 57:
+        return LAST_KARANAS[number - 58]
+    return MOVABLE_KARANAS[(number - 2) % 7]
+
+# Inauspicious periods of the day: the daytime (sunrise to sunset) is divided
+# into eight equal parts and each period takes one part (1-8) per weekday,
+# listed from Sunday
+DAY_PERIODS = {
+    "rahu_kaal": [8, 2, 7, 5, 6, 4, 3],
+    "yamaganda": [5, 4, 3, 2, 1, 7, 6],
+    "gulika_kaal": [7, 6, 5, 4, 3, 2, 1],
+}
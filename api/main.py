@@ -6,15 +6,16 @@ import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
-import requests
 from api.services.ephemeris_service import ephemeris_service
 from api.utils.error_handling import validation_exception_handler
+from api.utils.admission import ADMISSION_ENABLED, AdmissionMiddleware
+from api.utils.deadline import DeadlineExceededError, DeadlineMiddleware, deadline_exceeded_handler
+from api.utils.metrics import MetricsMiddleware, instrument_routes
+from api.utils.profiling import ProfilingMiddleware, start_periodic_sampling, stop_periodic_sampling
+from api.utils.logging_config import configure_logging
 
-# Create logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configure logging (queue-based, see api/utils/logging_config.py)
+configure_logging()
 logger = logging.getLogger("jai-api")
 
 # Create FastAPI app
@@ -29,6 +30,23 @@ app = FastAPI(
 # Add validation error handler
 app.add_exception_handler(ValidationError, validation_exception_handler)
 
+# Overdue requests raised by cooperative deadline checks
+app.add_exception_handler(DeadlineExceededError, deadline_exceeded_handler)
+
+# Per-client rate limiting and load shedding (light/heavy lanes)
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+# Request deadlines - added after (i.e. around) admission control so the
+# admission queue wait counts against the deadline
+app.add_middleware(DeadlineMiddleware)
+
+# On-demand profiling of single requests (X-JAI-Profile with the admin token)
+app.add_middleware(ProfilingMiddleware)
+
+# Request metrics - outermost, so shed and overdue requests are measured too
+app.add_middleware(MetricsMiddleware)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -38,27 +56,90 @@ async def root():
         "endpoints": [
             "/v1/api/horoscope",
             "/v1/api/horoscope/planets",
-            "/v1/api/horoscope/ascendant"
+            "/v1/api/horoscope/ascendant",
+            "/v1/api/charts/{chart_id}",
+            "/v1/api/panchanga",
+            "/v1/api/muhurta",
+            "/v1/api/lagna",
+            "/v1/api/ephemeris/series",
+            "/v1/api/jobs"
         ]
     }
 
+# Calculation worker processes live as long as the (HTTP) worker process
+@app.on_event("startup")
+async def start_calculation_pool():
+    from api.services.worker_pool import calculation_pool
+    calculation_pool.start()
+
+# Batch jobs left unfinished by the last run resume in the background
+@app.on_event("startup")
+async def start_job_runner():
+    from api.services.jobs import job_runner
+    job_runner.start()
+
+@app.on_event("startup")
+async def start_profiling():
+    start_periodic_sampling()
+
+# Deferred initialization (caches, ephemeris page cache and self-check, first
+# chart) runs in the background so the server binds without waiting for it
+@app.on_event("startup")
+async def start_warmup():
+    from api.services.warmup import start_warmup
+    start_warmup()
+
+@app.on_event("shutdown")
+async def stop_calculation_pool():
+    from api.services.worker_pool import calculation_pool
+    calculation_pool.shutdown()
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    from api.services.jobs import job_runner
+    job_runner.shutdown()
+
+@app.on_event("shutdown")
+async def stop_profiling():
+    stop_periodic_sampling()
+
+@app.on_event("shutdown")
+async def stop_chart_auditor():
+    from api.services.chart_auditor import chart_auditor
+    chart_auditor.stop()
+
 # Health check endpoint
 @app.get("/v1/api/health")
 async def health_check():
+    from api.services.warmup import warmup_state
     return {
         "status": "healthy",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "warmup": warmup_state.as_dict()
     }
 
 # Main application initialization
 def create_app():
     """Initialize and configure the application"""
     # Import routers from routes module
-    from api.routes import ascendant_router, planets_router, horoscope_router
+    from api.routes import (
+        ascendant_router, planets_router, horoscope_router, charts_router, metrics_router, panchanga_router,
+        muhurta_router, lagna_router, ephemeris_router, jobs_router
+    )
     
     # Include routers
     app.include_router(ascendant_router)
     app.include_router(planets_router)
     app.include_router(horoscope_router)
+    app.include_router(charts_router)
+    app.include_router(metrics_router)
+    app.include_router(panchanga_router)
+    app.include_router(muhurta_router)
+    app.include_router(lagna_router)
+    app.include_router(ephemeris_router)
+    app.include_router(jobs_router)
+
+    # Mark handler start/end for the per-stage request metrics
+    instrument_routes(app.routes)
     
     return app 
\ No newline at end of file
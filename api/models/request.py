@@ -2,23 +2,26 @@
 Request data models for JAI API
 """
 from pydantic import BaseModel, Field, validator, model_validator
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Tuple
 from datetime import datetime, date
-import requests
 import re
 import os
 import json
-import time
 import logging
+import threading
 from pathlib import Path
-from functools import lru_cache
+from functools import lru_cache, wraps
+from api.utils.http_cache import CHART_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, normalize_chart_params
+from api.utils.deadline import DeadlineExceededError, check_deadline, clamp_timeout, sleep_within_deadline
+from api.utils.metrics import count_cache, count_provider_call, Span
+from api.utils.input_validation import MAX_LAGNA_DAYS, MAX_MUHURTA_DAYS, MAX_PANCHANGA_DAYS, MAX_YEAR, MIN_YEAR
+from api.utils.logging_config import log_event
 
 # Configure logging
 logger = logging.getLogger("jai-api.request")
 
-# Create cache directory if it doesn't exist
+# Cache files (the directory is created on the first save)
 CACHE_DIR = Path("./cache")
-CACHE_DIR.mkdir(exist_ok=True)
 GEO_CACHE_FILE = CACHE_DIR / "geocode_cache.json"
 TZ_CACHE_FILE = CACHE_DIR / "timezone_cache.json"
 
@@ -45,14 +48,31 @@ def load_cache(cache_file: Path, default=None):
     
     return default
 
-# Load caches
-GEOCODE_CACHE = load_cache(GEO_CACHE_FILE)
-TIMEZONE_CACHE = load_cache(TZ_CACHE_FILE)
+# Geocoding and timezone caches, filled from the cache files on first use (or by
+# the warm-up) rather than at import time
+GEOCODE_CACHE: Dict[str, Any] = {}
+TIMEZONE_CACHE: Dict[str, float] = {}
+_caches_loaded = False
+_caches_lock = threading.Lock()
+
+def load_caches() -> None:
+    """Load the cache files once; entries already in memory take precedence"""
+    global _caches_loaded
+    if _caches_loaded:
+        return
+    with _caches_lock:
+        if _caches_loaded:
+            return
+        for cache, cache_file in ((GEOCODE_CACHE, GEO_CACHE_FILE), (TIMEZONE_CACHE, TZ_CACHE_FILE)):
+            for key, value in load_cache(cache_file).items():
+                cache.setdefault(key, value)
+        _caches_loaded = True
 
 def save_cache(cache_data: dict, cache_file: Path):
     """Safely save cache with error handling"""
     try:
         # Create a temporary file first
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
         temp_file = cache_file.with_suffix('.tmp')
         with open(temp_file, "w") as f:
             json.dump(cache_data, f)
@@ -64,7 +84,39 @@ def save_cache(cache_data: dict, cache_file: Path):
         logger.error(f"Error saving cache to {cache_file}: {str(e)}")
         return False
 
-@lru_cache(maxsize=100)
+# Set when a memoized lookup actually runs (see counted_lru_cache)
+_memo = threading.local()
+
+def counted_lru_cache(cache: str, maxsize: int = 100):
+    """
+    lru_cache whose hits are counted as hits of the named cache
+
+    The lookups answered by the memo never reach the counted cache lookups in
+    the function itself, so they are counted here. __wrapped__ is the function
+    without the memo.
+    """
+    def decorator(function):
+        @wraps(function)
+        def compute(*args, **kwargs):
+            _memo.computed = True
+            return function(*args, **kwargs)
+
+        cached = lru_cache(maxsize=maxsize)(compute)
+
+        @wraps(function)
+        def lookup(*args, **kwargs):
+            _memo.computed = False
+            result = cached(*args, **kwargs)
+            if not _memo.computed:
+                count_cache(cache, hit=True)
+            return result
+
+        lookup.cache_info = cached.cache_info
+        lookup.cache_clear = cached.cache_clear
+        return lookup
+    return decorator
+
+@counted_lru_cache("geocode")
 def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
     """
     Geocode a place name to get coordinates using multiple geocoding services with fallback.
@@ -81,19 +133,19 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
     Raises:
         ValueError: If geocoding fails after all retries and fallbacks
     """
-    import time
     import random
     import requests
-    from urllib.parse import quote
-    import os
     
     # Clean and normalize the place name for caching
     cache_key = place_name.lower().strip()
     
     # Check cache first
+    load_caches()
     if cache_key in GEOCODE_CACHE:
-        logger.debug(f"Geocode cache hit for '{place_name}'")
+        logger.debug("Geocode cache hit for '%s'", place_name)
+        count_cache("geocode", hit=True)
         return GEOCODE_CACHE[cache_key]
+    count_cache("geocode", hit=False)
     
     # User-Agent is required by Nominatim's usage policy
     user_agents = [
@@ -110,6 +162,7 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
     # Try OpenCage first if API key is available
     opencage_api_key = os.environ.get("OPENCAGE_API_KEY")
     if opencage_api_key:
+        check_deadline("geocoding")
         try:
             url = "https://api.opencagedata.com/geocode/v1/json"
             params = {
@@ -119,7 +172,8 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
                 "limit": 1
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            with Span("geocode_provider"):
+                response = requests.get(url, params=params, timeout=clamp_timeout(10))
             response.raise_for_status()
             data = response.json()
             
@@ -136,9 +190,12 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
                 GEOCODE_CACHE[cache_key] = geo_data
                 save_cache(GEOCODE_CACHE, GEO_CACHE_FILE)
                 logger.info(f"Geocoded '{place_name}' using OpenCage")
+                count_provider_call("opencage", "success")
                 return geo_data
+            count_provider_call("opencage", "no_result")
                 
         except Exception as e:
+            count_provider_call("opencage", "error")
             logger.warning(f"OpenCage geocoding failed, falling back to Nominatim: {str(e)}")
     
     # Fall back to Nominatim if OpenCage fails or is not configured
@@ -153,8 +210,11 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
     last_error = None
     
     for attempt in range(max_retries + 1):
+        # Stop retrying once the request is overdue or the client has gone
+        check_deadline("geocoding")
         try:
-            response = requests.get(geocode_url, params=params, headers=headers, timeout=5)
+            with Span("geocode_provider"):
+                response = requests.get(geocode_url, params=params, headers=headers, timeout=clamp_timeout(5))
             response.raise_for_status()
             
             data = response.json()
@@ -178,15 +238,17 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
             save_cache(GEOCODE_CACHE, GEO_CACHE_FILE)
             
             logger.info(f"Successfully geocoded '{place_name}' to {result['lat']}, {result['lon']}")
+            count_provider_call("nominatim", "success")
             return geo_data
             
         except Exception as e:
+            count_provider_call("nominatim", "error")
             last_error = e
             if attempt < max_retries:
                 # Exponential backoff with jitter
                 sleep_time = retry_delay * (2 ** attempt) + random.uniform(0, 1)
                 logger.warning(f"Geocoding attempt {attempt + 1} failed, retrying in {sleep_time:.1f}s: {str(e)}")
-                time.sleep(sleep_time)
+                sleep_within_deadline(sleep_time, "geocoding")
     
     # If we get here, all attempts failed
     logger.error(f"Failed to geocode '{place_name}' after {max_retries + 1} attempts")
@@ -195,7 +257,7 @@ def geocode_place(place_name: str, max_retries=2, retry_delay=1) -> dict:
         raise ValueError(f"Could not determine coordinates for place: {place_name}. Last error: {str(last_error)}")
     raise ValueError(f"Could not determine coordinates for place: {place_name}. Please check the place name and try again.")
 
-@lru_cache(maxsize=100)
+@counted_lru_cache("timezone")
 def get_timezone(lat: float, lon: float, max_retries=2, retry_delay=1) -> float:
     """
     Get timezone offset for coordinates using TimeZoneDB API with caching and fallback
@@ -218,9 +280,12 @@ def get_timezone(lat: float, lon: float, max_retries=2, retry_delay=1) -> float:
     
     # Create cache key
     cache_key = f"{lat:.4f},{lon:.4f}"
+    load_caches()
     if cache_key in TIMEZONE_CACHE:
-        logger.debug(f"Timezone cache hit for {lat}, {lon}")
+        logger.debug("Timezone cache hit for %s, %s", lat, lon)
+        count_cache("timezone", hit=True)
         return TIMEZONE_CACHE[cache_key]
+    count_cache("timezone", hit=False)
     
     logger.info(f"Getting timezone for {lat}, {lon}")
     
@@ -228,6 +293,8 @@ def get_timezone(lat: float, lon: float, max_retries=2, retry_delay=1) -> float:
     api_key = os.environ.get("TIMEZONEDB_API_KEY")
     
     if api_key:
+        import requests
+        
         # Use TimeZoneDB API
         tz_url = "https://api.timezonedb.com/v2.1/get-time-zone"
         params = {
@@ -239,13 +306,16 @@ def get_timezone(lat: float, lon: float, max_retries=2, retry_delay=1) -> float:
         }
         
         for attempt in range(max_retries + 1):
+            check_deadline("timezone resolution")
             try:
-                response = requests.get(tz_url, params=params, timeout=5)
+                with Span("timezone_provider"):
+                    response = requests.get(tz_url, params=params, timeout=clamp_timeout(5))
                 
                 if response.status_code != 200:
                     logger.warning(f"TimeZoneDB API returned status code {response.status_code}")
+                    count_provider_call("timezonedb", "error")
                     if attempt < max_retries:
-                        time.sleep(retry_delay * (attempt + 1))
+                        sleep_within_deadline(retry_delay * (attempt + 1), "timezone resolution")
                         continue
                     else:
                         logger.warning("Falling back to approximate timezone calculation")
@@ -261,20 +331,25 @@ def get_timezone(lat: float, lon: float, max_retries=2, retry_delay=1) -> float:
                     save_cache(TIMEZONE_CACHE, TZ_CACHE_FILE)
                     
                     logger.info(f"Timezone for {lat}, {lon} is UTC{'+' if offset_hours >= 0 else ''}{offset_hours}")
+                    count_provider_call("timezonedb", "success")
                     return offset_hours
                 else:
                     logger.warning(f"TimeZoneDB API error: {tz_data.get('message', 'Unknown error')}")
+                    count_provider_call("timezonedb", "error")
                     if attempt < max_retries:
-                        time.sleep(retry_delay * (attempt + 1))
+                        sleep_within_deadline(retry_delay * (attempt + 1), "timezone resolution")
                         continue
                     else:
                         logger.warning("Falling back to approximate timezone calculation")
                         break
                     
+            except DeadlineExceededError:
+                raise
             except Exception as e:
                 logger.warning(f"Error getting timezone from API: {str(e)}")
+                count_provider_call("timezonedb", "error")
                 if attempt < max_retries:
-                    time.sleep(retry_delay * (attempt + 1))
+                    sleep_within_deadline(retry_delay * (attempt + 1), "timezone resolution")
                     continue
                 else:
                     logger.warning("Falling back to approximate timezone calculation")
@@ -297,49 +372,107 @@ def get_timezone(lat: float, lon: float, max_retries=2, retry_delay=1) -> float:
     
     return offset_hours
 
+def normalize_date(v: str, label: str = "date") -> str:
+    """Normalize a date in one of the supported formats to YYYY-MM-DD"""
+    # Support standard ISO format
+    iso_pattern = r'^\d{4}-\d{2}-\d{2}$'
+    if re.match(iso_pattern, v):
+        return v
+        
+    # Try various date formats (DD-MM-YYYY, DD/MM/YYYY, etc.)
+    date_formats = [
+        '%d-%m-%Y',  # 01-01-1990
+        '%d/%m/%Y',  # 01/01/1990
+        '%m-%d-%Y',  # 01-01-1990 (US format)
+        '%m/%d/%Y',  # 01/01/1990 (US format)
+        '%d %b %Y',  # 01 Jan 1990
+        '%d %B %Y',  # 01 January 1990
+        '%b %d %Y',  # Jan 01 1990
+        '%B %d %Y',  # January 01 1990
+        '%b %d, %Y', # Jan 01, 1990
+        '%B %d, %Y'  # January 01, 1990
+    ]
+    
+    # Try each format
+    for fmt in date_formats:
+        try:
+            parsed_date = datetime.strptime(v, fmt)
+            # Convert to YYYY-MM-DD
+            return parsed_date.strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+            
+    # If we get here, no format matched
+    raise ValueError(f"Invalid {label} format. Supported formats include: YYYY-MM-DD, DD-MM-YYYY, MM/DD/YYYY, 01 Jan 1990, etc.")
+
+def resolve_place(place: str) -> Tuple[float, float, float]:
+    """
+    Geocode a place name
+
+    Returns:
+        Tuple of (latitude, longitude, timezone offset in hours)
+
+    Raises:
+        ValueError: If the place cannot be resolved
+    """
+    try:
+        # Get coordinates from place name
+        with Span("geocode"):
+            geo_data = geocode_place(place)
+        latitude = geo_data["lat"]
+        longitude = geo_data["lon"]
+        
+        # Get timezone for the coordinates
+        with Span("timezone"):
+            timezone_offset = get_timezone(latitude, longitude)
+        
+        log_event(logger, "geocoded", place=place, latitude=latitude,
+                  longitude=longitude, timezone_offset=timezone_offset)
+        return latitude, longitude, timezone_offset
+    
+    except DeadlineExceededError:
+        # Not a problem with the place name - answered with a 504
+        raise
+    except Exception as e:
+        # Log the error and raise a user-friendly message
+        logger.error(f"Error geocoding place '{place}': {str(e)}")
+        raise ValueError(f"Could not determine coordinates for place: {place}. Please check the place name and try again.")
+
 class HoroscopeRequest(BaseModel):
     """Request model for horoscope data using place-based geocoding"""
     birth_date: str = Field(..., description="Date of birth (supports multiple formats like YYYY-MM-DD, DD-MM-YYYY, DD MMM YYYY, etc.)")
     birth_time: str = Field(..., description="Time of birth (supports formats like HH:MM:SS, HH:MM, HHMM, 12-hour format with AM/PM)")
     place: str = Field(..., description="Place name (city, country) - e.g., 'Chennai, India'")
     ayanamsa: str = Field("lahiri", description="Ayanamsa system (default: lahiri). Options: lahiri, raman, krishnamurti, kp, jyotish_raman")
-    
+    precision: str = Field("standard", description="Calculation precision (default: standard). Options: standard (ephemeris files, Moshier where no file covers the date), file (ephemeris files only), moshier (built-in ephemeris), fast (analytical ephemeris, accurate to the sign and nakshatra)")
+    time_uncertainty_minutes: Optional[float] = Field(None, gt=0, le=180, description="Birth time uncertainty in minutes either side (up to 180). When set, the response includes birth_time_stability: which chart facts hold over the window and where the others change")
+    dasha_date: Optional[str] = Field(None, description="Date the running dasha of birth_time_stability is evaluated at (default: today)")
+
+    # Resolved from the place name by validate_and_geocode
+    latitude: Optional[float] = Field(None, description="Latitude resolved from the place name")
+    longitude: Optional[float] = Field(None, description="Longitude resolved from the place name")
+    timezone_offset: Optional[float] = Field(None, description="Timezone offset in hours resolved from the coordinates")
+
     @validator('birth_date')
     def validate_birth_date(cls, v):
         """
         Validate and normalize birth date format.
         Supports multiple formats for ChatGPT integration.
         """
-        # Support standard ISO format
-        iso_pattern = r'^\d{4}-\d{2}-\d{2}$'
-        if re.match(iso_pattern, v):
-            return v
-            
-        # Try various date formats (DD-MM-YYYY, DD/MM/YYYY, etc.)
-        date_formats = [
-            '%d-%m-%Y',  # 01-01-1990
-            '%d/%m/%Y',  # 01/01/1990
-            '%m-%d-%Y',  # 01-01-1990 (US format)
-            '%m/%d/%Y',  # 01/01/1990 (US format)
-            '%d %b %Y',  # 01 Jan 1990
-            '%d %B %Y',  # 01 January 1990
-            '%b %d %Y',  # Jan 01 1990
-            '%B %d %Y',  # January 01 1990
-            '%b %d, %Y', # Jan 01, 1990
-            '%B %d, %Y'  # January 01, 1990
-        ]
-        
-        # Try each format
-        for fmt in date_formats:
-            try:
-                parsed_date = datetime.strptime(v, fmt)
-                # Convert to YYYY-MM-DD
-                return parsed_date.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-                
-        # If we get here, no format matched
-        raise ValueError("Invalid birth date format. Supported formats include: YYYY-MM-DD, DD-MM-YYYY, MM/DD/YYYY, 01 Jan 1990, etc.")
+        return normalize_date(v, "birth date")
+    
+    @validator('dasha_date')
+    def validate_dasha_date(cls, v):
+        """Validate and normalize the dasha reference date"""
+        return normalize_date(v, "dasha date") if v is not None else None
+    
+    @validator('precision')
+    def validate_precision(cls, v):
+        """Validate the calculation precision"""
+        precision = (v or "standard").strip().lower()
+        if precision not in ("standard", "file", "moshier", "fast"):
+            raise ValueError("Invalid precision. Options: standard, file, moshier, fast")
+        return precision
     
     @validator('birth_time')
     def validate_birth_time(cls, v):
@@ -386,22 +519,39 @@ class HoroscopeRequest(BaseModel):
     @model_validator(mode='after')
     def validate_and_geocode(self):
         """Geocode the provided place name to get coordinates and timezone"""
-        try:
-            # Get coordinates from place name
-            geo_data = geocode_place(self.place)
-            self.latitude = geo_data["lat"]
-            self.longitude = geo_data["lon"]
-            
-            # Get timezone for the coordinates
-            self.timezone_offset = get_timezone(self.latitude, self.longitude)
-            
-            logger.info(f"Geocoded '{self.place}' to lat: {self.latitude}, lon: {self.longitude}, tz: {self.timezone_offset}")
-            return self
-                
-        except Exception as e:
-            # Log the error and raise a user-friendly message
-            logger.error(f"Error geocoding place '{self.place}': {str(e)}")
-            raise ValueError(f"Could not determine coordinates for place: {self.place}. Please check the place name and try again.")
+        self.latitude, self.longitude, self.timezone_offset = resolve_place(self.place)
+        return self
+
+    def chart_params(self) -> Dict[str, Any]:
+        """Normalized parameters that fully determine the chart for this request"""
+        return normalize_chart_params(
+            birth_date=self.birth_date,
+            birth_time=self.birth_time,
+            latitude=self.latitude,
+            longitude=self.longitude,
+            timezone_offset=self.timezone_offset,
+            ayanamsa=self.ayanamsa,
+            # Only non-default precisions are part of the parameters, so standard
+            # charts keep their fingerprints
+            precision=None if self.precision == "standard" else self.precision
+        )
+
+    def dasha_reference_date(self) -> date:
+        """Date the running dasha of the birth-time analysis is evaluated at"""
+        return date.fromisoformat(self.dasha_date) if self.dasha_date else datetime.utcnow().date()
+
+    def cache_scope(self, scope: str) -> Tuple[str, str]:
+        """
+        Fingerprint scope and Cache-Control header of a chart response
+
+        The birth-time analysis depends on its window and dasha date; without
+        an explicit dasha_date it changes with the current date, so clients
+        must revalidate it.
+        """
+        if self.time_uncertainty_minutes is None:
+            return scope, CHART_CACHE_CONTROL
+        scope = f"{scope}:uncertainty:{self.time_uncertainty_minutes:g}:{self.dasha_reference_date().isoformat()}"
+        return scope, CHART_CACHE_CONTROL if self.dasha_date else REVALIDATE_CACHE_CONTROL
 
 class TransitRequest(HoroscopeRequest):
     """
@@ -422,4 +572,138 @@ class TransitRequest(HoroscopeRequest):
                 
             return v
         except ValueError:
-            raise ValueError("transit_date must be in YYYY-MM-DD format") 
\ No newline at end of file
+            raise ValueError("transit_date must be in YYYY-MM-DD format") 
+
+# Most entries of one batch request
+MAX_BATCH_CHARTS = int(os.environ.get("JAI_BATCH_MAX_CHARTS", "1000"))
+
+class BatchChartRequest(BaseModel):
+    """Request model for a batch of charts"""
+    charts: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_CHARTS,
+        description="Birth details of each chart, as for /v1/api/horoscope/planets. Entries are validated one by one; an invalid entry gets an error result"
+    )
+
+class PlaceRangeRequest(BaseModel):
+    """Base of the requests for a range of days at a place (panchanga, muhurta, lagna)"""
+    place: str = Field(..., description="Place name (city, country) - e.g., 'Chennai, India'")
+    start_date: str = Field(..., description="First date (supports the same formats as birth_date)")
+
+    # Resolved from the place name by validate_and_geocode
+    latitude: Optional[float] = Field(None, description="Latitude resolved from the place name")
+    longitude: Optional[float] = Field(None, description="Longitude resolved from the place name")
+    timezone_offset: Optional[float] = Field(None, description="Timezone offset in hours resolved from the coordinates")
+
+    @validator('start_date')
+    def validate_start_date(cls, v):
+        """Validate and normalize the start date"""
+        return normalize_date(v, "start date")
+
+    # Subclasses with a precision field offer the standard and fast tiers
+    @validator('precision', check_fields=False)
+    def validate_precision(cls, v):
+        """Validate the calculation precision"""
+        precision = (v or "standard").strip().lower()
+        if precision not in ("standard", "fast"):
+            raise ValueError("Invalid precision. Options: standard, fast")
+        return precision
+
+    @model_validator(mode='after')
+    def validate_and_geocode(self):
+        """Geocode the provided place name to get coordinates and timezone"""
+        self.latitude, self.longitude, self.timezone_offset = resolve_place(self.place)
+        return self
+
+class PanchangaRequest(PlaceRangeRequest):
+    """Request model for the panchanga of a range of days at a place"""
+    days: int = Field(1, ge=1, le=MAX_PANCHANGA_DAYS, description="Number of consecutive days (default: 1, up to a year)")
+    ayanamsa: str = Field("lahiri", description="Ayanamsa system (default: lahiri). Options: lahiri, raman, krishnamurti")
+    precision: str = Field("standard", description="Calculation precision (default: standard). Options: standard (transition times refined with Swiss Ephemeris), fast (analytical ephemeris only, within a few minutes)")
+
+class MuhurtaConstraint(BaseModel):
+    """A condition every returned muhurta window must satisfy"""
+    type: str = Field(..., description="Constraint type. Options: weekday, daylight, avoid, tithi, karana, nakshatra, yoga, lagna")
+    values: List[Any] = Field(default_factory=list, description="Accepted names or numbers, any of which satisfies the constraint (e.g. ['Rohini', 'Hasta'] for nakshatra, ['fixed'] for lagna, ['rahu_kaal'] for avoid; none for daylight)")
+
+class MuhurtaRequest(PlaceRangeRequest):
+    """Request model for a muhurta (auspicious time window) search at a place"""
+    start_date: str = Field(..., description="First date searched (supports the same formats as birth_date)")
+    days: int = Field(30, ge=1, le=MAX_MUHURTA_DAYS, description="Number of days searched (default: 30, up to 90)")
+    constraints: List[MuhurtaConstraint] = Field(..., min_length=1, description="Conditions that must all hold")
+    min_duration_minutes: float = Field(0.0, ge=0, description="Shortest window returned, in minutes (default: 0)")
+    limit: int = Field(50, ge=1, le=1000, description="Most windows returned (default: 50)")
+    sort: str = Field("time", description="Order of the windows (default: time). Options: time, duration (longest first)")
+    ayanamsa: str = Field("lahiri", description="Ayanamsa system (default: lahiri). Options: lahiri, raman, krishnamurti")
+    precision: str = Field("standard", description="Precision of the tithi, karana, nakshatra and yoga boundaries (default: standard). Options: standard, fast")
+
+    @validator('sort')
+    def validate_sort(cls, v):
+        """Validate the sort order"""
+        sort = (v or "time").strip().lower()
+        if sort not in ("time", "duration"):
+            raise ValueError("Invalid sort order. Options: time, duration")
+        return sort
+
+class LagnaTableRequest(PlaceRangeRequest):
+    """Request model for the rising sign (lagna) tables of a range of days at a place"""
+    days: int = Field(1, ge=1, le=MAX_LAGNA_DAYS, description="Number of consecutive days (default: 1, up to a year)")
+    ayanamsa: str = Field("lahiri", description="Ayanamsa system (default: lahiri). Options: lahiri, raman, krishnamurti")
+
+SERIES_BODIES = ("Sun", "Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Rahu", "Ketu")
+
+def normalize_instant(v: str, label: str = "time") -> str:
+    """Normalize a date (midnight) or date and time to YYYY-MM-DDTHH:MM:SS"""
+    value = (v or "").strip()
+    day, _, clock = value.replace("T", " ").partition(" ")
+    day = normalize_date(day, label)
+    try:
+        moment = datetime.fromisoformat(f"{day}T{clock.strip() or '00:00:00'}")
+    except ValueError:
+        raise ValueError(f"Invalid {label}: {v}. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
+    if moment.tzinfo is not None:
+        raise ValueError(f"Invalid {label}: {v}. Times are UT, without a UTC offset")
+    return moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+class EphemerisSeriesRequest(BaseModel):
+    """Request model for sampled planetary longitudes over a time range"""
+    start: str = Field(..., description="First sample, UT: a date (YYYY-MM-DD, midnight) or date and time (YYYY-MM-DDTHH:MM:SS)")
+    end: str = Field(..., description="Last sample, UT (same formats as start)")
+    step_days: float = Field(1.0, gt=0, description="Days between samples (default: 1; e.g. 0.25 for six hours)")
+    bodies: List[str] = Field(list(SERIES_BODIES), min_length=1, description="Planets to include (default: all nine)")
+    ayanamsa: str = Field("lahiri", description="Ayanamsa system (default: lahiri). Options: lahiri, raman, krishnamurti")
+    precision: str = Field("standard", description="Ephemeris of the exact nodes the samples are interpolated between (default: standard). Options: standard, file, moshier, fast")
+
+    @validator('start', 'end')
+    def validate_instant(cls, v):
+        """Validate and normalize a sample time"""
+        return normalize_instant(v, "time")
+
+    @validator('bodies')
+    def validate_bodies(cls, v):
+        """Validate the planet names, case-insensitively, and drop duplicates"""
+        names = {name.lower(): name for name in SERIES_BODIES}
+        bodies = []
+        for body in v:
+            name = names.get(str(body).strip().lower())
+            if name is None:
+                raise ValueError(f"Unknown body: {body}. Options: {', '.join(SERIES_BODIES)}")
+            if name not in bodies:
+                bodies.append(name)
+        return bodies
+
+    @validator('precision')
+    def validate_precision(cls, v):
+        """Validate the calculation precision"""
+        precision = (v or "standard").strip().lower()
+        if precision not in ("standard", "file", "moshier", "fast"):
+            raise ValueError("Invalid precision. Options: standard, file, moshier, fast")
+        return precision
+
+    @model_validator(mode='after')
+    def validate_range(self):
+        """Check that the range runs forward within the supported years"""
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+        if int(self.start[:4]) < MIN_YEAR or int(self.end[:4]) > MAX_YEAR:
+            raise ValueError(f"Times must be between {MIN_YEAR} and {MAX_YEAR}")
+        return self
@@ -5,7 +5,7 @@ Designed for consistency and optimal consumption
 All response models should inherit from BaseResponse for consistent structure.
 """
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
 class BaseResponse(BaseModel):
@@ -14,6 +14,7 @@ class BaseResponse(BaseModel):
     version: str = Field("1.0", description="API version")
     generated_at: str = Field(..., description="Timestamp when the response was generated")
     request_params: Dict[str, Any] = Field(..., description="Original request parameters")
+    chart_id: Optional[str] = Field(None, description="ID of the stored chart, usable with the /v1/api/charts endpoints")
     
     class Config:
         json_schema_extra = {
@@ -334,6 +335,18 @@ class TransitInfo(BaseModel):
     house_from_birth_moon: int
     house_from_birth_ascendant: int
 
+class TransitEvent(BaseModel):
+    """A sign ingress or station of a transiting planet"""
+    planet: str = Field(..., description="Planet name")
+    event: str = Field(..., description="ingress (enters a sign), retrograde or direct (stations)")
+    julian_day: float = Field(..., description="Time of the event (Julian day, UT)")
+    time: str = Field(..., description="Time of the event in the chart's timezone (ISO 8601)")
+    longitude: float = Field(..., description="Sidereal longitude at the event (0-360)")
+    sign: str = Field(..., description="Sign entered (ingress) or occupied (station)")
+    sign_id: int = Field(..., description="Sign ID (1-12)")
+    house_from_birth_moon: int = Field(..., description="House of the sign counted from the natal Moon")
+    house_from_birth_ascendant: int = Field(..., description="House of the sign counted from the natal ascendant")
+
 class TransitAspectInfo(BaseModel):
     """Transit aspect information"""
     transit_planet: str
@@ -353,20 +366,176 @@ class SpecialTransitInfo(BaseModel):
     start_date: str
     end_date: str
 
+class PanchangaElement(BaseModel):
+    """A tithi, karana, nakshatra or yoga with its time span"""
+    number: int = Field(..., description="Element number (tithi 1-30, karana 1-60, nakshatra and yoga 1-27)")
+    name: str = Field(..., description="Element name")
+    paksha: Optional[str] = Field(None, description="Shukla or Krishna (tithis only)")
+    starts_at: str = Field(..., description="Start time (local ISO 8601)")
+    ends_at: str = Field(..., description="End time (local ISO 8601)")
+
+class VaraInfo(BaseModel):
+    """Weekday of a panchanga day"""
+    number: int = Field(..., description="Weekday number (1 = Sunday)")
+    name: str = Field(..., description="Sanskrit name of the weekday")
+    lord: str = Field(..., description="Planet ruling the weekday")
+
+class PanchangaDay(BaseModel):
+    """Panchanga of one day, from sunrise to the next sunrise"""
+    date: str = Field(..., description="Local date (YYYY-MM-DD)")
+    vara: VaraInfo = Field(..., description="Weekday")
+    sunrise: Optional[str] = Field(None, description="Sunrise (local ISO 8601); null when the Sun does not rise")
+    sunset: Optional[str] = Field(None, description="Sunset (local ISO 8601); null when the Sun does not set")
+    tithi: List[PanchangaElement] = Field(..., description="Tithis of the day, the one at sunrise first")
+    karana: List[PanchangaElement] = Field(..., description="Karanas of the day, the one at sunrise first")
+    nakshatra: List[PanchangaElement] = Field(..., description="Nakshatras of the Moon during the day, the one at sunrise first")
+    yoga: List[PanchangaElement] = Field(..., description="Yogas of the day, the one at sunrise first")
+
+class MuhurtaElement(BaseModel):
+    """A tithi, nakshatra or lagna in force during a muhurta window"""
+    number: int = Field(..., description="Element number (tithi 1-30, nakshatra 1-27, lagna sign 1-12)")
+    name: str = Field(..., description="Element name")
+    paksha: Optional[str] = Field(None, description="Shukla or Krishna (tithis only)")
+
+class MuhurtaWindow(BaseModel):
+    """A time window satisfying all constraints of a muhurta search"""
+    start: str = Field(..., description="Start time (local ISO 8601)")
+    end: str = Field(..., description="End time (local ISO 8601)")
+    duration_minutes: float = Field(..., description="Length of the window in minutes")
+    vara: VaraInfo = Field(..., description="Weekday (from sunrise) at the middle of the window")
+    tithi: MuhurtaElement = Field(..., description="Tithi at the middle of the window")
+    nakshatra: MuhurtaElement = Field(..., description="Nakshatra of the Moon at the middle of the window")
+    lagna: MuhurtaElement = Field(..., description="Rising sign at the middle of the window")
+
+class LagnaSpan(BaseModel):
+    """A rising sign with its time span"""
+    number: int = Field(..., description="Sign number (1-12)")
+    name: str = Field(..., description="Sanskrit name of the sign")
+    starts_at: str = Field(..., description="Time the sign rises (local ISO 8601)")
+    ends_at: str = Field(..., description="Time the next sign rises (local ISO 8601)")
+    duration_minutes: float = Field(..., description="Time the sign stays on the ascendant, in minutes")
+
+class LagnaDay(BaseModel):
+    """Rising signs of one local day"""
+    date: str = Field(..., description="Local date (YYYY-MM-DD)")
+    lagnas: List[LagnaSpan] = Field(..., description="Signs rising during the day, the one at midnight first")
+
+class FactSegment(BaseModel):
+    """Value of a chart fact over part of the birth-time window"""
+    value: Union[int, str, None] = Field(..., description="Value of the fact (null: no running dasha)")
+    start_offset_minutes: float = Field(..., description="Start, in minutes from the given birth time")
+    end_offset_minutes: float = Field(..., description="End, in minutes from the given birth time")
+
+class ChartFact(BaseModel):
+    """A chart fact and whether it holds over the birth-time window"""
+    fact: str = Field(..., description="Fact name, e.g. ascendant.sign, Moon.nakshatra, Saturn.house, dasha.antardasha")
+    value: Union[int, str, None] = Field(..., description="Value at the given birth time")
+    stable: bool = Field(..., description="Whether the value holds over the whole window")
+    segments: List[FactSegment] = Field(..., description="Values over the window, in time order (empty when stable)")
+
+class BirthTimeStability(BaseModel):
+    """Which chart facts hold over a birth-time uncertainty window"""
+    uncertainty_minutes: float = Field(..., description="Window half-width in minutes")
+    dasha_date: str = Field(..., description="Date the running dasha is evaluated at (YYYY-MM-DD)")
+    stable: bool = Field(..., description="Whether every fact holds over the whole window")
+    unstable_facts: List[str] = Field(..., description="Names of the facts that change within the window")
+    facts: List[ChartFact] = Field(..., description="Ascendant, planet sign/nakshatra/pada/house and running dasha facts")
+
+class SeriesColumns(BaseModel):
+    """Sampled positions of one body, one entry per sample time"""
+    longitude: List[float] = Field(..., description="Sidereal longitudes (0-360)")
+    speed: List[float] = Field(..., description="Speeds in degrees per day (negative when retrograde)")
+    sign: List[int] = Field(..., description="Sign numbers (1-12)")
+    nakshatra: List[int] = Field(..., description="Nakshatra numbers (1-27)")
+
+class BatchChartResult(BaseModel):
+    """Chart of one entry of a batch, or why it could not be calculated"""
+    index: int = Field(..., description="Position of the entry in the batch (from 0)")
+    status: str = Field("success", description="success or error")
+    chart_id: Optional[str] = Field(None, description="ID of the stored chart, usable with the /v1/api/charts endpoints")
+    ascendant: Optional[AscendantInfo] = Field(None, description="Ascendant information")
+    planets: Optional[List[PlanetInfo]] = Field(None, description="List of planetary positions")
+    error_code: Optional[str] = Field(None, description="Error code (when status is error)")
+    error_message: Optional[str] = Field(None, description="Error message (when status is error)")
+
 # All response models for specific endpoints should inherit from BaseResponse
 class PlanetsResponse(BaseResponse):
     """Response model for planets endpoint"""
     planets: List[PlanetInfo] = Field(..., description="List of planetary positions")
+    birth_time_stability: Optional[BirthTimeStability] = Field(None, description="Stability of the chart over the birth time uncertainty (when time_uncertainty_minutes is set)")
 
 class AscendantResponse(BaseResponse):
     """Response model for ascendant endpoint"""
     ascendant: AscendantInfo = Field(..., description="Ascendant information")
+    birth_time_stability: Optional[BirthTimeStability] = Field(None, description="Stability of the chart over the birth time uncertainty (when time_uncertainty_minutes is set)")
 
 class DashaResponse(BaseResponse):
     """Response model for dasha periods endpoint"""
     mahadasha: List[DashaPeriod] = Field(..., description="List of mahadasha periods")
+    antardasha: Optional[List[AntarDashaPeriod]] = Field(None, description="List of antardasha periods (when requested)")
+    pratyantardasha: Optional[List[PratyantarDashaPeriod]] = Field(None, description="List of pratyantardasha periods (when requested)")
 
 class NakshatraResponse(BaseResponse):
     """Response model for nakshatra information endpoint"""
     moon_nakshatra: Dict[str, Any] = Field(..., description="Moon's nakshatra information")
-    nakshatras: List[Dict[str, Any]] = Field(..., description="All planets' nakshatra information") 
\ No newline at end of file
+    nakshatras: List[Dict[str, Any]] = Field(..., description="All planets' nakshatra information") 
+
+class ChartResponse(BaseResponse):
+    """Response model for a stored chart"""
+    ascendant: AscendantInfo = Field(..., description="Ascendant information")
+    planets: List[PlanetInfo] = Field(..., description="List of planetary positions")
+    houses: List[HouseInfo] = Field(..., description="House cusps")
+
+class DivisionalResponse(BaseResponse):
+    """Response model for divisional chart endpoint"""
+    division: str = Field(..., description="Divisional chart name (e.g. D9)")
+    ascendant: AscendantInfo = Field(..., description="Ascendant in the divisional chart")
+    planets: List[PlanetInfo] = Field(..., description="Planetary positions in the divisional chart")
+
+class TransitsResponse(BaseResponse):
+    """Response model for transits endpoint"""
+    transit_date: str = Field(..., description="Transit date (YYYY-MM-DD)")
+    transits: List[TransitInfo] = Field(..., description="Transit positions relative to the natal chart")
+
+class TransitEventsResponse(BaseResponse):
+    """Response model for transit events endpoint"""
+    start_date: str = Field(..., description="First day of the range (YYYY-MM-DD, chart timezone)")
+    end_date: str = Field(..., description="Last day of the range (YYYY-MM-DD, chart timezone)")
+    events: List[TransitEvent] = Field(..., description="Ingresses and stations in time order")
+
+class BatchChartResponse(BaseResponse):
+    """Response model for chart batch endpoint"""
+    count: int = Field(..., description="Number of entries")
+    results: List[BatchChartResult] = Field(..., description="Chart of each entry, in input order")
+
+class JobStatusResponse(BaseResponse):
+    """Response model for batch jobs"""
+    job_id: str = Field(..., description="Job ID")
+    state: str = Field(..., description="queued, running, completed or failed")
+    format: str = Field(..., description="Format of the uploaded records (csv or ndjson)")
+    total: int = Field(..., description="Number of birth records")
+    processed: int = Field(..., description="Records with results so far")
+    failed: int = Field(..., description="Records whose result is an error")
+    progress: float = Field(..., description="Fraction of the records processed")
+    created_at: str = Field(..., description="When the job was submitted")
+    updated_at: str = Field(..., description="When the progress last changed")
+    error: Optional[str] = Field(None, description="Why the job failed (when state is failed)")
+    results: List[str] = Field(..., description="URLs of the result shards written so far, in input order: gzip-compressed NDJSON, one batch result per record")
+
+class PanchangaResponse(BaseResponse):
+    """Response model for panchanga endpoint"""
+    days: List[PanchangaDay] = Field(..., description="Panchanga of each requested day")
+
+class MuhurtaResponse(BaseResponse):
+    """Response model for muhurta search endpoint"""
+    windows: List[MuhurtaWindow] = Field(..., description="Windows satisfying all constraints")
+
+class LagnaTableResponse(BaseResponse):
+    """Response model for lagna table endpoint"""
+    days: List[LagnaDay] = Field(..., description="Rising signs of each requested day")
+
+class EphemerisSeriesResponse(BaseResponse):
+    """Response model for ephemeris series endpoint"""
+    count: int = Field(..., description="Number of samples")
+    julian_day: List[float] = Field(..., description="Sample times (Julian days, UT)")
+    bodies: Dict[str, SeriesColumns] = Field(..., description="Columns of each requested body")
@@ -9,8 +9,15 @@ Routes should follow a consistent pattern:
 from api.routes.ascendant import router as ascendant_router
 from api.routes.planets import router as planets_router
 from api.routes.horoscope import router as horoscope_router
+from api.routes.charts import router as charts_router
+from api.routes.metrics import router as metrics_router
+from api.routes.panchanga import router as panchanga_router
+from api.routes.muhurta import router as muhurta_router
+from api.routes.lagna import router as lagna_router
+from api.routes.ephemeris import router as ephemeris_router
+from api.routes.jobs import router as jobs_router
 
 # Export all routers that should be included in the app
-__all__ = ["ascendant_router", "planets_router", "horoscope_router"]
+__all__ = ["ascendant_router", "planets_router", "horoscope_router", "charts_router", "metrics_router", "panchanga_router", "muhurta_router", "lagna_router", "ephemeris_router", "jobs_router"]
 
 # Add new routers to both the imports above and __all__ list when creating new route modules 
\ No newline at end of file
@@ -1,10 +1,16 @@
 """
 Ascendant calculation endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from api.models.request import HoroscopeRequest
 from api.models.response import AscendantInfo, AscendantResponse
 from api.services import calculation
+from api.services.chart_store import chart_store
+from api.services.worker_pool import calculation_pool
+from api.utils.http_cache import conditional_chart_response
+from api.utils.deadline import DeadlineExceededError
+from api.utils.logging_config import log_event
+from api.utils.content_negotiation import NegotiatedRoute
 from typing import Dict, Any
 from datetime import datetime
 import logging
@@ -12,10 +18,10 @@ import logging
 # Configure logger
 logger = logging.getLogger("jai-api.routes.ascendant")
 
-router = APIRouter(prefix="/v1/api/horoscope", tags=["ascendant"])
+router = APIRouter(prefix="/v1/api/horoscope", tags=["ascendant"], route_class=NegotiatedRoute)
 
 @router.post("/ascendant", response_model=AscendantResponse)
-async def get_ascendant(request: HoroscopeRequest):
+async def get_ascendant(request: HoroscopeRequest, http_request: Request, response: Response):
     """
     Calculate the ascendant (lagna) based on birth details
     
@@ -30,20 +36,58 @@ async def get_ascendant(request: HoroscopeRequest):
     ```
     
     The API will automatically determine the coordinates and timezone from the provided place name.
+    
+    Responses carry an `ETag` derived from the normalized inputs and the
+    `chart_id` of the stored chart. To revalidate, fetch
+    `GET /v1/api/charts/{chart_id}` with the ETag in `If-None-Match`, which
+    answers `304 Not Modified`; this POST endpoint always answers in full.
+    
+    With `time_uncertainty_minutes` (e.g. 30 for +/- 30 minutes) the response also
+    lists which ascendant, planet and running dasha facts hold over the window
+    and the offsets at which the others change (`birth_time_stability`).
     """
+    # Revalidation short-circuit - must happen before any ephemeris work
+    scope, cache_control = request.cache_scope("ascendant")
+    not_modified = conditional_chart_response(http_request, response, scope, request.chart_params(), cache_control)
+    if not_modified is not None:
+        return not_modified
+    
     try:
         # Calculate the ascendant
-        logger.info(f"Calculating ascendant for {request.birth_date} {request.birth_time} in {request.place}")
-        logger.debug(f"Using coordinates: {request.latitude}, {request.longitude}, timezone: {request.timezone_offset}")
+        log_event(logger, "ascendant_request", birth_date=request.birth_date, birth_time=request.birth_time,
+                  place=request.place, latitude=request.latitude, longitude=request.longitude,
+                  timezone_offset=request.timezone_offset)
         
         try:
-            ascendant = calculation.calculate_ascendant(
-                birth_date=request.birth_date,
-                birth_time=request.birth_time,
-                latitude=request.latitude,
-                longitude=request.longitude,
-                timezone_offset=request.timezone_offset,
-                ayanamsa=request.ayanamsa
+            # Compute (or reuse) the full chart so follow-up calls can use the chart_id
+            chart_id, record = await chart_store.get_or_create_async(
+                request.chart_params(),
+                lambda: calculation_pool.calculate_chart(
+                    birth_date=request.birth_date,
+                    birth_time=request.birth_time,
+                    latitude=request.latitude,
+                    longitude=request.longitude,
+                    timezone_offset=request.timezone_offset,
+                    ayanamsa=request.ayanamsa,
+                    precision=request.precision
+                )
+            )
+            ascendant = calculation.ascendant_from_record(record)
+            
+            stability = None
+            if request.time_uncertainty_minutes is not None:
+                # Imported on first use: the analysis needs NumPy
+                from api.services.birth_time import analyze_birth_time
+                stability = analyze_birth_time(record, request.time_uncertainty_minutes, request.dasha_reference_date())
+        except DeadlineExceededError:
+            raise
+        except calculation.EphemerisUnavailableError as e:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error_code": "EPHEMERIS_UNAVAILABLE",
+                    "error_message": f"{str(e)}. Use precision=standard or moshier."
+                }
             )
         except Exception as e:
             logger.error(f"Error in ascendant calculation: {str(e)}", exc_info=True)
@@ -57,7 +101,7 @@ async def get_ascendant(request: HoroscopeRequest):
             )
         
         # Prepare the standardized response
-        response = AscendantResponse(
+        result = AscendantResponse(
             status="success",
             version="1.0",
             generated_at=datetime.utcnow().isoformat(),
@@ -68,12 +112,19 @@ async def get_ascendant(request: HoroscopeRequest):
                 "longitude": request.longitude,
                 "timezone_offset": request.timezone_offset,
                 "ayanamsa": request.ayanamsa,
-                "place": request.place
+                "precision": request.precision,
+                "place": request.place,
+                "time_uncertainty_minutes": request.time_uncertainty_minutes,
+                "dasha_date": request.dasha_date
             },
-            ascendant=ascendant
+            chart_id=chart_id,
+            ascendant=ascendant,
+            birth_time_stability=stability
         )
         
-        return response
+        return result
+    except (DeadlineExceededError, HTTPException):
+        raise
     except Exception as e:
         # Log the error
         logger.error(f"Error calculating ascendant: {str(e)}", exc_info=True)
@@ -0,0 +1,380 @@
+"""
+Stored chart endpoints
+
+Chart endpoints such as /v1/api/horoscope/planets return a `chart_id`. Follow-up
+questions about the same chart can use these endpoints, which derive their
+answers from the stored chart record instead of geocoding and recomputing.
+"""
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from api.models.request import SERIES_BODIES, BatchChartRequest
+from api.models.response import (
+    BatchChartResponse,
+    ChartResponse,
+    DashaPeriod,
+    DashaResponse,
+    DivisionalResponse,
+    TransitEventsResponse,
+    TransitsResponse
+)
+from api.services import calculation
+from api.services.chart_store import chart_store
+from api.services.batch import chart_batch
+from api.utils.content_negotiation import (
+    COLUMNAR_MEDIA_TYPE,
+    MODEL_MEDIA_TYPES,
+    NDJSON_MEDIA_TYPE,
+    NegotiatedRoute,
+    negotiate
+)
+from api.utils.error_handling import ErrorCode
+from api.utils.http_cache import conditional_chart_response
+from api.utils.deadline import DeadlineExceededError
+from api.utils.streaming import ndjson_response
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.charts")
+
+router = APIRouter(prefix="/v1/api/charts", tags=["charts"], route_class=NegotiatedRoute)
+
+def _load_chart(chart_id: str) -> Dict[str, Any]:
+    """Fetch a stored chart record or raise a 404"""
+    record = chart_store.get(chart_id)
+    if record is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error_code": ErrorCode.CHART_NOT_FOUND,
+                "error_message": f"Chart {chart_id} not found or expired. Submit the birth details again to get a new chart_id.",
+                "details": {"chart_id": chart_id}
+            }
+        )
+    return record
+
+def _request_params(record: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    """Birth inputs of the stored chart, echoed back as request parameters"""
+    params = {
+        "birth_date": record["birth_date"],
+        "birth_time": record["birth_time"],
+        "latitude": record["latitude"],
+        "longitude": record["longitude"],
+        "timezone_offset": record["timezone_offset"],
+        "ayanamsa": record["ayanamsa"]
+    }
+    params.update({key: value for key, value in extra.items() if value is not None})
+    return params
+
+def _calculation_error(message: str, e: Exception) -> HTTPException:
+    logger.error(f"{message}: {str(e)}")
+    return HTTPException(
+        status_code=422 if isinstance(e, ValueError) else 500,
+        detail={
+            "error_code": ErrorCode.CALCULATION_ERROR,
+            "error_message": f"{message}: {str(e)}"
+        }
+    )
+
+@router.get("/{chart_id}", response_model=ChartResponse)
+async def get_chart(chart_id: str, http_request: Request, response: Response):
+    """
+    Return the ascendant, planets and houses of a stored chart
+    """
+    record = _load_chart(chart_id)
+    not_modified = conditional_chart_response(http_request, response, "chart", record["params"])
+    if not_modified is not None:
+        return not_modified
+
+    return ChartResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params=_request_params(record),
+        chart_id=chart_id,
+        ascendant=calculation.ascendant_from_record(record),
+        planets=calculation.planets_from_record(record),
+        houses=calculation.houses_from_record(record)
+    )
+
+def _dasha_table(periods: List[Tuple[int, DashaPeriod]], headers: Dict[str, str], metadata: Dict[str, Any]) -> Response:
+    """Dasha periods as a columnar container, one row per period, level by level"""
+    # Imported on first use: the container needs NumPy
+    import numpy as np
+    from api.services import columnar
+
+    periods = sorted(periods, key=lambda item: item[0])
+    content = columnar.encode({
+        "level": np.array([level for level, _ in periods], dtype="u1"),
+        "planet": np.array([period.planet for _, period in periods], dtype="U7"),
+        "maha_planet": np.array([getattr(period, "maha_planet", period.planet) for _, period in periods], dtype="U7"),
+        "antar_planet": np.array(
+            [getattr(period, "antar_planet", period.planet) if level >= 2 else "" for level, period in periods],
+            dtype="U7"
+        ),
+        "start_date": np.array([period.start_date for _, period in periods], dtype="datetime64[D]"),
+        "end_date": np.array([period.end_date for _, period in periods], dtype="datetime64[D]"),
+        "years": np.array([period.years for _, period in periods], dtype="<f8"),
+    }, metadata)
+    return Response(content, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+
+def _dasha_records(periods: Iterator[Tuple[int, DashaPeriod]]) -> Iterator[Dict[str, Any]]:
+    """NDJSON records of the dasha tree: the level and fields of each period"""
+    for level, period in periods:
+        yield {"level": level, **period.model_dump()}
+
+@router.get("/{chart_id}/dasha", response_model=DashaResponse)
+async def get_chart_dasha(
+    chart_id: str,
+    http_request: Request,
+    response: Response,
+    levels: int = Query(
+        1, ge=1, le=calculation.MAX_DASHA_LEVEL,
+        description="1 for mahadashas only, 2 to include antardashas, 3 to include pratyantardashas"
+    )
+):
+    """
+    Return the Vimshottari dasha periods of a stored chart
+
+    With `Accept: application/vnd.jai.columnar` the periods are returned as a
+    columnar container with one row per period and the columns `level`
+    (1 mahadasha, 2 antardasha, 3 pratyantardasha), `planet`, `maha_planet`,
+    `antar_planet` (empty for mahadashas), `start_date`, `end_date` and `years`.
+
+    With `Accept: application/x-ndjson` the tree is streamed depth first as it
+    is calculated, one period per line (`level` plus the period fields), each
+    mahadasha followed by its sub-periods.
+    """
+    offered = MODEL_MEDIA_TYPES + (COLUMNAR_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+    media_type = negotiate(http_request, offered)
+    record = _load_chart(chart_id)
+    # Each representation has its own ETag
+    scope = f"dasha:{levels}"
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        scope += ":columnar"
+    elif media_type == NDJSON_MEDIA_TYPE:
+        scope += ":ndjson"
+    not_modified = conditional_chart_response(http_request, response, scope, record["params"])
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        mahadasha = calculation.dasha_periods_from_record(record)
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        raise _calculation_error("Error calculating dasha periods", e)
+
+    headers = {name: response.headers[name] for name in ("ETag", "Cache-Control")}
+    if media_type == NDJSON_MEDIA_TYPE:
+        return ndjson_response(_dasha_records(calculation.iter_dasha_periods(mahadasha, levels)), headers)
+
+    try:
+        periods = list(calculation.iter_dasha_periods(mahadasha, levels))
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        raise _calculation_error("Error calculating dasha periods", e)
+
+    generated_at = datetime.utcnow().isoformat()
+    request_params = _request_params(record, levels=levels)
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        metadata = {"generated_at": generated_at, "request_params": request_params, "chart_id": chart_id}
+        return _dasha_table(periods, headers, metadata)
+
+    by_level = {level: [period for period_level, period in periods if period_level == level] for level in (2, 3)}
+    return DashaResponse(
+        generated_at=generated_at,
+        request_params=request_params,
+        chart_id=chart_id,
+        mahadasha=mahadasha,
+        antardasha=by_level[2] if levels >= 2 else None,
+        pratyantardasha=by_level[3] if levels >= 3 else None
+    )
+
+@router.get("/{chart_id}/divisional/{division}", response_model=DivisionalResponse)
+async def get_chart_divisional(chart_id: str, division: str, http_request: Request, response: Response):
+    """
+    Return a divisional (varga) chart of a stored chart, e.g. D9 (Navamsa)
+    """
+    division = division.upper()
+    record = _load_chart(chart_id)
+    not_modified = conditional_chart_response(http_request, response, f"divisional:{division}", record["params"])
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        ascendant, planets = calculation.divisional_chart_from_record(record, division)
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        raise _calculation_error("Error calculating divisional chart", e)
+
+    return DivisionalResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params=_request_params(record, division=division),
+        chart_id=chart_id,
+        division=division,
+        ascendant=ascendant,
+        planets=planets
+    )
+
+@router.get("/{chart_id}/transits", response_model=TransitsResponse)
+async def get_chart_transits(
+    chart_id: str,
+    date: Optional[str] = Query(None, description="Transit date (YYYY-MM-DD), defaults to today")
+):
+    """
+    Return planetary transits for a date relative to a stored chart
+    """
+    record = _load_chart(chart_id)
+    transit_date = date or datetime.utcnow().strftime("%Y-%m-%d")
+
+    try:
+        datetime.strptime(transit_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error_code": ErrorCode.INVALID_DATE_FORMAT,
+                "error_message": "date must be in YYYY-MM-DD format"
+            }
+        )
+
+    try:
+        transits = calculation.transits_from_record(record, transit_date)
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        raise _calculation_error("Error calculating transits", e)
+
+    return TransitsResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params=_request_params(record, transit_date=transit_date),
+        chart_id=chart_id,
+        transit_date=transit_date,
+        transits=transits
+    )
+
+@router.get("/{chart_id}/transits/events", response_model=TransitEventsResponse)
+async def get_chart_transit_events(
+    chart_id: str,
+    http_request: Request,
+    response: Response,
+    start: str = Query(..., description="First day (YYYY-MM-DD, chart timezone)"),
+    end: str = Query(..., description="Last day (YYYY-MM-DD, chart timezone), up to a century after start"),
+    bodies: Optional[str] = Query(None, description="Comma-separated planets to follow (default: all nine)"),
+    precision: str = Query("standard", description="Ephemeris (default: standard). Options: standard, file, moshier, fast")
+):
+    """
+    Return the sign ingresses and retrograde/direct stations of the transiting
+    planets over a date range, in time order, relative to a stored chart
+
+    Event times are given in the chart's timezone, to the minute. With
+    `Accept: application/x-ndjson` the events are streamed one per line as
+    they are calculated, a year at a time, so decades of events start
+    arriving at once.
+    """
+    media_type = negotiate(http_request, MODEL_MEDIA_TYPES + (NDJSON_MEDIA_TYPE,))
+    # Imported on first use: the engine needs NumPy
+    from api.constants.planets import Planet
+    from api.services.transit_events import transit_events
+
+    record = _load_chart(chart_id)
+    for value in (start, end):
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error_code": ErrorCode.INVALID_DATE_FORMAT,
+                    "error_message": "start and end must be in YYYY-MM-DD format"
+                }
+            )
+    names = {name.lower(): name for name in SERIES_BODIES}
+    planets = []
+    for body in (bodies.split(",") if bodies else SERIES_BODIES):
+        name = names.get(body.strip().lower())
+        if name is None:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error_code": ErrorCode.VALIDATION_ERROR,
+                    "error_message": f"Unknown body: {body}. Options: {', '.join(SERIES_BODIES)}"
+                }
+            )
+        if Planet(name) not in planets:
+            planets.append(Planet(name))
+    precision = precision.strip().lower()
+
+    params = dict(record["params"], start=start, end=end, bodies=[planet.value for planet in planets], precision=precision)
+    scope = "transit_events:ndjson" if media_type == NDJSON_MEDIA_TYPE else "transit_events"
+    not_modified = conditional_chart_response(http_request, response, scope, params)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        events = transit_events(
+            record,
+            calculation.get_julian_day(start, "00:00:00", record["timezone_offset"]),
+            calculation.get_julian_day(end, "00:00:00", record["timezone_offset"]) + 1.0,
+            planets,
+            precision
+        )
+        if media_type == NDJSON_MEDIA_TYPE:
+            headers = {name: response.headers[name] for name in ("ETag", "Cache-Control")}
+            return ndjson_response(events, headers)
+        events = list(events)
+    except DeadlineExceededError:
+        raise
+    except calculation.EphemerisUnavailableError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error_code": "EPHEMERIS_UNAVAILABLE",
+                "error_message": f"{str(e)}. Use precision=standard or moshier."
+            }
+        )
+    except Exception as e:
+        raise _calculation_error("Error calculating transit events", e)
+
+    return TransitEventsResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params=_request_params(record, start=start, end=end, bodies=bodies, precision=precision),
+        chart_id=chart_id,
+        start_date=start,
+        end_date=end,
+        events=events
+    )
+
+@router.post("/batch", response_model=BatchChartResponse)
+async def calculate_chart_batch(request: BatchChartRequest, http_request: Request):
+    """
+    Calculate many charts in one call
+
+    **Request Format**:
+    ```json
+    {
+      "charts": [
+        {"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai, India"},
+        {"birth_date": "1985-06-15", "birth_time": "06:45:00", "place": "Mumbai, India"}
+      ]
+    }
+    ```
+
+    Returns one result per entry, in input order: the `chart_id` (usable with
+    the other chart endpoints), ascendant and planets, or an error code and
+    message for an entry that is invalid or cannot be calculated. With
+    `Accept: application/x-ndjson` the results are streamed one per line as
+    they are ready.
+    """
+    media_type = negotiate(http_request, MODEL_MEDIA_TYPES + (NDJSON_MEDIA_TYPE,))
+    results = chart_batch(request.charts)
+    if media_type == NDJSON_MEDIA_TYPE:
+        return ndjson_response(results)
+
+    return BatchChartResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params={"charts": len(request.charts)},
+        count=len(request.charts),
+        results=[result async for result in results]
+    )
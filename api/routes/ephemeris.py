@@ -0,0 +1,158 @@
+"""
+Ephemeris series endpoints
+
+Planetary longitudes sampled over a range of times in one call, as columns
+(see api.services.ephemeris_series), instead of one /planets call per sample.
+"""
+from typing import Any, Dict, Iterator, List
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from api.models.request import EphemerisSeriesRequest
+from api.models.response import EphemerisSeriesResponse
+from api.services import calculation
+from api.utils.content_negotiation import (
+    COLUMNAR_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MODEL_MEDIA_TYPES,
+    NegotiatedRoute,
+    negotiate
+)
+from api.utils.error_handling import ErrorCode
+from api.utils.deadline import DeadlineExceededError
+from api.utils.logging_config import log_event
+from datetime import datetime
+import itertools
+import json
+import os
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.ephemeris")
+
+router = APIRouter(prefix="/v1/api/ephemeris", tags=["ephemeris"], route_class=NegotiatedRoute)
+
+# Series with more values than this (samples times bodies) are streamed
+# instead of being built as one response model
+STREAM_THRESHOLD = int(os.environ.get("JAI_SERIES_STREAM_THRESHOLD", "50000"))
+
+# Values per JSON array chunk of a streamed series
+STREAM_CHUNK = 8192
+
+def _json_array(values) -> Iterator[str]:
+    """A NumPy array as JSON text, a chunk at a time"""
+    yield "["
+    for offset in range(0, len(values), STREAM_CHUNK):
+        text = json.dumps(values[offset:offset + STREAM_CHUNK].tolist())[1:-1]
+        yield text if offset == 0 else "," + text
+    yield "]"
+
+def _stream_series(head: Dict[str, Any], times, bodies) -> Iterator[bytes]:
+    """The series response as JSON, computing each body's columns in turn"""
+    yield (json.dumps(head)[:-1] + f', "count": {len(times)}, "julian_day": ').encode()
+    yield from (chunk.encode() for chunk in _json_array(times))
+    yield b', "bodies": {'
+    for index, (planet, columns) in enumerate(bodies):
+        yield (", " if index else "").encode() + json.dumps(planet.value).encode() + b": {"
+        for position, (name, values) in enumerate(columns.items()):
+            yield (", " if position else "").encode() + json.dumps(name).encode() + b": "
+            yield from (chunk.encode() for chunk in _json_array(values))
+        yield b"}"
+    yield b"}}"
+
+def _columnar_series(metadata: Dict[str, Any], times, bodies, streamed: bool) -> Response:
+    """The series as a columnar container: julian_day, then one column per body and field"""
+    # Imported on first use: the container needs NumPy
+    from api.services import columnar
+    from api.services.ephemeris_series import COLUMN_DTYPES
+
+    planets = metadata["request_params"]["bodies"]
+    schema = [("julian_day", times.dtype, len(times))] + [
+        (f"{planet}.{name}", dtype, len(times)) for planet in planets for name, dtype in COLUMN_DTYPES.items()
+    ]
+    arrays = itertools.chain([times], (array for _, body in bodies for array in body.values()))
+    chunks = columnar.encode_stream(schema, arrays, metadata)
+    if streamed:
+        return StreamingResponse(chunks, media_type=COLUMNAR_MEDIA_TYPE)
+    return Response(b"".join(chunks), media_type=COLUMNAR_MEDIA_TYPE)
+
+@router.post("/series", response_model=EphemerisSeriesResponse)
+async def get_ephemeris_series(request: EphemerisSeriesRequest, http_request: Request):
+    """
+    Sample planetary longitudes and speeds over a range of times
+
+    **Request Format**:
+    ```json
+    {
+      "start": "2024-01-01",
+      "end": "2024-12-31",
+      "step_days": 0.25,
+      "bodies": ["Sun", "Moon", "Mercury"],
+      "ayanamsa": "lahiri"
+    }
+    ```
+
+    Returns the sample times (`julian_day`, UT) and, per body, columns of
+    sidereal longitude, speed, sign and nakshatra numbers, one entry per
+    sample. Samples are interpolated between exact ephemeris positions a day
+    or a few apart, to within 0.0005 degrees. Large series are streamed.
+
+    With `Accept: application/vnd.jai.columnar` the series is returned as a
+    columnar container (see api.services.columnar) with the columns
+    `julian_day` and `<body>.<field>`, loadable zero-copy with NumPy.
+    """
+    media_type = negotiate(http_request, MODEL_MEDIA_TYPES + (COLUMNAR_MEDIA_TYPE,))
+    # Imported on first use: the engine needs NumPy
+    from api.constants.planets import Planet
+    from api.services.ephemeris_series import ephemeris_series
+
+    log_event(logger, "ephemeris_series_request", start=request.start, end=request.end,
+              step_days=request.step_days, bodies=request.bodies)
+    try:
+        start, end = (
+            calculation.get_julian_day(*instant.split("T"), 0.0) for instant in (request.start, request.end)
+        )
+        bodies: List[Planet] = [Planet(body) for body in request.bodies]
+        times, columns = ephemeris_series(
+            start, end, request.step_days, bodies, request.ayanamsa, request.precision
+        )
+    except DeadlineExceededError:
+        raise
+    except calculation.EphemerisUnavailableError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error_code": "EPHEMERIS_UNAVAILABLE",
+                "error_message": f"{str(e)}. Use precision=standard or moshier."
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"error_code": ErrorCode.VALIDATION_ERROR, "error_message": str(e)}
+        )
+    except Exception as e:
+        logger.error(f"Error calculating ephemeris series: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"error_code": ErrorCode.CALCULATION_ERROR, "error_message": f"Error calculating ephemeris series: {str(e)}"}
+        )
+
+    head = {
+        "status": "success",
+        "version": "1.0",
+        "generated_at": datetime.utcnow().isoformat(),
+        "request_params": request.model_dump(),
+        "chart_id": None,
+    }
+    times = times.round(6)
+    streamed = len(times) * len(bodies) > STREAM_THRESHOLD
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return _columnar_series(dict(head, count=len(times)), times, columns, streamed)
+    if streamed and media_type == JSON_MEDIA_TYPE:
+        return StreamingResponse(_stream_series(head, times, columns), media_type=JSON_MEDIA_TYPE)
+    return EphemerisSeriesResponse(
+        **head,
+        count=len(times),
+        julian_day=times.tolist(),
+        bodies={planet.value: {name: values.tolist() for name, values in body.items()} for planet, body in columns}
+    )
@@ -1,7 +1,7 @@
 """
 Horoscope calculation endpoints.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
@@ -12,8 +12,12 @@ from api.utils.input_validation import (
     validate_extreme_latitude
 )
 from api.services import calculation
+from api.utils.http_cache import conditional_chart_response, normalize_chart_params
+from api.utils.deadline import DeadlineExceededError
+from api.utils.metrics import Span
+from api.utils.content_negotiation import NegotiatedRoute
 
-router = APIRouter(prefix="/v1/api/horoscope", tags=["horoscope"])
+router = APIRouter(prefix="/v1/api/horoscope", tags=["horoscope"], route_class=NegotiatedRoute)
 
 class HoroscopeRequest(BaseModel):
     """Request model for horoscope calculations."""
@@ -34,7 +38,7 @@ class HoroscopeResponse(BaseModel):
     planets: List[dict]
 
 @router.post("/calculate", response_model=HoroscopeResponse)
-async def calculate_horoscope(request: HoroscopeRequest):
+async def calculate_horoscope(request: HoroscopeRequest, http_request: Request, response: Response):
     """
     Calculate a complete horoscope for the given date, time, and location.
     
@@ -47,6 +51,20 @@ async def calculate_horoscope(request: HoroscopeRequest):
     Raises:
         HTTPException: If calculation fails or input is invalid
     """
+    # Revalidation short-circuit - must happen before any ephemeris work
+    chart_params = normalize_chart_params(
+        birth_date=request.date.strftime("%Y-%m-%d"),
+        birth_time=request.date.strftime("%H:%M:%S"),
+        latitude=request.latitude,
+        longitude=request.longitude,
+        timezone_offset=0,
+        ayanamsa="lahiri",
+        house_system=request.house_system
+    )
+    not_modified = conditional_chart_response(http_request, response, "calculate", chart_params)
+    if not_modified is not None:
+        return not_modified
+    
     try:
         # Validate input using our validation system
         calc_input = CalculationInput(
@@ -61,30 +79,31 @@ async def calculate_horoscope(request: HoroscopeRequest):
         validate_extreme_latitude(request.latitude)
         
         # Use calculation.py functions
-        ascendant = calculation.calculate_ascendant(
-            birth_date=calc_input.date.strftime("%Y-%m-%d"),
-            birth_time=calc_input.date.strftime("%H:%M:%S"),
-            latitude=calc_input.latitude,
-            longitude=calc_input.longitude,
-            timezone_offset=0,  # Adjust as needed
-            ayanamsa="lahiri"  # Adjust as needed
-        )
-        planets = calculation.calculate_planets(
-            birth_date=calc_input.date.strftime("%Y-%m-%d"),
-            birth_time=calc_input.date.strftime("%H:%M:%S"),
-            latitude=calc_input.latitude,
-            longitude=calc_input.longitude,
-            timezone_offset=0,  # Adjust as needed
-            ayanamsa="lahiri"  # Adjust as needed
-        )
-        houses = calculation.calculate_houses(
-            birth_date=calc_input.date.strftime("%Y-%m-%d"),
-            birth_time=calc_input.date.strftime("%H:%M:%S"),
-            latitude=calc_input.latitude,
-            longitude=calc_input.longitude,
-            timezone_offset=0,  # Adjust as needed
-            ayanamsa="lahiri"  # Adjust as needed
-        )
+        with Span("chart_calculation"):
+            ascendant = calculation.calculate_ascendant(
+                birth_date=calc_input.date.strftime("%Y-%m-%d"),
+                birth_time=calc_input.date.strftime("%H:%M:%S"),
+                latitude=calc_input.latitude,
+                longitude=calc_input.longitude,
+                timezone_offset=0,  # Adjust as needed
+                ayanamsa="lahiri"  # Adjust as needed
+            )
+            planets = calculation.calculate_planets(
+                birth_date=calc_input.date.strftime("%Y-%m-%d"),
+                birth_time=calc_input.date.strftime("%H:%M:%S"),
+                latitude=calc_input.latitude,
+                longitude=calc_input.longitude,
+                timezone_offset=0,  # Adjust as needed
+                ayanamsa="lahiri"  # Adjust as needed
+            )
+            houses = calculation.calculate_houses(
+                birth_date=calc_input.date.strftime("%Y-%m-%d"),
+                birth_time=calc_input.date.strftime("%H:%M:%S"),
+                latitude=calc_input.latitude,
+                longitude=calc_input.longitude,
+                timezone_offset=0,  # Adjust as needed
+                ayanamsa="lahiri"  # Adjust as needed
+            )
         # Compose the response
         return HoroscopeResponse(
             ascendant=ascendant.longitude,
@@ -97,6 +116,8 @@ async def calculate_horoscope(request: HoroscopeRequest):
         )
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceededError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Calculation failed: {str(e)}")
 
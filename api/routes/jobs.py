@@ -0,0 +1,163 @@
+"""
+Batch job endpoints
+
+Chart batches too large for one request run as jobs (see api.services.jobs):
+the birth records are uploaded as CSV or NDJSON, and the job is polled for
+its progress and the result shards written so far.
+"""
+from fastapi import APIRouter, HTTPException, Path, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from api.models.response import JobStatusResponse
+from api.services.jobs import MAX_JOB_UPLOAD_BYTES, job_runner
+from api.utils.content_negotiation import NDJSON_MEDIA_TYPE, NegotiatedRoute
+from api.utils.error_handling import ErrorCode
+from typing import Any, Dict
+from datetime import datetime
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.jobs")
+
+router = APIRouter(prefix="/v1/api/jobs", tags=["jobs"], route_class=NegotiatedRoute)
+
+# Upload formats by content type
+UPLOAD_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    NDJSON_MEDIA_TYPE: "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson"
+}
+
+def _job_response(state: Dict[str, Any]) -> JobStatusResponse:
+    """Progress of a job from its saved state"""
+    job_id = state["job_id"]
+    shards = sorted(int(shard) for shard in state["shards"])
+    processed = sum(shard["records"] for shard in state["shards"].values())
+    return JobStatusResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params={"job_id": job_id},
+        job_id=job_id,
+        state=state["status"],
+        format=state["format"],
+        total=state["total"],
+        processed=processed,
+        failed=sum(shard["failed"] for shard in state["shards"].values()),
+        progress=round(processed / state["total"], 4),
+        created_at=state["created_at"],
+        updated_at=state["updated_at"],
+        error=state.get("error"),
+        results=[f"/v1/api/jobs/{job_id}/results/{shard}" for shard in shards]
+    )
+
+def _job_not_found(job_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail={
+            "error_code": ErrorCode.JOB_NOT_FOUND,
+            "error_message": f"Job {job_id} not found or expired",
+            "details": {"job_id": job_id}
+        }
+    )
+
+@router.post("", status_code=202, response_model=JobStatusResponse)
+async def create_job(http_request: Request, response: Response):
+    """
+    Submit a batch of birth records to be calculated in the background
+
+    The request body is the file of records: CSV (`Content-Type: text/csv`)
+    with a header row naming the fields, or NDJSON
+    (`Content-Type: application/x-ndjson`) with one JSON object per line:
+    ```
+    birth_date,birth_time,place,ayanamsa
+    1990-01-01,12:30:00,"Chennai, India",lahiri
+    1985-06-15,06:45:00,"Mumbai, India",
+    ```
+
+    The fields are those of /v1/api/horoscope/planets. Answers 202 with the
+    job status; poll `GET /v1/api/jobs/{job_id}` (the Location header) for
+    the progress and the URLs of the result shards.
+    """
+    content_type = http_request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = UPLOAD_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail={
+                "error_code": ErrorCode.UNSUPPORTED_MEDIA_TYPE,
+                "error_message": f"Upload the records as one of: {', '.join(UPLOAD_FORMATS)}"
+            }
+        )
+
+    job_id, input_path = job_runner.create(fmt)
+    try:
+        size = 0
+        # File I/O runs in the thread pool so a large upload does not block the
+        # event loop
+        f = await run_in_threadpool(open, input_path, "wb")
+        try:
+            async for chunk in http_request.stream():
+                size += len(chunk)
+                if size > MAX_JOB_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail={
+                            "error_code": ErrorCode.VALIDATION_ERROR,
+                            "error_message": f"The upload must not exceed {MAX_JOB_UPLOAD_BYTES // (1024 * 1024)} MB"
+                        }
+                    )
+                await run_in_threadpool(f.write, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+        state = await run_in_threadpool(job_runner.submit, job_id, fmt)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"error_code": ErrorCode.VALIDATION_ERROR, "error_message": str(e)}
+        )
+    except BaseException:
+        job_runner.discard(job_id)
+        raise
+
+    response.status_code = 202
+    response.headers["Location"] = f"/v1/api/jobs/{job_id}"
+    return _job_response(state)
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, response: Response):
+    """
+    Progress of a batch job
+
+    `results` lists the result shards written so far, in input order: each is
+    gzip-compressed NDJSON with one result per record (as returned by
+    /v1/api/charts/batch, with `index` the position of the record in the
+    upload). Shards can be downloaded while the job is still running.
+    """
+    state = await run_in_threadpool(job_runner.status, job_id)
+    if state is None:
+        raise _job_not_found(job_id)
+    response.headers["Cache-Control"] = "no-cache"
+    return _job_response(state)
+
+@router.get("/{job_id}/results/{shard}")
+async def get_job_results(job_id: str, shard: int = Path(..., ge=0)):
+    """
+    Results of one chunk of records of a batch job
+
+    Sent as NDJSON with `Content-Encoding: gzip`, so HTTP clients decompress
+    it transparently; saved as is, it is a `.ndjson.gz` file.
+    """
+    path = job_runner.result_path(job_id, shard)
+    if path is None:
+        if job_runner.status(job_id) is None:
+            raise _job_not_found(job_id)
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error_code": ErrorCode.JOB_NOT_FOUND,
+                "error_message": f"Results {shard} of job {job_id} are not written (yet)",
+                "details": {"job_id": job_id, "shard": shard}
+            }
+        )
+    return FileResponse(path, media_type=NDJSON_MEDIA_TYPE, headers={"Content-Encoding": "gzip"})
@@ -0,0 +1,81 @@
+"""
+Lagna table endpoints
+
+The times each sign rises at a place, for a range of days in one call (see
+api.services.lagna), instead of one ascendant calculation per instant.
+"""
+from fastapi import APIRouter, HTTPException
+from api.models.request import LagnaTableRequest
+from api.models.response import LagnaTableResponse
+from api.utils.error_handling import ErrorCode
+from api.utils.deadline import DeadlineExceededError
+from api.utils.logging_config import log_event
+from api.utils.content_negotiation import NegotiatedRoute
+from datetime import date, datetime
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.lagna")
+
+router = APIRouter(prefix="/v1/api", tags=["lagna"], route_class=NegotiatedRoute)
+
+@router.post("/lagna", response_model=LagnaTableResponse)
+async def get_lagna_table(request: LagnaTableRequest):
+    """
+    Calculate the rising sign (lagna) table of consecutive days at a place
+
+    **Request Format**:
+    ```json
+    {
+      "place": "Chennai, India",
+      "start_date": "2024-01-01",
+      "days": 7,
+      "ayanamsa": "lahiri"
+    }
+    ```
+
+    Each day lists the signs on the ascendant from local midnight to the next,
+    the one at midnight first, with their local rise and set times. Places
+    beyond the polar circles (where some signs never rise) are rejected.
+    """
+    # Imported on first use: the engine needs NumPy
+    from api.services.lagna import lagna_table
+
+    log_event(logger, "lagna_table_request", place=request.place, start_date=request.start_date,
+              days=request.days, latitude=request.latitude, longitude=request.longitude)
+    try:
+        days = lagna_table(
+            date.fromisoformat(request.start_date),
+            request.days,
+            request.latitude,
+            request.longitude,
+            request.timezone_offset,
+            request.ayanamsa
+        )
+    except DeadlineExceededError:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"error_code": ErrorCode.VALIDATION_ERROR, "error_message": str(e)}
+        )
+    except Exception as e:
+        logger.error(f"Error calculating lagna table: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"error_code": ErrorCode.CALCULATION_ERROR, "error_message": f"Error calculating lagna table: {str(e)}"}
+        )
+
+    return LagnaTableResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params={
+            "place": request.place,
+            "start_date": request.start_date,
+            "days": request.days,
+            "latitude": request.latitude,
+            "longitude": request.longitude,
+            "timezone_offset": request.timezone_offset,
+            "ayanamsa": request.ayanamsa
+        },
+        days=days
+    )
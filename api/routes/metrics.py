@@ -0,0 +1,92 @@
+"""
+Metrics endpoint
+
+Serves the request metrics (see api.utils.metrics) in the Prometheus text
+format, together with the state of the caches, the admission lanes and the
+calculation worker pool read at scrape time. When JAI_ADMIN_TOKEN is set, the
+scraper must send it (X-JAI-Admin-Token, or as a bearer token).
+"""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from api.utils.error_handling import ErrorCode
+from api.utils.metrics import CONTENT_TYPE, registry
+from api.utils.profiling import ADMIN_TOKEN
+import hmac
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.metrics")
+
+router = APIRouter(prefix="/v1/api", tags=["monitoring"])
+
+LRU_CACHE_SIZE = registry.gauge(
+    "jai_lru_cache_entries", "Entries in the in-process lookup caches", ("cache",)
+)
+LRU_CACHE_LOOKUPS = registry.counter(
+    "jai_lru_cache_lookups_total", "Lookups in the in-process lookup caches", ("cache", "result")
+)
+LANE_ACTIVE = registry.gauge(
+    "jai_admission_active_requests", "Requests holding a slot in an admission lane", ("lane",)
+)
+LANE_QUEUED = registry.gauge(
+    "jai_admission_queued_requests", "Requests waiting for a slot in an admission lane", ("lane",)
+)
+LANE_WAIT = registry.gauge(
+    "jai_admission_average_wait_seconds", "Moving average of the queue wait in an admission lane", ("lane",)
+)
+LANE_EVENTS = registry.counter(
+    "jai_admission_requests_total", "Requests admitted or shed by an admission lane", ("lane", "result")
+)
+POOL_WORKERS = registry.gauge(
+    "jai_calculation_workers", "Running calculation worker processes"
+)
+POOL_BATCHES = registry.counter(
+    "jai_calculation_batches_total", "Batches dispatched to the calculation workers"
+)
+
+def _collect_lru_caches() -> None:
+    # The geocode and timezone lookups are memoized in front of the file caches
+    from api.models.request import geocode_place, get_timezone
+    for name, function in (("geocode", geocode_place), ("timezone", get_timezone)):
+        info = function.cache_info()
+        LRU_CACHE_SIZE.set(info.currsize, name)
+        LRU_CACHE_LOOKUPS.set(info.hits, name, "hit")
+        LRU_CACHE_LOOKUPS.set(info.misses, name, "miss")
+
+def _collect_admission() -> None:
+    from api.utils.admission import admission_controller
+    for name, lane in admission_controller.lanes.items():
+        LANE_ACTIVE.set(lane.active, name)
+        LANE_QUEUED.set(lane.queued, name)
+        LANE_WAIT.set(lane.average_wait, name)
+        LANE_EVENTS.set(lane.admitted, name, "admitted")
+        LANE_EVENTS.set(lane.shed, name, "shed")
+
+def _collect_calculation_pool() -> None:
+    from api.services.worker_pool import calculation_pool
+    POOL_WORKERS.set(calculation_pool.workers if calculation_pool.enabled else 0)
+    POOL_BATCHES.set(calculation_pool.batches_dispatched)
+
+registry.register_collector(_collect_lru_caches)
+registry.register_collector(_collect_admission)
+registry.register_collector(_collect_calculation_pool)
+
+def _authorized(http_request: Request) -> bool:
+    """Whether the scraper sent the admin token (always, when none is configured)"""
+    if not ADMIN_TOKEN:
+        return True
+    token = http_request.headers.get("x-jai-admin-token", "")
+    scheme, _, credentials = http_request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer":
+        token = token or credentials.strip()
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(http_request: Request):
+    """Request metrics in the Prometheus text exposition format"""
+    if not _authorized(http_request):
+        raise HTTPException(
+            status_code=401,
+            detail={"error_code": ErrorCode.UNAUTHORIZED, "error_message": "Send the admin token to read the metrics"}
+        )
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,100 @@
+"""
+Muhurta endpoints
+
+Searches a date range at a place for the time windows satisfying declarative
+constraints (nakshatra, tithi, lagna, weekday, Rahu Kaal, ...) by intersecting
+the intervals of each constraint (see api.services.muhurta) instead of
+sampling charts minute by minute.
+"""
+from fastapi import APIRouter, HTTPException
+from api.models.request import MuhurtaRequest
+from api.models.response import MuhurtaResponse
+from api.utils.error_handling import ErrorCode
+from api.utils.deadline import DeadlineExceededError
+from api.utils.logging_config import log_event
+from api.utils.content_negotiation import NegotiatedRoute
+from datetime import date, datetime
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.muhurta")
+
+router = APIRouter(prefix="/v1/api", tags=["muhurta"], route_class=NegotiatedRoute)
+
+@router.post("/muhurta", response_model=MuhurtaResponse)
+async def search_muhurta(request: MuhurtaRequest):
+    """
+    Find the time windows satisfying all constraints
+
+    **Request Format**:
+    ```json
+    {
+      "place": "Chennai, India",
+      "start_date": "2024-01-01",
+      "days": 30,
+      "constraints": [
+        {"type": "nakshatra", "values": ["Rohini", "Hasta"]},
+        {"type": "avoid", "values": ["rahu_kaal"]},
+        {"type": "lagna", "values": ["fixed"]},
+        {"type": "daylight"}
+      ],
+      "min_duration_minutes": 30
+    }
+    ```
+
+    Constraint types: weekday, daylight, avoid (rahu_kaal, yamaganda,
+    gulika_kaal), tithi, karana, nakshatra, yoga and lagna (sign names or
+    numbers, or the qualities movable, fixed and dual). All constraints must
+    hold; any of the values of one constraint satisfies it.
+    """
+    # Imported on first use: the engine needs NumPy
+    from api.services import muhurta
+
+    log_event(logger, "muhurta_request", place=request.place, start_date=request.start_date,
+              days=request.days, constraints=len(request.constraints))
+    try:
+        windows = muhurta.search_muhurta(
+            date.fromisoformat(request.start_date),
+            request.days,
+            request.latitude,
+            request.longitude,
+            request.timezone_offset,
+            [(constraint.type, constraint.values) for constraint in request.constraints],
+            min_duration_minutes=request.min_duration_minutes,
+            limit=request.limit,
+            sort=request.sort,
+            ayanamsa=request.ayanamsa,
+            precision=request.precision
+        )
+    except DeadlineExceededError:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"error_code": ErrorCode.VALIDATION_ERROR, "error_message": str(e)}
+        )
+    except Exception as e:
+        logger.error(f"Error searching muhurta: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"error_code": ErrorCode.CALCULATION_ERROR, "error_message": f"Error searching muhurta: {str(e)}"}
+        )
+
+    return MuhurtaResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params={
+            "place": request.place,
+            "start_date": request.start_date,
+            "days": request.days,
+            "constraints": [constraint.model_dump() for constraint in request.constraints],
+            "min_duration_minutes": request.min_duration_minutes,
+            "limit": request.limit,
+            "sort": request.sort,
+            "latitude": request.latitude,
+            "longitude": request.longitude,
+            "timezone_offset": request.timezone_offset,
+            "ayanamsa": request.ayanamsa,
+            "precision": request.precision
+        },
+        windows=windows
+    )
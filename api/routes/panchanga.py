@@ -0,0 +1,84 @@
+"""
+Panchanga endpoints
+
+The daily panchanga (tithi, karana, nakshatra, yoga, vara, sunrise/sunset) of
+a place for a range of days, computed in one call (see api.services.panchanga)
+instead of one chart per day.
+"""
+from fastapi import APIRouter, HTTPException
+from api.models.request import PanchangaRequest
+from api.models.response import PanchangaResponse
+from api.utils.error_handling import ErrorCode
+from api.utils.deadline import DeadlineExceededError
+from api.utils.logging_config import log_event
+from api.utils.content_negotiation import NegotiatedRoute
+from datetime import date, datetime
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.routes.panchanga")
+
+router = APIRouter(prefix="/v1/api", tags=["panchanga"], route_class=NegotiatedRoute)
+
+@router.post("/panchanga", response_model=PanchangaResponse)
+async def get_panchanga(request: PanchangaRequest):
+    """
+    Calculate the panchanga of consecutive days at a place
+
+    **Request Format**:
+    ```json
+    {
+      "place": "Chennai, India",
+      "start_date": "2024-01-01",
+      "days": 30,
+      "ayanamsa": "lahiri"
+    }
+    ```
+
+    Each day runs from sunrise to the next sunrise and lists the elements in
+    force during it with their local start and end times, the one at sunrise
+    first. A whole month or year is computed in one call.
+    """
+    # Imported on first use: the engine needs NumPy
+    from api.services.panchanga import generate_panchanga
+
+    log_event(logger, "panchanga_request", place=request.place, start_date=request.start_date,
+              days=request.days, latitude=request.latitude, longitude=request.longitude)
+    try:
+        days = generate_panchanga(
+            date.fromisoformat(request.start_date),
+            request.days,
+            request.latitude,
+            request.longitude,
+            request.timezone_offset,
+            request.ayanamsa,
+            request.precision
+        )
+    except DeadlineExceededError:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"error_code": ErrorCode.VALIDATION_ERROR, "error_message": str(e)}
+        )
+    except Exception as e:
+        logger.error(f"Error calculating panchanga: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={"error_code": ErrorCode.CALCULATION_ERROR, "error_message": f"Error calculating panchanga: {str(e)}"}
+        )
+
+    return PanchangaResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params={
+            "place": request.place,
+            "start_date": request.start_date,
+            "days": request.days,
+            "latitude": request.latitude,
+            "longitude": request.longitude,
+            "timezone_offset": request.timezone_offset,
+            "ayanamsa": request.ayanamsa,
+            "precision": request.precision
+        },
+        days=days
+    )
@@ -1,21 +1,27 @@
 """
 Planetary positions calculation endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from api.models.request import HoroscopeRequest
 from api.models.response import PlanetInfo, PlanetsResponse
 from api.services import calculation
+from api.services.chart_store import chart_store
+from api.services.chart_auditor import chart_auditor
+from api.services.worker_pool import calculation_pool
+from api.utils.http_cache import conditional_chart_response
+from api.utils.deadline import DeadlineExceededError
+from api.utils.content_negotiation import NegotiatedRoute
 from typing import Dict, List, Any
 from datetime import datetime
 
-router = APIRouter(prefix="/v1/api/horoscope", tags=["planets"])
+router = APIRouter(prefix="/v1/api/horoscope", tags=["planets"], route_class=NegotiatedRoute)
 
 @router.post("/planets", response_model=PlanetsResponse)
-async def get_planets(request: HoroscopeRequest):
+async def get_planets(request: HoroscopeRequest, http_request: Request, response: Response):
     """
     Calculate planetary positions based on birth details
     
-    **PREFERRED METHOD**: Provide only the `place` field
+    **Request Format**:
     ```json
     {
       "birth_date": "1990-01-01",
@@ -25,57 +31,53 @@ async def get_planets(request: HoroscopeRequest):
     }
     ```
     
-    **ALTERNATIVE METHOD**: Provide all location fields manually
-    ```json
-    {
-      "birth_date": "1990-01-01",
-      "birth_time": "12:30:00",
-      "latitude": 13.0827,
-      "longitude": 80.2707,
-      "timezone_offset": 5.5,
-      "ayanamsa": "lahiri"
-    }
-    ```
+    The coordinates and timezone are always determined from the place name;
+    `latitude`, `longitude` and `timezone_offset` in the request are ignored.
+    
+    Responses carry an `ETag` derived from the normalized inputs and the
+    `chart_id` of the stored chart. To revalidate, fetch
+    `GET /v1/api/charts/{chart_id}` with the ETag in `If-None-Match`, which
+    answers `304 Not Modified`; this POST endpoint always answers in full.
     
-    The place-based input method is strongly recommended as it simplifies the API usage
-    and ensures consistent coordinate and timezone determination.
+    With `time_uncertainty_minutes` (e.g. 30 for +/- 30 minutes) the response also
+    lists which ascendant, planet and running dasha facts hold over the window
+    and the offsets at which the others change (`birth_time_stability`).
     """
+    # Revalidation short-circuit - must happen before any ephemeris work
+    scope, cache_control = request.cache_scope("planets")
+    not_modified = conditional_chart_response(http_request, response, scope, request.chart_params(), cache_control)
+    if not_modified is not None:
+        return not_modified
+    
     try:
-        # Calculate the ascendant
-        ascendant = calculation.calculate_ascendant(
-            birth_date=request.birth_date,
-            birth_time=request.birth_time,
-            latitude=request.latitude,
-            longitude=request.longitude,
-            timezone_offset=request.timezone_offset,
-            ayanamsa=request.ayanamsa
+        # Compute (or reuse) the full chart so follow-up calls can use the chart_id
+        chart_id, record = await chart_store.get_or_create_async(
+            request.chart_params(),
+            lambda: calculation_pool.calculate_chart(
+                birth_date=request.birth_date,
+                birth_time=request.birth_time,
+                latitude=request.latitude,
+                longitude=request.longitude,
+                timezone_offset=request.timezone_offset,
+                ayanamsa=request.ayanamsa,
+                precision=request.precision
+            )
         )
         
-        # Calculate the planetary positions
-        planets = calculation.calculate_planets(
-            birth_date=request.birth_date,
-            birth_time=request.birth_time,
-            latitude=request.latitude,
-            longitude=request.longitude,
-            timezone_offset=request.timezone_offset,
-            ayanamsa=request.ayanamsa
-        )
+        # Derive the planetary positions from the chart
+        planets = calculation.planets_from_record(record)
         
-        # Calculate houses
-        houses = calculation.calculate_houses(
-            birth_date=request.birth_date,
-            birth_time=request.birth_time,
-            latitude=request.latitude,
-            longitude=request.longitude,
-            timezone_offset=request.timezone_offset,
-            ayanamsa=request.ayanamsa
-        )
+        stability = None
+        if request.time_uncertainty_minutes is not None:
+            # Imported on first use: the analysis needs NumPy
+            from api.services.birth_time import analyze_birth_time
+            stability = analyze_birth_time(record, request.time_uncertainty_minutes, request.dasha_reference_date())
         
-        # Validate D1 chart calculations for consistency
-        calculation.validate_d1_chart(ascendant, planets, houses)
+        # Check a sample of charts for consistency in the background
+        chart_auditor.submit(chart_id, record)
         
         # Prepare the response with standardized format
-        response = PlanetsResponse(
+        result = PlanetsResponse(
             status="success",
             version="1.0",
             generated_at=datetime.utcnow().isoformat(),
@@ -86,12 +88,27 @@ async def get_planets(request: HoroscopeRequest):
                 "longitude": request.longitude,
                 "timezone_offset": request.timezone_offset,
                 "ayanamsa": request.ayanamsa,
-                "place": request.place
+                "precision": request.precision,
+                "place": request.place,
+                "time_uncertainty_minutes": request.time_uncertainty_minutes,
+                "dasha_date": request.dasha_date
             },
-            planets=planets
+            chart_id=chart_id,
+            planets=planets,
+            birth_time_stability=stability
         )
         
-        return response
+        return result
+    except DeadlineExceededError:
+        raise
+    except calculation.EphemerisUnavailableError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error_code": "EPHEMERIS_UNAVAILABLE",
+                "error_message": f"{str(e)}. Use precision=standard or moshier."
+            }
+        )
     except Exception as e:
         # Log the error
         import logging
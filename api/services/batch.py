@@ -0,0 +1,129 @@
+"""
+Chart batches
+
+Many charts in one call. Entries are validated (geocoded) and calculated as
+the results are consumed, at most BATCH_CONCURRENCY at a time so the worker
+pool can micro-batch them, and yielded in input order. An entry that cannot
+be validated or calculated yields an error result instead of failing the
+batch. Nothing but the charts in flight is held in memory, so the results
+can be streamed as they are ready (see api.utils.streaming). Batch jobs
+(api.services.jobs) build their results with the same helpers.
+"""
+from typing import Any, AsyncIterator, Deque, Dict, Sequence, Union
+from collections import deque
+import asyncio
+import os
+import logging
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from api.models.request import HoroscopeRequest
+from api.models.response import BatchChartResult
+from api.services import calculation
+from api.services.chart_store import chart_store
+from api.services.worker_pool import calculation_pool
+from api.utils.deadline import DeadlineExceededError
+from api.utils.error_handling import ErrorCode
+
+# Configure logger
+logger = logging.getLogger("jai-api.batch")
+
+# Charts of a batch validated and calculated at the same time
+BATCH_CONCURRENCY = int(os.environ.get("JAI_BATCH_CONCURRENCY", "16"))
+
+def error_result(index: int, error_code: str, error_message: str) -> BatchChartResult:
+    """Result of an entry that could not be validated or calculated"""
+    return BatchChartResult(index=index, status="error", error_code=error_code, error_message=error_message)
+
+def calculation_error(index: int, e: Exception) -> BatchChartResult:
+    """Result of an entry whose calculation failed"""
+    if isinstance(e, calculation.EphemerisUnavailableError):
+        return error_result(index, "EPHEMERIS_UNAVAILABLE", str(e))
+    logger.error(f"Error calculating batch entry {index}: {str(e)}")
+    return error_result(index, ErrorCode.CALCULATION_ERROR, str(e))
+
+def chart_result(index: int, chart_id: str, record: Dict[str, Any]) -> BatchChartResult:
+    """Result of a calculated entry"""
+    return BatchChartResult(
+        index=index,
+        chart_id=chart_id,
+        ascendant=calculation.ascendant_from_record(record),
+        planets=calculation.planets_from_record(record)
+    )
+
+def validate_entry(index: int, entry: Dict[str, Any]) -> Union[HoroscopeRequest, BatchChartResult]:
+    """
+    Validate (and geocode) one entry: birth details as for /v1/api/horoscope/planets
+
+    Returns:
+        The request, or the error result of an invalid entry
+
+    Raises:
+        DeadlineExceededError: If the request is overdue or abandoned
+    """
+    try:
+        return HoroscopeRequest.model_validate(entry)
+    except ValidationError as e:
+        return error_result(index, ErrorCode.VALIDATION_ERROR, "; ".join(error["msg"] for error in e.errors()))
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        return error_result(index, ErrorCode.VALIDATION_ERROR, str(e))
+
+async def batch_chart(index: int, entry: Dict[str, Any]) -> BatchChartResult:
+    """
+    Validate and calculate one entry
+
+    Raises:
+        DeadlineExceededError: If the request is overdue or abandoned
+    """
+    # Validation geocodes the place, which may call a geocoding service
+    request = await run_in_threadpool(validate_entry, index, entry)
+    if isinstance(request, BatchChartResult):
+        return request
+
+    try:
+        chart_id, record = await chart_store.get_or_create_async(
+            request.chart_params(),
+            lambda: calculation_pool.calculate_chart(
+                birth_date=request.birth_date,
+                birth_time=request.birth_time,
+                latitude=request.latitude,
+                longitude=request.longitude,
+                timezone_offset=request.timezone_offset,
+                ayanamsa=request.ayanamsa,
+                precision=request.precision
+            )
+        )
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        return calculation_error(index, e)
+
+    return chart_result(index, chart_id, record)
+
+async def chart_batch(
+    entries: Sequence[Dict[str, Any]],
+    concurrency: int = BATCH_CONCURRENCY
+) -> AsyncIterator[BatchChartResult]:
+    """
+    Results of a batch in input order
+
+    Args:
+        entries: Birth details of each chart
+        concurrency: Entries processed at the same time
+
+    Raises:
+        DeadlineExceededError: If the request is overdue or abandoned
+    """
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        for index, entry in enumerate(entries):
+            pending.append(asyncio.ensure_future(batch_chart(index, entry)))
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # The consumer stopped early (e.g. the client disconnected)
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,260 @@
+"""
+Birth-time uncertainty analysis
+
+When the birth time is only known to within a window (e.g. +/- 30 minutes),
+some chart facts hold over the whole window and others flip at a boundary.
+This module finds, for a chart record, every fact that changes inside the
+window and the offsets at which it does, from the crossing times of the
+boundaries rather than from charts sampled across the window:
+
+- planets: over a few hours every planet moves at its recorded speed, so the
+  time it crosses a pada boundary (3°20', which also bounds nakshatras and
+  signs) is solved directly from its longitude and speed
+- ascendant: bracketed on a grid shorter than any pada rises in, then refined
+  by Newton iterations on the analytical ascendant (fast_ephemeris), offset
+  to agree with the record's ascendant at the birth time
+- houses (Whole Sign): change with the sign of the planet or the ascendant
+- running dasha: the time elapsed in the Vimshottari cycle at the reference
+  date is linear in the birth time between Moon nakshatra changes, so each
+  mahadasha and antardasha boundary crossing is solved directly
+
+All of it costs one vectorized ascendant evaluation and some arithmetic, with
+no ephemeris calls, so it can run on every chart request.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date
+from functools import lru_cache
+import bisect
+import logging
+import numpy as np
+from api.constants.nakshatras import NAKSHATRA_NAMES
+from api.constants.planets import Planet
+from api.constants.zodiac import SIGN_NAMES, Sign
+from api.services import fast_ephemeris
+from api.services.calculation import (
+    DASHA_YEARS,
+    NAKSHATRA_LORD_ORDER,
+    PLANETS,
+    VIMSHOTTARI_TOTAL_YEARS
+)
+
+# Configure logging
+logger = logging.getLogger("jai-api.birth_time")
+
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = NAKSHATRA_SPAN / 4
+PADA_COUNT = 108
+
+# Ascendant bracketing step (days, about 43 seconds): shorter than a pada
+# takes to rise below the polar circles
+ASCENDANT_STEP = 0.0005
+
+DAYS_PER_YEAR = 365.25
+
+# A step function of time: change times (sorted) and the values before the
+# first change, between changes and after the last one
+Steps = Tuple[np.ndarray, List[Any]]
+
+def _wrap(degrees: np.ndarray) -> np.ndarray:
+    return np.mod(degrees + 180.0, 360.0) - 180.0
+
+def _pada(longitude: float) -> int:
+    """Pada (0-107) of a sidereal longitude"""
+    return int(np.floor(longitude / PADA_SPAN)) % PADA_COUNT
+
+def _planet_padas(longitude: float, speed: float, birth: float, start: float, end: float) -> Steps:
+    """Padas of a planet moving at a constant speed (degrees per day)"""
+    first, last = longitude + speed * (start - birth), longitude + speed * (end - birth)
+    low, high = min(first, last), max(first, last)
+    boundaries = PADA_SPAN * np.arange(np.floor(low / PADA_SPAN) + 1, np.ceil(high / PADA_SPAN))
+    if speed < 0:
+        boundaries = boundaries[::-1]
+    times = birth + (boundaries - longitude) / speed if len(boundaries) else np.empty(0)
+    return times, [_pada(first)] + [
+        _pada(boundary + 1e-9 * np.sign(speed)) for boundary in boundaries
+    ]
+
+def _ascendant_padas(record: Dict[str, Any], start: float, end: float, iterations: int = 3) -> Steps:
+    """Padas of the ascendant between two Julian days (UT)"""
+    latitude, longitude, ayanamsa = record["latitude"], record["longitude"], record["ayanamsa"]
+    birth = record["julian_day"]
+    samples = np.append(np.arange(start, end, ASCENDANT_STEP), [end, birth])
+    values = fast_ephemeris.ascendant(samples, latitude, longitude, ayanamsa)
+    # Align the analytical ascendant with the recorded one
+    offset = float(_wrap(record["ascendant"] - values[-1]))
+    samples, values = samples[:-1], np.mod(values[:-1] + offset, 360.0)
+
+    padas = np.floor(values / PADA_SPAN).astype(int) % PADA_COUNT
+    change = np.nonzero(padas[1:] != padas[:-1])[0]
+    targets = padas[change + 1] * PADA_SPAN
+    times = (samples[change] + samples[change + 1]) / 2
+    step = 1e-5
+    for _ in range(iterations):
+        value, before, after = fast_ephemeris.ascendant(
+            np.stack([times, times - step, times + step]), latitude, longitude, ayanamsa
+        )
+        rate = _wrap(after - before) / (2 * step)
+        times = times - _wrap(value + offset - targets) / rate
+    times = np.clip(times, samples[change], samples[change + 1])
+    return times, [int(padas[0])] + padas[change + 1].tolist()
+
+def _combine(function: Callable[..., Any], *steps: Steps) -> Steps:
+    """Step function of a function of step functions"""
+    times = np.unique(np.concatenate([change_times for change_times, _ in steps]))
+    lists = [(change_times.tolist(), step_values) for change_times, step_values in steps]
+    values = [
+        function(*[step_values[bisect.bisect_right(change_times, point)] for change_times, step_values in lists])
+        for point in [-np.inf] + times.tolist()
+    ]
+    return times, values
+
+def _segments(steps: Steps, birth: float, start: float, end: float) -> List[Dict[str, Any]]:
+    """Runs of equal values as offsets from the birth time (minutes)"""
+    times, values = steps
+    edges = [start] + times.tolist() + [end]
+    segments: List[Dict[str, Any]] = []
+    for index, value in enumerate(values):
+        if segments and segments[-1]["value"] == value:
+            segments[-1]["end_offset_minutes"] = round((edges[index + 1] - birth) * 1440.0, 1)
+            continue
+        segments.append({
+            "value": value,
+            "start_offset_minutes": round((edges[index] - birth) * 1440.0, 1),
+            "end_offset_minutes": round((edges[index + 1] - birth) * 1440.0, 1),
+        })
+    return segments
+
+@lru_cache(maxsize=9)
+def _cycle_boundaries(lord_index: int) -> Tuple[np.ndarray, List[Tuple[str, str]]]:
+    """
+    Antardasha boundaries (years from the start of the first mahadasha) of the
+    120-year Vimshottari cycle starting with a lord, and the (mahadasha,
+    antardasha) lords of the periods between them
+    """
+    boundaries, periods, elapsed = [0.0], [], 0.0
+    for maha_offset in range(9):
+        maha = NAKSHATRA_LORD_ORDER[(lord_index + maha_offset) % 9]
+        maha_years = DASHA_YEARS[Planet(maha)]
+        for antar_offset in range(9):
+            antar = NAKSHATRA_LORD_ORDER[(lord_index + maha_offset + antar_offset) % 9]
+            elapsed += maha_years * DASHA_YEARS[Planet(antar)] / VIMSHOTTARI_TOTAL_YEARS
+            boundaries.append(elapsed)
+            periods.append((maha, antar))
+    return np.array(boundaries), periods
+
+def _dasha_periods(
+    moon: Dict[str, float],
+    birth: float,
+    start: float,
+    end: float,
+    nakshatra_changes: List[float],
+    reference: float
+) -> Steps:
+    """
+    Running (mahadasha, antardasha) lords at the reference Julian day as a
+    step function of the birth time; None before birth or after the cycle
+    """
+    times: List[float] = []
+    values: List[Any] = []
+    edges = [start] + nakshatra_changes + [end]
+    for low, high in zip(edges, edges[1:]):
+        # Each Moon nakshatra starts the cycle with its own lord
+        nakshatra = int(np.floor((moon["longitude"] + moon["speed"] * ((low + high) / 2 - birth)) / NAKSHATRA_SPAN)) % 27
+        first_years = DASHA_YEARS[Planet(NAKSHATRA_LORD_ORDER[nakshatra % 9])]
+        boundaries, periods = _cycle_boundaries(nakshatra % 9)
+
+        # Years elapsed in the cycle at the reference date, for birth time t:
+        # the reference is (reference - t) after birth, and the cycle started
+        # the traversed fraction of the nakshatra times first_years before it
+        def elapsed(t: float, nakshatra: int = nakshatra, first_years: float = first_years) -> float:
+            moon_longitude = np.mod(moon["longitude"] + moon["speed"] * (t - birth), 360.0)
+            progress = (moon_longitude - nakshatra * NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+            return (reference - t) / DAYS_PER_YEAR + progress * first_years
+
+        rate = moon["speed"] / NAKSHATRA_SPAN * first_years - 1.0 / DAYS_PER_YEAR
+        at_low, at_high = elapsed(low), elapsed(high)
+        crossed = boundaries[(boundaries > min(at_low, at_high)) & (boundaries < max(at_low, at_high))]
+        cuts = sorted([low, high] + (low + (crossed - at_low) / rate).tolist()
+                      + ([reference] if low < reference < high else []))
+        for first, last in zip(cuts, cuts[1:]):
+            middle = (first + last) / 2
+            years = elapsed(middle)
+            times.append(first)
+            if middle > reference or years >= boundaries[-1]:
+                values.append(None)
+            else:
+                values.append(periods[int(np.searchsorted(boundaries, years, side="right")) - 1])
+    return np.array(times[1:]), values
+
+def _pada_facts(prefix: str, padas: Steps) -> Dict[str, Steps]:
+    times, values = padas
+    return {
+        f"{prefix}.sign": (times, [SIGN_NAMES[Sign(pada // 9 + 1)] for pada in values]),
+        f"{prefix}.nakshatra": (times, [NAKSHATRA_NAMES[pada // 4] for pada in values]),
+        f"{prefix}.pada": (times, [pada % 4 + 1 for pada in values]),
+    }
+
+def analyze_birth_time(
+    record: Dict[str, Any],
+    uncertainty_minutes: float,
+    reference_date: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Stability of the chart facts over a birth-time window
+
+    Args:
+        record: Chart record (see calculation.calculate_chart_record)
+        uncertainty_minutes: Half-width of the window around the birth time
+        reference_date: Date the running dasha is evaluated at (default: today)
+
+    Returns:
+        Dictionary with the window, whether every fact is stable, the names of
+        the facts that change and, per fact, its value at the birth time and
+        (when it changes) the runs of values with their start and end offsets
+        from the birth time in minutes
+    """
+    reference_date = reference_date or date.today()
+    birth = record["julian_day"]
+    window = uncertainty_minutes / 1440.0
+    start, end = birth - window, birth + window
+
+    ascendant = _ascendant_padas(record, start, end)
+    facts = _pada_facts("ascendant", ascendant)
+    for planet in PLANETS:
+        position = record["planets"][planet.value]
+        padas = _planet_padas(position["longitude"], position["speed"], birth, start, end)
+        facts.update(_pada_facts(planet.value, padas))
+        facts[f"{planet.value}.house"] = _combine(
+            lambda planet_pada, ascendant_pada: (planet_pada // 9 - ascendant_pada // 9) % 12 + 1,
+            padas, ascendant
+        )
+        if planet == Planet.MOON:
+            nakshatra_changes = [
+                float(t) for t, before, after in zip(padas[0], padas[1], padas[1][1:]) if before // 4 != after // 4
+            ]
+
+    # Julian day of noon on the reference date (UT)
+    reference = reference_date.toordinal() + 1721425.0
+    periods = _dasha_periods(record["planets"][Planet.MOON.value], birth, start, end, nakshatra_changes, reference)
+    facts["dasha.mahadasha"] = (periods[0], [period[0] if period else None for period in periods[1]])
+    facts["dasha.antardasha"] = (periods[0], [period[1] if period else None for period in periods[1]])
+
+    result = []
+    for name, steps in facts.items():
+        segments = _segments(steps, birth, start, end)
+        times, values = steps
+        value = values[int(np.searchsorted(times, birth, side="right"))]
+        result.append({
+            "fact": name,
+            "value": value,
+            "stable": len(segments) == 1,
+            "segments": segments if len(segments) > 1 else [],
+        })
+    unstable = [fact["fact"] for fact in result if not fact["stable"]]
+    return {
+        "uncertainty_minutes": uncertainty_minutes,
+        "dasha_date": reference_date.isoformat(),
+        "stable": not unstable,
+        "unstable_facts": unstable,
+        "facts": result,
+    }
@@ -0,0 +1,419 @@
+"""
+Offline bulk chart calculation (the jai-batch command)
+
+Computes charts, dashas and vargas of a file of birth records without going
+through HTTP, for data-science use:
+
+    jai-batch births.csv --output charts/
+    python -m api.services.bulk_charts births.parquet --output charts/ --vargas D9,D10
+
+The records (CSV with a header row, NDJSON or Parquet) have the fields of
+/v1/api/horoscope/planets. Places are resolved in the main process through
+the geocoding and timezone caches and services of the API (so a run warms
+the caches the API uses); the records are then calculated a chunk at a time
+by a pool of worker processes, one per core by default, each warmed up like
+the calculation workers (see worker_pool).
+
+Every chunk is written by its worker as columnar files (see columnar, or
+Parquet with --output-format parquet):
+
+    charts-00000.jcol   one row per record: inputs, ascendant and the sign,
+                        house, nakshatra and speed of every graha, varga signs
+    dashas-00000.jcol   one row per dasha period of the chunk's charts
+    jai-batch.json      the settings of the run
+
+A chunk's charts file is written last and atomically, so it marks the chunk
+as done: running the same command again skips the finished chunks and
+resumes with the first missing one. Throughput is reported in charts per
+second.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from itertools import count, islice
+from pathlib import Path
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import logging
+from api.constants.planets import Planet
+from api.models.response import BatchChartResult
+from api.services.batch import calculation_error, validate_entry
+from api.services.chart_store import make_chart_id
+from api.services.jobs import read_records
+from api.services.worker_pool import CHART_TASK_FIELDS, ChartTask, init_worker
+from api.utils.logging_config import configure_logging
+
+# Configure logging
+logger = logging.getLogger("jai-api.bulk_charts")
+
+# Defaults of the command line options
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_DASHA_LEVELS = 1
+
+# Input formats by file suffix
+INPUT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet", ".pq": "parquet"}
+
+# Output formats and their file suffix
+OUTPUT_FORMATS = {"jcol": ".jcol", "parquet": ".parquet"}
+
+# Settings a resumed run must share with the run that wrote the chunks
+MANIFEST = "jai-batch.json"
+RESUME_SETTINGS = ("chunk_size", "vargas", "dasha_levels", "output_format", "ayanamsa", "precision")
+
+# Record of a chunk: (index, chart ID, chart parameters in CHART_TASK_FIELDS
+# order or None, error code, error message)
+BulkRecord = Tuple[int, Optional[str], Optional[ChartTask], Optional[str], Optional[str]]
+
+# Nakshatras span 13°20', padas a quarter of that
+NAKSHATRA_SIZE = 360.0 / 27
+
+def read_parquet(path: Path, batch_size: int = 10000) -> Iterator[Dict[str, Any]]:
+    """
+    Birth records of a Parquet file (needs pyarrow)
+
+    Missing values are left out, so those fields get their defaults; date and
+    time columns become ISO strings.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Reading Parquet files needs pyarrow (pip install -e '.[batch]')")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            record = {name: value.isoformat() if hasattr(value, "isoformat") else value
+                      for name, value in row.items() if value is not None and value != ""}
+            if record:
+                yield record
+
+def input_records(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Birth records of an input file in one of the INPUT_FORMATS"""
+    if fmt == "parquet":
+        return read_parquet(path)
+    return read_records(path, fmt)
+
+def prepare_chunk(first: int, entries: List[Dict[str, Any]]) -> List[BulkRecord]:
+    """Validate (and geocode) the records of a chunk in this process"""
+    chunk = []
+    for offset, entry in enumerate(entries):
+        request = validate_entry(first + offset, entry)
+        if isinstance(request, BatchChartResult):
+            chunk.append((first + offset, None, None, request.error_code, request.error_message))
+            continue
+        task = tuple(getattr(request, field) for field in CHART_TASK_FIELDS)
+        chunk.append((first + offset, make_chart_id(request.chart_params()), task, None, None))
+    return chunk
+
+def varga_signs(longitudes, division: str):
+    """
+    Signs (1-12) of D1 longitudes in a divisional chart, vectorized
+
+    Matches calculation.divisional_longitude for every longitude.
+    """
+    import numpy as np
+    from constants.divisional_mappings import DIVISIONAL_MAPPINGS
+
+    mapping = DIVISIONAL_MAPPINGS[division]
+    parts = len(mapping[1])
+    table = np.array([[mapping[sign][part] for part in range(1, parts + 1)] for sign in range(1, 13)], dtype="u1")
+    sign = np.floor(longitudes / 30.0).astype(int) % 12
+    part = np.minimum(np.floor((longitudes % 30.0) / (30.0 / parts)).astype(int), parts - 1)
+    return table[sign, part]
+
+def _chart_columns(records: List[BulkRecord], charts: List[Optional[Dict[str, Any]]],
+                   errors: List[Optional[Tuple[str, str]]], vargas: Sequence[str]) -> Dict[str, Any]:
+    """Columns of the charts table of a chunk"""
+    import numpy as np
+
+    calculated = np.array([chart is not None for chart in charts], dtype=bool)
+    nan = float("nan")
+
+    def column(values, dtype):
+        return np.array(values, dtype=dtype)
+
+    def chart_value(key, default):
+        return [chart[key] if chart is not None else default for chart in charts]
+
+    columns = {
+        "index": column([record[0] for record in records], "<i8"),
+        "chart_id": column([record[1] or "" for record in records], "U32"),
+        "error_code": column([error[0] if error else "" for error in errors], "U"),
+        "error_message": column([error[1] if error else "" for error in errors], "U"),
+        "birth_date": column(chart_value("birth_date", "NaT"), "datetime64[D]"),
+        "birth_time": column(chart_value("birth_time", ""), "U8"),
+        "latitude": column(chart_value("latitude", nan), "<f8"),
+        "longitude": column(chart_value("longitude", nan), "<f8"),
+        "timezone_offset": column(chart_value("timezone_offset", nan), "<f8"),
+        "ayanamsa": column(chart_value("ayanamsa", ""), "U"),
+        "julian_day": column(chart_value("julian_day", nan), "<f8"),
+    }
+
+    # Longitudes of the ascendant and the grahas; rows without a chart are
+    # zero and masked out of the derived columns
+    bodies = {"ascendant": column([chart["ascendant"] if chart else 0.0 for chart in charts], "<f8")}
+    speeds = {}
+    for planet in Planet:
+        bodies[planet.value] = column([chart["planets"][planet.value]["longitude"] if chart else 0.0 for chart in charts], "<f8")
+        speeds[planet.value] = column([chart["planets"][planet.value]["speed"] if chart else 0.0 for chart in charts], "<f8")
+
+    def masked(values):
+        return np.where(calculated, values, 0).astype("u1")
+
+    asc_sign = np.floor(bodies["ascendant"] / 30.0).astype(int) % 12
+    for name, longitudes in bodies.items():
+        sign = np.floor(longitudes / 30.0).astype(int) % 12
+        columns[f"{name}.longitude"] = np.where(calculated, longitudes, nan)
+        columns[f"{name}.sign"] = masked(sign + 1)
+        if name != "ascendant":
+            columns[f"{name}.house"] = masked((sign - asc_sign) % 12 + 1)
+            columns[f"{name}.speed"] = np.where(calculated, speeds[name], nan)
+            columns[f"{name}.retrograde"] = calculated & (speeds[name] < 0)
+        columns[f"{name}.nakshatra"] = masked(np.floor(longitudes / NAKSHATRA_SIZE).astype(int) % 27 + 1)
+        columns[f"{name}.pada"] = masked(np.floor((longitudes % NAKSHATRA_SIZE) / (NAKSHATRA_SIZE / 4)).astype(int) + 1)
+
+    for division in vargas:
+        for name, longitudes in bodies.items():
+            columns[f"{division}.{name}.sign"] = masked(varga_signs(longitudes, division))
+    return columns
+
+def _dasha_columns(records: List[BulkRecord], charts: List[Optional[Dict[str, Any]]], levels: int) -> Dict[str, Any]:
+    """Columns of the dasha table of a chunk: one row per period, depth first per chart"""
+    import numpy as np
+    from api.services import calculation
+
+    rows = []
+    for record, chart in zip(records, charts):
+        if chart is None:
+            continue
+        for level, period in calculation.iter_dasha_periods(calculation.dasha_periods_from_record(chart), levels):
+            rows.append((
+                record[0],
+                level,
+                period.planet,
+                getattr(period, "maha_planet", period.planet),
+                getattr(period, "antar_planet", period.planet) if level >= 2 else "",
+                period.start_date,
+                period.end_date,
+                period.years
+            ))
+    fields = (("index", "<i8"), ("level", "u1"), ("planet", "U7"), ("maha_planet", "U7"), ("antar_planet", "U7"),
+              ("start_date", "datetime64[D]"), ("end_date", "datetime64[D]"), ("years", "<f8"))
+    return {name: np.array([row[position] for row in rows], dtype=dtype) for position, (name, dtype) in enumerate(fields)}
+
+def _write_table(path: Path, columns: Dict[str, Any], output_format: str, metadata: Dict[str, Any]) -> None:
+    """Write a table atomically"""
+    temp_file = path.with_name(path.name + ".tmp")
+    if output_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({name: pa.array(values) for name, values in columns.items()})
+        pq.write_table(table.replace_schema_metadata({"jai": json.dumps(metadata)}), temp_file)
+    else:
+        from api.services import columnar
+        with open(temp_file, "wb") as f:
+            for data in columnar.encode_stream(columnar.schema_of(columns), columns.values(), metadata):
+                f.write(data)
+    temp_file.replace(path)
+
+def calculate_chunk(output: str, shard: int, records: List[BulkRecord], settings: Dict[str, Any]) -> Tuple[int, int, int]:
+    """
+    Calculate the records of a chunk and write its tables (in a worker process)
+
+    Returns:
+        Tuple of (shard, charts calculated, records with errors)
+    """
+    from api.services import calculation
+    from api.services.chart_record import ChartRecord, decode, encode
+
+    charts: List[Optional[Dict[str, Any]]] = []
+    errors: List[Optional[Tuple[str, str]]] = []
+    for index, _, task, error_code, error_message in records:
+        if task is None:
+            charts.append(None)
+            errors.append((error_code, error_message))
+            continue
+        try:
+            # The stored form, so values match those the API serves
+            chart = decode(encode(ChartRecord.from_dict(calculation.calculate_chart_record(*task)))).to_dict()
+        except Exception as e:
+            result = calculation_error(index, e)
+            charts.append(None)
+            errors.append((result.error_code, result.error_message))
+            continue
+        charts.append(chart)
+        errors.append(None)
+
+    suffix = OUTPUT_FORMATS[settings["output_format"]]
+    metadata = {"shard": shard, "first_index": records[0][0], "records": len(records)}
+    directory = Path(output)
+    if settings["dasha_levels"]:
+        _write_table(directory / f"dashas-{shard:05d}{suffix}",
+                     _dasha_columns(records, charts, settings["dasha_levels"]), settings["output_format"], metadata)
+    # Written last: its presence marks the chunk as done
+    _write_table(directory / f"charts-{shard:05d}{suffix}",
+                 _chart_columns(records, charts, errors, settings["vargas"]), settings["output_format"], metadata)
+    calculated = sum(chart is not None for chart in charts)
+    return shard, calculated, len(records) - calculated
+
+class _InlineExecutor:
+    """Runs the chunks in this process (--workers 0)"""
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        pass
+
+def _check_manifest(output: Path, settings: Dict[str, Any], source: Path) -> None:
+    """Record the settings of the run, or check them against those of the chunks already written"""
+    path = output / MANIFEST
+    if path.exists():
+        with open(path, "r") as f:
+            previous = json.load(f)
+        different = [name for name in RESUME_SETTINGS if previous.get(name) != settings[name]]
+        if different:
+            raise ValueError(f"{output} holds chunks written with other settings ({', '.join(different)}); "
+                             f"use another output directory")
+        return
+    output.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(dict(settings, input=str(source)), f, indent=2)
+
+def run(
+    source: Path,
+    output: Path,
+    fmt: str,
+    settings: Dict[str, Any],
+    workers: int,
+    progress=None
+) -> Dict[str, Any]:
+    """
+    Calculate the records of an input file into an output directory
+
+    Args:
+        source: Input file
+        output: Output directory (created if needed)
+        fmt: Input format (csv, ndjson or parquet)
+        settings: chunk_size, vargas, dasha_levels, output_format and the
+            default ayanamsa and precision of records without one
+        workers: Worker processes (0 calculates in this process)
+        progress: Called with the summary so far after every chunk
+
+    Returns:
+        Summary: records, charts calculated, errors, chunks written and
+        skipped (already done), seconds and charts per second
+
+    Raises:
+        ValueError: For a malformed input or settings differing from those of
+            the chunks already in the output directory
+    """
+    _check_manifest(output, settings, source)
+    suffix = OUTPUT_FORMATS[settings["output_format"]]
+    chunk_size = settings["chunk_size"]
+    defaults = {"ayanamsa": settings["ayanamsa"], "precision": settings["precision"]}
+
+    summary = {"records": 0, "charts": 0, "errors": 0, "chunks": 0, "skipped_chunks": 0,
+               "seconds": 0.0, "charts_per_second": 0.0}
+    started = time.monotonic()
+
+    def finish(future: Future) -> None:
+        _, calculated, failed = future.result()
+        summary["charts"] += calculated
+        summary["errors"] += failed
+        summary["chunks"] += 1
+        summary["seconds"] = round(time.monotonic() - started, 3)
+        summary["charts_per_second"] = round(summary["charts"] / summary["seconds"], 1) if summary["seconds"] else 0.0
+        if progress is not None:
+            progress(summary)
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker) if workers > 0 else _InlineExecutor()
+    in_flight: "deque[Future]" = deque()
+    try:
+        records = input_records(source, fmt)
+        for shard in count():
+            entries = list(islice(records, chunk_size))
+            if not entries:
+                break
+            summary["records"] += len(entries)
+            if (output / f"charts-{shard:05d}{suffix}").exists():
+                summary["skipped_chunks"] += 1
+                continue
+            chunk = prepare_chunk(shard * chunk_size, [{**defaults, **entry} for entry in entries])
+            in_flight.append(executor.submit(calculate_chunk, str(output), shard, chunk, settings))
+            # Validate the next chunk while every worker is busy
+            while len(in_flight) > max(1, workers):
+                finish(in_flight.popleft())
+        while in_flight:
+            finish(in_flight.popleft())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    summary["seconds"] = round(time.monotonic() - started, 3)
+    summary["charts_per_second"] = round(summary["charts"] / summary["seconds"], 1) if summary["seconds"] else 0.0
+    return summary
+
+def main(argv=None) -> int:
+    from constants.divisional_mappings import DIVISIONAL_MAPPINGS
+
+    parser = argparse.ArgumentParser(
+        prog="jai-batch", description="Calculate charts, dashas and vargas of a file of birth records"
+    )
+    parser.add_argument("input", help="Birth records: CSV (header row), NDJSON or Parquet")
+    parser.add_argument("--output", "-o", required=True, help="Directory receiving the chunk files")
+    parser.add_argument("--format", choices=sorted(set(INPUT_FORMATS.values())),
+                        help="Input format (default: from the file suffix)")
+    parser.add_argument("--output-format", choices=sorted(OUTPUT_FORMATS), default="jcol",
+                        help="jcol (columnar container, see api/services/columnar.py) or parquet (needs pyarrow)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per core; 0 calculates in this process)")
+    parser.add_argument("--vargas", default=",".join(division for division in DIVISIONAL_MAPPINGS if division != "D1"),
+                        help="Comma-separated divisional charts, or 'none' (default: all)")
+    parser.add_argument("--dasha-levels", type=int, choices=range(0, 4), default=DEFAULT_DASHA_LEVELS,
+                        help="0 for no dasha table, 1 for mahadashas, 2 with antardashas, 3 with pratyantardashas")
+    parser.add_argument("--ayanamsa", default="lahiri", help="Ayanamsa of records without one")
+    parser.add_argument("--precision", default="standard", help="Precision of records without one")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    source = Path(args.input)
+    fmt = args.format or INPUT_FORMATS.get(source.suffix.lower())
+    if fmt is None:
+        parser.error(f"Cannot tell the format of {source}; use --format")
+    if "parquet" in (fmt, args.output_format) and importlib.util.find_spec("pyarrow") is None:
+        parser.error("Parquet input and output need pyarrow (pip install -e '.[batch]')")
+    vargas = [] if args.vargas.strip().lower() == "none" else [v.strip().upper() for v in args.vargas.split(",") if v.strip()]
+    unknown = [division for division in vargas if division not in DIVISIONAL_MAPPINGS]
+    if unknown:
+        parser.error(f"Unsupported vargas: {', '.join(unknown)}. Options: {', '.join(DIVISIONAL_MAPPINGS)}")
+    settings = {
+        "chunk_size": max(1, args.chunk_size),
+        "vargas": vargas,
+        "dasha_levels": args.dasha_levels,
+        "output_format": args.output_format,
+        "ayanamsa": args.ayanamsa,
+        "precision": args.precision
+    }
+
+    def report(summary: Dict[str, Any]) -> None:
+        print(f"{summary['chunks']} chunks, {summary['charts']} charts ({summary['errors']} errors) "
+              f"in {summary['seconds']:.1f} s: {summary['charts_per_second']:.0f} charts/s", file=sys.stderr)
+
+    try:
+        summary = run(source, Path(args.output), fmt, settings, max(0, args.workers), progress=report)
+    except (OSError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    print(f"{summary['records']} records: {summary['charts']} charts, {summary['errors']} errors, "
+          f"{summary['chunks']} chunks written, {summary['skipped_chunks']} already done")
+    print(f"{summary['seconds']:.1f} s, {summary['charts_per_second']:.0f} charts/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,38 +12,74 @@ from api.models.response import (
     HouseInfo, 
     AspectInfo, 
     DashaPeriod,
+    AntarDashaPeriod,
+    PratyantarDashaPeriod,
     YogaInfo,
     TransitInfo,
     TransitAspectInfo,
     SpecialTransitInfo
 )
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Tuple
 from datetime import datetime, timedelta
 import math
 import os
 import logging
+import threading
 from pathlib import Path
 from api.constants.zodiac import Sign, SIGN_NAMES
 from api.constants.planets import Planet, PLANET_NAMES
 from api.constants.nakshatras import NAKSHATRA_NAMES
-import requests
+from constants.divisional_mappings import DIVISIONAL_MAPPINGS
+from api.services import ephemeris_files
+from api.services.ephemeris_files import file_names as ephemeris_file_names
+from api.services.chart_record import FLAG_MOCK_EPHEMERIS, FLAG_MOSHIER_EPHEMERIS
+from api.utils.deadline import DeadlineExceededError, check_deadline
+from api.utils.metrics import registry, swe_call
+from api.utils.logging_config import diagnostics_enabled, log_event
 
 # Configure logging
 logger = logging.getLogger("jai-api.calculation")
 
-# Try to import pyswisseph, fall back to mock if not available
+# Ephemeris backend: "auto" (Swiss Ephemeris if installed, else the mock),
+# "swisseph" or "mock". Benchmarks use it to compare both backends.
+EPHEMERIS_BACKEND = os.environ.get("JAI_EPHEMERIS_BACKEND", "auto").lower()
+
+# Calculation precision modes:
+# - "file": Swiss Ephemeris data files (sepl_*/semo_*.se1), most accurate
+# - "moshier": the built-in Moshier ephemeris (no files, ~1 arcsecond)
+# - "fast": the analytical NumPy ephemeris (fast_ephemeris; sign/nakshatra accuracy)
+# - "standard" (default): file mode where the files cover the date, Moshier otherwise
+PRECISION_STANDARD = "standard"
+PRECISION_FILE = "file"
+PRECISION_MOSHIER = "moshier"
+PRECISION_FAST = "fast"
+PRECISION_MODES = (PRECISION_STANDARD, PRECISION_FILE, PRECISION_MOSHIER, PRECISION_FAST)
+
+EPHEMERIS_FALLBACKS = registry.counter(
+    "jai_ephemeris_fallbacks_total",
+    "Standard precision charts calculated with Moshier because no ephemeris file covers the date"
+)
+
+class EphemerisUnavailableError(ValueError):
+    """Raised when file precision is requested for a date without ephemeris files"""
+
+# Try to import pyswisseph (installed as the `swisseph` module), fall back to mock if not available
 try:
-    import pyswisseph as swe
+    if EPHEMERIS_BACKEND == "mock":
+        raise ImportError("mock ephemeris backend requested")
+    import swisseph as swe
     USING_MOCK = False
     logger.info("Using real Swiss Ephemeris library in calculation.py")
 except ImportError:
+    if EPHEMERIS_BACKEND == "swisseph":
+        raise
     logger.warning("Swiss Ephemeris library not found, using mock implementation in calculation.py")
     from api.services.mock_swisseph import (
         # Constants
         SUN, MOON, MERCURY, VENUS, MARS, JUPITER, SATURN, MEAN_NODE,
         SIDM_LAHIRI, SIDM_RAMAN, SIDM_KRISHNAMURTI,
         # Functions
-        julday, calc_ut, set_sid_mode, houses_ex
+        julday, calc_ut, set_sid_mode, houses_ex, get_ayanamsa_ut
     )
     
     # Create namespace for swe to avoid changing the rest of the code
@@ -78,6 +114,10 @@ except ImportError:
         @staticmethod
         def houses_ex(jd, lat, lon, hsys):
             return houses_ex(jd, lat, lon, hsys)
+        
+        @staticmethod
+        def get_ayanamsa(jd):
+            return get_ayanamsa_ut(jd)
     
     # Replace swe with mock
     swe = SwissEph()
@@ -89,9 +129,19 @@ except ImportError:
     
     logger.warning("Swiss Ephemeris mock enabled in calculation.py")
 
+# Ephemeris data directory and files found by initialize_ephemeris (file names)
+EPHEMERIS_DIR = Path(os.environ.get("EPHEMERIS_PATH", "./ephemeris"))
+EPHEMERIS_FILES = frozenset()
+
+def ephemeris_files_cover(julian_day: float) -> bool:
+    """Whether the planet and Moon files for the Julian day are available"""
+    return all(name in EPHEMERIS_FILES for name in ephemeris_file_names(julian_day))
+
 # Initialize Swiss Ephemeris
 def initialize_ephemeris():
     """Initialize Swiss Ephemeris with proper error handling"""
+    global EPHEMERIS_DIR, EPHEMERIS_FILES
+    
     # Get ephemeris path from environment or use default
     ephemeris_path = os.environ.get("EPHEMERIS_PATH", "./ephemeris")
     
@@ -108,28 +158,103 @@ def initialize_ephemeris():
             # Fall back to relative path as last resort
             ephemeris_path = "./ephemeris"
             logger.warning(f"Falling back to {ephemeris_path}")
-            Path(ephemeris_path).mkdir(parents=True, exist_ok=True)
+            path = Path(ephemeris_path)
+            path.mkdir(parents=True, exist_ok=True)
     
+    EPHEMERIS_DIR = ephemeris_files.resolve_directory(path)
+    ephemeris_path = str(EPHEMERIS_DIR)
     logger.info(f"Setting ephemeris path to {ephemeris_path}")
     
-    # Set the ephemeris path if we're not using the mock
+    # Set the ephemeris path if we're not using the mock; reading the files is
+    # left to verify_ephemeris (first chart or the warm-up) to keep startup short
     if not USING_MOCK:
         try:
             swe.set_ephe_path(ephemeris_path)
-            
-            # Verify the ephemeris by attempting to calculate the sun's position
-            test_jd = swe.julday(2000, 1, 1, 0)
-            _ = swe.calc_ut(test_jd, swe.SUN)
-            logger.info("Swiss Ephemeris initialized successfully")
+            _thread_state.ephemeris_path = ephemeris_path
+            EPHEMERIS_FILES = frozenset(f.name for f in Path(ephemeris_path).glob("*.se1"))
         except Exception as e:
-            logger.error(f"Failed to verify Swiss Ephemeris: {str(e)}")
-            logger.warning("Ephemeris data files may be missing. Calculations may be inaccurate.")
+            EPHEMERIS_FILES = frozenset()
+            logger.error(f"Failed to set the Swiss Ephemeris path: {str(e)}")
     else:
         logger.info("Using mock Swiss Ephemeris implementation - initialization skipped")
 
+# Swiss Ephemeris keeps its settings per thread (the path set at import only
+# applies to the importing thread)
+_thread_state = threading.local()
+
+def ensure_ephemeris_path() -> None:
+    """Set the ephemeris path in the calling thread if it has not been set there yet"""
+    if USING_MOCK or getattr(_thread_state, "ephemeris_path", None) == str(EPHEMERIS_DIR):
+        return
+    swe.set_ephe_path(str(EPHEMERIS_DIR))
+    _thread_state.ephemeris_path = str(EPHEMERIS_DIR)
+
+_ephemeris_verified = False
+
+def verify_ephemeris() -> None:
+    """
+    Check once that Swiss Ephemeris can read the data files
+
+    Swiss Ephemeris silently switches to Moshier when it cannot read them, so a
+    position is calculated and the ephemeris it reports is checked; without
+    usable files, EPHEMERIS_FILES is emptied (standard precision then uses
+    Moshier and file precision is unavailable).
+    """
+    global EPHEMERIS_FILES, _ephemeris_verified
+    if _ephemeris_verified or USING_MOCK:
+        return
+    _ephemeris_verified = True
+    try:
+        ensure_ephemeris_path()
+        test_jd = swe.julday(2000, 1, 1, 0)
+        _, used_flags = swe.calc_ut(test_jd, swe.SUN, swe.FLG_SWIEPH)
+        if used_flags & swe.FLG_SWIEPH:
+            logger.info(f"Swiss Ephemeris initialized successfully ({len(EPHEMERIS_FILES)} data files)")
+        else:
+            EPHEMERIS_FILES = frozenset()
+            logger.warning(
+                f"No usable ephemeris files in {EPHEMERIS_DIR}; "
+                "standard precision uses the Moshier ephemeris, file precision is unavailable"
+            )
+    except Exception as e:
+        EPHEMERIS_FILES = frozenset()
+        logger.error(f"Failed to verify Swiss Ephemeris: {str(e)}")
+        logger.warning("Ephemeris data files may be missing. Calculations may be inaccurate.")
+
+def resolve_precision(precision: str, julian_day: float) -> str:
+    """
+    The precision mode a chart is actually calculated with
+
+    Standard precision falls back to Moshier when no ephemeris file covers the
+    date. With the mock backend, file and Moshier modes use the mock.
+
+    Raises:
+        EphemerisUnavailableError: If file precision is requested for an uncovered date
+        ValueError: If the precision is unknown
+    """
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision: {precision}")
+    if precision in (PRECISION_FAST, PRECISION_MOSHIER) or USING_MOCK:
+        return precision
+    verify_ephemeris()
+    if ephemeris_files_cover(julian_day):
+        return PRECISION_FILE
+    if precision == PRECISION_FILE:
+        raise EphemerisUnavailableError(
+            f"No ephemeris files for this date ({', '.join(ephemeris_file_names(julian_day))})"
+        )
+    EPHEMERIS_FALLBACKS.inc()
+    return PRECISION_MOSHIER
+
 # Run initialization
 initialize_ephemeris()
 
+# Ephemeris flags for calc_ut by precision mode (the mock ignores them)
+EPHEMERIS_FLAGS = {
+    PRECISION_FILE: getattr(swe, "FLG_SWIEPH", 2) | getattr(swe, "FLG_SPEED", 256),
+    PRECISION_MOSHIER: getattr(swe, "FLG_MOSEPH", 4) | getattr(swe, "FLG_SPEED", 256),
+}
+
 # Ayanamsa constants
 AYANAMSA_LAHIRI = swe.SIDM_LAHIRI
 AYANAMSA_RAMAN = swe.SIDM_RAMAN
@@ -289,6 +414,51 @@ def get_planet_dignity(planet: str, sign_id: int) -> str:
     else:
         return "Neutral"
 
+def get_ascendant_longitude(julian_day: float, latitude: float, longitude: float) -> float:
+    """
+    Calculate the sidereal ascendant longitude (0-360) for a Julian day and location
+    
+    Note: the ayanamsa must already be set with set_ayanamsa.
+    """
+    # houses_ex returns (cusps, ascmc[, flags]) depending on the library version
+    ascmc = swe_call("houses_ex", swe.houses_ex, julian_day, latitude, longitude, HOUSE_SYSTEM)[1]
+    
+    # Get ascendant longitude (sidereal, with ayanamsa adjustment)
+    asc_longitude = ascmc[0] - swe.get_ayanamsa(julian_day)
+    if asc_longitude < 0:
+        asc_longitude += 360
+    return asc_longitude
+
+def ascendant_from_longitude(asc_longitude: float) -> AscendantInfo:
+    """Build the ascendant information for a sidereal ascendant longitude"""
+    # Get sign information - this returns 0-based sign_id
+    sign_name, sign_id = get_sign_info(asc_longitude)
+    
+    # Get nakshatra information
+    nakshatra_name, nakshatra_id, nakshatra_pada = get_nakshatra_info(asc_longitude)
+    
+    # Calculate degrees, minutes, seconds
+    total_degrees = asc_longitude % 30
+    degrees = int(total_degrees)
+    minutes_float = (total_degrees - degrees) * 60
+    minutes = int(minutes_float)
+    seconds = round((minutes_float - minutes) * 60, 4)
+    
+    log_event(logger, "ascendant", longitude=asc_longitude, sign=sign_name, sign_index=sign_id,
+              nakshatra=nakshatra_name, position=f"{degrees}° {minutes}' {int(seconds)}\"")
+    
+    return AscendantInfo(
+        sign=sign_name,
+        sign_id=sign_id + 1,  # Convert to 1-based for API response
+        degrees=degrees,
+        minutes=minutes,
+        seconds=int(seconds),
+        longitude=round(asc_longitude, 4),
+        nakshatra=nakshatra_name,
+        nakshatra_id=nakshatra_id + 1,  # Convert to 1-based for API response
+        nakshatra_pada=nakshatra_pada
+    )
+
 def calculate_ascendant(
     birth_date: str, 
     birth_time: str, 
@@ -311,59 +481,44 @@ def calculate_ascendant(
         # Set ayanamsa
         set_ayanamsa(ayanamsa)
         
-        # Calculate houses
-        houses_cusps, ascmc, _ = swe.houses_ex(julian_day, latitude, longitude, HOUSE_SYSTEM)
-        
-        # Get ascendant longitude (sidereal, with ayanamsa adjustment)
-        asc_longitude = ascmc[0] - swe.get_ayanamsa(julian_day)
-        if asc_longitude < 0:
-            asc_longitude += 360
-        
-        # Get sign information - this returns 0-based sign_id
-        sign_name, sign_id = get_sign_info(asc_longitude)
-        
-        # Get nakshatra information
-        nakshatra_name, nakshatra_id, nakshatra_pada = get_nakshatra_info(asc_longitude)
-        
-        # Calculate degrees, minutes, seconds
-        total_degrees = asc_longitude % 30
-        degrees = int(total_degrees)
-        minutes_float = (total_degrees - degrees) * 60
-        minutes = int(minutes_float)
-        seconds = round((minutes_float - minutes) * 60, 4)
+        # Calculate houses and derive the ascendant
+        asc_longitude = get_ascendant_longitude(julian_day, latitude, longitude)
         
-        logger.info(f"Ascendant calculation - Longitude: {asc_longitude}, Sign: {sign_name} (ID: {sign_id}, 0-based), "
-                   f"Nakshatra: {nakshatra_name}, Position: {degrees}° {minutes}' {int(seconds)}\"")
-        
-        return AscendantInfo(
-            sign=sign_name,
-            sign_id=sign_id + 1,  # Convert to 1-based for API response
-            degrees=degrees,
-            minutes=minutes,
-            seconds=int(seconds),
-            longitude=round(asc_longitude, 4),
-            nakshatra=nakshatra_name,
-            nakshatra_id=nakshatra_id + 1,  # Convert to 1-based for API response
-            nakshatra_pada=nakshatra_pada
-        )
+        return ascendant_from_longitude(asc_longitude)
     
     except Exception as e:
         logger.error(f"Error calculating ascendant: {str(e)}")
         raise ValueError(f"Failed to calculate ascendant: {str(e)}")
 
-def calculate_planet_position(planet_id: int, julian_day: float) -> Dict[str, Any]:
-    """Calculate planet position using Swiss Ephemeris"""
+def _unwrap_calc_result(result):
+    """Return the position vector from calc_ut, which may be wrapped as (xx, retflag)"""
+    if len(result) == 2 and isinstance(result[0], (list, tuple)):
+        return result[0]
+    return result
+
+def calculate_planet_position(planet_id: int, julian_day: float, flags: int = None) -> Dict[str, Any]:
+    """
+    Calculate planet position using Swiss Ephemeris
+    
+    Args:
+        flags: calc_ut flags selecting the ephemeris (see EPHEMERIS_FLAGS);
+            the library default when not given
+    """
+    # Cooperative cancellation point for every loop over ephemeris positions
+    check_deadline("ephemeris calculation")
+    ensure_ephemeris_path()
+    flag_args = () if flags is None else (flags,)
     try:
         # For Ketu (South Node), calculate based on Rahu (North Node) + 180°
         if planet_id == -1:  # Ketu
-            rahu_result = swe.calc_ut(julian_day, swe.MEAN_NODE)
+            rahu_result = _unwrap_calc_result(swe_call("calc_ut", swe.calc_ut, julian_day, swe.MEAN_NODE, *flag_args))
             # Safe access to tuple elements with defaults
             longitude = (rahu_result[0] + 180) % 360 if len(rahu_result) > 0 else 0
             latitude = -rahu_result[1] if len(rahu_result) > 1 else 0
             distance = rahu_result[2] if len(rahu_result) > 2 else 1.0
             speed = -rahu_result[3] if len(rahu_result) > 3 else 0
         else:
-            result = swe.calc_ut(julian_day, planet_id)
+            result = _unwrap_calc_result(swe_call("calc_ut", swe.calc_ut, julian_day, planet_id, *flag_args))
             # Safe access to tuple elements with defaults
             longitude = result[0] if len(result) > 0 else 0
             latitude = result[1] if len(result) > 1 else 0
@@ -393,6 +548,61 @@ def calculate_planet_position(planet_id: int, julian_day: float) -> Dict[str, An
             "is_retrograde": False
         }
 
+def planet_info_from_position(planet: Planet, position: Dict[str, Any], asc_sign: int) -> PlanetInfo:
+    """
+    Build the planet information for a calculated position
+    
+    Args:
+        planet: Planet enum member
+        position: Position dictionary as returned by calculate_planet_position
+        asc_sign: Ascendant sign (0-based), used for Whole Sign house placement
+    """
+    # Get sign information
+    sign_name, sign_id = get_sign_info(position["longitude"])
+    
+    # Get nakshatra information
+    nakshatra_name, nakshatra_id, nakshatra_pada = get_nakshatra_info(position["longitude"])
+    
+    # Calculate house position using Vedic Whole Sign house system
+    # In Whole Sign houses, the house is determined by counting from the ascendant sign
+    # Sign_id and asc_sign are 0-based, but house is 1-based for the response
+    house = ((sign_id - asc_sign) % 12) + 1
+    
+    log_event(logger, "planet_position", planet=PLANET_NAMES[planet], longitude=position["longitude"],
+              sign=sign_name, sign_index=sign_id, asc_sign_index=asc_sign, house=house)
+    
+    # Calculate degrees, minutes, seconds within sign
+    total_degrees = position["longitude"] % 30
+    degrees = int(total_degrees)
+    minutes_float = (total_degrees - degrees) * 60
+    minutes = int(minutes_float)
+    seconds = round((minutes_float - minutes) * 60, 4)
+    
+    # Determine planet dignity
+    dignity = get_planet_dignity(PLANET_NAMES[planet], sign_id)
+    
+    latitude = position.get("latitude")
+    
+    return PlanetInfo(
+        name=PLANET_NAMES[planet],
+        sanskrit_name=SANSKRIT_NAMES.get(planet, PLANET_NAMES[planet]),
+        longitude=round(position["longitude"], 4),
+        latitude=round(latitude, 4) if latitude is not None else None,
+        sign=sign_name,
+        sign_id=sign_id + 1,  # Convert to 1-based for API response
+        sign_longitude=round(total_degrees, 4),
+        house=house,
+        nakshatra=nakshatra_name,
+        nakshatra_id=nakshatra_id + 1,  # Convert to 1-based for API response
+        nakshatra_pada=nakshatra_pada,
+        is_retrograde=position.get("is_retrograde", position["speed"] < 0),
+        speed=round(position["speed"], 4),
+        degrees=degrees,
+        minutes=minutes,
+        seconds=int(seconds),
+        dignity=dignity
+    )
+
 def calculate_planets(
     birth_date: str, 
     birth_time: str, 
@@ -416,74 +626,59 @@ def calculate_planets(
         set_ayanamsa(ayanamsa)
         
         # Calculate ascendant first
-        houses_cusps, ascmc, _ = swe.houses_ex(julian_day, latitude, longitude, HOUSE_SYSTEM)
-        
-        # Get ascendant longitude with ayanamsa correction
-        asc_longitude = ascmc[0] - swe.get_ayanamsa(julian_day)
-        if asc_longitude < 0:
-            asc_longitude += 360
+        asc_longitude = get_ascendant_longitude(julian_day, latitude, longitude)
             
         # Get ascendant sign (0-11)
         asc_sign = int(asc_longitude / 30)
         
-        logger.info(f"Ascendant longitude: {asc_longitude}, sign: {SIGN_NAMES[list(Sign)[asc_sign]]} (ID: {asc_sign})")
-        
         # Calculate positions for all planets
-        planets_info = []
-        
-        for planet, planet_id in PLANETS.items():
-            # Calculate planet position
-            position = calculate_planet_position(planet_id, julian_day)
-            
-            # Get sign information
-            sign_name, sign_id = get_sign_info(position["longitude"])
-            
-            # Get nakshatra information
-            nakshatra_name, nakshatra_id, nakshatra_pada = get_nakshatra_info(position["longitude"])
-            
-            # Calculate house position using Vedic Whole Sign house system
-            # In Whole Sign houses, the house is determined by counting from the ascendant sign
-            # Sign_id and asc_sign are 0-based, but house is 1-based for the response
-            house = ((sign_id - asc_sign) % 12) + 1
-            
-            logger.info(f"Planet: {PLANET_NAMES[planet]}, Longitude: {position['longitude']}, Sign: {sign_name} (ID: {sign_id}), Asc Sign: {asc_sign}, House: {house}")
-            
-            # Calculate degrees, minutes, seconds within sign
-            total_degrees = position["longitude"] % 30
-            degrees = int(total_degrees)
-            minutes_float = (total_degrees - degrees) * 60
-            minutes = int(minutes_float)
-            seconds = round((minutes_float - minutes) * 60, 4)
-            
-            # Determine planet dignity
-            dignity = get_planet_dignity(PLANET_NAMES[planet], sign_id)
-            
-            planets_info.append(PlanetInfo(
-                name=PLANET_NAMES[planet],
-                sanskrit_name=SANSKRIT_NAMES.get(planet, PLANET_NAMES[planet]),
-                longitude=round(position["longitude"], 4),
-                latitude=round(position.get("latitude", 0.0), 4),
-                sign=sign_name,
-                sign_id=sign_id + 1,  # Convert to 1-based for API response
-                sign_longitude=round(total_degrees, 4),
-                house=house,
-                nakshatra=nakshatra_name,
-                nakshatra_id=nakshatra_id + 1,  # Convert to 1-based for API response
-                nakshatra_pada=nakshatra_pada,
-                is_retrograde=position["is_retrograde"],
-                speed=round(position["speed"], 4),
-                degrees=degrees,
-                minutes=minutes,
-                seconds=int(seconds),
-                dignity=dignity
-            ))
-        
-        return planets_info
+        return [
+            planet_info_from_position(planet, calculate_planet_position(planet_id, julian_day), asc_sign)
+            for planet, planet_id in PLANETS.items()
+        ]
     
+    except DeadlineExceededError:
+        raise
     except Exception as e:
         logger.error(f"Error calculating planetary positions: {str(e)}")
         raise ValueError(f"Failed to calculate planetary positions: {str(e)}")
 
+def houses_from_ascendant(asc_longitude: float) -> List[HouseInfo]:
+    """Build the Whole Sign houses for a sidereal ascendant longitude"""
+    # Get ascendant sign (0-11)
+    asc_sign = int(asc_longitude / 30)
+    
+    log_event(logger, "houses", asc_longitude=asc_longitude, asc_sign_index=asc_sign)
+    
+    houses = []
+    
+    # In Whole Sign houses, each house corresponds to a complete sign
+    # House numbering is 1-based, but sign indices are 0-based
+    for i in range(12):  # Process all 12 houses (0-11 index)
+        # Calculate the sign for this house (0-11)
+        house_sign = (asc_sign + i) % 12
+        
+        # Get the longitude at the beginning of the sign
+        house_longitude = house_sign * 30
+        
+        # Get sign information (0-based)
+        sign_name, sign_id = get_sign_info(house_longitude)
+        
+        # House number is 1-based (i+1)
+        house_number = i + 1
+        
+        houses.append(HouseInfo(
+            house_number=house_number,
+            sign=sign_name,
+            sign_id=sign_id + 1,  # Convert to 1-based for API response
+            degrees=0,  # In Whole Sign, house starts at 0 degrees of the sign
+            minutes=0,
+            seconds=0,
+            longitude=round(house_longitude, 4)
+        ))
+    
+    return houses
+
 def calculate_houses(
     birth_date: str, 
     birth_time: str, 
@@ -501,52 +696,181 @@ def calculate_houses(
         set_ayanamsa(ayanamsa)
         
         # Calculate houses
-        houses_cusps, ascmc, _ = swe.houses_ex(julian_day, latitude, longitude, HOUSE_SYSTEM)
+        asc_longitude = get_ascendant_longitude(julian_day, latitude, longitude)
         
-        # Get ascendant longitude with ayanamsa correction
-        asc_longitude = ascmc[0] - swe.get_ayanamsa(julian_day)
-        if asc_longitude < 0:
-            asc_longitude += 360
+        return houses_from_ascendant(asc_longitude)
+    
+    except Exception as e:
+        logger.error(f"Error calculating house positions: {str(e)}")
+        raise ValueError(f"Failed to calculate house positions: {str(e)}")
+
+# Vimshottari sequence of nakshatra lords, starting from Ashwini
+NAKSHATRA_LORD_ORDER = [
+    "Ketu", "Venus", "Sun", "Moon", "Mars", 
+    "Rahu", "Jupiter", "Saturn", "Mercury"
+]
+
+# Length of the Vimshottari cycle in years
+VIMSHOTTARI_TOTAL_YEARS = 120
+
+def dasha_periods_from_moon(moon_longitude: float, birth_dt: datetime) -> List[DashaPeriod]:
+    """
+    Calculate Vimshottari mahadasha periods from the Moon's sidereal longitude
+    
+    Args:
+        moon_longitude: Sidereal longitude of the Moon at birth (0-360)
+        birth_dt: Local birth date and time
         
-        # Get ascendant sign (0-11)
-        asc_sign = int(asc_longitude / 30)
+    Returns:
+        List of nine mahadasha periods, starting with the balance at birth
+    """
+    # Calculate Moon's nakshatra
+    nakshatra_size = 13 + 1/3  # 13°20'
+    nakshatra_id = int(moon_longitude / nakshatra_size) % 27
+    
+    # Calculate remaining degrees in the nakshatra
+    degrees_in_nakshatra = moon_longitude % nakshatra_size
+    
+    # Determine the lord of the nakshatra
+    nakshatra_ruler_index = nakshatra_id % 9
+    first_dasha_lord = NAKSHATRA_LORD_ORDER[nakshatra_ruler_index]
+    
+    # Calculate balance of first dasha
+    total_years = DASHA_YEARS[Planet(first_dasha_lord)]
+    nakshatra_progress = degrees_in_nakshatra / nakshatra_size
+    balance_years = total_years * (1 - nakshatra_progress)
+    
+    # Generate dasha periods
+    dasha_periods = []
+    current_date = birth_dt
+    
+    # Start with remaining portion of first dasha
+    end_date = current_date + timedelta(days=balance_years*365.25)
+    
+    dasha_periods.append(DashaPeriod(
+        planet=first_dasha_lord,
+        start_date=birth_dt.strftime("%Y-%m-%d"),
+        end_date=end_date.strftime("%Y-%m-%d"),
+        years=round(balance_years, 4)
+    ))
+    
+    current_date = end_date
+    
+    # Calculate subsequent dashas
+    start_index = (nakshatra_ruler_index + 1) % 9
+    
+    for i in range(8):  # 8 more dashas to complete the cycle
+        lord_index = (start_index + i) % 9
+        dasha_lord = NAKSHATRA_LORD_ORDER[lord_index]
+        years = DASHA_YEARS[Planet(dasha_lord)]
         
-        logger.info(f"House calculation - Ascendant longitude: {asc_longitude}, sign: {SIGN_NAMES[list(Sign)[asc_sign]]} (ID: {asc_sign})")
+        end_date = current_date + timedelta(days=years*365.25)
         
-        houses = []
+        dasha_periods.append(DashaPeriod(
+            planet=dasha_lord,
+            start_date=current_date.strftime("%Y-%m-%d"),
+            end_date=end_date.strftime("%Y-%m-%d"),
+            years=years
+        ))
         
-        # In Whole Sign houses, each house corresponds to a complete sign
-        # House numbering is 1-based, but sign indices are 0-based
-        for i in range(12):  # Process all 12 houses (0-11 index)
-            # Calculate the sign for this house (0-11)
-            house_sign = (asc_sign + i) % 12
-            
-            # Get the longitude at the beginning of the sign
-            house_longitude = house_sign * 30
-            
-            # Get sign information (0-based)
-            sign_name, sign_id = get_sign_info(house_longitude)
-            
-            # House number is 1-based (i+1)
-            house_number = i + 1
-            
-            logger.info(f"House: {house_number}, Sign: {sign_name} (ID: {sign_id}), Longitude: {house_longitude}")
-            
-            houses.append(HouseInfo(
-                house_number=house_number,
-                sign=sign_name,
-                sign_id=sign_id + 1,  # Convert to 1-based for API response
-                degrees=0,  # In Whole Sign, house starts at 0 degrees of the sign
-                minutes=0,
-                seconds=0,
-                longitude=round(house_longitude, 4)
-            ))
+        current_date = end_date
+    
+    return dasha_periods
+
+# Deepest dasha level: 1 mahadasha, 2 antardasha, 3 pratyantardasha
+MAX_DASHA_LEVEL = 3
+
+def _sub_periods(
+    lord: str,
+    full_start: datetime,
+    full_years: float,
+    start: datetime,
+    end: datetime
+) -> Iterator[Tuple[str, datetime, datetime, float, datetime, datetime]]:
+    """
+    Divide a dasha period among the nine lords
+    
+    The period is laid out over its full length (full_start, full_years) in
+    Vimshottari order starting with its own lord, each lord getting a share in
+    proportion to its dasha years. Sub-periods that ended before start (a
+    balance at birth) are dropped and the rest are clipped to start and end.
+    
+    Yields:
+        (lord, full start, full end, full years, clipped start, clipped end)
+    """
+    current_date = full_start
+    lord_index = NAKSHATRA_LORD_ORDER.index(lord)
+    
+    for i in range(9):
+        sub_lord = NAKSHATRA_LORD_ORDER[(lord_index + i) % 9]
+        years = full_years * DASHA_YEARS[Planet(sub_lord)] / VIMSHOTTARI_TOTAL_YEARS
+        end_date = current_date + timedelta(days=years*365.25)
+        
+        if end_date > start:
+            yield sub_lord, current_date, end_date, years, max(current_date, start), min(end_date, end)
         
-        return houses
+        current_date = end_date
+
+def iter_dasha_periods(mahadashas: List[DashaPeriod], levels: int = 1) -> Iterator[Tuple[int, DashaPeriod]]:
+    """
+    Walk the dasha tree depth first, down to the given level
     
-    except Exception as e:
-        logger.error(f"Error calculating house positions: {str(e)}")
-        raise ValueError(f"Failed to calculate house positions: {str(e)}")
+    Each mahadasha is followed by its antardashas, each antardasha by its
+    pratyantardashas, so a long tree can be streamed without being built.
+    The first mahadasha is usually only a balance at birth, so its
+    sub-periods are laid out over the full period and the part elapsed
+    before birth is dropped.
+    
+    Yields:
+        (level, period): DashaPeriod at level 1, AntarDashaPeriod at level 2
+        and PratyantarDashaPeriod at level 3
+    """
+    for maha in mahadashas:
+        check_deadline("dasha calculation")
+        yield 1, maha
+        if levels < 2:
+            continue
+        
+        maha_start = datetime.strptime(maha.start_date, "%Y-%m-%d")
+        maha_end = datetime.strptime(maha.end_date, "%Y-%m-%d")
+        full_years = DASHA_YEARS[Planet(maha.planet)]
+        # Start of the full mahadasha (before birth for a partial first period)
+        full_start = maha_start - timedelta(days=(full_years - maha.years) * 365.25)
+        
+        for antar_lord, antar_full_start, antar_full_end, antar_years, antar_start, antar_end in _sub_periods(
+            maha.planet, full_start, full_years, maha_start, maha_end
+        ):
+            yield 2, AntarDashaPeriod(
+                planet=antar_lord,
+                maha_planet=maha.planet,
+                start_date=antar_start.strftime("%Y-%m-%d"),
+                end_date=antar_end.strftime("%Y-%m-%d"),
+                years=round((antar_full_end - antar_start).days / 365.25, 4)
+            )
+            if levels < 3:
+                continue
+            
+            for lord, _, full_end, _, start, end in _sub_periods(
+                antar_lord, antar_full_start, antar_years, antar_start, antar_end
+            ):
+                yield 3, PratyantarDashaPeriod(
+                    planet=lord,
+                    antar_planet=antar_lord,
+                    maha_planet=maha.planet,
+                    start_date=start.strftime("%Y-%m-%d"),
+                    end_date=end.strftime("%Y-%m-%d"),
+                    years=round((full_end - start).days / 365.25, 4)
+                )
+
+def antardasha_periods(mahadashas: List[DashaPeriod]) -> List[AntarDashaPeriod]:
+    """
+    Calculate antardasha (sub-period) periods for a list of mahadashas
+    
+    Each mahadasha is divided among the nine lords in Vimshottari order, starting
+    with the mahadasha lord itself, in proportion to their dasha years (see
+    iter_dasha_periods).
+    """
+    return [period for level, period in iter_dasha_periods(mahadashas, 2) if level == 2]
 
 def calculate_dasha_periods(
     birth_date: str, 
@@ -567,120 +891,283 @@ def calculate_dasha_periods(
         # Calculate Moon's position
         moon_position = calculate_planet_position(swe.MOON, julian_day)
         
-        # Calculate Moon's nakshatra
-        nakshatra_size = 13 + 1/3  # 13°20'
-        nakshatra_id = int(moon_position["longitude"] / nakshatra_size) % 27
-        
-        # Calculate remaining degrees in the nakshatra
-        degrees_in_nakshatra = moon_position["longitude"] % nakshatra_size
-        
-        # Calculate balance of dasha at birth
-        nakshatra_lord_order = [
-            "Ketu", "Venus", "Sun", "Moon", "Mars", 
-            "Rahu", "Jupiter", "Saturn", "Mercury"
-        ]
+        # Convert birth date to datetime
+        birth_dt = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M:%S")
         
-        # Determine the lord of the nakshatra
-        nakshatra_ruler_index = nakshatra_id % 9
-        first_dasha_lord = nakshatra_lord_order[nakshatra_ruler_index]
+        return dasha_periods_from_moon(moon_position["longitude"], birth_dt)
+    
+    except DeadlineExceededError:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating dasha periods: {str(e)}")
+        raise ValueError(f"Failed to calculate dasha periods: {str(e)}")
+
+# Chart records
+#
+# A chart record holds the raw inputs and sidereal positions of a chart. Every
+# chart-level answer (ascendant, planets, houses, dashas, divisional charts) can
+# be derived from it without touching the ephemeris again, which is what the
+# chart store relies on to serve follow-up requests. The functions below work on
+# the dictionary form; chart_record.ChartRecord is the compact binary form.
+
+def calculate_chart_record(
+    birth_date: str, 
+    birth_time: str, 
+    latitude: float, 
+    longitude: float, 
+    timezone_offset: float, 
+    ayanamsa: str,
+    precision: str = PRECISION_STANDARD
+) -> Dict[str, Any]:
+    """
+    Calculate the raw positions of a chart
+    
+    Args:
+        precision: One of PRECISION_MODES (see resolve_precision); Moshier and
+            fast charts are flagged with FLAG_MOSHIER_EPHEMERIS and
+            FLAG_FAST_EPHEMERIS
+    
+    Raises:
+        EphemerisUnavailableError: If file precision is requested for an uncovered date
+    
+    Returns:
+        Dictionary with the birth inputs (including the requested precision),
+        Julian day, sidereal ascendant longitude
+        and a position dictionary (longitude, latitude, speed) per planet
+    """
+    try:
+        # Calculate Julian day
+        julian_day = get_julian_day(birth_date, birth_time, timezone_offset)
         
-        # Calculate balance of first dasha
-        total_years = DASHA_YEARS[first_dasha_lord]
-        nakshatra_progress = degrees_in_nakshatra / nakshatra_size
-        balance_years = total_years * (1 - nakshatra_progress)
+        mode = resolve_precision(precision, julian_day)
+        if mode == PRECISION_FAST:
+            from api.services import fast_ephemeris
+            record = fast_ephemeris.chart_record(
+                julian_day, birth_date, birth_time, latitude, longitude, timezone_offset, ayanamsa
+            )
+            record["precision"] = precision
+            return record
+        flags = EPHEMERIS_FLAGS.get(mode)
+        if mode == PRECISION_FILE and not USING_MOCK:
+            ephemeris_files.count_access(julian_day)
         
-        # Convert birth date to datetime
-        birth_dt = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M:%S")
+        # Set ayanamsa
+        set_ayanamsa(ayanamsa)
         
-        # Generate dasha periods
-        dasha_periods = []
-        current_date = birth_dt
+        asc_longitude = get_ascendant_longitude(julian_day, latitude, longitude)
         
-        # Start with remaining portion of first dasha
-        end_date = current_date + timedelta(days=balance_years*365.25)
+        planets = {}
+        for planet, planet_id in PLANETS.items():
+            position = calculate_planet_position(planet_id, julian_day, flags)
+            planets[planet.value] = {
+                "longitude": position["longitude"],
+                "latitude": position["latitude"],
+                "speed": position["speed"]
+            }
         
-        dasha_periods.append(DashaPeriod(
-            planet=first_dasha_lord,
-            start_date=birth_dt.strftime("%Y-%m-%d"),
-            end_date=end_date.strftime("%Y-%m-%d"),
-            years=round(balance_years, 4)
-        ))
+        return {
+            "birth_date": birth_date,
+            "birth_time": birth_time,
+            "latitude": latitude,
+            "longitude": longitude,
+            "timezone_offset": timezone_offset,
+            "ayanamsa": ayanamsa,
+            "precision": precision,
+            "julian_day": julian_day,
+            "ascendant": asc_longitude,
+            "planets": planets,
+            "flags": (FLAG_MOCK_EPHEMERIS if USING_MOCK else 0)
+                     | (FLAG_MOSHIER_EPHEMERIS if mode == PRECISION_MOSHIER else 0)
+        }
+    
+    except (DeadlineExceededError, EphemerisUnavailableError):
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating chart record: {str(e)}")
+        raise ValueError(f"Failed to calculate chart: {str(e)}")
+
+def ascendant_from_record(record: Dict[str, Any]) -> AscendantInfo:
+    """Derive the ascendant information from a chart record"""
+    return ascendant_from_longitude(record["ascendant"])
+
+def planets_from_record(record: Dict[str, Any]) -> List[PlanetInfo]:
+    """Derive the planetary positions from a chart record"""
+    asc_sign = int(record["ascendant"] / 30)
+    return [
+        planet_info_from_position(planet, record["planets"][planet.value], asc_sign)
+        for planet in PLANETS
+    ]
+
+def houses_from_record(record: Dict[str, Any]) -> List[HouseInfo]:
+    """Derive the Whole Sign houses from a chart record"""
+    return houses_from_ascendant(record["ascendant"])
+
+def dasha_periods_from_record(record: Dict[str, Any]) -> List[DashaPeriod]:
+    """Derive the Vimshottari mahadasha periods from a chart record"""
+    birth_dt = datetime.strptime(f"{record['birth_date']} {record['birth_time']}", "%Y-%m-%d %H:%M:%S")
+    return dasha_periods_from_moon(record["planets"][Planet.MOON.value]["longitude"], birth_dt)
+
+def divisional_longitude(longitude: float, division: str) -> float:
+    """
+    Map a D1 sidereal longitude into a divisional (varga) chart
+    
+    Args:
+        longitude: D1 sidereal longitude (0-360)
+        division: Divisional chart name (e.g. "D9")
         
-        current_date = end_date
+    Returns:
+        Longitude in the divisional chart (0-360)
+    """
+    mapping = DIVISIONAL_MAPPINGS[division]
+    parts = len(mapping[1])
+    part_size = 30 / parts
+    
+    sign = int(longitude / 30) % 12 + 1  # 1-based, as in the mapping tables
+    longitude_in_sign = longitude % 30
+    part = min(int(longitude_in_sign / part_size), parts - 1) + 1
+    
+    divisional_sign = mapping[sign][part]
+    return (divisional_sign - 1) * 30 + (longitude_in_sign % part_size) * parts
+
+def divisional_chart_from_record(record: Dict[str, Any], division: str) -> Tuple[AscendantInfo, List[PlanetInfo]]:
+    """
+    Derive a divisional chart from a chart record
+    
+    Returns:
+        Tuple of (ascendant, planets) in the divisional chart. Houses are counted
+        from the divisional ascendant.
+    """
+    if division not in DIVISIONAL_MAPPINGS:
+        raise ValueError(f"Unsupported divisional chart: {division}. Options: {', '.join(DIVISIONAL_MAPPINGS)}")
+    
+    asc_longitude = divisional_longitude(record["ascendant"], division)
+    asc_sign = int(asc_longitude / 30)
+    
+    planets = []
+    for planet in PLANETS:
+        position = dict(record["planets"][planet.value])
+        position["longitude"] = divisional_longitude(position["longitude"], division)
+        planets.append(planet_info_from_position(planet, position, asc_sign))
+    
+    return ascendant_from_longitude(asc_longitude), planets
+
+def transits_from_record(record: Dict[str, Any], transit_date: str) -> List[TransitInfo]:
+    """
+    Calculate transits for a date relative to a natal chart record
+    
+    Transit positions are calculated at local noon of the transit date using the
+    chart's timezone and ayanamsa.
+    """
+    try:
+        julian_day = get_julian_day(transit_date, "12:00:00", record["timezone_offset"])
+        set_ayanamsa(record["ayanamsa"])
         
-        # Calculate subsequent dashas
-        start_index = (nakshatra_ruler_index + 1) % 9
+        natal_asc_sign = int(record["ascendant"] / 30)
+        natal_moon_sign = int(record["planets"][Planet.MOON.value]["longitude"] / 30)
         
-        for i in range(8):  # 8 more dashas to complete the cycle
-            lord_index = (start_index + i) % 9
-            dasha_lord = nakshatra_lord_order[lord_index]
-            years = DASHA_YEARS[dasha_lord]
+        transits = []
+        for planet, planet_id in PLANETS.items():
+            natal = record["planets"][planet.value]
+            current = calculate_planet_position(planet_id, julian_day)
             
-            end_date = current_date + timedelta(days=years*365.25)
+            natal_sign_name, natal_sign_id = get_sign_info(natal["longitude"])
+            sign_name, sign_id = get_sign_info(current["longitude"])
             
-            dasha_periods.append(DashaPeriod(
-                planet=dasha_lord,
-                start_date=current_date.strftime("%Y-%m-%d"),
-                end_date=end_date.strftime("%Y-%m-%d"),
-                years=years
+            transits.append(TransitInfo(
+                planet=PLANET_NAMES[planet],
+                birth_position={
+                    "longitude": round(natal["longitude"], 4),
+                    "sign": natal_sign_name,
+                    "sign_id": natal_sign_id + 1
+                },
+                current_position={
+                    "longitude": round(current["longitude"], 4),
+                    "sign": sign_name,
+                    "sign_id": sign_id + 1,
+                    "is_retrograde": current["is_retrograde"]
+                },
+                house_from_birth_moon=((sign_id - natal_moon_sign) % 12) + 1,
+                house_from_birth_ascendant=((sign_id - natal_asc_sign) % 12) + 1
             ))
-            
-            current_date = end_date
         
-        return dasha_periods
+        return transits
     
+    except DeadlineExceededError:
+        raise
     except Exception as e:
-        logger.error(f"Error calculating dasha periods: {str(e)}")
-        raise ValueError(f"Failed to calculate dasha periods: {str(e)}")
+        logger.error(f"Error calculating transits: {str(e)}")
+        raise ValueError(f"Failed to calculate transits: {str(e)}")
 
 # Additional utility functions for testing and validation
 
-def validate_d1_chart(
+def d1_chart_mismatches(
     ascendant_info: AscendantInfo,
     planets_info: List[PlanetInfo],
     houses_info: List[HouseInfo]
-) -> None:
+) -> Dict[str, List[Any]]:
     """
-    Validate that the D1 chart calculations are consistent for debugging purposes.
+    Check that a D1 chart is consistent
     
     This checks:
     1. House signs match what's expected from the ascendant
     2. Planet house assignments match their sign positions
     3. The 1-based and 0-based indexing is consistent
     
+    Returns:
+        Dictionary with the numbers of the inconsistent houses ("houses") and
+        the names of the misplaced planets ("planets"); both empty if the
+        chart is consistent
+    """
+    asc_sign_id_0based = ascendant_info.sign_id - 1  # Convert 1-based to 0-based
+    
+    # Houses whose sign does not follow from the ascendant
+    wrong_houses = [
+        house.house_number for house in houses_info
+        if house.sign_id - 1 != (asc_sign_id_0based + house.house_number - 1) % 12
+    ]
+    
+    # Planets whose house does not match their sign
+    wrong_planets = [
+        planet.name for planet in planets_info
+        if planet.house != ((planet.sign_id - 1 - asc_sign_id_0based) % 12) + 1
+    ]
+    
+    return {"houses": wrong_houses, "planets": wrong_planets}
+
+def validate_d1_chart(
+    ascendant_info: AscendantInfo,
+    planets_info: List[PlanetInfo],
+    houses_info: List[HouseInfo]
+) -> None:
+    """
+    Validate that the D1 chart calculations are consistent for debugging purposes.
+    
+    Inconsistencies are logged as warnings. Requests no longer call this; the
+    chart auditor (see chart_auditor) checks a sample of computed charts.
+    
     Args:
         ascendant_info: The ascendant information
         planets_info: List of planetary positions
         houses_info: List of house positions
     """
-    logger.info("=============== D1 CHART VALIDATION ===============")
-    
-    # Ascendant info
-    asc_sign_id_0based = ascendant_info.sign_id - 1  # Convert 1-based to 0-based
-    logger.info(f"Ascendant: {ascendant_info.sign} (ID: {ascendant_info.sign_id} / 0-based: {asc_sign_id_0based})")
+    mismatches = d1_chart_mismatches(ascendant_info, planets_info, houses_info)
+    consistent = not (mismatches["houses"] or mismatches["planets"])
     
-    # Validate houses
-    logger.info("House validation:")
-    for house in houses_info:
-        sign_id_0based = house.sign_id - 1  # Convert 1-based to 0-based
-        expected_sign_id_0based = (asc_sign_id_0based + house.house_number - 1) % 12
-        is_correct = sign_id_0based == expected_sign_id_0based
-        
-        logger.info(f"House {house.house_number}: Sign: {house.sign} (ID: {house.sign_id} / 0-based: {sign_id_0based}), "
-                   f"Expected sign ID (0-based): {expected_sign_id_0based}, "
-                   f"Correct: {is_correct}")
+    if not consistent:
+        logger.warning("D1 chart inconsistent: ascendant %s, houses %s, planets %s",
+                       ascendant_info.sign, mismatches["houses"], mismatches["planets"])
     
-    # Validate planets
-    logger.info("Planet validation:")
-    for planet in planets_info:
-        sign_id_0based = planet.sign_id - 1  # Convert 1-based to 0-based
-        expected_house = ((sign_id_0based - asc_sign_id_0based) % 12) + 1
-        is_correct = planet.house == expected_house
-        
-        logger.info(f"Planet: {planet.name}, Sign: {planet.sign} (ID: {planet.sign_id} / 0-based: {sign_id_0based}), "
-                   f"House: {planet.house}, Expected house: {expected_house}, Correct: {is_correct}")
-    
-    logger.info("====================================================")
+    # Full diagnostics only when debug logging is on (sampled)
+    if diagnostics_enabled(logger):
+        log_event(
+            logger,
+            "d1_chart_validation",
+            ascendant=ascendant_info.sign,
+            ascendant_sign_id=ascendant_info.sign_id,
+            houses={house.house_number: house.sign_id for house in houses_info},
+            planets={planet.name: (planet.sign_id, planet.house) for planet in planets_info},
+            consistent=consistent
+        )
 
 # Geocoding helper (using OpenCage)
 def geocode_place(place: str, api_key: str = None) -> Tuple[float, float, float]:
@@ -695,6 +1182,7 @@ def geocode_place(place: str, api_key: str = None) -> Tuple[float, float, float]
         "key": api_key,
         "no_annotations": 0
     }
+    import requests
     response = requests.get(url, params=params)
     data = response.json()
     if data['results']:
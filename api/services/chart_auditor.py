@@ -0,0 +1,206 @@
+"""
+Background D1 chart auditor
+
+The D1 consistency check (house signs follow from the ascendant, planets sit in
+the house of their sign) used to run, and log, on every /planets request. The
+auditor keeps that safety net off the request path:
+
+- routes submit the charts they served; a configurable fraction
+  (JAI_AUDIT_SAMPLE_RATE) is queued, the rest costs one random() call
+- a background thread derives the ascendant, planets and houses from the chart
+  record and runs calculation.d1_chart_mismatches
+- results are counted in the metrics (jai_d1_audits_total{result}) and every
+  inconsistent chart is stored as JSON in JAI_AUDIT_DIR, with the chart
+  parameters so it can be replayed:
+
+      python -m api.services.chart_auditor cache/audit/<chart_id>.json
+
+The queue is bounded; charts submitted while it is full are dropped (and
+counted) rather than slowing requests down.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import logging
+from api.utils.metrics import registry
+
+# Configure logging
+logger = logging.getLogger("jai-api.chart_auditor")
+
+# Auditor configuration
+AUDIT_SAMPLE_RATE = float(os.environ.get("JAI_AUDIT_SAMPLE_RATE", "0.01"))
+AUDIT_QUEUE_SIZE = int(os.environ.get("JAI_AUDIT_QUEUE_SIZE", "1000"))
+AUDIT_DIR = os.environ.get("JAI_AUDIT_DIR", "./cache/audit")
+AUDIT_MAX_FILES = int(os.environ.get("JAI_AUDIT_MAX_FILES", "1000"))
+
+AUDITS = registry.counter(
+    "jai_d1_audits_total", "Charts checked by the D1 auditor by result", ("result",)
+)
+AUDIT_MISMATCHES = registry.counter(
+    "jai_d1_audit_mismatches_total", "Inconsistent houses and planets found by the D1 auditor", ("kind",)
+)
+
+# Queued chart: (chart ID, chart record in dictionary form)
+AuditItem = Tuple[str, Dict[str, Any]]
+
+def audit_record(record: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Run the D1 consistency check on a chart record
+
+    Returns:
+        The mismatches as returned by calculation.d1_chart_mismatches
+    """
+    from api.services import calculation
+    return calculation.d1_chart_mismatches(
+        calculation.ascendant_from_record(record),
+        calculation.planets_from_record(record),
+        calculation.houses_from_record(record)
+    )
+
+def replay(path: str) -> Dict[str, List[Any]]:
+    """
+    Recalculate a stored failing chart from its parameters and check it again
+
+    Args:
+        path: Audit file written by the auditor
+
+    Returns:
+        The mismatches of the recalculated chart (empty lists once fixed)
+    """
+    from api.services import calculation
+    from api.services.worker_pool import CHART_TASK_FIELDS
+
+    with open(path, "r") as f:
+        params = json.load(f)["params"]
+    # Optional fields (precision) are only in the parameters when not the default
+    record = calculation.calculate_chart_record(*(params[field] for field in CHART_TASK_FIELDS if field in params))
+    return audit_record(record)
+
+class ChartAuditor:
+    """Checks a sample of served charts in a background thread"""
+
+    def __init__(
+        self,
+        sample_rate: float = AUDIT_SAMPLE_RATE,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        directory: str = AUDIT_DIR,
+        max_files: int = AUDIT_MAX_FILES
+    ):
+        """
+        Initialize the auditor.
+
+        Args:
+            sample_rate: Fraction of submitted charts that are checked
+            queue_size: Maximum number of charts waiting to be checked
+            directory: Where inconsistent charts are stored
+            max_files: Stop storing new failures once this many files exist
+        """
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[Optional[AuditItem]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._directory = Path(directory)
+        self._max_files = max_files
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, chart_id: str, record: Dict[str, Any]) -> bool:
+        """
+        Offer a served chart for auditing (never blocks)
+
+        Returns:
+            Whether the chart was queued
+        """
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((chart_id, record))
+        except queue.Full:
+            AUDITS.inc("dropped")
+            return False
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jai-chart-auditor", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Check the charts still queued and stop the background thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def join(self) -> None:
+        """Wait until every queued chart has been checked"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.audit(*item)
+            except Exception as e:
+                AUDITS.inc("error")
+                logger.error(f"Error auditing chart: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def audit(self, chart_id: str, record: Dict[str, Any]) -> Dict[str, List[Any]]:
+        """Check one chart, recording the result"""
+        mismatches = audit_record(record)
+        if not (mismatches["houses"] or mismatches["planets"]):
+            AUDITS.inc("ok")
+            return mismatches
+
+        AUDITS.inc("mismatch")
+        AUDIT_MISMATCHES.inc("house", amount=len(mismatches["houses"]))
+        AUDIT_MISMATCHES.inc("planet", amount=len(mismatches["planets"]))
+        logger.warning(
+            "D1 audit failed for chart %s: houses %s, planets %s",
+            chart_id, mismatches["houses"], mismatches["planets"]
+        )
+        self._store(chart_id, record, mismatches)
+        return mismatches
+
+    def _store(self, chart_id: str, record: Dict[str, Any], mismatches: Dict[str, List[Any]]) -> None:
+        """Keep the inputs of an inconsistent chart for replay"""
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            if sum(1 for _ in self._directory.glob("*.json")) >= self._max_files:
+                return
+            with open(self._directory / f"{chart_id}.json", "w") as f:
+                json.dump({
+                    "chart_id": chart_id,
+                    "audited_at": datetime.utcnow().isoformat(),
+                    "params": record.get("params"),
+                    "mismatches": mismatches,
+                    "record": record,
+                }, f, indent=2, default=str)
+        except Exception as e:
+            logger.error(f"Error storing audit failure for chart {chart_id}: {str(e)}")
+
+# Create singleton instance
+chart_auditor = ChartAuditor()
+
+if __name__ == "__main__":
+    # Replay stored audit failures: python -m api.services.chart_auditor FILE...
+    failed = 0
+    for audit_file in sys.argv[1:]:
+        result = replay(audit_file)
+        consistent = not (result["houses"] or result["planets"])
+        failed += not consistent
+        print(f"{audit_file}: {'consistent' if consistent else result}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,299 @@
+"""
+Compact binary chart record format
+
+A chart record is the canonical, fixed-width representation of a computed chart
+used by the chart store, process-pool IPC and bulk exports. Every chart-level
+answer can be derived from it (see calculation.*_from_record).
+
+Layout (version 2, little-endian, 236 bytes):
+
+    offset  size  type        field
+    0       2     char[2]     magic b"JC"
+    2       1     uint8       format version
+    3       1     uint8       ayanamsa id (constants.ayanamsa)
+    4       4     uint32      flags (see FLAG_*)
+    8       8     int64       local birth date and time (seconds since
+                              1970-01-01 00:00, in the timezone offset)
+    16      8     float64     Julian day (UT)
+    24      8     float64     latitude (degrees)
+    32      8     float64     longitude (degrees)
+    40      8     float64     timezone offset (hours)
+    48      8     float64     sidereal ascendant longitude
+    56      72    float64[9]  sidereal planet longitudes
+    128     72    float64[9]  planet speeds (degrees/day)
+    200     36    float32[9]  planet ecliptic latitudes
+
+Planets are stored in PLANET_ORDER. The birth date and time are stored as
+given rather than derived from the Julian day, so they (and the chart
+parameters) survive a round trip exactly. Decoding works directly on a
+memoryview of the source buffer, so slicing a bulk buffer never copies it.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+from datetime import datetime, timedelta
+import importlib.util
+import struct
+import logging
+from functools import lru_cache
+from api.constants.planets import Planet
+from api.utils.http_cache import normalize_chart_params
+from constants.ayanamsa import AYANAMSA_MAPPING, AYANAMSA_NAMES, DEFAULT_AYANAMSA
+
+# Configure logging
+logger = logging.getLogger("jai-api.chart_record")
+
+# Optional NumPy support for zero-copy columnar views of bulk buffers (imported
+# on first use; NumPy adds tens of milliseconds to startup)
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+MAGIC = b"JC"
+FORMAT_VERSION = 2
+
+# Order of the planet arrays in the record
+PLANET_ORDER = list(Planet)
+PLANET_COUNT = len(PLANET_ORDER)
+
+# Flags: bits 0-8 mark retrograde planets (in PLANET_ORDER)
+FLAG_RETROGRADE_MASK = (1 << PLANET_COUNT) - 1
+# Bit 9: computed with the mock ephemeris backend
+FLAG_MOCK_EPHEMERIS = 1 << 9
+# Bit 10: computed with the fast analytical ephemeris (precision=fast)
+FLAG_FAST_EPHEMERIS = 1 << 10
+# Bit 11: computed with the Moshier ephemeris (precision=moshier or no files)
+FLAG_MOSHIER_EPHEMERIS = 1 << 11
+# Bits 12-13: requested precision mode (index in PRECISION_MODES), which may
+# differ from the ephemeris used when standard precision falls back to Moshier
+PRECISION_SHIFT = 12
+PRECISION_MASK = 0b11 << PRECISION_SHIFT
+
+# Precision modes in the order of calculation.PRECISION_MODES
+PRECISION_MODES = ("standard", "file", "moshier", "fast")
+
+_HEADER = "<2sBBI"
+_STRUCT = struct.Struct(f"{_HEADER}q5d{PLANET_COUNT}d{PLANET_COUNT}d{PLANET_COUNT}f")
+RECORD_SIZE = _STRUCT.size
+
+# Julian day of 2000-01-01 00:00 UT, used to convert Julian days back to dates
+_JD_2000 = 2451544.5
+
+# Origin of the stored local birth date and time
+_EPOCH = datetime(1970, 1, 1)
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+class ChartRecord(NamedTuple):
+    """Decoded chart record"""
+    julian_day: float
+    latitude: float
+    longitude: float
+    timezone_offset: float
+    ayanamsa_id: int
+    ascendant: float
+    longitudes: Tuple[float, ...]
+    speeds: Tuple[float, ...]
+    planet_latitudes: Tuple[float, ...]
+    flags: int = 0
+    birth_timestamp: int = 0
+
+    @property
+    def ayanamsa(self) -> str:
+        """Ayanamsa name"""
+        return AYANAMSA_NAMES.get(self.ayanamsa_id, AYANAMSA_NAMES[DEFAULT_AYANAMSA])
+
+    @property
+    def birth_datetime(self) -> datetime:
+        """Local birth date and time, as given"""
+        return _EPOCH + timedelta(seconds=self.birth_timestamp)
+
+    @property
+    def precision(self) -> str:
+        """Precision mode the chart was requested with"""
+        return PRECISION_MODES[(self.flags & PRECISION_MASK) >> PRECISION_SHIFT]
+
+    def is_retrograde(self, index: int) -> bool:
+        """Whether the planet at PLANET_ORDER[index] is retrograde"""
+        return bool(self.flags & (1 << index))
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "ChartRecord":
+        """
+        Build a chart record from the dictionary form returned by
+        calculation.calculate_chart_record
+        """
+        flags = int(record.get("flags", 0)) & ~(FLAG_RETROGRADE_MASK | PRECISION_MASK)
+        precision = record.get("precision") or PRECISION_MODES[0]
+        if precision not in PRECISION_MODES:
+            raise ValueError(f"Unknown precision: {precision}")
+        flags |= PRECISION_MODES.index(precision) << PRECISION_SHIFT
+        birth_dt = datetime.strptime(f"{record['birth_date']} {record['birth_time']}", "%Y-%m-%d %H:%M:%S")
+        planets = [record["planets"][planet.value] for planet in PLANET_ORDER]
+        speeds = tuple(float(p["speed"]) for p in planets)
+
+        for index, speed in enumerate(speeds):
+            if speed < 0:
+                flags |= 1 << index
+
+        return cls(
+            julian_day=float(record["julian_day"]),
+            latitude=float(record["latitude"]),
+            longitude=float(record["longitude"]),
+            timezone_offset=float(record["timezone_offset"]),
+            ayanamsa_id=AYANAMSA_MAPPING.get(str(record["ayanamsa"]).strip().lower(), DEFAULT_AYANAMSA),
+            ascendant=float(record["ascendant"]),
+            longitudes=tuple(float(p["longitude"]) for p in planets),
+            speeds=speeds,
+            planet_latitudes=tuple(float(p.get("latitude") or 0.0) for p in planets),
+            flags=flags,
+            birth_timestamp=round((birth_dt - _EPOCH).total_seconds())
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Expand the record into the dictionary form used by the calculation
+        helpers (calculation.*_from_record), including normalized parameters
+        """
+        birth_dt = self.birth_datetime
+        record = {
+            "birth_date": birth_dt.strftime("%Y-%m-%d"),
+            "birth_time": birth_dt.strftime("%H:%M:%S"),
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "timezone_offset": self.timezone_offset,
+            "ayanamsa": self.ayanamsa,
+            "precision": self.precision,
+            "julian_day": self.julian_day,
+            "ascendant": self.ascendant,
+            "flags": self.flags,
+            "planets": {
+                planet.value: {
+                    "longitude": self.longitudes[index],
+                    "latitude": self.planet_latitudes[index],
+                    "speed": self.speeds[index],
+                    "is_retrograde": self.is_retrograde(index)
+                }
+                for index, planet in enumerate(PLANET_ORDER)
+            }
+        }
+        record["params"] = normalize_chart_params(
+            birth_date=record["birth_date"],
+            birth_time=record["birth_time"],
+            latitude=self.latitude,
+            longitude=self.longitude,
+            timezone_offset=self.timezone_offset,
+            ayanamsa=self.ayanamsa,
+            # As in HoroscopeRequest.chart_params
+            precision=None if self.precision == PRECISION_MODES[0] else self.precision
+        )
+        return record
+
+def julian_day_to_datetime(julian_day: float) -> datetime:
+    """Convert a Julian day (UT) to a naive UTC datetime, rounded to the second"""
+    seconds = round((julian_day - _JD_2000) * 86400)
+    return datetime(2000, 1, 1) + timedelta(seconds=seconds)
+
+def _values(record: ChartRecord) -> Tuple:
+    return (
+        MAGIC, FORMAT_VERSION, record.ayanamsa_id, record.flags,
+        record.birth_timestamp, record.julian_day, record.latitude, record.longitude,
+        record.timezone_offset, record.ascendant,
+        *record.longitudes, *record.speeds, *record.planet_latitudes
+    )
+
+def _from_values(values: Tuple) -> ChartRecord:
+    magic, version, ayanamsa_id, flags = values[:4]
+    if magic != MAGIC:
+        raise ValueError(f"Not a chart record (magic {magic!r})")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported chart record version {version}")
+
+    birth_timestamp, julian_day, latitude, longitude, timezone_offset, ascendant = values[4:10]
+    start = 10
+    longitudes = values[start:start + PLANET_COUNT]
+    speeds = values[start + PLANET_COUNT:start + 2 * PLANET_COUNT]
+    planet_latitudes = values[start + 2 * PLANET_COUNT:]
+
+    return ChartRecord(
+        julian_day=julian_day,
+        latitude=latitude,
+        longitude=longitude,
+        timezone_offset=timezone_offset,
+        ayanamsa_id=ayanamsa_id,
+        ascendant=ascendant,
+        longitudes=longitudes,
+        speeds=speeds,
+        planet_latitudes=planet_latitudes,
+        flags=flags,
+        birth_timestamp=birth_timestamp
+    )
+
+def encode(record: ChartRecord) -> bytes:
+    """Encode a single chart record"""
+    return _STRUCT.pack(*_values(record))
+
+def decode(buffer: BufferLike, offset: int = 0) -> ChartRecord:
+    """
+    Decode a single chart record
+
+    Args:
+        buffer: Buffer holding one or more records
+        offset: Byte offset of the record in the buffer
+
+    Returns:
+        Decoded chart record
+    """
+    return _from_values(_STRUCT.unpack_from(memoryview(buffer), offset))
+
+def encode_many(records: Iterable[ChartRecord]) -> bytearray:
+    """Encode a sequence of chart records into one contiguous buffer"""
+    records = list(records)
+    buffer = bytearray(RECORD_SIZE * len(records))
+    for index, record in enumerate(records):
+        _STRUCT.pack_into(buffer, index * RECORD_SIZE, *_values(record))
+    return buffer
+
+def iter_decode(buffer: BufferLike) -> Iterator[ChartRecord]:
+    """Lazily decode all records of a contiguous buffer"""
+    view = memoryview(buffer)
+    if len(view) % RECORD_SIZE:
+        raise ValueError(f"Buffer size {len(view)} is not a multiple of the record size {RECORD_SIZE}")
+    for values in _STRUCT.iter_unpack(view):
+        yield _from_values(values)
+
+def decode_many(buffer: BufferLike) -> List[ChartRecord]:
+    """Decode all records of a contiguous buffer"""
+    return list(iter_decode(buffer))
+
+def record_count(buffer: BufferLike) -> int:
+    """Number of records in a contiguous buffer"""
+    return len(memoryview(buffer)) // RECORD_SIZE
+
+@lru_cache(maxsize=None)
+def record_dtype():
+    """Structured NumPy dtype matching the binary layout, for columnar access"""
+    import numpy as np
+    return np.dtype([
+        ("magic", "S2"),
+        ("version", "<u1"),
+        ("ayanamsa_id", "<u1"),
+        ("flags", "<u4"),
+        ("birth_timestamp", "<i8"),
+        ("julian_day", "<f8"),
+        ("latitude", "<f8"),
+        ("longitude", "<f8"),
+        ("timezone_offset", "<f8"),
+        ("ascendant", "<f8"),
+        ("longitudes", "<f8", (PLANET_COUNT,)),
+        ("speeds", "<f8", (PLANET_COUNT,)),
+        ("planet_latitudes", "<f4", (PLANET_COUNT,)),
+    ])
+
+def as_numpy(buffer: BufferLike):
+    """
+    View a contiguous buffer of records as a NumPy structured array (zero-copy)
+
+    Raises:
+        RuntimeError: If NumPy is not installed
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is required for columnar chart record access")
+    import numpy as np
+    return np.frombuffer(buffer, dtype=record_dtype())
@@ -0,0 +1,291 @@
+"""
+Chart store service module
+
+Keeps computed chart records keyed by a chart ID so follow-up requests in a
+conversation (dasha, divisional charts, transits, ...) can be answered from the
+stored positions instead of re-geocoding and recomputing the chart.
+
+Records live in two tiers, both holding the compact binary chart record
+(see chart_record):
+- an in-memory LRU for the hot working set
+- one file per chart on disk, shared by all workers on the box
+
+Both tiers expire records after a TTL.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import os
+import re
+import tempfile
+import threading
+import time
+import logging
+from api.services.chart_record import ChartRecord, RECORD_SIZE, decode, encode
+from api.utils.http_cache import chart_fingerprint
+from api.utils.metrics import count_cache, Span
+
+# Configure logging
+logger = logging.getLogger("jai-api.chart_store")
+
+# Store configuration
+CHART_STORE_DIR = os.environ.get("CHART_STORE_DIR", "./cache/charts")
+CHART_STORE_MAX_ITEMS = int(os.environ.get("CHART_STORE_MAX_ITEMS", "1024"))
+CHART_STORE_TTL = int(os.environ.get("CHART_STORE_TTL", str(7 * 24 * 3600)))
+
+# Sweep expired files from the disk tier every N writes
+SWEEP_INTERVAL = 256
+
+# Chart IDs are chart fingerprints (32 hex characters)
+CHART_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def make_chart_id(params: Dict[str, Any]) -> str:
+    """
+    Derive the chart ID for a set of normalized chart parameters
+
+    The ID is deterministic, so repeating the first call of a conversation with
+    the same birth data finds the already stored chart.
+    """
+    return chart_fingerprint(params, scope="chart")
+
+def is_valid_chart_id(chart_id: str) -> bool:
+    """Check that a chart ID is well formed (also guards the disk tier paths)"""
+    return bool(CHART_ID_PATTERN.match(chart_id))
+
+class ChartStore:
+    """Two-tier (memory LRU + disk) store of chart records with TTL eviction"""
+
+    def __init__(
+        self,
+        directory: str = CHART_STORE_DIR,
+        max_items: int = CHART_STORE_MAX_ITEMS,
+        ttl_seconds: int = CHART_STORE_TTL
+    ):
+        """
+        Initialize the chart store.
+
+        Args:
+            directory: Directory for the disk tier
+            max_items: Maximum number of records kept in memory
+            ttl_seconds: Time to live of a record in seconds
+        """
+        self._directory = Path(directory)
+        self._max_items = max_items
+        self._ttl = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _path(self, chart_id: str) -> Path:
+        return self._directory / f"{chart_id}.chart"
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self._ttl
+
+    def _remember(self, chart_id: str, stored_at: float, data: bytes) -> None:
+        """Insert into the memory tier, evicting the least recently used record"""
+        with self._lock:
+            self._memory[chart_id] = (stored_at, data)
+            self._memory.move_to_end(chart_id)
+            while len(self._memory) > self._max_items:
+                self._memory.popitem(last=False)
+
+    def get(self, chart_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a chart record
+
+        Args:
+            chart_id: Chart ID
+
+        Returns:
+            The chart record in dictionary form, or None if unknown or expired
+        """
+        data = self.get_raw(chart_id)
+        if data is None:
+            return None
+        return decode(data).to_dict()
+
+    def get_raw(self, chart_id: str) -> Optional[bytes]:
+        """
+        Look up the encoded binary chart record
+
+        Args:
+            chart_id: Chart ID
+
+        Returns:
+            The encoded record, or None if unknown or expired
+        """
+        if not is_valid_chart_id(chart_id):
+            return None
+
+        # Memory tier
+        with self._lock:
+            entry = self._memory.get(chart_id)
+            if entry is not None:
+                stored_at, data = entry
+                if not self._is_expired(stored_at):
+                    self._memory.move_to_end(chart_id)
+                    return data
+                del self._memory[chart_id]
+
+        # Disk tier - the file is written once, so its mtime is the store time
+        path = self._path(chart_id)
+        try:
+            stored_at = path.stat().st_mtime
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except IOError as e:
+            logger.error(f"Error reading chart {chart_id} from disk: {str(e)}")
+            return None
+
+        if len(data) != RECORD_SIZE:
+            logger.error(f"Ignoring corrupted chart file {path} ({len(data)} bytes)")
+            self._delete_file(path)
+            return None
+
+        if self._is_expired(stored_at):
+            self._delete_file(path)
+            return None
+
+        self._remember(chart_id, stored_at, data)
+        return data
+
+    def put(self, chart_id: str, record: ChartRecord) -> None:
+        """
+        Store a chart record in both tiers
+
+        Args:
+            chart_id: Chart ID
+            record: Chart record
+        """
+        data = encode(record)
+        self._remember(chart_id, time.time(), data)
+
+        temp_file = None
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file of this writer's own, then replace
+            # atomically (workers storing the same chart must not share it)
+            with tempfile.NamedTemporaryFile(
+                dir=self._directory, prefix=f"{chart_id}.", suffix=".tmp", delete=False
+            ) as f:
+                temp_file = Path(f.name)
+                f.write(data)
+            temp_file.replace(self._path(chart_id))
+        except Exception as e:
+            # The memory tier still serves the record
+            logger.error(f"Error saving chart {chart_id} to disk: {str(e)}")
+            if temp_file is not None:
+                temp_file.unlink(missing_ok=True)
+
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % SWEEP_INTERVAL == 0
+        if sweep:
+            self.evict_expired()
+
+    def get_or_create(
+        self,
+        params: Dict[str, Any],
+        compute: Callable[[], Dict[str, Any]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Return the stored chart for a set of parameters, computing it if needed
+
+        Args:
+            params: Normalized chart parameters
+            compute: Callable that calculates the chart record (dictionary form,
+                as returned by calculation.calculate_chart_record)
+
+        Returns:
+            Tuple of (chart_id, record in dictionary form)
+        """
+        chart_id = make_chart_id(params)
+        record = self._lookup(chart_id)
+        if record is None:
+            with Span("chart_calculation"):
+                chart = ChartRecord.from_dict(compute())
+            record = self._store_computed(chart_id, chart)
+        record["params"] = params
+        return chart_id, record
+
+    async def get_or_create_async(
+        self,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[ChartRecord]]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Like get_or_create, for calculations awaited off the event loop
+
+        Args:
+            params: Normalized chart parameters
+            compute: Coroutine function returning the chart record (e.g.
+                worker_pool.calculation_pool.calculate_chart)
+
+        Returns:
+            Tuple of (chart_id, record in dictionary form)
+        """
+        chart_id = make_chart_id(params)
+        record = self._lookup(chart_id)
+        if record is None:
+            with Span("chart_calculation"):
+                chart = await compute()
+            record = self._store_computed(chart_id, chart)
+        record["params"] = params
+        return chart_id, record
+
+    def _lookup(self, chart_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a chart on behalf of get_or_create, recording the cache result"""
+        with Span("chart_store"):
+            record = self.get(chart_id)
+        count_cache("chart_store", hit=record is not None)
+        return record
+
+    def _store_computed(self, chart_id: str, chart: ChartRecord) -> Dict[str, Any]:
+        """Store a freshly computed chart and return its dictionary form"""
+        with Span("chart_store"):
+            self.put(chart_id, chart)
+        # Serve the stored form so first and follow-up answers are identical
+        return decode(encode(chart)).to_dict()
+
+    def evict_expired(self) -> int:
+        """
+        Remove expired records from both tiers
+
+        Returns:
+            Number of records removed from disk
+        """
+        with self._lock:
+            expired = [key for key, (stored_at, _) in self._memory.items() if self._is_expired(stored_at)]
+            for key in expired:
+                del self._memory[key]
+
+        removed = 0
+        if not self._directory.exists():
+            return removed
+
+        cutoff = time.time() - self._ttl
+        for path in self._directory.glob("*.chart"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    self._delete_file(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+
+        if removed:
+            logger.info(f"Evicted {removed} expired charts from {self._directory}")
+        return removed
+
+    def _delete_file(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting expired chart file {path}: {str(e)}")
+
+# Create singleton instance
+chart_store = ChartStore()
@@ -0,0 +1,138 @@
+"""
+Columnar NumPy-array container
+
+Bulk results (ephemeris series, dasha tables, batches) as named 1-D arrays
+instead of JSON objects that repeat every field name per row. Clients get it
+by sending `Accept: application/vnd.jai.columnar` and can load every column
+zero-copy with NumPy, then hand the dictionary to pandas or polars.
+
+Layout (version 1, little-endian):
+
+    offset  size  type      field
+    0       4     char[4]   magic b"JCOL"
+    4       1     uint8     format version
+    5       3               reserved (zero)
+    8       4     uint32    header length H
+    12      4               reserved (zero)
+    16      H     UTF-8     JSON header, space padded to a multiple of 8 bytes
+    16+H    ...             column data, each column starting on an 8-byte
+                            boundary (zero padded)
+
+The JSON header holds "metadata" (endpoint specific: request parameters,
+generation time, ...) and "columns", a list of {"name", "dtype", "length",
+"offset"} in data order, where dtype is a NumPy dtype string ("<f8", "|u1",
+"<U7", "<M8[D]", ...) and offset counts bytes from the start of the
+container. Reading a column needs nothing beyond NumPy:
+
+    header_length = int.from_bytes(data[8:12], "little")
+    header = json.loads(data[16:16 + header_length])
+    columns = {c["name"]: np.frombuffer(data, c["dtype"], c["length"], c["offset"])
+               for c in header["columns"]}
+
+Because the header only needs each column's dtype and length, a container can
+be streamed column by column (encode_stream) without holding it in memory.
+"""
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+import json
+import struct
+import numpy as np
+
+MAGIC = b"JCOL"
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+_PREAMBLE = struct.Struct("<4sB3xI4x")
+
+# Booleans, integers, floats, fixed-width strings, datetimes and timedeltas
+SUPPORTED_KINDS = "biufUMm"
+
+# Name, dtype and length of a column
+ColumnSpec = Tuple[str, np.dtype, int]
+
+def _little_endian(dtype: Any) -> np.dtype:
+    dtype = np.dtype(dtype)
+    if dtype.kind not in SUPPORTED_KINDS:
+        raise ValueError(f"Unsupported column dtype: {dtype}")
+    return dtype.newbyteorder("<") if dtype.byteorder not in ("|", "<") else dtype
+
+def _padding(size: int) -> int:
+    return -size % ALIGNMENT
+
+def encode_stream(
+    schema: Sequence[ColumnSpec],
+    columns: Iterable[np.ndarray],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Iterator[bytes]:
+    """
+    Encode a container a column at a time
+
+    Args:
+        schema: Name, dtype and length of every column, in data order
+        columns: The column arrays in schema order, produced lazily if needed
+        metadata: JSON-serializable endpoint metadata
+
+    Raises:
+        ValueError: If a column does not match its schema entry
+    """
+    schema = [(name, _little_endian(dtype), int(length)) for name, dtype, length in schema]
+    # The header length depends on the offsets and the offsets on the header
+    # length: grow the space reserved for the header until the header fits
+    table = [{"name": name, "dtype": dtype.str, "length": length, "offset": 0} for name, dtype, length in schema]
+    header_length = 0
+    while True:
+        position = _PREAMBLE.size + header_length
+        for entry, (_, dtype, length) in zip(table, schema):
+            entry["offset"] = position
+            position += dtype.itemsize * length
+            position += _padding(position)
+        header = json.dumps({"metadata": metadata or {}, "columns": table}, separators=(",", ":")).encode()
+        if len(header) <= header_length:
+            break
+        header_length = len(header) + _padding(len(header))
+    header += b" " * (header_length - len(header))
+
+    yield _PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_length) + header
+    count = 0
+    for (name, dtype, length), array in zip(schema, columns):
+        array = np.ascontiguousarray(array, dtype=dtype)
+        if array.ndim != 1 or len(array) != length:
+            raise ValueError(f"Column {name} has shape {array.shape}, expected ({length},)")
+        data = array.tobytes()
+        yield data + b"\0" * _padding(len(data))
+        count += 1
+    if count != len(schema):
+        raise ValueError(f"{count} columns given for a schema of {len(schema)}")
+
+def schema_of(columns: Mapping[str, np.ndarray]) -> Sequence[ColumnSpec]:
+    """Schema of materialized columns"""
+    return [(name, np.asarray(array).dtype, len(array)) for name, array in columns.items()]
+
+def encode(columns: Mapping[str, np.ndarray], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """Encode named 1-D arrays as a container"""
+    arrays = {name: np.asarray(array) for name, array in columns.items()}
+    return b"".join(encode_stream(schema_of(arrays), arrays.values(), metadata))
+
+def decode(buffer: Any) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Decode a container without copying the column data
+
+    Returns:
+        The metadata and the columns by name (read-only views of the buffer)
+
+    Raises:
+        ValueError: If the buffer is not a container of a supported version
+    """
+    view = memoryview(buffer)
+    if len(view) < _PREAMBLE.size:
+        raise ValueError("Truncated columnar container")
+    magic, version, header_length = _PREAMBLE.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a columnar container")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version: {version}")
+    header = json.loads(bytes(view[_PREAMBLE.size:_PREAMBLE.size + header_length]))
+    columns = {
+        column["name"]: np.frombuffer(view, dtype=column["dtype"], count=column["length"], offset=column["offset"])
+        for column in header["columns"]
+    }
+    return header["metadata"], columns
@@ -0,0 +1,188 @@
+"""
+Ephemeris file footprint
+
+The Swiss Ephemeris distribution covers thousands of years (sepl_* planets,
+semo_* Moon, seas_* asteroids, plus the ep4/ and sat/ sets) while requests are
+limited to MIN_YEAR-MAX_YEAR by api/utils/input_validation.py. This module:
+
+- names the files a date range needs (two 600-year files for 1900-2100)
+- trims an ephemeris directory to those files for deployment:
+
+      python -m api.services.ephemeris_files trim ./ephemeris ./ephemeris_data
+      python -m api.services.ephemeris_files list ./ephemeris
+
+- prewarms the required files into the OS page cache at worker start
+  (JAI_EPHEMERIS_PREWARM), so the first chart does not pay first-touch disk
+  latency; the page cache is shared, so forked and sibling workers reuse it
+- counts the charts calculated from each file (jai_ephemeris_file_accesses_total)
+"""
+from typing import Dict, Iterable, List, Tuple
+from pathlib import Path
+import argparse
+import math
+import os
+import shutil
+import sys
+import logging
+from api.utils.input_validation import MAX_YEAR, MIN_YEAR
+from api.utils.metrics import registry
+
+# Configure logging
+logger = logging.getLogger("jai-api.ephemeris_files")
+
+# Read the required ephemeris files into the page cache at worker start
+EPHEMERIS_PREWARM = os.environ.get("JAI_EPHEMERIS_PREWARM", "true").lower() == "true"
+
+# Years covered by one planet/Moon file
+FILE_SPAN_YEARS = 600
+
+# Non-ephemeris support files kept when trimming (fixed stars, orbital elements)
+SUPPORT_FILES = ("sefstars.txt", "seorbel.txt")
+
+_READ_CHUNK = 1 << 20
+
+FILE_ACCESSES = registry.counter(
+    "jai_ephemeris_file_accesses_total", "Charts calculated from each ephemeris file", ("file",)
+)
+
+def _year(julian_day: float) -> float:
+    return 2000 + (julian_day - 2451545.0) / 365.25
+
+def _suffix(year: float) -> str:
+    block = math.floor(year / FILE_SPAN_YEARS) * (FILE_SPAN_YEARS // 100)
+    return f"_{block:02d}" if block >= 0 else f"m{-block:02d}"
+
+def file_names(julian_day: float) -> Tuple[str, str]:
+    """
+    Planet and Moon ephemeris files covering a Julian day
+
+    Each file covers 600 years starting at a multiple of 600, e.g. sepl_18.se1
+    and semo_18.se1 for 1800-2399 and seplm06.se1 for 600-1 BC.
+    """
+    suffix = _suffix(_year(julian_day))
+    return f"sepl{suffix}.se1", f"semo{suffix}.se1"
+
+def required_files(start_year: int = MIN_YEAR, end_year: int = MAX_YEAR) -> List[str]:
+    """Planet and Moon files needed for the years start_year-end_year (inclusive)"""
+    suffixes = sorted({
+        _suffix(year)
+        for year in range(start_year, end_year + 1, FILE_SPAN_YEARS)
+    } | {_suffix(end_year)})
+    return [f"{prefix}{suffix}.se1" for suffix in suffixes for prefix in ("sepl", "semo")]
+
+def count_access(julian_day: float) -> None:
+    """Record a chart calculated from the files covering the Julian day"""
+    for name in file_names(julian_day):
+        FILE_ACCESSES.inc(name)
+
+def access_counts() -> Dict[str, int]:
+    """Charts calculated from each file since start"""
+    return {labels[0]: int(count) for labels, count in FILE_ACCESSES.samples()}
+
+def resolve_directory(path: Path) -> Path:
+    """The directory holding the .se1 files: the path itself or its ephe/ subdirectory"""
+    if not any(path.glob("*.se1")) and any((path / "ephe").glob("*.se1")):
+        return path / "ephe"
+    return path
+
+def footprint(directory: Path, files: Iterable[str]) -> int:
+    """Total size in bytes of the existing files"""
+    return sum((directory / name).stat().st_size for name in files if (directory / name).is_file())
+
+def _tree_size(directory: Path) -> int:
+    return sum(f.stat().st_size for f in directory.rglob("*") if f.is_file())
+
+def trim(source: Path, destination: Path, start_year: int = MIN_YEAR, end_year: int = MAX_YEAR) -> List[str]:
+    """
+    Copy only the files needed for a year range (plus SUPPORT_FILES)
+
+    Returns:
+        The copied file names
+
+    Raises:
+        FileNotFoundError: If a required planet or Moon file is missing
+    """
+    missing = [name for name in required_files(start_year, end_year) if not (source / name).is_file()]
+    if missing:
+        raise FileNotFoundError(f"Missing ephemeris files in {source}: {', '.join(missing)}")
+
+    destination.mkdir(parents=True, exist_ok=True)
+    copied = []
+    for name in required_files(start_year, end_year) + list(SUPPORT_FILES):
+        if (source / name).is_file():
+            shutil.copy2(source / name, destination / name)
+            copied.append(name)
+    return copied
+
+def prewarm(directory: Path, files: Iterable[str]) -> int:
+    """
+    Read files into the OS page cache
+
+    Returns:
+        Number of bytes read (missing files are skipped)
+    """
+    total = 0
+    buffer = bytearray(_READ_CHUNK)
+    for name in files:
+        path = directory / name
+        try:
+            with open(path, "rb", buffering=0) as f:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    total += read
+        except FileNotFoundError:
+            continue
+    return total
+
+def prewarm_ephemeris() -> None:
+    """Prewarm the files for the supported date range from the configured ephemeris directory"""
+    if not EPHEMERIS_PREWARM:
+        return
+    from api.services import calculation
+    if calculation.USING_MOCK or not calculation.EPHEMERIS_FILES:
+        return
+    try:
+        size = prewarm(calculation.EPHEMERIS_DIR, required_files())
+        logger.info(f"Prewarmed {size} bytes of ephemeris files from {calculation.EPHEMERIS_DIR}")
+    except OSError as e:
+        logger.warning(f"Could not prewarm ephemeris files: {str(e)}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m api.services.ephemeris_files", description="Ephemeris file footprint"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("list", "Show the files a year range needs"),
+                               ("trim", "Copy only the files a year range needs")):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument("source", help="Ephemeris directory")
+        if command == "trim":
+            command_parser.add_argument("destination", help="Directory receiving the trimmed files")
+        command_parser.add_argument("--start-year", type=int, default=MIN_YEAR)
+        command_parser.add_argument("--end-year", type=int, default=MAX_YEAR)
+    args = parser.parse_args(argv)
+
+    source = resolve_directory(Path(args.source))
+    files = required_files(args.start_year, args.end_year)
+    if args.command == "list":
+        for name in files:
+            print(f"{name}{'' if (source / name).is_file() else '  (missing)'}")
+        print(f"{footprint(source, files)} of {_tree_size(source)} bytes needed "
+              f"for {args.start_year}-{args.end_year}")
+        return 0
+
+    try:
+        copied = trim(source, Path(args.destination), args.start_year, args.end_year)
+    except FileNotFoundError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"Copied {len(copied)} files ({footprint(Path(args.destination), copied)} bytes) "
+          f"to {args.destination}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Planetary longitude time series
+
+Longitudes and speeds of the grahas sampled over a range at a fixed step, as
+columns, for plotting and analysis. Instead of one ephemeris call per sample
+and body, each body is calculated exactly only at sparse nodes (NODE_STEPS
+apart, Swiss Ephemeris or the analytical ephemeris) and the samples between
+them are interpolated with cubic Hermite polynomials on the node longitudes
+and speeds. The node spacing keeps the interpolation error below 0.0005
+degrees, a fraction of the 4-decimal precision of the chart endpoints.
+
+The nodes of all bodies are calculated up front (this is where the ephemeris
+time goes); the columns of each body are interpolated only when iterated, so
+a large series can be streamed body by body.
+"""
+from typing import Dict, Iterator, Sequence, Tuple
+import os
+import logging
+import numpy as np
+from api.constants.planets import Planet
+from api.services import calculation, fast_ephemeris
+
+# Configure logging
+logger = logging.getLogger("jai-api.ephemeris_series")
+
+# Longest range (days) and most samples per body of one series
+MAX_SERIES_DAYS = float(os.environ.get("JAI_SERIES_MAX_DAYS", "3660"))
+MAX_SERIES_SAMPLES = int(os.environ.get("JAI_SERIES_MAX_SAMPLES", "500000"))
+
+# Spacing of the exact nodes (days). Cubic Hermite interpolation errs by about
+# h^4 / 384 times the fourth derivative of the longitude: the Moon's largest
+# inequality (6.3 degrees over 27.6 days) needs one node a day, the retrograde
+# loops of the inner planets one every two and the outer bodies one every four
+NODE_STEPS = {
+    Planet.SUN: 2.0,
+    Planet.MOON: 1.0,
+    Planet.MARS: 2.0,
+    Planet.MERCURY: 2.0,
+    Planet.JUPITER: 4.0,
+    Planet.VENUS: 2.0,
+    Planet.SATURN: 4.0,
+    Planet.RAHU: 4.0,
+    Planet.KETU: 4.0,
+}
+
+# dtypes of the columns of each body
+COLUMN_DTYPES = {"longitude": "<f8", "speed": "<f8", "sign": "|u1", "nakshatra": "|u1"}
+
+# Exact positions at the nodes: times, unwrapped longitudes, speeds
+Nodes = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+def sample_times(start: float, end: float, step: float) -> np.ndarray:
+    """
+    Sample Julian days from start to end (inclusive when on the step)
+
+    Raises:
+        ValueError: For an empty or too long range or too many samples
+    """
+    if step <= 0:
+        raise ValueError("step must be positive")
+    if end <= start:
+        raise ValueError("end must be after start")
+    if end - start > MAX_SERIES_DAYS:
+        raise ValueError(f"The range must not exceed {MAX_SERIES_DAYS:g} days")
+    count = int(np.floor((end - start) / step + 1e-9)) + 1
+    if count > MAX_SERIES_SAMPLES:
+        raise ValueError(
+            f"{count} samples requested; at most {MAX_SERIES_SAMPLES} per body (use a larger step)"
+        )
+    return start + step * np.arange(count)
+
+def _node_times(planet: Planet, start: float, end: float) -> np.ndarray:
+    step = NODE_STEPS[planet]
+    return start + step * np.arange(int(np.ceil((end - start) / step)) + 1)
+
+def _swiss_ephemeris_nodes(
+    bodies: Sequence[Planet],
+    start: float,
+    end: float,
+    ayanamsa: str,
+    precision: str
+) -> Dict[Planet, Nodes]:
+    """Nodes from Swiss Ephemeris, one calc_ut call per node and body"""
+    # Files must cover the whole range for it to use them; otherwise Moshier
+    modes = {calculation.resolve_precision(precision, julian_day) for julian_day in (start, end)}
+    mode = calculation.PRECISION_FILE if modes == {calculation.PRECISION_FILE} else calculation.PRECISION_MOSHIER
+    flags = calculation.EPHEMERIS_FLAGS.get(mode)
+    calculation.set_ayanamsa(ayanamsa)
+
+    nodes = {}
+    for planet in bodies:
+        if planet == Planet.KETU and Planet.RAHU in nodes:
+            continue
+        times = _node_times(planet, start, end)
+        positions = [calculation.calculate_planet_position(calculation.PLANETS[planet], float(t), flags) for t in times]
+        longitudes = np.array([position["longitude"] for position in positions])
+        speeds = np.array([position["speed"] for position in positions])
+        nodes[planet] = (times, longitudes, speeds)
+    if Planet.KETU in bodies and Planet.RAHU in nodes:
+        # Ketu is opposite Rahu, at the same speed
+        times, longitudes, speeds = nodes[Planet.RAHU]
+        nodes[Planet.KETU] = (times, np.mod(longitudes + 180.0, 360.0), speeds)
+    return nodes
+
+def _fast_nodes(bodies: Sequence[Planet], start: float, end: float, ayanamsa: str) -> Dict[Planet, Nodes]:
+    """Nodes from the analytical ephemeris, all of a body's in one call"""
+    nodes = {}
+    for planet in bodies:
+        times = _node_times(planet, start, end)
+        position = fast_ephemeris.sidereal_positions(times, ayanamsa)[planet]
+        nodes[planet] = (times, position["longitude"], position["speed"])
+    return nodes
+
+def calculate_nodes(
+    bodies: Sequence[Planet],
+    start: float,
+    end: float,
+    ayanamsa: str = "lahiri",
+    precision: str = calculation.PRECISION_STANDARD
+) -> Dict[Planet, Nodes]:
+    """
+    Exact positions of the bodies at their nodes covering start to end
+
+    Args:
+        precision: One of calculation.PRECISION_MODES
+
+    Returns:
+        Per body, the node times and the longitudes (unwrapped, so consecutive
+        nodes differ by less than 180 degrees) and speeds at them
+
+    Raises:
+        EphemerisUnavailableError: If file precision is requested for an uncovered range
+    """
+    if precision == calculation.PRECISION_FAST:
+        nodes = _fast_nodes(bodies, start, end, ayanamsa)
+    else:
+        nodes = _swiss_ephemeris_nodes(bodies, start, end, ayanamsa, precision)
+    return {
+        planet: (times, np.unwrap(longitudes, period=360.0), speeds)
+        for planet, (times, longitudes, speeds) in nodes.items()
+    }
+
+def interpolate(nodes: Nodes, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Longitude (0-360) and speed at the given times from the cubic Hermite
+    polynomials through the nodes
+    """
+    node_times, longitudes, speeds = nodes
+    index = np.clip(np.searchsorted(node_times, times, side="right") - 1, 0, len(node_times) - 2)
+    h = node_times[index + 1] - node_times[index]
+    s = (times - node_times[index]) / h
+    p0, p1 = longitudes[index], longitudes[index + 1]
+    m0, m1 = speeds[index] * h, speeds[index + 1] * h
+    s2, s3 = s * s, s * s * s
+    longitude = ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0
+                 + (3 * s2 - 2 * s3) * p1 + (s3 - s2) * m1)
+    speed = ((6 * s2 - 6 * s) * (p0 - p1) + (3 * s2 - 4 * s + 1) * m0 + (3 * s2 - 2 * s) * m1) / h
+    return np.mod(longitude, 360.0), speed
+
+def columns(nodes: Nodes, times: np.ndarray) -> Dict[str, np.ndarray]:
+    """Longitude, speed, sign (1-12) and nakshatra (1-27) columns of a body"""
+    longitude, speed = interpolate(nodes, times)
+    return {
+        "longitude": np.round(longitude, 6),
+        "speed": np.round(speed, 6),
+        "sign": (np.floor(longitude / 30.0).astype(int) % 12 + 1).astype(COLUMN_DTYPES["sign"]),
+        "nakshatra": (np.floor(longitude / (360.0 / 27)).astype(int) % 27 + 1).astype(COLUMN_DTYPES["nakshatra"]),
+    }
+
+def ephemeris_series(
+    start: float,
+    end: float,
+    step: float,
+    bodies: Sequence[Planet],
+    ayanamsa: str = "lahiri",
+    precision: str = calculation.PRECISION_STANDARD
+) -> Tuple[np.ndarray, Iterator[Tuple[Planet, Dict[str, np.ndarray]]]]:
+    """
+    Sampled positions of the bodies between two Julian days (UT)
+
+    The nodes are calculated before returning, so ephemeris errors and
+    deadlines surface here; the columns are interpolated lazily.
+
+    Args:
+        start, end: Julian days (UT) of the first and last sample
+        step: Days between samples
+        bodies: Planets to include, in output order
+
+    Returns:
+        The sample times and an iterator of (planet, columns) per body (see
+        columns)
+
+    Raises:
+        ValueError: For an invalid range or step
+        EphemerisUnavailableError: If file precision is requested for an uncovered range
+    """
+    times = sample_times(start, end, step)
+    nodes = calculate_nodes(bodies, start, times[-1], ayanamsa, precision)
+    logger.debug("Series of %d samples for %d bodies from %d nodes",
+                 len(times), len(bodies), sum(len(node[0]) for node in nodes.values()))
+    return times, ((planet, columns(nodes[planet], times)) for planet in bodies)
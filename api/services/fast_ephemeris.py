@@ -0,0 +1,331 @@
+"""
+Fast analytical ephemeris
+
+A low-precision ephemeris in pure NumPy, for answers that only need the sign,
+nakshatra and house of the grahas (precision=fast), for load tests and as a
+degraded mode without ephemeris files:
+
+- Sun and planets: JPL's Keplerian elements with secular rates ("Approximate
+  Positions of the Major Planets", E.M. Standish), geocentric via the
+  Earth-Moon barycenter, precessed to the equinox of date
+- Moon: the main periodic terms of ELP-2000/82 as truncated by Meeus
+  (Astronomical Algorithms, ch. 47)
+- Rahu/Ketu: the mean lunar node (Meeus 47.7)
+- ascendant: apparent sidereal time and obliquity (Meeus ch. 12, 22)
+- ayanamsa: value at J2000 plus general precession
+
+Longitudes are apparent (main nutation terms, solar aberration) like the
+Swiss Ephemeris positions the rest of the service uses, and sidereal values are
+derived the same way (tropical minus ayanamsa). Against Swiss Ephemeris over
+1900-2100 the longitude errors stay within 0.06 degree for the Sun, Moon,
+Mercury, Venus, Mars and the nodes, 0.2 degree for Jupiter and 0.4 degree for
+Saturn (mutual perturbations are not modelled), and 0.01 degree for the
+ascendant; Delta T, light time and planetary aberration are ignored.
+
+Every function accepts scalars or NumPy arrays of Julian days (UT), so many
+instants are computed in one vectorized pass.
+"""
+from typing import Any, Dict, Tuple, Union
+import numpy as np
+from api.constants.planets import Planet
+from api.services.chart_record import FLAG_FAST_EPHEMERIS
+
+ArrayLike = Union[float, np.ndarray]
+
+J2000 = 2451545.0
+DAYS_PER_CENTURY = 36525.0
+
+# Ayanamsa at J2000 (degrees), matching the Swiss Ephemeris definitions
+AYANAMSA_J2000 = {
+    "lahiri": 23.857092325,
+    "raman": 22.410791012,
+    "krishnamurti": 23.760240012,
+}
+
+# Keplerian elements at J2000 and their rates per Julian century (valid
+# 1800-2050, usable to 2100), one row per body in _BODIES: a (AU), e, I, L,
+# longitude of perihelion, longitude of the ascending node (degrees)
+_BODIES = ("earth", "mercury", "venus", "mars", "jupiter", "saturn")
+_ELEMENTS = np.array([
+    (1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0),
+    (0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593),
+    (0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255),
+    (1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891),
+    (5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909),
+    (9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448),
+])
+_ELEMENT_RATES = np.array([
+    (0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0),
+    (0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081),
+    (0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418),
+    (0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343),
+    (-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106),
+    (-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794),
+])
+
+# Planets computed from the elements (rows 1-5 of _ELEMENTS)
+_ELEMENT_PLANETS = (Planet.MERCURY, Planet.VENUS, Planet.MARS, Planet.JUPITER, Planet.SATURN)
+
+# Moon longitude terms (Meeus table 47.A): multiples of D, M, M', F and the
+# coefficient in 1e-6 degrees
+_MOON_LONGITUDE = np.array([
+    (0, 0, 1, 0, 6288774), (2, 0, -1, 0, 1274027), (2, 0, 0, 0, 658314),
+    (0, 0, 2, 0, 213618), (0, 1, 0, 0, -185116), (0, 0, 0, 2, -114332),
+    (2, 0, -2, 0, 58793), (2, -1, -1, 0, 57066), (2, 0, 1, 0, 53322),
+    (2, -1, 0, 0, 45758), (0, 1, -1, 0, -40923), (1, 0, 0, 0, -34720),
+    (0, 1, 1, 0, -30383), (2, 0, 0, -2, 15327), (0, 0, 1, 2, -12528),
+    (0, 0, 1, -2, 10980), (4, 0, -1, 0, 10675), (0, 0, 3, 0, 10034),
+    (4, 0, -2, 0, 8548), (2, 1, -1, 0, -7888), (2, 1, 0, 0, -6766),
+    (1, 0, -1, 0, -5163), (1, 1, 0, 0, 4987), (2, -1, 1, 0, 4036),
+    (2, 0, 2, 0, 3994), (4, 0, 0, 0, 3861), (2, 0, -3, 0, 3665),
+    (0, 1, -2, 0, -2689), (2, 0, -1, 2, -2602), (2, -1, -2, 0, 2390),
+    (1, 0, 1, 0, -2348), (2, -2, 0, 0, 2236), (0, 1, 2, 0, -2120),
+    (0, 2, 0, 0, -2069), (2, -2, -1, 0, 2048), (2, 0, 1, -2, -1773),
+    (2, 0, 0, 2, -1595), (4, -1, -1, 0, 1215), (0, 0, 2, 2, -1110),
+    (3, 0, -1, 0, -892), (2, 1, 1, 0, -810), (4, -1, -2, 0, 759),
+    (0, 2, -1, 0, -713), (2, 2, -1, 0, -700), (2, 1, -2, 0, 691),
+    (2, -1, 0, -2, 596), (4, 0, 1, 0, 549), (0, 0, 4, 0, 537),
+    (4, -1, 0, 0, 520), (1, 0, -2, 0, -487),
+], dtype=float)
+
+# Moon latitude terms (Meeus table 47.B)
+_MOON_LATITUDE = np.array([
+    (0, 0, 0, 1, 5128122), (0, 0, 1, 1, 280602), (0, 0, 1, -1, 277693),
+    (2, 0, 0, -1, 173237), (2, 0, -1, 1, 55413), (2, 0, -1, -1, 46271),
+    (2, 0, 0, 1, 32573), (0, 0, 2, 1, 17198), (2, 0, 1, -1, 9266),
+    (0, 0, 2, -1, 8822), (2, -1, 0, -1, 8216), (2, 0, -2, -1, 4324),
+    (2, 0, 1, 1, 4200), (2, 1, 0, -1, -3359), (2, -1, -1, 1, 2463),
+    (2, -1, 0, 1, 2211), (2, -1, -1, -1, 2065), (0, 1, -1, -1, -1870),
+    (4, 0, -1, -1, 1828), (0, 1, 0, 1, -1794), (0, 0, 0, 3, -1749),
+    (0, 1, -1, 1, -1565), (1, 0, 0, 1, -1491), (0, 1, 1, 1, -1475),
+    (0, 1, 1, -1, -1410), (0, 1, 0, -1, -1344), (1, 0, 0, -1, -1335),
+    (0, 0, 3, 1, 1107), (4, 0, 0, -1, 1021), (4, 0, -1, 1, 833),
+], dtype=float)
+
+# Step for the speeds (central difference), in days
+_SPEED_STEP = 0.05
+
+def _centuries(julian_day: ArrayLike) -> np.ndarray:
+    return (np.asarray(julian_day, dtype=float) - J2000) / DAYS_PER_CENTURY
+
+def _normalize(degrees: np.ndarray) -> np.ndarray:
+    return np.mod(degrees, 360.0)
+
+def nutation(julian_day: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Nutation in longitude and obliquity (degrees), main terms"""
+    t = _centuries(julian_day)
+    node = np.radians(125.04452 - 1934.136261 * t)
+    sun = np.radians(2 * (280.4665 + 36000.7698 * t))
+    moon = np.radians(2 * (218.3165 + 481267.8813 * t))
+    psi = -17.20 * np.sin(node) - 1.32 * np.sin(sun) - 0.23 * np.sin(moon) + 0.21 * np.sin(2 * node)
+    eps = 9.20 * np.cos(node) + 0.57 * np.cos(sun) + 0.10 * np.cos(moon) - 0.09 * np.cos(2 * node)
+    return psi / 3600.0, eps / 3600.0
+
+def obliquity(julian_day: ArrayLike) -> np.ndarray:
+    """True obliquity of the ecliptic (degrees)"""
+    t = _centuries(julian_day)
+    mean = 23.439291111 - (46.8150 * t + 0.00059 * t ** 2 - 0.001813 * t ** 3) / 3600.0
+    return mean + nutation(julian_day)[1]
+
+def _precession(t: np.ndarray) -> np.ndarray:
+    """General precession in longitude since J2000 (degrees)"""
+    return (5029.0966 * t + 1.11113 * t ** 2) / 3600.0
+
+def ayanamsa(julian_day: ArrayLike, name: str = "lahiri") -> np.ndarray:
+    """Ayanamsa (degrees) for an ayanamsa name (unknown names use Lahiri)"""
+    t = _centuries(julian_day)
+    base = AYANAMSA_J2000.get(name.lower(), AYANAMSA_J2000["lahiri"])
+    return base + (5028.796195 * t + 1.1054348 * t ** 2) / 3600.0
+
+def _heliocentric(t: np.ndarray, bodies: int = len(_BODIES)) -> np.ndarray:
+    """
+    Heliocentric ecliptic coordinates (J2000 ecliptic and equinox, AU) of the
+    first bodies of _BODIES, shape (3, bodies, *t.shape)
+    """
+    t = t[np.newaxis, ...]
+    shape = (-1,) + (1,) * (t.ndim - 1)
+    elements = [
+        value.reshape(shape) + rate.reshape(shape) * t
+        for value, rate in zip(_ELEMENTS[:bodies].T, _ELEMENT_RATES[:bodies].T)
+    ]
+    a, e, inclination, mean_longitude, perihelion, node = elements
+    mean_anomaly = np.radians(np.mod(mean_longitude - perihelion + 180.0, 360.0) - 180.0)
+    eccentric = mean_anomaly + e * np.sin(mean_anomaly)
+    for _ in range(5):
+        eccentric = eccentric - (eccentric - e * np.sin(eccentric) - mean_anomaly) / (1 - e * np.cos(eccentric))
+
+    x_orbit = a * (np.cos(eccentric) - e)
+    y_orbit = a * np.sqrt(1 - e ** 2) * np.sin(eccentric)
+
+    omega = np.radians(perihelion - node)
+    node = np.radians(node)
+    inclination = np.radians(inclination)
+    cos_w, sin_w = np.cos(omega), np.sin(omega)
+    cos_n, sin_n = np.cos(node), np.sin(node)
+    cos_i, sin_i = np.cos(inclination), np.sin(inclination)
+
+    x = (cos_w * cos_n - sin_w * sin_n * cos_i) * x_orbit + (-sin_w * cos_n - cos_w * sin_n * cos_i) * y_orbit
+    y = (cos_w * sin_n + sin_w * cos_n * cos_i) * x_orbit + (-sin_w * sin_n + cos_w * cos_n * cos_i) * y_orbit
+    z = (sin_w * sin_i) * x_orbit + (cos_w * sin_i) * y_orbit
+    return np.array([x, y, z])
+
+def _to_longitude_latitude(vector: np.ndarray, shift: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Longitude (plus shift, e.g. precession and nutation) and latitude of a
+    J2000 ecliptic vector
+    """
+    x, y, z = vector
+    longitude = np.degrees(np.arctan2(y, x)) + shift
+    latitude = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    return _normalize(longitude), latitude
+
+def _apparent_shift(julian_day: ArrayLike) -> np.ndarray:
+    """Precession from J2000 plus nutation in longitude (degrees)"""
+    return _precession(_centuries(julian_day)) + nutation(julian_day)[0]
+
+def sun_and_planet_positions(julian_day: ArrayLike) -> Dict[Planet, Tuple[np.ndarray, np.ndarray]]:
+    """Apparent tropical longitude and latitude of the Sun and Mercury to Saturn (degrees)"""
+    helio = _heliocentric(_centuries(julian_day))
+    earth = helio[:, 0]
+    shift = _apparent_shift(julian_day)
+
+    sun_longitude, sun_latitude = _to_longitude_latitude(-earth, shift)
+    # Annual aberration
+    positions = {Planet.SUN: (_normalize(sun_longitude - 20.4898 / 3600.0), sun_latitude)}
+    longitudes, latitudes = _to_longitude_latitude(helio[:, 1:] - earth[:, np.newaxis], shift)
+    for index, planet in enumerate(_ELEMENT_PLANETS):
+        positions[planet] = (longitudes[index], latitudes[index])
+    return positions
+
+def sun_longitude(julian_day: ArrayLike) -> np.ndarray:
+    """Apparent tropical longitude of the Sun (degrees), without the planets"""
+    earth = _heliocentric(_centuries(julian_day), bodies=1)[:, 0]
+    longitude, _ = _to_longitude_latitude(-earth, _apparent_shift(julian_day))
+    return _normalize(longitude - 20.4898 / 3600.0)
+
+def moon_position(julian_day: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """Apparent tropical longitude and latitude of the Moon (degrees)"""
+    t = _centuries(julian_day)
+    mean_longitude = 218.3164477 + 481267.88123421 * t - 0.0015786 * t ** 2 + t ** 3 / 538841 - t ** 4 / 65194000
+    elongation = 297.8501921 + 445267.1114034 * t - 0.0018819 * t ** 2 + t ** 3 / 545868 - t ** 4 / 113065000
+    sun_anomaly = 357.5291092 + 35999.0502909 * t - 0.0001536 * t ** 2 + t ** 3 / 24490000
+    moon_anomaly = 134.9633964 + 477198.8675055 * t + 0.0087414 * t ** 2 + t ** 3 / 69699 - t ** 4 / 14712000
+    latitude_argument = 93.2720950 + 483202.0175233 * t - 0.0036539 * t ** 2 - t ** 3 / 3526000 + t ** 4 / 863310000
+    a1 = np.radians(119.75 + 131.849 * t)
+    a2 = np.radians(53.09 + 479264.290 * t)
+    a3 = np.radians(313.45 + 481266.484 * t)
+    eccentricity = 1 - 0.002516 * t - 0.0000074 * t ** 2
+
+    arguments = np.radians(np.array([elongation, sun_anomaly, moon_anomaly, latitude_argument]))
+    arguments = arguments.reshape(4, -1)
+    ecc = np.reshape(eccentricity, -1)
+
+    def series(table: np.ndarray, function) -> np.ndarray:
+        angles = table[:, :4] @ arguments
+        # Terms with the Sun's anomaly are scaled by E (E^2 for 2M)
+        scale = ecc[np.newaxis, :] ** np.abs(table[:, 1:2])
+        return (table[:, 4:5] * scale * function(angles)).sum(axis=0)
+
+    sum_longitude = series(_MOON_LONGITUDE, np.sin).reshape(np.shape(t))
+    sum_latitude = series(_MOON_LATITUDE, np.sin).reshape(np.shape(t))
+
+    l_rad = np.radians(mean_longitude)
+    f_rad = np.radians(latitude_argument)
+    m_rad = np.radians(moon_anomaly)
+    sum_longitude = sum_longitude + 3958 * np.sin(a1) + 1962 * np.sin(l_rad - f_rad) + 318 * np.sin(a2)
+    sum_latitude = (sum_latitude - 2235 * np.sin(l_rad) + 382 * np.sin(a3) + 175 * np.sin(a1 - f_rad)
+                    + 175 * np.sin(a1 + f_rad) + 127 * np.sin(l_rad - m_rad) - 115 * np.sin(l_rad + m_rad))
+
+    longitude = mean_longitude + sum_longitude / 1e6 + nutation(julian_day)[0]
+    return _normalize(longitude), sum_latitude / 1e6
+
+def mean_node(julian_day: ArrayLike) -> np.ndarray:
+    """Tropical longitude of the mean ascending lunar node (degrees)"""
+    t = _centuries(julian_day)
+    node = 125.0445479 - 1934.1362891 * t + 0.0020754 * t ** 2 + t ** 3 / 467441 - t ** 4 / 60616000
+    return _normalize(node + nutation(julian_day)[0])
+
+def tropical_positions(julian_day: ArrayLike) -> Dict[Planet, Tuple[np.ndarray, np.ndarray]]:
+    """Apparent tropical longitude and latitude of the nine grahas"""
+    positions = sun_and_planet_positions(julian_day)
+    node = mean_node(julian_day)
+    positions[Planet.MOON] = moon_position(julian_day)
+    positions[Planet.RAHU] = (node, np.zeros_like(node))
+    positions[Planet.KETU] = (_normalize(node + 180.0), np.zeros_like(node))
+    return positions
+
+def sidereal_positions(julian_day: ArrayLike, ayanamsa_name: str = "lahiri") -> Dict[Planet, Dict[str, np.ndarray]]:
+    """
+    Sidereal longitude, latitude and speed (degrees/day) of the nine grahas
+
+    Args:
+        julian_day: Julian day(s), UT
+        ayanamsa_name: Ayanamsa name
+
+    Returns:
+        Arrays (or scalars) by planet, with the keys "longitude", "latitude"
+        and "speed"
+    """
+    julian_day = np.asarray(julian_day, dtype=float)
+    offset = ayanamsa(julian_day, ayanamsa_name)
+    # The instant and its neighbours for the speeds, in a single pass
+    stacked = tropical_positions(np.stack([julian_day, julian_day - _SPEED_STEP, julian_day + _SPEED_STEP]))
+
+    result = {}
+    for planet in Planet:
+        (longitude, before, after), (latitude, _, _) = stacked[planet]
+        # Wrap the difference into (-180, 180] before dividing
+        delta = np.mod(after - before + 180.0, 360.0) - 180.0
+        result[planet] = {
+            "longitude": _normalize(longitude - offset),
+            "latitude": latitude,
+            "speed": delta / (2 * _SPEED_STEP),
+        }
+    return result
+
+def sidereal_time(julian_day: ArrayLike) -> np.ndarray:
+    """Apparent Greenwich sidereal time (degrees)"""
+    t = _centuries(julian_day)
+    mean = (280.46061837 + 360.98564736629 * (np.asarray(julian_day, dtype=float) - J2000)
+            + 0.000387933 * t ** 2 - t ** 3 / 38710000)
+    psi, _ = nutation(julian_day)
+    return _normalize(mean + psi * np.cos(np.radians(obliquity(julian_day))))
+
+def ascendant(julian_day: ArrayLike, latitude: ArrayLike, longitude: ArrayLike, ayanamsa_name: str = "lahiri") -> np.ndarray:
+    """Sidereal ascendant longitude (degrees) for geographic latitude/longitude (east positive)"""
+    ramc = np.radians(sidereal_time(julian_day) + np.asarray(longitude, dtype=float))
+    eps = np.radians(obliquity(julian_day))
+    phi = np.radians(np.asarray(latitude, dtype=float))
+    tropical = np.degrees(np.arctan2(np.cos(ramc), -(np.sin(ramc) * np.cos(eps) + np.tan(phi) * np.sin(eps))))
+    return _normalize(tropical - ayanamsa(julian_day, ayanamsa_name))
+
+def chart_record(
+    julian_day: float,
+    birth_date: str,
+    birth_time: str,
+    latitude: float,
+    longitude: float,
+    timezone_offset: float,
+    ayanamsa_name: str
+) -> Dict[str, Any]:
+    """A chart record (see calculation.calculate_chart_record) from the fast ephemeris"""
+    positions = sidereal_positions(julian_day, ayanamsa_name)
+    return {
+        "birth_date": birth_date,
+        "birth_time": birth_time,
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone_offset": timezone_offset,
+        "ayanamsa": ayanamsa_name,
+        "julian_day": julian_day,
+        "ascendant": float(ascendant(julian_day, latitude, longitude, ayanamsa_name)),
+        "planets": {
+            planet.value: {
+                "longitude": round(float(position["longitude"]), 4),
+                "latitude": round(float(position["latitude"]), 4),
+                "speed": round(float(position["speed"]), 4),
+            }
+            for planet, position in positions.items()
+        },
+        "flags": FLAG_FAST_EPHEMERIS
+    }
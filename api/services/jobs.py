@@ -0,0 +1,518 @@
+"""
+Batch jobs
+
+Chart batches too large for one request - hundreds of thousands of birth
+records for research - run as jobs in the background of the API process.
+Every job is a directory under JAI_JOBS_DIR:
+
+    <job_id>/
+        input.csv | input.ndjson    the uploaded birth records
+        job.json                    state and progress
+        results-00000.ndjson.gz     results of the first JAI_JOB_CHUNK_SIZE records
+        results-00001.ndjson.gz     ...
+        lock                        locked (flock) by the process running the job
+
+A runner thread reads the records a chunk at a time, validates (geocodes)
+them and hands the chart calculations of the chunk to a pool of worker
+processes, warmed up like those of the calculation pool (see worker_pool).
+The results - batch results as returned by /v1/api/charts/batch, one per line
+in input order - are written to a gzip-compressed shard, atomically, and the
+progress is recorded in job.json. The shards are the checkpoints: a job
+interrupted by a crash or restart resumes at its first missing shard when the
+runner starts again, instead of starting over.
+
+Everything lives on the local disk, so no external queue is needed; the lock
+keeps the processes of a box from running a job twice. Charts calculated by
+jobs are not added to the chart store (a large job would only flush it);
+their chart_id is the one the chart endpoints give the same birth details.
+"""
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from datetime import datetime
+from itertools import count, islice
+from pathlib import Path
+import csv
+import fcntl
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+import logging
+from api.models.response import BatchChartResult
+from api.services.batch import calculation_error, chart_result, error_result, validate_entry
+from api.services.chart_record import RECORD_SIZE, decode
+from api.services.chart_store import make_chart_id
+from api.services.worker_pool import CHART_TASK_FIELDS, calculate_batch, init_worker, worker_context
+from api.utils.error_handling import ErrorCode
+from api.utils.logging_config import log_event
+from api.utils.streaming import ndjson_line
+
+# Configure logging
+logger = logging.getLogger("jai-api.jobs")
+
+# Job configuration
+JOBS_DIR = os.environ.get("JAI_JOBS_DIR", "./cache/jobs")
+JOB_WORKERS = int(os.environ.get("JAI_JOB_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+JOB_CHUNK_SIZE = int(os.environ.get("JAI_JOB_CHUNK_SIZE", "1000"))
+MAX_JOB_RECORDS = int(os.environ.get("JAI_JOB_MAX_RECORDS", "1000000"))
+MAX_JOB_UPLOAD_BYTES = int(float(os.environ.get("JAI_JOB_MAX_UPLOAD_MB", "256")) * 1024 * 1024)
+JOB_RETENTION = float(os.environ.get("JAI_JOB_RETENTION_DAYS", "7")) * 24 * 3600
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Input file of each upload format
+JOB_FORMATS = {"csv": "input.csv", "ndjson": "input.ndjson"}
+
+# Job IDs are random UUIDs (32 hex characters)
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Calculations of a chunk whose worker process crashed are retried once; the
+# entries of a chunk that crashes a worker again get error results
+CHUNK_ATTEMPTS = 2
+CHUNK_CRASHED = "The calculation worker crashed on the chunk of this record"
+
+def is_valid_job_id(job_id: str) -> bool:
+    """Check that a job ID is well formed (also guards the job directory paths)"""
+    return bool(JOB_ID_PATTERN.match(job_id))
+
+def shard_name(shard: int) -> str:
+    """File name of a result shard"""
+    return f"results-{shard:05d}.ndjson.gz"
+
+def read_records(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Birth records of an input file, as dictionaries of request fields
+
+    CSV files have a header row naming the fields (birth_date, birth_time,
+    place, ayanamsa, ...); empty cells are left out, so those fields get their
+    defaults. NDJSON files have one JSON object per line. Blank lines are
+    skipped.
+
+    Raises:
+        ValueError: For a malformed line or a CSV file without a header row
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            if not reader.fieldnames:
+                raise ValueError("The CSV file has no header row")
+            try:
+                for row in reader:
+                    record = {name.strip(): value.strip() for name, value in row.items()
+                              if name and value and value.strip()}
+                    if record:
+                        yield record
+            except csv.Error as e:
+                raise ValueError(f"Line {reader.line_num} is not valid CSV: {str(e)}")
+            return
+
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {number} is not valid JSON: {e.msg}")
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {number} is not a JSON object")
+            yield record
+
+def read_results(path: Path) -> Iterator[Dict[str, Any]]:
+    """Batch results (dictionary form) of a result shard"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+class _Chunk:
+    """Records of a job being calculated"""
+
+    def __init__(self, shard: int, first: int, size: int):
+        self.shard = shard
+        self.first = first
+        # Result of each record; None until its chart is calculated
+        self.results: List[Optional[BatchChartResult]] = [None] * size
+        # Chart parameters of the valid records (CHART_TASK_FIELDS order),
+        # with the position and chart ID of each
+        self.tasks: List[Tuple] = []
+        self.slots: List[Tuple[int, str]] = []
+        self.future: Optional[Future] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+class JobRunner:
+    """Runs batch jobs from their directories, a chunk at a time"""
+
+    def __init__(
+        self,
+        directory: str = JOBS_DIR,
+        workers: int = JOB_WORKERS,
+        chunk_size: int = JOB_CHUNK_SIZE
+    ):
+        """
+        Initialize the job runner.
+
+        Args:
+            directory: Directory holding the job directories
+            workers: Worker processes calculating charts (0 calculates in the
+                runner thread)
+            chunk_size: Records per chunk (and result shard) of new jobs
+        """
+        self._directory = Path(directory)
+        self._workers = workers
+        self._chunk_size = max(1, chunk_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self._directory / job_id
+
+    def start(self) -> None:
+        """Start the runner thread and queue the unfinished jobs found on disk (no-op when running)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            for job_id in self._unfinished_jobs():
+                self._queue.put(job_id)
+            self._thread = threading.Thread(target=self._run, name="jai-jobs", daemon=True)
+            self._thread.start()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the runner; interrupted jobs resume when a runner starts again"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._stopping.set()
+            self._queue.put(None)
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        thread.join(timeout)
+
+    def create(self, fmt: str) -> Tuple[str, Path]:
+        """
+        Create the directory of a new job
+
+        Returns:
+            Tuple of (job ID, path the input file is to be written to)
+
+        Raises:
+            ValueError: For an unknown input format
+        """
+        if fmt not in JOB_FORMATS:
+            raise ValueError(f"Unknown input format {fmt}. Options: {', '.join(JOB_FORMATS)}")
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        job_dir.mkdir(parents=True)
+        return job_id, job_dir / JOB_FORMATS[fmt]
+
+    def submit(self, job_id: str, fmt: str) -> Dict[str, Any]:
+        """
+        Queue a job whose input file has been written (see create)
+
+        The records are read once here, to check and count them.
+
+        Returns:
+            The state of the job
+
+        Raises:
+            ValueError: For a malformed or empty input or too many records; the
+                job directory is removed
+        """
+        try:
+            total = 0
+            for _ in read_records(self._job_dir(job_id) / JOB_FORMATS[fmt], fmt):
+                total += 1
+                if total > MAX_JOB_RECORDS:
+                    raise ValueError(f"A job must not have more than {MAX_JOB_RECORDS} records")
+            if total == 0:
+                raise ValueError("The upload contains no birth records")
+        except ValueError:
+            self.discard(job_id)
+            raise
+
+        now = datetime.utcnow().isoformat()
+        state = {
+            "job_id": job_id,
+            "status": QUEUED,
+            "format": fmt,
+            "total": total,
+            "chunk_size": self._chunk_size,
+            "shards": {},
+            "created_at": now,
+            "updated_at": now,
+            "error": None
+        }
+        # Started before the job is saved, so the start-up scan does not queue it too
+        self.start()
+        self._save(state)
+        self._queue.put(job_id)
+        log_event(logger, "job_submitted", logging.INFO, job_id=job_id, format=fmt, records=total)
+        return state
+
+    def discard(self, job_id: str) -> None:
+        """Remove the directory of a job"""
+        if is_valid_job_id(job_id):
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the state of a job
+
+        Returns:
+            The state (as saved in job.json), or None for an unknown job
+        """
+        if not is_valid_job_id(job_id):
+            return None
+        return self._load(job_id)
+
+    def result_path(self, job_id: str, shard: int) -> Optional[Path]:
+        """Path of a written result shard, or None"""
+        if not is_valid_job_id(job_id) or shard < 0:
+            return None
+        path = self._job_dir(job_id) / shard_name(shard)
+        return path if path.exists() else None
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._job_dir(job_id) / "job.json", "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error(f"Error reading the state of job {job_id}: {str(e)}")
+            return None
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        """Write the state of a job, replacing job.json atomically"""
+        state["updated_at"] = datetime.utcnow().isoformat()
+        path = self._job_dir(state["job_id"]) / "job.json"
+        temp_file = path.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(state, f)
+        temp_file.replace(path)
+
+    def _unfinished_jobs(self) -> List[str]:
+        """IDs of the queued and interrupted jobs on disk, oldest first; expired jobs are removed"""
+        if not self._directory.exists():
+            return []
+        unfinished = []
+        for job_dir in self._directory.iterdir():
+            if not is_valid_job_id(job_dir.name):
+                continue
+            state = self._load(job_dir.name)
+            if state is not None and state["status"] in (QUEUED, RUNNING):
+                unfinished.append((state["created_at"], job_dir.name))
+                continue
+            # Finished jobs, and uploads that never completed
+            try:
+                age = time.time() - (job_dir / "job.json" if state else job_dir).stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if age > JOB_RETENTION:
+                self.discard(job_dir.name)
+        if unfinished:
+            logger.info(f"Resuming {len(unfinished)} unfinished jobs")
+        return [job_id for _, job_id in sorted(unfinished)]
+
+    def _run(self) -> None:
+        """Runner thread: runs the queued jobs one after the other"""
+        while True:
+            job_id = self._queue.get()
+            if job_id is None or self._stopping.is_set():
+                return
+            try:
+                self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"Error running job {job_id}: {str(e)}", exc_info=True)
+
+    def _claim(self, job_id: str) -> Optional[IO]:
+        """Lock a job for this process; None if another process runs it"""
+        lock = open(self._job_dir(job_id) / "lock", "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return None
+        return lock
+
+    def _run_job(self, job_id: str) -> None:
+        lock = self._claim(job_id)
+        if lock is None:
+            logger.info(f"Job {job_id} is run by another process")
+            return
+        try:
+            state = self._load(job_id)
+            if state is None or state["status"] not in (QUEUED, RUNNING):
+                return
+            state["status"] = RUNNING
+            self._save(state)
+
+            started = time.monotonic()
+            try:
+                calculated = self._process(state)
+            except Exception as e:
+                if self._stopping.is_set():
+                    return
+                logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+                state["status"] = FAILED
+                state["error"] = str(e)
+                self._save(state)
+                return
+            if self._stopping.is_set():
+                return
+
+            state["status"] = COMPLETED
+            self._save(state)
+            elapsed = time.monotonic() - started
+            log_event(logger, "job_completed", logging.INFO, job_id=job_id, records=state["total"], calculated=calculated,
+                      seconds=round(elapsed, 1), charts_per_second=round(calculated / elapsed, 1) if elapsed else None)
+        finally:
+            lock.close()
+
+    def _process(self, state: Dict[str, Any]) -> int:
+        """
+        Calculate the chunks of a job that have no result shard yet
+
+        Returns:
+            Number of records calculated (not taken from existing shards)
+        """
+        job_dir = self._job_dir(state["job_id"])
+        # The chunk size the job was created with, so the shards line up
+        # after a restart with another setting
+        chunk_size = state["chunk_size"]
+        records = read_records(job_dir / JOB_FORMATS[state["format"]], state["format"])
+        in_flight: "deque[_Chunk]" = deque()
+        calculated = 0
+
+        for shard in count():
+            entries = list(islice(records, chunk_size))
+            if not entries or self._stopping.is_set():
+                break
+            if str(shard) in state["shards"]:
+                continue
+            path = job_dir / shard_name(shard)
+            if path.exists():
+                # Written just before an interruption, but not recorded
+                self._record(state, shard, [BatchChartResult(**result) for result in read_results(path)])
+                continue
+
+            in_flight.append(self._start_chunk(shard, shard * chunk_size, entries))
+            calculated += len(entries)
+            # Keep every worker busy while the next chunk is validated
+            while len(in_flight) > max(1, self._workers):
+                self._finish_chunk(state, in_flight.popleft())
+
+        while in_flight and not self._stopping.is_set():
+            self._finish_chunk(state, in_flight.popleft())
+        return calculated
+
+    def _start_chunk(self, shard: int, first: int, entries: List[Dict[str, Any]]) -> _Chunk:
+        """Validate the records of a chunk and start calculating the valid ones"""
+        chunk = _Chunk(shard, first, len(entries))
+        for offset, entry in enumerate(entries):
+            request = validate_entry(first + offset, entry)
+            if isinstance(request, BatchChartResult):
+                chunk.results[offset] = request
+                continue
+            chunk.tasks.append(tuple(getattr(request, field) for field in CHART_TASK_FIELDS))
+            chunk.slots.append((offset, make_chart_id(request.chart_params())))
+        chunk.future, chunk.executor = self._submit(chunk.tasks)
+        return chunk
+
+    def _submit(self, tasks: List[Tuple]) -> Tuple[Future, Optional[ProcessPoolExecutor]]:
+        """Start calculating chart tasks, in a worker process when there are workers"""
+        if self._workers > 0 and tasks:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                        mp_context=worker_context(),
+                        initializer=init_worker
+                    )
+                executor = self._executor
+            try:
+                return executor.submit(calculate_batch, tasks, [None] * len(tasks)), executor
+            except BrokenProcessPool:
+                # Broken by a crash on another chunk, which is retried when collected
+                self._restart(executor)
+                return self._submit(tasks)
+
+        future: Future = Future()
+        future.set_result(calculate_batch(tasks, [None] * len(tasks)))
+        return future, None
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Replace a broken executor (once, however many chunks it failed)"""
+        with self._lock:
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = None
+
+    def _calculated(self, chunk: _Chunk) -> Tuple[Optional[bytearray], Dict[int, Exception]]:
+        """
+        Records and errors of the tasks of a chunk, retried if a worker crashed
+
+        Returns:
+            Tuple of (encoded records, errors by task index); the records are
+            None if the chunk crashed its worker every time
+        """
+        for attempt in range(1, CHUNK_ATTEMPTS + 1):
+            try:
+                return chunk.future.result()
+            except BrokenProcessPool as e:
+                if self._stopping.is_set():
+                    raise
+                logger.error(f"Job worker crashed calculating records {chunk.first} to "
+                             f"{chunk.first + len(chunk.results) - 1}: {str(e)}")
+                self._restart(chunk.executor)
+                if attempt < CHUNK_ATTEMPTS:
+                    chunk.future, chunk.executor = self._submit(chunk.tasks)
+
+        return None, {}
+
+    def _finish_chunk(self, state: Dict[str, Any], chunk: _Chunk) -> None:
+        """Collect the calculations of a chunk and write its result shard"""
+        buffer, errors = self._calculated(chunk)
+        for task_index, (offset, chart_id) in enumerate(chunk.slots):
+            index = chunk.first + offset
+            if buffer is None:
+                chunk.results[offset] = error_result(index, ErrorCode.CALCULATION_ERROR, CHUNK_CRASHED)
+            elif task_index in errors:
+                chunk.results[offset] = calculation_error(index, errors[task_index])
+            else:
+                record = decode(buffer, task_index * RECORD_SIZE).to_dict()
+                chunk.results[offset] = chart_result(index, chart_id, record)
+
+        path = self._job_dir(state["job_id"]) / shard_name(chunk.shard)
+        temp_file = path.with_suffix(".tmp")
+        with gzip.open(temp_file, "wb", compresslevel=6) as f:
+            for result in chunk.results:
+                f.write(ndjson_line(result))
+        temp_file.replace(path)
+        self._record(state, chunk.shard, chunk.results)
+
+    def _record(self, state: Dict[str, Any], shard: int, results: List[BatchChartResult]) -> None:
+        """Record the results of a shard in the job state"""
+        state["shards"][str(shard)] = {
+            "records": len(results),
+            "failed": sum(result.status == "error" for result in results)
+        }
+        self._save(state)
+
+# Create singleton instance
+job_runner = JobRunner()
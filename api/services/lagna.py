@@ -0,0 +1,251 @@
+"""
+Lagna (ascendant) sign transitions
+
+The ascendant runs through the twelve signs every sidereal day, at a rate
+that depends on the sign and the latitude (long and short ascension). A sign
+rises when its first point (sidereal longitude k * 30 degrees) crosses the
+eastern horizon, which happens at a local sidereal time given in closed form
+by the point's right ascension and declination:
+
+    local sidereal time = right ascension - semi-diurnal arc
+
+The rise times of a day follow from the sidereal time of the analytical
+ephemeris (fast_ephemeris, the same model as fast_ephemeris.ascendant, within
+a few seconds of time) by two Newton steps, for all days and signs at once.
+Rise times are cached per (location cell, UT date, ayanamsa); a table for a
+local date or a muhurta window is cut from the cached days.
+
+Beyond the polar circles some signs never rise and the ascendant jumps, so
+rise tables are only defined for |latitude| <= MAX_LATITUDE.
+"""
+from typing import Any, Dict, List, Tuple
+from collections import OrderedDict
+from datetime import date, timedelta, timezone
+import os
+import threading
+import logging
+import numpy as np
+from api.constants.zodiac import SIGN_NAMES, Sign
+from api.services import fast_ephemeris
+from api.services.panchanga import (
+    SIDEREAL_RATE,
+    local_time,
+    location_cell,
+    midnight_julian_day
+)
+from api.utils.input_validation import MAX_LAGNA_DAYS, MAX_YEAR, MIN_YEAR
+from api.utils.metrics import count_cache
+
+# Configure logging
+logger = logging.getLogger("jai-api.lagna")
+
+# Rise-time days kept in memory (one per location cell, UT date and ayanamsa)
+LAGNA_CACHE_SIZE = int(os.environ.get("JAI_LAGNA_CACHE_SIZE", "100000"))
+
+# Every sign rises at this latitude (90 degrees minus the obliquity)
+MAX_LATITUDE = 66.5
+
+SIGN_SPAN = 30.0
+
+def _wrap(degrees: np.ndarray) -> np.ndarray:
+    return np.mod(degrees + 180.0, 360.0) - 180.0
+
+def _rising_sidereal_time(julian_days: np.ndarray, signs: np.ndarray, latitude: float, ayanamsa: str) -> np.ndarray:
+    """Local sidereal time (degrees) at which the first point of each sign rises"""
+    eps = np.radians(fast_ephemeris.obliquity(julian_days))
+    point = np.radians(signs * SIGN_SPAN + fast_ephemeris.ayanamsa(julian_days, ayanamsa))
+    right_ascension = np.degrees(np.arctan2(np.sin(point) * np.cos(eps), np.cos(point)))
+    declination = np.arcsin(np.sin(eps) * np.sin(point))
+    semi_arc = np.degrees(np.arccos(-np.tan(np.radians(latitude)) * np.tan(declination)))
+    return right_ascension - semi_arc
+
+def sign_rises(
+    julian_days: np.ndarray,
+    latitude: float,
+    longitude: float,
+    ayanamsa: str = "lahiri",
+    iterations: int = 2
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Rise times of the twelve signs during the UT days starting at julian_days
+
+    Args:
+        julian_days: 0h UT of each date
+        latitude, longitude: Degrees (east positive), |latitude| <= MAX_LATITUDE
+
+    Returns:
+        Per day, the rise times (Julian days, UT) and the signs (1-12) rising
+        at them, sorted by time. A sidereal day is 4 minutes shorter than a
+        day, so about once a year a sign rises twice in one day.
+    """
+    days = np.asarray(julian_days, dtype=float)
+    signs = np.arange(12.0)
+    # Each sign rises once per sidereal day: first rise after 0h UT, and the
+    # following one where it still falls inside the day
+    first = _rising_sidereal_time(days[:, None], signs, latitude, ayanamsa)
+    times = days[:, None] + np.mod(first - fast_ephemeris.sidereal_time(days)[:, None] - longitude, 360.0) / SIDEREAL_RATE
+    times = np.stack([times, times + 360.0 / SIDEREAL_RATE], axis=-1)
+    for _ in range(iterations):
+        target = _rising_sidereal_time(times, signs[:, None], latitude, ayanamsa)
+        times = times + _wrap(target - fast_ephemeris.sidereal_time(times) - longitude) / SIDEREAL_RATE
+
+    result = []
+    for day, day_times in zip(days, times):
+        inside = (day_times >= day) & (day_times < day + 1.0)
+        day_signs = np.broadcast_to(signs[:, None], day_times.shape)[inside].astype(int) + 1
+        order = np.argsort(day_times[inside])
+        result.append((day_times[inside][order], day_signs[order]))
+    return result
+
+class LagnaTableCache:
+    """
+    Sign rise times per (location cell, UT date, ayanamsa), least recently used
+    first out
+
+    Misses of a request are computed together in one vectorized call.
+    """
+
+    def __init__(self, max_entries: int = LAGNA_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[float, float, int, str], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(
+        self,
+        latitude: float,
+        longitude: float,
+        days: List[date],
+        ayanamsa: str = "lahiri"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rise times (Julian days, UT) and signs of consecutive UT dates at the location's cell"""
+        if abs(latitude) > MAX_LATITUDE:
+            raise ValueError(f"Rising signs are only tabulated within {MAX_LATITUDE} degrees of the equator")
+        cell = location_cell(latitude, longitude)
+        keys = [cell + (day.toordinal(), ayanamsa) for day in days]
+        found: Dict[Tuple[float, float, int, str], Tuple[np.ndarray, np.ndarray]] = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+        for key in keys:
+            count_cache("lagna", key in found)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            midnights = np.array([midnight_julian_day(date.fromordinal(key[2])) for key in missing])
+            computed = dict(zip(missing, sign_rises(midnights, cell[0], cell[1], ayanamsa)))
+            found.update(computed)
+            with self._lock:
+                self._entries.update(computed)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        times = np.concatenate([found[key][0] for key in keys])
+        signs = np.concatenate([found[key][1] for key in keys])
+        return times, signs
+
+def _rises_between(start: float, end: float, latitude: float, longitude: float, ayanamsa: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Cached rises from the UT day before start to the UT day of end"""
+    first = date.fromordinal(int(np.floor(start - 1721424.5)) - 1)
+    last = date.fromordinal(int(np.floor(end - 1721424.5)))
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    return lagna_cache.get_many(latitude, longitude, days, ayanamsa)
+
+def sign_intervals(
+    windows: np.ndarray,
+    latitude: float,
+    longitude: float,
+    ayanamsa: str = "lahiri"
+) -> List[Tuple[float, float, int]]:
+    """
+    Rising sign intervals inside time windows
+
+    Args:
+        windows: Array of sorted, non-overlapping (start, end) Julian days
+            (UT), shape (n, 2)
+        latitude, longitude: Degrees (east positive)
+
+    Returns:
+        (start, end, sign) tuples covering the windows, sign 1-12, in window
+        order
+    """
+    windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+    if not len(windows):
+        return []
+    times, signs = _rises_between(windows[0, 0], windows[-1, 1], latitude, longitude, ayanamsa)
+    first = np.searchsorted(times, windows[:, 0], side="right")
+    last = np.searchsorted(times, windows[:, 1], side="left")
+    intervals = []
+    for (start, end), low, high in zip(windows, first, last):
+        edges = [start] + times[low:high].tolist() + [end]
+        # The sign in force at the start rose last before it
+        window_signs = signs[low - 1:high].tolist()
+        intervals.extend((edges[k], edges[k + 1], window_signs[k]) for k in range(len(window_signs)))
+    return intervals
+
+def lagna_table(
+    start_date: date,
+    days: int,
+    latitude: float,
+    longitude: float,
+    timezone_offset: float,
+    ayanamsa: str = "lahiri"
+) -> List[Dict[str, Any]]:
+    """
+    Rising signs of consecutive local days at a location
+
+    Args:
+        start_date: First (local) date
+        days: Number of days (1 to MAX_LAGNA_DAYS)
+        timezone_offset: Hours east of UTC, for the dates and the returned times
+
+    Returns:
+        One dictionary per day with the date and the lagnas in force during it
+        (the one at midnight first), each with its local rise and set times
+        and duration
+
+    Raises:
+        ValueError: For an invalid range or a latitude beyond MAX_LATITUDE
+    """
+    if not 1 <= days <= MAX_LAGNA_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_LAGNA_DAYS}")
+    last_date = start_date + timedelta(days=days - 1)
+    if start_date.year < MIN_YEAR or last_date.year > MAX_YEAR:
+        raise ValueError(f"Dates must be between {MIN_YEAR} and {MAX_YEAR}")
+
+    midnights = midnight_julian_day(start_date) - timezone_offset / 24.0 + np.arange(days + 1.0)
+    # One rise before the first midnight and one after the last
+    times, signs = _rises_between(midnights[0], midnights[-1] + 1.0, latitude, longitude, ayanamsa)
+    zone = timezone(timedelta(hours=timezone_offset))
+    labels = [local_time(t, zone) for t in times]
+
+    table = []
+    for index in range(days):
+        first = int(np.searchsorted(times, midnights[index], side="right")) - 1
+        last = int(np.searchsorted(times, midnights[index + 1], side="left"))
+        table.append({
+            "date": (start_date + timedelta(days=index)).isoformat(),
+            "lagnas": [
+                {
+                    "number": int(signs[position]),
+                    "name": SIGN_NAMES[Sign(int(signs[position]))],
+                    "starts_at": labels[position],
+                    "ends_at": labels[position + 1],
+                    "duration_minutes": round(float(times[position + 1] - times[position]) * 1440.0, 1),
+                }
+                for position in range(first, last)
+            ],
+        })
+    return table
+
+# Create singleton instance
+lagna_cache = LagnaTableCache()
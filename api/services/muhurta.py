@@ -0,0 +1,318 @@
+"""
+Muhurta search
+
+Finds the time windows in a date range that satisfy a set of declarative
+constraints, e.g. "Moon in Rohini, no Rahu Kaal, fixed lagna". Instead of
+sampling the chart minute by minute, every constraint is turned into a set of
+intervals by an event finder and the sets are intersected:
+
+- weekday, daylight and the inauspicious day periods (Rahu Kaal, Yamaganda,
+  Gulika Kaal) come from the cached sunrises and sunsets
+- tithi, karana, nakshatra and yoga come from the element boundaries of the
+  panchanga engine, found for the whole range in one vectorized pass
+- the rising sign (lagna) changes every couple of hours, so it is found last
+  and only inside the windows that survived the other constraints
+
+Constraints are applied cheapest first and the search stops as soon as
+nothing is left. Interval sets are (n, 2) arrays of Julian days (UT), sorted
+and non-overlapping.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from datetime import date, timedelta, timezone
+import os
+import logging
+import numpy as np
+from api.constants.nakshatras import NAKSHATRA_NAMES
+from api.constants.panchanga import (
+    DAY_PERIODS,
+    VARA_LORDS,
+    VARA_NAMES,
+    YOGA_NAMES,
+    karana_name,
+    paksha_name,
+    tithi_name
+)
+from api.constants.zodiac import SIGN_NAMES, SIGN_QUALITIES, Sign
+from api.services import calculation, fast_ephemeris, lagna, panchanga
+from api.utils.input_validation import MAX_MUHURTA_DAYS, MAX_YEAR, MIN_YEAR
+
+# Configure logging
+logger = logging.getLogger("jai-api.muhurta")
+
+# Constraint types in the order they are applied (cheapest first)
+SUNRISE_CONSTRAINTS = ("weekday", "daylight", "avoid")
+ELEMENT_CONSTRAINTS = ("tithi", "karana", "nakshatra", "yoga")
+CONSTRAINT_TYPES = SUNRISE_CONSTRAINTS + ELEMENT_CONSTRAINTS + ("lagna",)
+
+SORT_ORDERS = ("time", "duration")
+
+# Sign qualities under their Sanskrit and English names
+QUALITY_ALIASES = {
+    "cardinal": "Cardinal", "movable": "Cardinal", "chara": "Cardinal",
+    "fixed": "Fixed", "sthira": "Fixed",
+    "mutable": "Mutable", "dual": "Mutable", "dvisvabhava": "Mutable",
+}
+
+ENGLISH_WEEKDAYS = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+
+def _merge(intervals: np.ndarray) -> np.ndarray:
+    """Sort intervals and join the overlapping or touching ones"""
+    intervals = np.asarray(intervals, dtype=float).reshape(-1, 2)
+    intervals = intervals[intervals[:, 1] > intervals[:, 0]]
+    if len(intervals) < 2:
+        return intervals
+    intervals = intervals[np.argsort(intervals[:, 0])]
+    ends = np.maximum.accumulate(intervals[:, 1])
+    # A new group starts where an interval begins after everything before it
+    new = np.concatenate([[True], intervals[1:, 0] > ends[:-1]])
+    return np.stack([intervals[new, 0], np.maximum.reduceat(ends, np.nonzero(new)[0])], axis=1)
+
+def _intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection of two interval sets"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start, end = max(a[i, 0], b[j, 0]), min(a[i, 1], b[j, 1])
+        if start < end:
+            result.append((start, end))
+        # Drop whichever interval finishes first
+        if a[i, 1] < b[j, 1]:
+            i += 1
+        else:
+            j += 1
+    return np.array(result).reshape(-1, 2)
+
+def _subtract(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Parts of a outside b"""
+    gaps = np.stack([np.concatenate([[-np.inf], b[:, 1]]), np.concatenate([b[:, 0], [np.inf]])], axis=1)
+    return _intersect(a, gaps[gaps[:, 1] > gaps[:, 0]])
+
+def _runs(times: np.ndarray, numbers: np.ndarray, allowed: Set[int]) -> np.ndarray:
+    """Intervals between consecutive boundaries whose element is allowed"""
+    keep = np.isin(numbers[:-1], list(allowed))
+    return _merge(np.stack([times[:-1][keep], times[1:][keep]], axis=1))
+
+def _normalize_name(value: Any) -> str:
+    return str(value).strip().lower().replace("-", " ").replace("_", " ")
+
+def _parse_numbers(kind: str, values: Sequence[Any], names: Dict[str, List[int]], count: int) -> Set[int]:
+    """Element numbers from numbers or (case-insensitive) names"""
+    numbers: Set[int] = set()
+    for value in values:
+        if isinstance(value, int) and not isinstance(value, bool) or str(value).strip().isdigit():
+            number = int(value)
+            if not 1 <= number <= count:
+                raise ValueError(f"Invalid {kind} number: {value}. Must be between 1 and {count}")
+            numbers.add(number)
+            continue
+        matches = names.get(_normalize_name(value))
+        if not matches:
+            raise ValueError(f"Unknown {kind}: {value}")
+        numbers.update(matches)
+    return numbers
+
+def _names(numbers: Sequence[int], namer) -> Dict[str, List[int]]:
+    names: Dict[str, List[int]] = {}
+    for number in numbers:
+        names.setdefault(_normalize_name(namer(number)), []).append(number)
+    return names
+
+def _tithi_names() -> Dict[str, List[int]]:
+    # "Ekadashi" is both Ekadashis; "Shukla Ekadashi" only the waxing one
+    names = _names(range(1, 31), tithi_name)
+    for number in range(1, 31):
+        names[_normalize_name(f"{paksha_name(number)} {tithi_name(number)}")] = [number]
+    return names
+
+def _sign_names() -> Dict[str, List[int]]:
+    names = _names(range(1, 13), lambda number: SIGN_NAMES[Sign(number)])
+    for sign in Sign:
+        names[_normalize_name(sign.name)] = [sign.value]
+    for alias, quality in QUALITY_ALIASES.items():
+        names[alias] = [sign.value for sign in Sign if SIGN_QUALITIES[sign] == quality]
+    return names
+
+def _weekday_names() -> Dict[str, List[int]]:
+    names = _names(range(1, 8), lambda number: VARA_NAMES[number - 1])
+    for number, name in enumerate(ENGLISH_WEEKDAYS, 1):
+        names[name] = [number]
+    return names
+
+def parse_constraint(kind: str, values: Optional[Sequence[Any]] = None) -> Tuple[str, Set[Any]]:
+    """
+    Validate a constraint and resolve its values
+
+    Args:
+        kind: One of CONSTRAINT_TYPES
+        values: Accepted names or numbers; any of them satisfies the
+            constraint (none for "daylight")
+
+    Returns:
+        The constraint type and the set of accepted numbers (period names for
+        "avoid")
+
+    Raises:
+        ValueError: For an unknown type or value
+    """
+    kind = _normalize_name(kind)
+    values = list(values or [])
+    if kind not in CONSTRAINT_TYPES:
+        raise ValueError(f"Unknown constraint type: {kind}. Options: {', '.join(CONSTRAINT_TYPES)}")
+    if kind == "daylight":
+        return kind, set()
+    if not values:
+        raise ValueError(f"The {kind} constraint needs at least one value")
+    if kind == "avoid":
+        periods = {_normalize_name(value).replace(" ", "_") for value in values}
+        unknown = periods - set(DAY_PERIODS)
+        if unknown:
+            raise ValueError(f"Unknown period to avoid: {', '.join(sorted(unknown))}. Options: {', '.join(DAY_PERIODS)}")
+        return kind, periods
+    if kind == "weekday":
+        return kind, _parse_numbers(kind, values, _weekday_names(), 7)
+    if kind == "lagna":
+        return kind, _parse_numbers(kind, values, _sign_names(), 12)
+    if kind == "tithi":
+        return kind, _parse_numbers(kind, values, _tithi_names(), 30)
+    if kind == "karana":
+        return kind, _parse_numbers(kind, values, _names(range(1, 61), karana_name), 60)
+    if kind == "nakshatra":
+        return kind, _parse_numbers(kind, values, _names(range(1, 28), lambda n: NAKSHATRA_NAMES[n - 1]), 27)
+    return kind, _parse_numbers(kind, values, _names(range(1, 28), lambda n: YOGA_NAMES[n - 1]), 27)
+
+def day_periods(rises: np.ndarray, sets: np.ndarray, weekdays: np.ndarray, period: str) -> np.ndarray:
+    """
+    Intervals of an inauspicious day period (see DAY_PERIODS)
+
+    Args:
+        rises, sets: Sunrise and sunset of each day (NaN where there is none)
+        weekdays: Weekday of each day (0 = Sunday)
+    """
+    part = np.array(DAY_PERIODS[period])[weekdays] - 1
+    eighth = (sets - rises) / 8.0
+    intervals = np.stack([rises + part * eighth, rises + (part + 1) * eighth], axis=1)
+    return intervals[~np.isnan(intervals).any(axis=1)]
+
+def _describe(
+    window: np.ndarray,
+    numbers: Dict[str, int],
+    sign: int,
+    weekday: int,
+    zone: timezone
+) -> Dict[str, Any]:
+    start, end = window
+    tithi = numbers["tithi"]
+    return {
+        "start": panchanga.local_time(start, zone),
+        "end": panchanga.local_time(end, zone),
+        "duration_minutes": round(float(end - start) * 1440.0, 1),
+        "vara": {"number": weekday + 1, "name": VARA_NAMES[weekday], "lord": VARA_LORDS[weekday]},
+        "tithi": {"number": tithi, "name": tithi_name(tithi), "paksha": paksha_name(tithi)},
+        "nakshatra": {"number": numbers["nakshatra"], "name": NAKSHATRA_NAMES[numbers["nakshatra"] - 1]},
+        "lagna": {"number": sign, "name": SIGN_NAMES[Sign(sign)]},
+    }
+
+def search_muhurta(
+    start_date: date,
+    days: int,
+    latitude: float,
+    longitude: float,
+    timezone_offset: float,
+    constraints: Sequence[Tuple[str, Optional[Sequence[Any]]]],
+    min_duration_minutes: float = 0.0,
+    limit: Optional[int] = None,
+    sort: str = "time",
+    ayanamsa: str = "lahiri",
+    precision: str = calculation.PRECISION_STANDARD
+) -> List[Dict[str, Any]]:
+    """
+    Time windows satisfying all constraints
+
+    Args:
+        start_date: First (local) date searched
+        days: Number of days searched (1 to MAX_MUHURTA_DAYS)
+        timezone_offset: Hours east of UTC, for the dates and the returned times
+        constraints: (type, values) pairs, all of which must hold
+        min_duration_minutes: Shortest window returned
+        limit: Most windows returned
+        sort: "time" (chronological) or "duration" (longest first)
+        precision: Precision of the element boundaries ("standard" or "fast")
+
+    Returns:
+        One dictionary per window with its local start and end, duration and
+        the vara, tithi, nakshatra and lagna in force at its middle
+
+    Raises:
+        ValueError: For an invalid range, constraint, sort order or precision
+    """
+    if precision not in panchanga.PRECISION_MODES:
+        raise ValueError(f"Unknown muhurta precision: {precision}. Options: {', '.join(panchanga.PRECISION_MODES)}")
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort order: {sort}. Options: {', '.join(SORT_ORDERS)}")
+    if not 1 <= days <= MAX_MUHURTA_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_MUHURTA_DAYS}")
+    last_date = start_date + timedelta(days=days - 1)
+    if start_date.year < MIN_YEAR or last_date.year > MAX_YEAR:
+        raise ValueError(f"Dates must be between {MIN_YEAR} and {MAX_YEAR}")
+    parsed = [parse_constraint(kind, values) for kind, values in constraints]
+    parsed.sort(key=lambda constraint: CONSTRAINT_TYPES.index(constraint[0]))
+
+    # Search range: local midnights; the sunrise days start the day before
+    # (its vara lasts until the first sunrise) and end the day after
+    offset = timezone_offset / 24.0
+    start = panchanga.midnight_julian_day(start_date) - offset
+    end = start + days
+    dates = [start_date + timedelta(days=index) for index in range(-1, days + 2)]
+    rises, sets = panchanga.sunrise_cache.get_many(latitude, longitude, dates)
+    midnights = np.array([panchanga.midnight_julian_day(day) for day in dates]) - offset
+    day_starts = np.where(np.isnan(rises), midnights, rises)
+    weekdays = np.array([(day.weekday() + 1) % 7 for day in dates])
+
+    windows = np.array([[start, end]])
+    needed = [kind for kind, _ in parsed if kind in ELEMENT_CONSTRAINTS]
+    boundaries = None
+    for kind, values in parsed:
+        if not len(windows):
+            break
+        if kind == "weekday":
+            keep = np.isin(weekdays[:-1] + 1, list(values))
+            allowed = np.stack([day_starts[:-1][keep], day_starts[1:][keep]], axis=1)
+        elif kind == "daylight":
+            allowed = np.stack([rises, sets], axis=1)
+            allowed = allowed[~np.isnan(allowed).any(axis=1)]
+        elif kind == "avoid":
+            for period in sorted(values):
+                windows = _subtract(windows, day_periods(rises, sets, weekdays, period))
+            continue
+        elif kind in ELEMENT_CONSTRAINTS:
+            if boundaries is None:
+                # Only the windows left matter; nakshatras and yogas last up
+                # to 1.2 days, so look 2 days beyond them
+                boundaries = panchanga.transitions(
+                    windows[0, 0] - 2.0, windows[-1, 1] + 2.0, ayanamsa, precision, needed
+                )
+            allowed = _runs(*boundaries[kind], values)
+        else:
+            allowed = np.array([(first, last) for first, last, sign in lagna.sign_intervals(windows, latitude, longitude, ayanamsa)
+                                if sign in values]).reshape(-1, 2)
+        windows = _intersect(windows, _merge(allowed))
+
+    durations = (windows[:, 1] - windows[:, 0]) * 1440.0
+    windows = windows[durations >= min_duration_minutes]
+    if sort == "duration":
+        windows = windows[np.argsort(windows[:, 0] - windows[:, 1], kind="stable")]
+    if limit is not None:
+        windows = windows[:limit]
+    if not len(windows):
+        return []
+
+    middles = windows.mean(axis=1)
+    numbers = panchanga.element_numbers(middles, ayanamsa)
+    signs = (fast_ephemeris.ascendant(middles, latitude, longitude, ayanamsa) // lagna.SIGN_SPAN).astype(int) + 1
+    varas = weekdays[np.searchsorted(day_starts, middles, side="right") - 1]
+    zone = timezone(timedelta(hours=timezone_offset))
+    return [
+        _describe(window, {name: int(values[index]) for name, values in numbers.items()},
+                  int(signs[index]), int(varas[index]), zone)
+        for index, window in enumerate(windows)
+    ]
@@ -0,0 +1,375 @@
+"""
+Panchanga engine
+
+The five limbs of the Vedic day for a location and a range of dates:
+
+- tithi: Moon - Sun elongation in 12 degree steps (30 per lunar month)
+- karana: half a tithi (60 per lunar month)
+- nakshatra: sidereal longitude of the Moon in 13°20' steps
+- yoga: sidereal longitude of the Sun plus the Moon in 13°20' steps
+- vara: the weekday, which starts at sunrise
+
+A panchanga day runs from sunrise to the next sunrise. It is named after the
+elements in force at sunrise and lists every element that starts during it
+with its start and end times.
+
+A whole range is computed in a few vectorized passes instead of one chart per
+day:
+
+1. sunrise and sunset of every day, from the analytical solar model of
+   fast_ephemeris (hour angle iterated to convergence, upper limb with
+   standard refraction), cached per (location cell, date)
+2. the three angles sampled every SAMPLE_STEP days over the range; each
+   element boundary is bracketed where the element number changes
+3. every boundary refined at once by Newton iterations on the analytical
+   ephemeris, then, with standard precision, by one Newton step on Swiss
+   Ephemeris positions (the Moon and Sun speeds give the derivative), which
+   brings the analytical error of a few minutes down to seconds
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+from datetime import date, timedelta, timezone
+import os
+import threading
+import logging
+import numpy as np
+from api.constants.nakshatras import NAKSHATRA_NAMES
+from api.constants.panchanga import (
+    KARANA_SPAN,
+    NAKSHATRA_SPAN,
+    TITHI_SPAN,
+    VARA_LORDS,
+    VARA_NAMES,
+    YOGA_NAMES,
+    YOGA_SPAN,
+    karana_name,
+    paksha_name,
+    tithi_name
+)
+from api.constants.planets import Planet
+from api.services import calculation, fast_ephemeris
+from api.services.chart_record import julian_day_to_datetime
+from api.utils.input_validation import MAX_PANCHANGA_DAYS, MAX_YEAR, MIN_YEAR
+from api.utils.metrics import count_cache
+
+# Configure logging
+logger = logging.getLogger("jai-api.panchanga")
+
+# Sunrise/sunset entries kept in memory (one per location cell and date)
+SUNRISE_CACHE_SIZE = int(os.environ.get("JAI_SUNRISE_CACHE_SIZE", "100000"))
+
+# Locations are rounded to cells of this size (degrees, about 1 km); sunrise
+# moves by a few seconds across a cell
+LOCATION_CELL = 0.01
+
+# Sampling step of the angles (days). The fastest element (karana, 6 degrees)
+# advances at most 4 degrees in a quarter day, so no boundary is skipped
+SAMPLE_STEP = 0.25
+
+# Altitude of the Sun's centre at sunrise/sunset: upper limb on the horizon
+# with standard refraction
+SUNRISE_ALTITUDE = -0.8333
+
+SIDEREAL_RATE = 360.98564736629  # degrees of hour angle per day
+
+# Elements by the angle they are counted on: (name, angle row, span, count)
+ELEMENTS = (
+    ("tithi", 0, TITHI_SPAN, 30),
+    ("karana", 0, KARANA_SPAN, 60),
+    ("nakshatra", 1, NAKSHATRA_SPAN, 27),
+    ("yoga", 2, YOGA_SPAN, 27),
+)
+
+PRECISION_MODES = (calculation.PRECISION_STANDARD, calculation.PRECISION_FAST)
+
+def location_cell(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Centre of the cache cell holding a location"""
+    return (round(round(latitude / LOCATION_CELL) * LOCATION_CELL, 6),
+            round(round(longitude / LOCATION_CELL) * LOCATION_CELL, 6))
+
+def _wrap(degrees: np.ndarray) -> np.ndarray:
+    """Angle difference in [-180, 180)"""
+    return np.mod(degrees + 180.0, 360.0) - 180.0
+
+def midnight_julian_day(day: date) -> float:
+    """Julian day of 0h UT of a calendar date"""
+    return day.toordinal() + 1721424.5
+
+def sun_events(
+    julian_days: np.ndarray,
+    latitude: float,
+    longitude: float,
+    iterations: int = 4
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sunrise and sunset (Julian days, UT) of the days starting at julian_days
+
+    Args:
+        julian_days: 0h UT of each date
+        latitude, longitude: Degrees (east positive)
+
+    Returns:
+        Sunrise and sunset arrays; NaN where the Sun does not rise or set
+        (polar day or night)
+    """
+    # Local mean noon, then a quarter day either side as first guesses
+    noon = np.asarray(julian_days, dtype=float) + 0.5 - longitude / 360.0
+    phi = np.radians(latitude)
+    events = []
+    for direction in (-1.0, 1.0):
+        t = noon + direction * 0.25
+        for _ in range(iterations):
+            sun_longitude = np.radians(fast_ephemeris.sun_longitude(t))
+            eps = np.radians(fast_ephemeris.obliquity(t))
+            right_ascension = np.degrees(np.arctan2(np.cos(eps) * np.sin(sun_longitude), np.cos(sun_longitude)))
+            declination = np.arcsin(np.sin(eps) * np.sin(sun_longitude))
+            hour_angle = fast_ephemeris.sidereal_time(t) + longitude - right_ascension
+            cos_h0 = ((np.sin(np.radians(SUNRISE_ALTITUDE)) - np.sin(phi) * np.sin(declination))
+                      / (np.cos(phi) * np.cos(declination)))
+            h0 = np.degrees(np.arccos(np.clip(cos_h0, -1.0, 1.0)))
+            t = t + _wrap(direction * h0 - hour_angle) / SIDEREAL_RATE
+        events.append(np.where(np.abs(cos_h0) > 1.0, np.nan, t))
+    return events[0], events[1]
+
+class SunriseCache:
+    """
+    Sunrise and sunset per (location cell, date), least recently used first out
+
+    Misses of a request are computed together in one vectorized call.
+    """
+
+    def __init__(self, max_entries: int = SUNRISE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[float, float, int], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(self, latitude: float, longitude: float, days: List[date]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sunrise and sunset (Julian days, UT) of each date at the location's cell"""
+        cell = location_cell(latitude, longitude)
+        keys = [cell + (day.toordinal(),) for day in days]
+        found: Dict[Tuple[float, float, int], Tuple[float, float]] = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+        for key in keys:
+            count_cache("sunrise", key in found)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            midnights = np.array([midnight_julian_day(date.fromordinal(key[2])) for key in missing])
+            rises, sets = sun_events(midnights, cell[0], cell[1])
+            computed = {key: (float(rise), float(set_)) for key, rise, set_ in zip(missing, rises, sets)}
+            found.update(computed)
+            with self._lock:
+                self._entries.update(computed)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        rises = np.array([found[key][0] for key in keys])
+        sets = np.array([found[key][1] for key in keys])
+        return rises, sets
+
+def _angles(julian_days: np.ndarray, ayanamsa: str) -> np.ndarray:
+    """Elongation, sidereal Moon and sidereal Sun + Moon (degrees), shape (3, ...)"""
+    sun = fast_ephemeris.sun_longitude(julian_days)
+    moon = fast_ephemeris.moon_position(julian_days)[0]
+    offset = fast_ephemeris.ayanamsa(julian_days, ayanamsa)
+    return np.mod(np.stack([moon - sun, moon - offset, sun + moon - 2 * offset]), 360.0)
+
+def element_numbers(julian_days: np.ndarray, ayanamsa: str = "lahiri") -> Dict[str, np.ndarray]:
+    """Number (1-based) of each element in force at the given Julian days (UT)"""
+    angles = _angles(np.asarray(julian_days, dtype=float), ayanamsa)
+    return {
+        name: np.floor(angles[row] / span).astype(int) % count + 1
+        for name, row, span, count in ELEMENTS
+    }
+
+def _refine_fast(
+    times: np.ndarray,
+    rows: np.ndarray,
+    targets: np.ndarray,
+    ayanamsa: str,
+    iterations: int = 2
+) -> np.ndarray:
+    """
+    Newton iterations on the analytical ephemeris for all boundaries at once
+
+    The rate is computed once: it barely changes over the few minutes the
+    boundaries move, and every extra evaluation costs a full lunar series.
+    """
+    step = 0.01
+    columns = np.arange(len(times))
+    before, after = _angles(np.stack([times - step, times + step]), ayanamsa)[rows, :, columns].T
+    rate = _wrap(after - before) / (2 * step)
+    # The value at the guess is the midpoint of its neighbours
+    times = times - _wrap(before + _wrap(after - before) / 2 - targets) / rate
+    for _ in range(iterations):
+        value = _angles(times, ayanamsa)[rows, columns]
+        times = times - _wrap(value - targets) / rate
+    return times
+
+def _refine_swiss_ephemeris(times: np.ndarray, rows: np.ndarray, targets: np.ndarray, ayanamsa: str) -> np.ndarray:
+    """One Newton step on Swiss Ephemeris positions (speeds give the derivative)"""
+    flags = calculation.EPHEMERIS_FLAGS.get(
+        calculation.resolve_precision(calculation.PRECISION_STANDARD, float(np.median(times)))
+    )
+    calculation.set_ayanamsa(ayanamsa)
+    refined = np.empty_like(times)
+    sun_id, moon_id = calculation.PLANETS[Planet.SUN], calculation.PLANETS[Planet.MOON]
+    for index, (t, row, target) in enumerate(zip(times, rows, targets)):
+        sun = calculation.calculate_planet_position(sun_id, float(t), flags)
+        moon = calculation.calculate_planet_position(moon_id, float(t), flags)
+        if row == 0:
+            value, rate = moon["longitude"] - sun["longitude"], moon["speed"] - sun["speed"]
+        elif row == 1:
+            value, rate = moon["longitude"], moon["speed"]
+        else:
+            value, rate = sun["longitude"] + moon["longitude"], sun["speed"] + moon["speed"]
+        refined[index] = t - _wrap(value - target) / rate
+    return refined
+
+def transitions(
+    start: float,
+    end: float,
+    ayanamsa: str = "lahiri",
+    precision: str = calculation.PRECISION_STANDARD,
+    elements: Optional[Sequence[str]] = None
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Element boundaries between two Julian days (UT)
+
+    Args:
+        elements: Element names to find (default: all of ELEMENTS)
+
+    Returns:
+        Per element name, the boundary times and the number (1-based) of the
+        element starting at each of them, both sorted by time
+    """
+    samples = np.arange(start, end + SAMPLE_STEP, SAMPLE_STEP)
+    angles = _angles(samples, ayanamsa)
+
+    times, rows, targets, numbers, owners = [], [], [], [], []
+    for owner, (name, row, span, count) in enumerate(ELEMENTS):
+        if elements is not None and name not in elements:
+            continue
+        index = np.floor(angles[row] / span).astype(int) % count
+        crossing = np.nonzero(index[1:] != index[:-1])[0]
+        new_index = index[crossing + 1]
+        # Linear interpolation inside the bracket as the first guess
+        before = _wrap(angles[row][crossing] - new_index * span)
+        after = _wrap(angles[row][crossing + 1] - new_index * span)
+        times.append(samples[crossing] + SAMPLE_STEP * before / (before - after))
+        rows.append(np.full(len(crossing), row))
+        targets.append(new_index * span)
+        numbers.append(new_index + 1)
+        owners.append(np.full(len(crossing), owner))
+
+    times, rows, targets = np.concatenate(times), np.concatenate(rows), np.concatenate(targets)
+    numbers, owners = np.concatenate(numbers), np.concatenate(owners)
+    times = _refine_fast(times, rows, targets, ayanamsa)
+    if precision == calculation.PRECISION_STANDARD and not calculation.USING_MOCK:
+        times = _refine_swiss_ephemeris(times, rows, targets, ayanamsa)
+
+    result = {}
+    for owner, (name, _, _, _) in enumerate(ELEMENTS):
+        if elements is not None and name not in elements:
+            continue
+        selected = owners == owner
+        order = np.argsort(times[selected])
+        result[name] = (times[selected][order], numbers[selected][order])
+    return result
+
+def _element(name: str, number: int) -> Dict[str, Any]:
+    if name == "tithi":
+        return {"number": number, "name": tithi_name(number), "paksha": paksha_name(number)}
+    if name == "karana":
+        return {"number": number, "name": karana_name(number)}
+    if name == "nakshatra":
+        return {"number": number, "name": NAKSHATRA_NAMES[number - 1]}
+    return {"number": number, "name": YOGA_NAMES[number - 1]}
+
+def local_time(julian_day: float, zone: timezone) -> Optional[str]:
+    """Local ISO 8601 time of a Julian day (UT); None for NaN"""
+    if np.isnan(julian_day):
+        return None
+    return julian_day_to_datetime(julian_day).replace(tzinfo=timezone.utc).astimezone(zone).isoformat()
+
+def generate_panchanga(
+    start_date: date,
+    days: int,
+    latitude: float,
+    longitude: float,
+    timezone_offset: float,
+    ayanamsa: str = "lahiri",
+    precision: str = calculation.PRECISION_STANDARD
+) -> List[Dict[str, Any]]:
+    """
+    Panchanga of consecutive days at a location
+
+    Args:
+        start_date: First (local) date
+        days: Number of days (1 to MAX_PANCHANGA_DAYS)
+        timezone_offset: Hours east of UTC, for the dates and the returned times
+        precision: "standard" (Swiss Ephemeris refinement) or "fast"
+
+    Returns:
+        One dictionary per day with the date, vara, sunrise, sunset and the
+        tithi, karana, nakshatra and yoga lists; the first entry of each list
+        is the element in force at sunrise. Times are local ISO 8601 strings.
+
+    Raises:
+        ValueError: For an invalid range or precision
+    """
+    if precision not in PRECISION_MODES:
+        raise ValueError(f"Unknown panchanga precision: {precision}. Options: {', '.join(PRECISION_MODES)}")
+    if not 1 <= days <= MAX_PANCHANGA_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_PANCHANGA_DAYS}")
+    dates = [start_date + timedelta(days=offset) for offset in range(days + 1)]
+    if dates[0].year < MIN_YEAR or dates[-2].year > MAX_YEAR:
+        raise ValueError(f"Dates must be between {MIN_YEAR} and {MAX_YEAR}")
+
+    # Day boundaries: sunrise, or local midnight where the Sun does not rise
+    rises, sets = sunrise_cache.get_many(latitude, longitude, dates)
+    midnights = np.array([midnight_julian_day(day) for day in dates]) - timezone_offset / 24.0
+    starts = np.where(np.isnan(rises), midnights, rises)
+
+    # Nakshatras last up to 1.2 days: sample enough on both sides to know the
+    # element in force at the first sunrise and the end of the last one
+    boundaries = transitions(starts[0] - 2.0, starts[-1] + 2.0, ayanamsa, precision)
+    zone = timezone(timedelta(hours=timezone_offset))
+    # Each boundary ends one element and starts the next: format it once
+    labels = {name: [local_time(t, zone) for t in times] for name, (times, _) in boundaries.items()}
+
+    panchanga = []
+    for index, day in enumerate(dates[:-1]):
+        vara = (day.weekday() + 1) % 7
+        entry: Dict[str, Any] = {
+            "date": day.isoformat(),
+            "vara": {"number": vara + 1, "name": VARA_NAMES[vara], "lord": VARA_LORDS[vara]},
+            "sunrise": local_time(rises[index], zone),
+            "sunset": local_time(sets[index], zone),
+        }
+        for name, (times, numbers) in boundaries.items():
+            first = int(np.searchsorted(times, starts[index], side="right")) - 1
+            last = int(np.searchsorted(times, starts[index + 1], side="left"))
+            entry[name] = [
+                dict(_element(name, int(numbers[position])),
+                     starts_at=labels[name][position],
+                     ends_at=labels[name][position + 1])
+                for position in range(first, last)
+            ]
+        panchanga.append(entry)
+    return panchanga
+
+# Create singleton instance
+sunrise_cache = SunriseCache()
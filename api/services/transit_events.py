@@ -0,0 +1,145 @@
+"""
+Transit events of a natal chart over a date range
+
+Sign ingresses of the grahas and the retrograde and direct stations of the
+five tara grahas, in time order, each placed relative to the natal Moon and
+ascendant. Positions come from the interpolated series (ephemeris_series):
+the range is walked in chunks of CHUNK_DAYS, each sampled every SAMPLE_STEP
+days, and every crossing between two samples is refined to the minute by
+interpolating the exact nodes again. Only one chunk is held at a time, so
+the events of a century stream out with flat memory.
+"""
+from typing import Iterator, Optional, Sequence
+from datetime import timedelta, timezone
+import os
+import logging
+import numpy as np
+from api.constants.planets import Planet, PLANET_NAMES
+from api.models.response import TransitEvent
+from api.services import calculation
+from api.services.ephemeris_series import calculate_nodes, interpolate
+from api.services.panchanga import local_time
+from api.utils.deadline import check_deadline
+
+# Configure logging
+logger = logging.getLogger("jai-api.transit_events")
+
+# Longest range (days) of one request
+MAX_TRANSIT_EVENT_DAYS = float(os.environ.get("JAI_TRANSIT_EVENTS_MAX_DAYS", "36525"))
+
+# Days calculated at a time and spacing of the samples searched for crossings
+CHUNK_DAYS = 366.0
+SAMPLE_STEP = 1.0 / 24
+
+# Bodies that station (the Sun and Moon never do; the nodes wobble around
+# their mean retrograde motion)
+STATIONING = (Planet.MARS, Planet.MERCURY, Planet.JUPITER, Planet.VENUS, Planet.SATURN)
+
+def _refine_ingress(nodes, t0: np.ndarray, t1: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+    """Times within [t0, t1] at which the longitude reaches the sign boundaries"""
+    times = t0
+    for _ in range(2):
+        longitude, speed = interpolate(nodes, times)
+        offset = (boundaries - longitude + 180.0) % 360.0 - 180.0
+        times = np.clip(times + offset / speed, t0, t1)
+    return times
+
+def _refine_station(nodes, t0: np.ndarray, t1: np.ndarray) -> np.ndarray:
+    """Times within [t0, t1] at which the speed changes sign (by bisection)"""
+    low, high = t0.copy(), t1.copy()
+    sign = np.sign(interpolate(nodes, low)[1])
+    for _ in range(12):
+        middle = (low + high) / 2
+        same = np.sign(interpolate(nodes, middle)[1]) == sign
+        low = np.where(same, middle, low)
+        high = np.where(same, high, middle)
+    return (low + high) / 2
+
+def _chunk_events(nodes, planet: Planet, times: np.ndarray):
+    """(julian day, kind) of the ingresses and stations of a body between samples"""
+    longitude, speed = interpolate(nodes, times)
+    sign = np.floor(longitude / 30.0).astype(int) % 12
+    index = np.flatnonzero(sign[1:] != sign[:-1])
+    t0, t1 = times[index], times[index + 1]
+    # Moving forward the body enters the new sign at its start, moving back
+    # it leaves the old sign at its start
+    forward = ((longitude[index + 1] - longitude[index] + 180.0) % 360.0 - 180.0) > 0
+    boundaries = np.where(forward, sign[index + 1], sign[index]) * 30.0
+    for julian_day in _refine_ingress(nodes, t0, t1, boundaries):
+        yield float(julian_day), "ingress"
+
+    if planet in STATIONING:
+        index = np.flatnonzero(np.sign(speed[1:]) != np.sign(speed[:-1]))
+        for julian_day, after in zip(_refine_station(nodes, times[index], times[index + 1]), speed[index + 1]):
+            yield float(julian_day), "retrograde" if after < 0 else "direct"
+
+def _events(record: dict, start: float, end: float, bodies: Sequence[Planet], precision: str) -> Iterator[TransitEvent]:
+    """The events of transit_events, a chunk at a time"""
+    zone = timezone(timedelta(hours=record["timezone_offset"]))
+    natal_asc_sign = int(record["ascendant"] / 30)
+    natal_moon_sign = int(record["planets"][Planet.MOON.value]["longitude"] / 30)
+
+    chunk_start = start
+    while chunk_start < end:
+        check_deadline("transit events")
+        chunk_end = min(chunk_start + CHUNK_DAYS, end)
+        times = np.linspace(chunk_start, chunk_end, int(np.ceil((chunk_end - chunk_start) / SAMPLE_STEP)) + 1)
+        nodes = calculate_nodes(bodies, chunk_start, chunk_end, record["ayanamsa"], precision)
+
+        events = []
+        for planet in bodies:
+            for julian_day, kind in _chunk_events(nodes[planet], planet, times):
+                events.append((julian_day, planet, kind))
+        events.sort(key=lambda event: event[0])
+
+        for julian_day, planet, kind in events:
+            longitude, speed = (float(values[0]) for values in interpolate(nodes[planet], np.array([julian_day])))
+            sign_name, sign_id = calculation.get_sign_info(longitude)
+            if kind == "ingress":
+                # The sign being entered, not the one the interpolated point
+                # lands in a hair before the boundary
+                sign_id = int(np.floor(longitude / 30.0 + (0.5 if speed > 0 else -0.5))) % 12
+                sign_name = calculation.get_sign_info(sign_id * 30.0 + 15.0)[0]
+            yield TransitEvent(
+                planet=PLANET_NAMES[planet],
+                event=kind,
+                julian_day=round(julian_day, 6),
+                time=local_time(julian_day, zone),
+                longitude=round(longitude, 4) % 360.0,
+                sign=sign_name,
+                sign_id=sign_id + 1,
+                house_from_birth_moon=((sign_id - natal_moon_sign) % 12) + 1,
+                house_from_birth_ascendant=((sign_id - natal_asc_sign) % 12) + 1
+            )
+        chunk_start = chunk_end
+
+def transit_events(
+    record: dict,
+    start: float,
+    end: float,
+    bodies: Optional[Sequence[Planet]] = None,
+    precision: str = calculation.PRECISION_STANDARD
+) -> Iterator[TransitEvent]:
+    """
+    Transit events of a chart between two Julian days (UT), in time order
+
+    The arguments are checked straight away; the events are calculated a
+    chunk at a time as the iterator is consumed.
+
+    Args:
+        record: Chart record (dictionary form), for the ayanamsa, timezone and
+            the natal Moon and ascendant
+        bodies: Planets to follow (default: all nine)
+        precision: One of calculation.PRECISION_MODES
+
+    Raises:
+        ValueError: For an empty or too long range or an unknown precision
+        EphemerisUnavailableError: If file precision is requested for an uncovered range
+    """
+    if end <= start:
+        raise ValueError("end must be after start")
+    if end - start > MAX_TRANSIT_EVENT_DAYS:
+        raise ValueError(f"The range must not exceed {MAX_TRANSIT_EVENT_DAYS:g} days")
+    for julian_day in (start, end):
+        calculation.resolve_precision(precision, julian_day)
+    return _events(record, start, end, list(bodies or Planet), precision)
@@ -0,0 +1,81 @@
+"""
+Deferred warm-up
+
+Importing the application only does what is needed to serve (ephemeris path,
+routes, models); the pieces that touch the disk or compute are deferred:
+
+- the geocoding/timezone cache files (request.load_caches)
+- prewarming the ephemeris files into the page cache (ephemeris_files)
+- the Swiss Ephemeris self-check (calculation.verify_ephemeris)
+- a first chart, which loads the ephemeris data into Swiss Ephemeris
+
+Each of them also happens on first use. The warm-up runs them in a background
+thread started by the application's startup event, so the server binds and
+answers health checks without waiting for it (JAI_WARMUP=false disables it).
+"""
+from typing import Any, Dict, Optional
+import os
+import threading
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger("jai-api.warmup")
+
+WARMUP_ENABLED = os.environ.get("JAI_WARMUP", "true").lower() == "true"
+
+# Chart calculated by the warm-up (noon UT, 2000-01-01)
+WARMUP_CHART = ("2000-01-01", "12:00:00", 0.0, 0.0, 0.0, "lahiri")
+
+class WarmupState:
+    """Progress of the warm-up, reported by the health check"""
+
+    def __init__(self):
+        self.started: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish; returns whether it did"""
+        return self._done.wait(timeout)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"finished": self.finished, "duration_ms": self.duration_ms, "error": self.error}
+
+def warm_up(state: Optional[WarmupState] = None) -> None:
+    """Run the deferred initialization now"""
+    state = state or warmup_state
+    state.started = time.perf_counter()
+    try:
+        from api.models import request
+        from api.services import calculation
+        from api.services.ephemeris_files import prewarm_ephemeris
+
+        request.load_caches()
+        prewarm_ephemeris()
+        calculation.verify_ephemeris()
+        calculation.calculate_chart_record(*WARMUP_CHART)
+    except Exception as e:
+        state.error = str(e)
+        logger.warning(f"Warm-up failed: {str(e)}")
+    finally:
+        state.duration_ms = round((time.perf_counter() - state.started) * 1000, 1)
+        state._done.set()
+        logger.info(f"Warm-up finished in {state.duration_ms} ms")
+
+def start_warmup() -> Optional[threading.Thread]:
+    """Start the warm-up in a background thread (once)"""
+    if not WARMUP_ENABLED or warmup_state.started is not None:
+        return None
+    warmup_state.started = time.perf_counter()
+    thread = threading.Thread(target=warm_up, name="jai-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# Create singleton instance
+warmup_state = WarmupState()
@@ -0,0 +1,282 @@
+"""
+Calculation worker pool
+
+Chart calculations are CPU bound. Running them inline in the HTTP workers ties
+ephemeris throughput to the number of web workers, so this module offers a pool
+of dedicated calculation processes instead:
+
+- every worker initializes Swiss Ephemeris once (and computes a warm-up chart so
+  the ephemeris files are opened) and then keeps that state for its lifetime
+- chart requests arriving within a short window are micro-batched, and each
+  batch is split into at most one IPC message per worker
+- results travel back as compact binary chart records (see chart_record)
+
+The pool is enabled with JAI_CALC_WORKERS (number of processes per HTTP worker,
+so a server runs HTTP workers x JAI_CALC_WORKERS calculation processes). When
+it is disabled or not started, charts are calculated inline as before.
+
+Workers are started with JAI_CALC_START_METHOD (default forkserver): the HTTP
+worker already runs the log writer, profiler and auditor threads, and forking a
+threaded process can leave the child with locks no thread will release.
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+import os
+import time
+import logging
+from api.services.chart_record import ChartRecord, RECORD_SIZE, decode, encode
+from api.utils.deadline import DeadlineExceededError, check_deadline, current_deadline
+from api.utils.logging_config import configure_logging
+
+# Configure logging
+logger = logging.getLogger("jai-api.worker_pool")
+
+# Pool configuration
+CALC_WORKERS = int(os.environ.get("JAI_CALC_WORKERS", "0"))
+BATCH_WINDOW_MS = float(os.environ.get("JAI_CALC_BATCH_WINDOW_MS", "2"))
+MAX_BATCH_SIZE = int(os.environ.get("JAI_CALC_MAX_BATCH", "64"))
+START_METHOD = os.environ.get("JAI_CALC_START_METHOD", "forkserver")
+
+# Positional order of the chart parameters sent to the workers
+CHART_TASK_FIELDS = ("birth_date", "birth_time", "latitude", "longitude", "timezone_offset", "ayanamsa", "precision")
+
+ChartTask = Tuple[str, str, float, float, float, str, str]
+
+# A waiting request: chart parameters, deadline (time.time() timestamp) and the
+# future that receives the record
+PendingChart = Tuple[ChartTask, Optional[float], asyncio.Future]
+
+# Error reported for tasks whose request was already overdue in the worker
+DEADLINE_EXPIRED = "request deadline exceeded before calculation"
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """Multiprocessing context of the calculation workers (START_METHOD where available)"""
+    if START_METHOD in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context(START_METHOD)
+    return multiprocessing.get_context("spawn")
+
+def init_worker() -> None:
+    """
+    Worker process initializer
+
+    Importing the calculation module initializes Swiss Ephemeris; the files
+    are prewarmed into the page cache and the warm-up chart makes the worker
+    open them before the first request. The worker gets its own log writer
+    thread (a forked process does not inherit the parent's).
+    """
+    configure_logging()
+    from api.services import calculation
+    from api.services.ephemeris_files import prewarm_ephemeris
+    prewarm_ephemeris()
+    try:
+        calculation.calculate_chart_record("2000-01-01", "12:00:00", 0.0, 0.0, 0.0, "lahiri")
+    except Exception as e:
+        logger.warning(f"Calculation worker warm-up failed: {str(e)}")
+
+def calculate_batch(
+    tasks: List[ChartTask],
+    expires: List[Optional[float]]
+) -> Tuple[bytearray, Dict[int, ValueError]]:
+    """
+    Calculate a batch of charts inside a worker process
+
+    Args:
+        tasks: Chart parameters in CHART_TASK_FIELDS order
+        expires: Deadline of each task (time.time() timestamp); overdue tasks
+            are skipped
+
+    Returns:
+        Tuple of (encoded records, errors by task index). The slots of
+        failed tasks are left zero-filled in the buffer.
+    """
+    from api.services import calculation
+
+    buffer = bytearray(RECORD_SIZE * len(tasks))
+    errors: Dict[int, ValueError] = {}
+    for index, task in enumerate(tasks):
+        if expires[index] is not None and time.time() > expires[index]:
+            errors[index] = ValueError(DEADLINE_EXPIRED)
+            continue
+        try:
+            record = ChartRecord.from_dict(calculation.calculate_chart_record(*task))
+            buffer[index * RECORD_SIZE:(index + 1) * RECORD_SIZE] = encode(record)
+        except Exception as e:
+            # ValueError subclasses (e.g. EphemerisUnavailableError) reach the request as is
+            errors[index] = e if isinstance(e, ValueError) else ValueError(str(e))
+    return buffer, errors
+
+class CalculationPool:
+    """Process pool of warm calculation workers with micro-batching"""
+
+    def __init__(
+        self,
+        workers: int = CALC_WORKERS,
+        batch_window_ms: float = BATCH_WINDOW_MS,
+        max_batch_size: int = MAX_BATCH_SIZE
+    ):
+        """
+        Initialize the calculation pool.
+
+        Args:
+            workers: Number of worker processes (0 disables the pool)
+            batch_window_ms: How long to collect requests before dispatching
+            max_batch_size: Dispatch immediately once this many requests wait
+        """
+        self._workers = workers
+        self._window = batch_window_ms / 1000.0
+        self._max_batch_size = max(1, max_batch_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[PendingChart] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        # Counters for monitoring
+        self.batches_dispatched = 0
+        self.charts_calculated = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calculations are dispatched to worker processes"""
+        return self._executor is not None
+
+    @property
+    def workers(self) -> int:
+        """Configured number of worker processes"""
+        return self._workers
+
+    def start(self) -> None:
+        """Start the worker processes (no-op when disabled or already running)"""
+        if self._workers <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=worker_context(),
+            initializer=init_worker
+        )
+        logger.info(f"Started {self._workers} calculation workers")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; waiting requests fail with RuntimeError"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for _, _, future in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Calculation pool shut down"))
+        self._pending = []
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info("Stopped calculation workers")
+
+    async def calculate_chart(
+        self,
+        birth_date: str,
+        birth_time: str,
+        latitude: float,
+        longitude: float,
+        timezone_offset: float,
+        ayanamsa: str,
+        precision: str = "standard"
+    ) -> ChartRecord:
+        """
+        Calculate a chart record, in a worker process when the pool is running
+
+        Raises:
+            ValueError: If the chart cannot be calculated
+            DeadlineExceededError: If the request is overdue before calculation
+        """
+        task: ChartTask = (birth_date, birth_time, latitude, longitude, timezone_offset, ayanamsa, precision)
+        check_deadline("calculation")
+
+        if self._executor is None:
+            from api.services import calculation
+            return ChartRecord.from_dict(calculation.calculate_chart_record(*task))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = current_deadline()
+        # Cancelling the awaiting request cancels the future, which removes the
+        # task from a batch that has not been dispatched yet
+        self._pending.append((task, deadline.wall_clock_expiry() if deadline else None, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch the waiting requests, at most one message per worker"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending = [entry for entry in self._pending if not entry[2].done()]
+        self._pending = []
+        if not pending:
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        chunk_size = -(-len(pending) // self._workers)
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            try:
+                batch = loop.run_in_executor(
+                    executor,
+                    calculate_batch,
+                    [task for task, _, _ in chunk],
+                    [expires for _, expires, _ in chunk]
+                )
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._fail(chunk, e, executor)
+                continue
+            batch.add_done_callback(lambda done, chunk=chunk: self._resolve(chunk, done, executor))
+            self.batches_dispatched += 1
+
+    def _resolve(self, chunk: List[PendingChart], batch: asyncio.Future, executor: ProcessPoolExecutor) -> None:
+        """Hand the results of a worker batch to the waiting requests"""
+        if batch.cancelled():
+            self._fail(chunk, RuntimeError("Calculation batch cancelled"), executor)
+            return
+        if batch.exception() is not None:
+            self._fail(chunk, batch.exception(), executor)
+            return
+
+        buffer, errors = batch.result()
+        for index, (_, _, future) in enumerate(chunk):
+            if future.done():
+                continue
+            if index in errors:
+                error = errors[index]
+                if str(error) == DEADLINE_EXPIRED:
+                    # Overdue in the worker: answered like any other overdue request (504)
+                    error = DeadlineExceededError("calculation")
+                future.set_exception(error)
+            else:
+                future.set_result(decode(buffer, index * RECORD_SIZE))
+                self.charts_calculated += 1
+
+    def _fail(self, chunk: List[PendingChart], error: BaseException, executor: ProcessPoolExecutor) -> None:
+        logger.error(f"Calculation batch failed: {str(error)}")
+        if isinstance(error, BrokenProcessPool):
+            self._restart(executor)
+        for _, _, future in chunk:
+            if not future.done():
+                future.set_exception(error)
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Replace a broken executor (e.g. after a worker crashed), once however many batches it failed"""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        executor.shutdown(wait=False)
+        self.start()
+
+# Create singleton instance
+calculation_pool = CalculationPool()
@@ -0,0 +1,421 @@
+"""
+Admission control and load shedding
+
+Two mechanisms protect the calculation endpoints from bursts:
+
+- per-client token buckets: every client has a budget of request tokens that
+  refills at a steady rate; heavy requests cost more tokens than light ones.
+  An exhausted budget is answered with 429 and a Retry-After hint.
+- concurrency lanes: light endpoints (ascendant, planets, stored charts) and
+  heavy endpoints (full horoscope, long-range dasha, transits, ...) have
+  separate concurrency limits and wait queues, so a burst of heavy requests
+  cannot delay the light ones. Each lane measures how long requests wait for a
+  slot; when the queue is full or the measured wait exceeds the lane's budget,
+  new requests are shed immediately with 503 and a Retry-After hint instead of
+  piling up.
+
+The middleware is pure ASGI and runs before routing, so rejected requests cost
+almost nothing.
+"""
+from typing import Any, Callable, Deque, Dict, List, Optional, Pattern, Tuple
+from collections import OrderedDict, deque
+from datetime import datetime
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import math
+import os
+import re
+import time
+import logging
+from fastapi.responses import JSONResponse
+from api.utils.error_handling import ErrorCode
+from api.utils.metrics import Span
+
+# Configure logger
+logger = logging.getLogger("jai-api.admission")
+
+# Admission control configuration
+ADMISSION_ENABLED = os.environ.get("JAI_ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+
+# Per-client token buckets (tokens per second / bucket size / cost per lane).
+# A "client" is often many users behind one address (ChatGPT Actions all come
+# from OpenAI's egress addresses), so the defaults are generous; the lanes
+# below protect the server itself.
+CLIENT_RATE = float(os.environ.get("JAI_CLIENT_RATE", "20"))
+CLIENT_BURST = float(os.environ.get("JAI_CLIENT_BURST", "400"))
+LIGHT_COST = 1.0
+HEAVY_COST = float(os.environ.get("JAI_HEAVY_COST", "5"))
+MAX_TRACKED_CLIENTS = 10000
+
+# Concurrency lanes
+LIGHT_CONCURRENCY = int(os.environ.get("JAI_LIGHT_CONCURRENCY", "32"))
+HEAVY_CONCURRENCY = int(os.environ.get("JAI_HEAVY_CONCURRENCY", "4"))
+LIGHT_MAX_QUEUE = int(os.environ.get("JAI_LIGHT_MAX_QUEUE", "256"))
+HEAVY_MAX_QUEUE = int(os.environ.get("JAI_HEAVY_MAX_QUEUE", "16"))
+LIGHT_MAX_WAIT_MS = float(os.environ.get("JAI_LIGHT_MAX_WAIT_MS", "2000"))
+HEAVY_MAX_WAIT_MS = float(os.environ.get("JAI_HEAVY_MAX_WAIT_MS", "1000"))
+
+LIGHT_LANE = "light"
+HEAVY_LANE = "heavy"
+
+# Paths that are never throttled
+EXEMPT_PATHS = {"/", "/v1/api/health", "/v1/api/metrics", "/v1/docs", "/v1/redoc", "/openapi.json"}
+
+# Paths served by the heavy lane. Endpoints that do long-range or multi-chart
+# work should be added here.
+HEAVY_ROUTE_PATTERNS: List[Pattern] = [
+    re.compile(r"^/v1/api/horoscope/(calculate|transits|progressions)$"),
+    re.compile(r"^/v1/api/charts/[^/]+/(dasha|transits|transits/events)$"),
+    re.compile(r"^/v1/api/charts/batch$"),
+    re.compile(r"^/v1/api/jobs$"),
+    re.compile(r"^/v1/api/panchanga$"),
+    re.compile(r"^/v1/api/muhurta$"),
+    re.compile(r"^/v1/api/lagna$"),
+    re.compile(r"^/v1/api/ephemeris/series$"),
+]
+
+# Reverse proxies (addresses or networks, comma-separated) whose
+# X-Forwarded-For entries are trusted; requests from anywhere else are keyed on
+# their peer address
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.environ.get("JAI_TRUSTED_PROXIES", "").split(",") if entry.strip()
+]
+
+# Secret signing client IDs (see sign_client_id); without it X-Client-ID is ignored
+CLIENT_ID_SECRET = os.environ.get("JAI_CLIENT_ID_SECRET", "")
+
+CLIENT_ID_HEADER = b"x-client-id"
+FORWARDED_FOR_HEADER = b"x-forwarded-for"
+
+class OverloadedError(Exception):
+    """Raised when a request is shed"""
+    def __init__(self, status_code: int, error_code: str, message: str, retry_after: float):
+        self.status_code = status_code
+        self.error_code = error_code
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(message)
+
+def register_heavy_route(pattern: str) -> None:
+    """Serve paths matching the regular expression from the heavy lane"""
+    HEAVY_ROUTE_PATTERNS.append(re.compile(pattern))
+
+def classify_path(path: str) -> Optional[str]:
+    """
+    Pick the lane of a request path
+
+    Returns:
+        LIGHT_LANE, HEAVY_LANE, or None for exempt paths
+    """
+    if path in EXEMPT_PATHS or not path.startswith("/v1/api/"):
+        return None
+    for pattern in HEAVY_ROUTE_PATTERNS:
+        if pattern.match(path):
+            return HEAVY_LANE
+    return LIGHT_LANE
+
+class TokenBuckets:
+    """Per-client token buckets, bounded to the most recently seen clients"""
+
+    def __init__(
+        self,
+        rate: float = CLIENT_RATE,
+        burst: float = CLIENT_BURST,
+        max_clients: int = MAX_TRACKED_CLIENTS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._rate = rate
+        self._burst = burst
+        self._max_clients = max_clients
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, client: str, cost: float = 1.0) -> float:
+        """
+        Take tokens from a client's bucket
+
+        Args:
+            client: Client key
+            cost: Number of tokens the request costs
+
+        Returns:
+            0 if the request is admitted, otherwise the seconds until enough
+            tokens are available
+        """
+        now = self._clock()
+        tokens, updated = self._buckets.pop(client, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate)
+
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self._rate if self._rate > 0 else math.inf
+
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self._max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        """Refill every client's bucket"""
+        self._buckets.clear()
+
+class Lane:
+    """Concurrency-limited lane with a bounded, wait-time aware queue"""
+
+    # Weight of the latest sample in the moving average of queue wait times
+    WAIT_SMOOTHING = 0.2
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait_ms: float):
+        self.name = name
+        self._concurrency = max(1, concurrency)
+        self._max_queue = max_queue
+        self._max_wait = max_wait_ms / 1000.0
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Monitoring
+        self.average_wait = 0.0
+        self.admitted = 0
+        self.shed = 0
+
+    @property
+    def active(self) -> int:
+        """Requests currently holding a slot"""
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        """Requests waiting for a slot"""
+        return len(self._waiters)
+
+    def _record_wait(self, seconds: float) -> None:
+        self.average_wait += self.WAIT_SMOOTHING * (seconds - self.average_wait)
+
+    def _overloaded(self, reason: str) -> OverloadedError:
+        self.shed += 1
+        retry_after = max(1.0, self.average_wait, self._max_wait)
+        return OverloadedError(
+            503,
+            ErrorCode.SERVICE_OVERLOADED,
+            f"Server is busy ({reason}). Please retry later.",
+            retry_after
+        )
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot in the lane
+
+        Raises:
+            OverloadedError: If the request is shed
+        """
+        if self._active < self._concurrency and not self._waiters:
+            self._active += 1
+            self._record_wait(0.0)
+            self.admitted += 1
+            return
+
+        # Shed early instead of queueing requests that would time out anyway
+        if len(self._waiters) >= self._max_queue:
+            raise self._overloaded(f"{self.name} queue full")
+        if self.average_wait > self._max_wait:
+            raise self._overloaded(f"{self.name} queue wait {self.average_wait:.1f}s")
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self._max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # The slot was handed over just as the wait timed out
+                self.release()
+            else:
+                waiter.cancel()
+            self._remove_waiter(waiter)
+            self._record_wait(time.monotonic() - started)
+            raise self._overloaded(f"{self.name} queue wait exceeded")
+        except asyncio.CancelledError:
+            # Client went away while queued
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            self._remove_waiter(waiter)
+            raise
+
+        self._record_wait(time.monotonic() - started)
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the next waiter"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def _remove_waiter(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+class AdmissionController:
+    """Combines the per-client token buckets with the light and heavy lanes"""
+
+    def __init__(
+        self,
+        buckets: Optional[TokenBuckets] = None,
+        lanes: Optional[Dict[str, Lane]] = None
+    ):
+        self.buckets = buckets or TokenBuckets()
+        self.lanes = lanes or {
+            LIGHT_LANE: Lane(LIGHT_LANE, LIGHT_CONCURRENCY, LIGHT_MAX_QUEUE, LIGHT_MAX_WAIT_MS),
+            HEAVY_LANE: Lane(HEAVY_LANE, HEAVY_CONCURRENCY, HEAVY_MAX_QUEUE, HEAVY_MAX_WAIT_MS),
+        }
+        self.rate_limited = 0
+
+    def reset(self) -> None:
+        """Refill every client's budget and forget the lanes' measured waits (e.g. between tests)"""
+        self.buckets.clear()
+        for lane in self.lanes.values():
+            lane.average_wait = 0.0
+        self.rate_limited = 0
+
+    async def admit(self, client: str, lane_name: str) -> Lane:
+        """
+        Admit a request, waiting for a lane slot if necessary
+
+        Returns:
+            The lane holding the request's slot (release it when done)
+
+        Raises:
+            OverloadedError: If the client is over budget or the lane is saturated
+        """
+        cost = HEAVY_COST if lane_name == HEAVY_LANE else LIGHT_COST
+        wait = self.buckets.take(client, cost)
+        if wait > 0:
+            self.rate_limited += 1
+            raise OverloadedError(
+                429,
+                ErrorCode.RATE_LIMIT_EXCEEDED,
+                "Too many requests. Please slow down.",
+                wait
+            )
+
+        lane = self.lanes[lane_name]
+        await lane.acquire()
+        return lane
+
+def sign_client_id(client_id: str, secret: str = CLIENT_ID_SECRET) -> str:
+    """
+    The X-Client-ID value of an authenticated client: its ID and an HMAC of it
+
+    Issue these to clients sharing an address (e.g. behind one NAT) that
+    should get budgets of their own.
+    """
+    signature = hmac.new(secret.encode(), client_id.encode(), hashlib.sha256).hexdigest()
+    return f"{client_id}.{signature}"
+
+def _authenticated_client_id(value: str, secret: str) -> Optional[str]:
+    """The client ID of a signed X-Client-ID value, None if it is not signed with the secret"""
+    client_id = value.rpartition(".")[0]
+    if not secret or not client_id:
+        return None
+    if not hmac.compare_digest(sign_client_id(client_id, secret), value):
+        return None
+    return client_id
+
+def _is_trusted(address: str, proxies: List[Any]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+def client_key(
+    scope: Dict[str, Any],
+    trusted_proxies: Optional[List[Any]] = None,
+    secret: Optional[str] = None
+) -> str:
+    """
+    Identify the client of an ASGI request
+
+    Clients are keyed on their address: the peer address, or behind trusted
+    proxies the rightmost X-Forwarded-For entry that is not a trusted proxy
+    (entries left of it can be forged by the client). A client ID counts only
+    when signed with CLIENT_ID_SECRET (see sign_client_id).
+    """
+    proxies = TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    secret = CLIENT_ID_SECRET if secret is None else secret
+    headers = dict(scope.get("headers") or [])
+
+    client_id = headers.get(CLIENT_ID_HEADER)
+    if client_id:
+        authenticated = _authenticated_client_id(client_id.decode("latin-1").strip(), secret)
+        if authenticated is not None:
+            return f"id:{authenticated}"
+
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    forwarded_for = headers.get(FORWARDED_FOR_HEADER)
+    if forwarded_for and _is_trusted(address, proxies):
+        hops = [hop.strip() for hop in forwarded_for.decode("latin-1").split(",") if hop.strip()]
+        for address in reversed(hops):
+            if not _is_trusted(address, proxies):
+                break
+    return address
+
+def overloaded_response(exc: OverloadedError) -> JSONResponse:
+    """Standardized error response for shed requests"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "status": "error",
+            "version": "1.0",
+            "generated_at": datetime.now().isoformat(),
+            "error_code": exc.error_code,
+            "error_message": exc.message,
+            "error_details": {"retry_after": math.ceil(exc.retry_after)}
+        },
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the admission controller to API requests"""
+
+    def __init__(self, app, controller: Optional["AdmissionController"] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        lane_name = classify_path(scope["path"])
+        if lane_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with Span("admission_wait"):
+                lane = await self.controller.admit(client_key(scope), lane_name)
+        except OverloadedError as e:
+            logger.warning(f"Shed {scope['path']} ({lane_name} lane): {e.message}")
+            await overloaded_response(e)(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
+
+# Create singleton instance
+admission_controller = AdmissionController()
@@ -0,0 +1,180 @@
+"""
+Content negotiation
+
+Endpoints can answer in more than one representation. The client picks one
+with the Accept header; JSON stays the default, so clients that send no
+Accept header (or */*) are unaffected.
+
+Routers created with `route_class=NegotiatedRoute` encode the response model
+of every endpoint as MessagePack or CBOR when the client prefers one of them
+(see api.utils.model_encoding); the endpoints themselves are unchanged.
+Endpoints with representations of their own (the columnar container or NDJSON
+streams of bulk endpoints) negotiate explicitly and return a Response for them:
+
+    media_type = negotiate(http_request, MODEL_MEDIA_TYPES + (COLUMNAR_MEDIA_TYPE,))
+
+Responses whose representation depends on Accept carry `Vary: Accept` so
+shared caches keep them apart.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from contextvars import ContextVar
+import functools
+import inspect
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from api.utils.error_handling import ErrorCode
+from api.utils.model_encoding import ENCODERS
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Columnar NumPy-array container (see api.services.columnar)
+COLUMNAR_MEDIA_TYPE = "application/vnd.jai.columnar"
+
+# Newline-delimited JSON, streamed record by record (see api.utils.streaming)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Representations of response models: JSON, then the installed binary encodings
+MODEL_MEDIA_TYPES = (JSON_MEDIA_TYPE,) + tuple(ENCODERS)
+
+# Representation of the response model of the current request
+_model_media_type: ContextVar[str] = ContextVar("jai_model_media_type", default=JSON_MEDIA_TYPE)
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    """Media ranges of an Accept header with their quality values"""
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range.lower(), quality))
+    return ranges
+
+def _quality(media_type: str, ranges: List[Tuple[str, float]]) -> float:
+    """Quality of a media type under the most specific matching range"""
+    kind = media_type.split("/")[0]
+    best: Optional[Tuple[int, float]] = None
+    for media_range, quality in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{kind}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if best is None or specificity > best[0]:
+            best = (specificity, quality)
+    return best[1] if best else 0.0
+
+def preferred_media_type(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    The offered media type the client prefers
+
+    Args:
+        accept: Raw Accept header (None or empty accepts anything)
+        offered: Media types the endpoint can produce, the default first
+
+    Returns:
+        The acceptable offered type with the highest quality (ties go to the
+        earlier one), or None if the client accepts none of them
+    """
+    if not accept or not accept.strip():
+        return offered[0]
+    ranges = _parse_accept(accept)
+    qualities: Dict[str, float] = {media_type: _quality(media_type, ranges) for media_type in offered}
+    best = max(offered, key=lambda media_type: qualities[media_type])
+    return best if qualities[best] > 0 else None
+
+def negotiate(http_request: Request, offered: Sequence[str]) -> str:
+    """
+    Pick the response media type of a request
+
+    Raises:
+        HTTPException: 406 if the client accepts none of the offered types
+    """
+    media_type = preferred_media_type(http_request.headers.get("accept"), offered)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail={
+                "error_code": ErrorCode.NOT_ACCEPTABLE,
+                "error_message": f"Cannot produce any of the accepted media types. Available: {', '.join(offered)}"
+            }
+        )
+    return media_type
+
+def response_media_type() -> str:
+    """Media type the response model of the current request is encoded in"""
+    return _model_media_type.get()
+
+def _add_vary(response: Response) -> None:
+    vary = response.headers.get("vary")
+    if not vary:
+        response.headers["Vary"] = "Accept"
+    elif "accept" not in [item.strip().lower() for item in vary.split(",")]:
+        response.headers["Vary"] = f"{vary}, Accept"
+
+def _encoded(content: Any, media_type: str, sub_response: Optional[Response]) -> Response:
+    """A binary response with the headers the endpoint set on its injected Response"""
+    headers = {}
+    if sub_response is not None:
+        headers = {name: value for name, value in sub_response.headers.items()
+                   if name not in ("content-length", "content-type")}
+    status_code = sub_response.status_code if sub_response is not None and sub_response.status_code else 200
+    return Response(ENCODERS[media_type](content), status_code=status_code, media_type=media_type, headers=headers)
+
+def _encoding_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so its return value is encoded in the negotiated binary format"""
+    def encode(result: Any, kwargs: Dict[str, Any]) -> Any:
+        media_type = _model_media_type.get()
+        if media_type == JSON_MEDIA_TYPE or isinstance(result, Response):
+            return result
+        sub_response = next((value for value in kwargs.values() if isinstance(value, Response)), None)
+        return _encoded(result, media_type, sub_response)
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            return encode(await endpoint(*args, **kwargs), kwargs)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        return encode(endpoint(*args, **kwargs), kwargs)
+    return wrapper
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route whose response model can also be sent as MessagePack or CBOR
+
+    The binary body is encoded from the object the endpoint returns, skipping
+    FastAPI's JSON serialization; headers the endpoint set on its injected
+    Response (ETag, Cache-Control, ...) are kept.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, _encoding_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            media_type = preferred_media_type(request.headers.get("accept"), MODEL_MEDIA_TYPES)
+            token = _model_media_type.set(media_type or JSON_MEDIA_TYPE)
+            try:
+                response = await handler(request)
+            finally:
+                _model_media_type.reset(token)
+            _add_vary(response)
+            return response
+
+        return negotiated_handler
+
@@ -0,0 +1,247 @@
+"""
+Request deadlines and cooperative cancellation
+
+Every API request gets a deadline (JAI_REQUEST_TIMEOUT, or a shorter
+X-Request-Timeout sent by the client). The deadline is carried in a context
+variable, so code anywhere below the route - geocoding, timezone resolution,
+ephemeris loops, dasha and transit generators - can check it without having it
+threaded through every signature:
+
+    check_deadline("geocoding")          # raises DeadlineExceededError when overdue
+    timeout = clamp_timeout(5)           # HTTP timeout bounded by the deadline
+    sleep_within_deadline(backoff)       # retry back-off that respects it
+
+The middleware also watches the connection. When the client disconnects or the
+deadline passes while the route is waiting (e.g. on a calculation worker), the
+route task is cancelled so its worker slot is freed immediately; overdue
+requests are answered with 504. The deadline bounds the time to the response
+headers: once they are sent, a streamed body (NDJSON, columnar series) runs to
+its end unless the client disconnects.
+"""
+from typing import Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import math
+import os
+import time
+import logging
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from api.utils.error_handling import ErrorCode
+
+# Configure logger
+logger = logging.getLogger("jai-api.deadline")
+
+# Default and maximum time budget of a request, in seconds. The default stays
+# below the 45 second timeout of GPT actions.
+REQUEST_TIMEOUT = float(os.environ.get("JAI_REQUEST_TIMEOUT", "40"))
+MAX_REQUEST_TIMEOUT = float(os.environ.get("JAI_MAX_REQUEST_TIMEOUT", "120"))
+
+# Header a client can use to ask for a shorter deadline (seconds)
+TIMEOUT_HEADER = b"x-request-timeout"
+
+# Requests without a deadline: job uploads are bounded by their size
+# (MAX_JOB_UPLOAD_BYTES) rather than by time, and their calculation runs in the
+# background
+UNBOUNDED_ROUTES = {("POST", "/v1/api/jobs")}
+
+class DeadlineExceededError(Exception):
+    """Raised by cooperative checks once the request is overdue or abandoned"""
+    def __init__(self, stage: str = "", cancelled: bool = False):
+        self.stage = stage
+        self.cancelled = cancelled
+        reason = "client disconnected" if cancelled else "request deadline exceeded"
+        super().__init__(f"{reason} during {stage}" if stage else reason)
+
+class Deadline:
+    """Point in time by which a request must be answered"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.cancelled = False
+
+    def remaining(self) -> float:
+        """Seconds left (0 once expired or cancelled)"""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the work for this request should stop"""
+        return self.cancelled or time.monotonic() >= self.expires_at
+
+    def cancel(self) -> None:
+        """Mark the request as abandoned (client disconnected)"""
+        self.cancelled = True
+
+    def lift(self) -> None:
+        """Remove the time limit (the response has started); cancellation still applies"""
+        self.expires_at = math.inf
+
+    def check(self, stage: str = "") -> None:
+        """
+        Raise if the request is overdue or abandoned
+
+        Raises:
+            DeadlineExceededError: If work for this request should stop
+        """
+        if self.expired:
+            raise DeadlineExceededError(stage, cancelled=self.cancelled)
+
+    def wall_clock_expiry(self) -> float:
+        """The deadline as a time.time() timestamp, for other processes"""
+        return time.time() + self.remaining()
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("jai_request_deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the request being handled, if any"""
+    return _current_deadline.get()
+
+def check_deadline(stage: str = "") -> None:
+    """
+    Cooperative cancellation point (no-op outside of a request)
+
+    Raises:
+        DeadlineExceededError: If the current request is overdue or abandoned
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+def clamp_timeout(timeout: float) -> float:
+    """Bound a timeout (e.g. of an outgoing HTTP call) by the time left"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return timeout
+    return max(0.1, min(timeout, deadline.remaining()))
+
+def sleep_within_deadline(seconds: float, stage: str = "") -> None:
+    """
+    Sleep (e.g. for a retry back-off) unless that would overrun the deadline
+
+    Raises:
+        DeadlineExceededError: If the deadline passes before the sleep would end
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.remaining() <= seconds:
+        raise DeadlineExceededError(stage, cancelled=deadline.cancelled)
+    time.sleep(seconds)
+
+@contextmanager
+def deadline_scope(timeout: float) -> Iterator[Deadline]:
+    """Run a block of work under a deadline (for work outside HTTP requests)"""
+    deadline = Deadline(timeout)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+def request_timeout(scope) -> float:
+    """Time budget of a request: the default, or a shorter one asked for by the client"""
+    for name, value in scope.get("headers") or []:
+        if name == TIMEOUT_HEADER:
+            try:
+                return max(0.1, min(float(value), MAX_REQUEST_TIMEOUT))
+            except ValueError:
+                break
+    return REQUEST_TIMEOUT
+
+def deadline_response(stage: str = "") -> JSONResponse:
+    """Standardized error response for overdue requests"""
+    message = "The request could not be completed within its time limit"
+    return JSONResponse(
+        status_code=504,
+        content={
+            "status": "error",
+            "version": "1.0",
+            "generated_at": datetime.now().isoformat(),
+            "error_code": ErrorCode.REQUEST_TIMEOUT,
+            "error_message": f"{message} ({stage})" if stage else message
+        }
+    )
+
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError) -> JSONResponse:
+    """Handler for DeadlineExceededError raised by cooperative checks"""
+    logger.warning(f"{request.url.path}: {str(exc)}")
+    return deadline_response(exc.stage)
+
+class DeadlineMiddleware:
+    """ASGI middleware attaching a deadline to API requests and enforcing it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not scope["path"].startswith("/v1/api/")
+                or (scope["method"], scope["path"]) in UNBOUNDED_ROUTES):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(request_timeout(scope))
+        token = _current_deadline.set(deadline)
+        messages: "asyncio.Queue[dict]" = asyncio.Queue()
+        response_started = False
+        response_complete = False
+
+        async def pump_messages():
+            # Read the connection in the background so a disconnect is noticed
+            # while the route is still working
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    deadline.cancel()
+                    return
+
+        async def send_wrapper(message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                # The client is being answered: a streamed body is not cut off
+                # (nor turned into an error line) when the deadline passes
+                response_started = True
+                deadline.lift()
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                response_complete = True
+            await send(message)
+
+        pump = asyncio.ensure_future(pump_messages())
+        # The task inherits the context, and with it the deadline
+        app_task = asyncio.ensure_future(self.app(scope, messages.get, send_wrapper))
+        try:
+            while True:
+                remaining = deadline.remaining()
+                done, _ = await asyncio.wait(
+                    {app_task, pump},
+                    timeout=None if math.isinf(remaining) else remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if app_task in done or response_complete:
+                    # Answered in time (a disconnect after the response is normal)
+                    await app_task
+                    return
+                if done or not response_started:
+                    break
+                # The response started as the deadline passed: keep streaming
+
+            # Overdue or abandoned: stop the route and free its slot
+            app_task.cancel()
+            try:
+                await app_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+            if deadline.cancelled:
+                logger.info(f"Client disconnected, cancelled {scope['path']}")
+            else:
+                logger.warning(f"Deadline of {deadline.timeout:.1f}s exceeded, cancelled {scope['path']}")
+                if not response_started:
+                    await deadline_response()(scope, receive, send)
+        finally:
+            pump.cancel()
+            _current_deadline.reset(token)
@@ -25,6 +25,13 @@ class ErrorCode:
     INTERNAL_SERVER_ERROR = "INTERNAL_SERVER_ERROR"
     VALIDATION_ERROR = "VALIDATION_ERROR"
     RATE_LIMIT_EXCEEDED = "RATE_LIMIT_EXCEEDED"
+    CHART_NOT_FOUND = "CHART_NOT_FOUND"
+    SERVICE_OVERLOADED = "SERVICE_OVERLOADED"
+    REQUEST_TIMEOUT = "REQUEST_TIMEOUT"
+    NOT_ACCEPTABLE = "NOT_ACCEPTABLE"
+    UNSUPPORTED_MEDIA_TYPE = "UNSUPPORTED_MEDIA_TYPE"
+    JOB_NOT_FOUND = "JOB_NOT_FOUND"
+    UNAUTHORIZED = "UNAUTHORIZED"
 
 class APIError(Exception):
     """Custom API error with code, message, and details"""
@@ -0,0 +1,192 @@
+"""
+HTTP caching helpers for chart endpoints
+
+Chart results are a pure function of the normalized birth inputs (date, time,
+resolved coordinates, timezone, ayanamsa and calculation options). This module
+derives a canonical fingerprint from those inputs and exposes it as an ETag so
+clients and CDNs can revalidate with If-None-Match instead of recomputing.
+"""
+from fastapi import Request, Response
+from api.utils.content_negotiation import JSON_MEDIA_TYPE, response_media_type
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.http_cache")
+
+# Bump whenever a change to the calculation code alters chart output, so that
+# previously issued ETags stop matching
+CHART_ENGINE_VERSION = "2"
+
+# API version included in every fingerprint (matches BaseResponse.version)
+API_VERSION = "1.0"
+
+# Cache lifetime for chart responses (default: 30 days)
+CHART_CACHE_MAX_AGE = int(os.environ.get("CHART_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+CHART_CACHE_CONTROL = f"public, max-age={CHART_CACHE_MAX_AGE}, immutable"
+
+# For chart responses that also depend on the current date: clients keep them
+# but revalidate, and the ETag changes with the date
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# For chart responses to POST requests, which shared caches do not store and
+# which cannot be revalidated
+POST_CACHE_CONTROL = "private"
+
+# Methods whose requests are answered 304 for a matching If-None-Match
+# (RFC 7232 section 3.2); other methods ignore the header
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+def normalize_chart_params(
+    birth_date: str,
+    birth_time: str,
+    latitude: float,
+    longitude: float,
+    timezone_offset: float,
+    ayanamsa: str,
+    **options: Any
+) -> Dict[str, Any]:
+    """
+    Build the canonical parameter set that fully determines a chart
+
+    Coordinates are rounded to 6 decimals (~0.1 m) and the timezone offset to
+    4 decimals so that float noise from geocoding does not change the fingerprint.
+
+    Args:
+        birth_date: Birth date (YYYY-MM-DD, already normalized by the request model)
+        birth_time: Birth time (HH:MM:SS, already normalized by the request model)
+        latitude: Resolved latitude
+        longitude: Resolved longitude
+        timezone_offset: Resolved timezone offset in hours
+        ayanamsa: Ayanamsa name
+        **options: Additional calculation options that influence the result
+
+    Returns:
+        Dictionary of normalized parameters
+    """
+    params = {
+        "birth_date": birth_date,
+        "birth_time": birth_time,
+        "latitude": round(float(latitude), 6),
+        "longitude": round(float(longitude), 6),
+        "timezone_offset": round(float(timezone_offset), 4),
+        "ayanamsa": (ayanamsa or "lahiri").strip().lower(),
+    }
+    for key, value in options.items():
+        if value is not None:
+            params[key] = value.strip().lower() if isinstance(value, str) else value
+    return params
+
+def chart_fingerprint(params: Dict[str, Any], scope: str = "") -> str:
+    """
+    Compute a deterministic fingerprint for a set of normalized chart parameters
+
+    Args:
+        params: Normalized parameters from normalize_chart_params
+        scope: Optional scope (e.g. the endpoint name) so that different
+            representations of the same chart get different fingerprints
+
+    Returns:
+        Hex digest (32 characters)
+    """
+    canonical = json.dumps(
+        {
+            "engine": CHART_ENGINE_VERSION,
+            "api": API_VERSION,
+            "scope": scope,
+            "params": params,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+def make_etag(fingerprint: str) -> str:
+    """
+    Format a fingerprint as a weak ETag
+
+    The ETag is weak because response bodies carry a fresh generated_at
+    timestamp: they are semantically, not byte-for-byte, equivalent.
+    """
+    return f'W/"{fingerprint}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag using weak comparison
+
+    Args:
+        if_none_match: Raw If-None-Match header value (may list several tags)
+        etag: ETag of the current representation
+
+    Returns:
+        True if the client's cached representation is still valid
+    """
+    if not if_none_match:
+        return False
+
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+def cache_headers(etag: str, cache_control: str = CHART_CACHE_CONTROL) -> Dict[str, str]:
+    """Headers attached to cacheable chart responses (including 304s)"""
+    return {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+    }
+
+def conditional_chart_response(
+    http_request: Request,
+    response: Response,
+    scope: str,
+    params: Dict[str, Any],
+    cache_control: str = CHART_CACHE_CONTROL
+) -> Optional[Response]:
+    """
+    Apply ETag/Cache-Control headers and short-circuit revalidation requests
+
+    Call this at the top of a chart route, before any ephemeris work. If the
+    client already holds the current representation of a GET or HEAD request,
+    a 304 response is returned and the route should return it immediately.
+    Otherwise the cache headers are set on the route's response and None is
+    returned. POST requests ignore If-None-Match and their responses are
+    marked private instead of immutable.
+
+    Args:
+        http_request: Incoming request (for If-None-Match)
+        response: Response object injected by FastAPI for the route
+        scope: Endpoint scope included in the fingerprint
+        params: Normalized chart parameters
+        cache_control: Cache-Control header (default: immutable for
+            CHART_CACHE_MAX_AGE)
+
+    Returns:
+        A 304 Response, or None if the chart must be computed
+    """
+    # Each representation (JSON, MessagePack, CBOR) has its own ETag
+    media_type = response_media_type()
+    if media_type != JSON_MEDIA_TYPE:
+        scope = f"{scope}:{media_type}"
+    etag = make_etag(chart_fingerprint(params, scope=scope))
+    conditional = http_request.method in CONDITIONAL_METHODS
+    if not conditional and cache_control == CHART_CACHE_CONTROL:
+        cache_control = POST_CACHE_CONTROL
+    headers = cache_headers(etag, cache_control)
+
+    if conditional and etag_matches(http_request.headers.get("if-none-match"), etag):
+        logger.debug("ETag match for %s: %s", scope, etag)
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -4,6 +4,7 @@ Input validation utilities for the JAI API.
 from datetime import datetime
 from typing import Tuple, Optional
 from pydantic import BaseModel, Field, validator
+import os
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,12 @@ MAX_LONGITUDE = 180.0
 MIN_YEAR = 1900
 MAX_YEAR = 2100
 
+# Longest ranges of the day-range endpoints (the request models and the
+# services enforce the same limits)
+MAX_PANCHANGA_DAYS = int(os.environ.get("JAI_PANCHANGA_MAX_DAYS", "366"))
+MAX_MUHURTA_DAYS = int(os.environ.get("JAI_MUHURTA_MAX_DAYS", "90"))
+MAX_LAGNA_DAYS = int(os.environ.get("JAI_LAGNA_MAX_DAYS", "366"))
+
 class ValidationError(Exception):
     """Custom validation error with detailed message."""
     def __init__(self, message: str, field: str = None):
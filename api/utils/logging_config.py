@@ -0,0 +1,182 @@
+"""
+Logging configuration
+
+Logging is kept off the request path:
+
+- records are handed to a QueueHandler; a listener thread formats them and
+  writes them to stdout, so slow I/O (e.g. a blocked pipe under gunicorn)
+  never blocks request or calculation threads
+- messages use lazy %-style arguments, which are only formatted when the record
+  is actually emitted
+- levels are configured globally (JAI_LOG_LEVEL) and per logger
+  (JAI_LOG_LEVELS="jai-api.calculation=DEBUG,jai-api.request=WARNING")
+- JAI_LOG_FORMAT=json writes one JSON object per line
+- a forked process (gunicorn workers of a preloaded app, calculation workers)
+  gets its own queue and listener thread; threads do not survive a fork
+
+Per-request diagnostics are structured debug events:
+
+    log_event(logger, "planet_position", planet="Sun", longitude=123.4)
+
+They cost a single level check when debug logging is off. Diagnostics that are
+too verbose to log for every request are sampled with
+JAI_DIAGNOSTICS_SAMPLE_RATE (fraction of requests, default 1.0 when debug
+logging is enabled for the logger):
+
+    if diagnostics_enabled(logger):
+        log_event(logger, "d1_chart_validation", ...)
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Logging configuration
+LOG_LEVEL = os.environ.get("JAI_LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("JAI_LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("JAI_LOG_FORMAT", "text").lower()
+DIAGNOSTICS_SAMPLE_RATE = float(os.environ.get("JAI_DIAGNOSTICS_SAMPLE_RATE", "1.0"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed as an event field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def _event_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+class TextFormatter(logging.Formatter):
+    """The usual text format, with event fields appended as key=value pairs"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _event_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        document.update(_event_fields(record))
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str)
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread
+
+    The stdlib handler formats every record before queueing it. The queue is
+    in-process, so only the %-interpolation of the message is done here (the
+    arguments may change after the call); timestamps, tracebacks and JSON
+    encoding happen in the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse "logger=LEVEL,..." into levels by logger name (invalid entries are skipped)"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        level_number = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level_number, int):
+            levels[name.strip()] = level_number
+    return levels
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    log_format: str = LOG_FORMAT,
+    stream=None
+) -> None:
+    """
+    Route all logging through a queue to a background writer thread
+
+    Safe to call more than once; later calls replace the configuration.
+    """
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if log_format == "json" else TextFormatter())
+
+    # stop_logging removed an earlier configuration; handlers installed by
+    # others (e.g. pytest's log capture) are left alone
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root = logging.getLogger()
+    root.addHandler(_LazyQueueHandler(log_queue))
+    root.setLevel(level)
+
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Flush the queue, stop the writer thread and detach the queue handler"""
+    global _listener
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _LazyQueueHandler):
+            root.removeHandler(handler)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _restart_after_fork() -> None:
+    """
+    Give a forked child its own queue and listener thread
+
+    Only the forking thread survives a fork, so without this the child's
+    records would pile up in a queue nobody reads. Records the parent had not
+    written yet stay with the parent.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, _LazyQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.DEBUG, **fields: Any) -> None:
+    """Log a structured event (fields become attributes of the record)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra=fields)
+
+def diagnostics_enabled(logger: logging.Logger, sample_rate: Optional[float] = None) -> bool:
+    """Whether verbose debug diagnostics should be produced for this request"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    rate = DIAGNOSTICS_SAMPLE_RATE if sample_rate is None else sample_rate
+    return rate >= 1.0 or random.random() < rate
@@ -0,0 +1,398 @@
+"""
+Request metrics
+
+Lightweight, in-process instrumentation exposed in the Prometheus text format
+at /v1/api/metrics:
+
+- stage timings: code wraps a stage of the request in a Span, which feeds the
+  jai_stage_duration_seconds histogram
+
+      with Span("geocode"):
+          geo_data = geocode_place(place)
+
+- ephemeris calls: Swiss Ephemeris functions are called through swe_call, which
+  counts and times every call, per function and per request
+- cache and provider events: counters of cache hits/misses and of calls to
+  external services (geocoding, timezone)
+- request timings: the middleware measures every API request and splits it into
+  validation (until the route handler starts), handler and serialization (from
+  the end of the handler until the response starts)
+
+Metrics are plain dictionaries updated without locks; an occasional lost
+increment under thread contention is acceptable for monitoring. Every process
+keeps its own metrics (with several HTTP workers, each worker is scraped
+separately). Ephemeris calls made in calculation worker processes are not
+counted. JAI_METRICS=false turns the instrumentation off.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextvars import ContextVar
+import functools
+import inspect
+import os
+import time
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.metrics")
+
+METRICS_ENABLED = os.environ.get("JAI_METRICS", "true").lower() in ("1", "true", "yes")
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Histogram buckets in seconds: requests and stages range from microseconds
+# (cache hits, single ephemeris calls) to tens of seconds (geocoding retries)
+DURATION_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+CALLS_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Metric:
+    """Base class of a metric family with a fixed set of label names"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Increase the count of a label combination"""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the value of a label combination (collectors copying a running total kept elsewhere)"""
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """Values by label combination"""
+        return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self.samples():
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+    def clear(self) -> None:
+        self._values.clear()
+
+class Gauge(Counter):
+    """Value that can go up and down (usually set by a collector at scrape time)"""
+
+    kind = "gauge"
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record an observation for a label combination"""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def total(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[-1] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bucket_names = self.labelnames + ("le",)
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                label_text = _label_text(bucket_names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{label_text} {int(cumulative)}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {int(cumulative)}")
+        return lines
+
+    def clear(self) -> None:
+        self._series.clear()
+
+class Registry:
+    """Collection of metric families, rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric name: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Run a function before every scrape (e.g. to update gauges from other components)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {str(e)}")
+
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Reset all values (for tests)"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    "jai_request_duration_seconds", "Duration of API requests", ("route", "method", "status")
+)
+STAGE_DURATION = registry.histogram(
+    "jai_stage_duration_seconds", "Duration of request processing stages", ("stage",)
+)
+CACHE_EVENTS = registry.counter(
+    "jai_cache_events_total", "Cache lookups by cache and result", ("cache", "result")
+)
+PROVIDER_CALLS = registry.counter(
+    "jai_provider_calls_total", "Calls to external services by provider and outcome", ("provider", "outcome")
+)
+SWE_CALLS = registry.counter(
+    "jai_swe_calls_total", "Swiss Ephemeris calls by function", ("function",)
+)
+SWE_DURATION = registry.histogram(
+    "jai_swe_call_duration_seconds", "Duration of Swiss Ephemeris calls by function", ("function",)
+)
+SWE_CALLS_PER_REQUEST = registry.histogram(
+    "jai_swe_calls_per_request", "Swiss Ephemeris calls made while handling a request", ("route",),
+    buckets=CALLS_BUCKETS
+)
+
+class RequestMetrics:
+    """Measurements of the request being handled"""
+
+    __slots__ = ("started", "route", "handler_started", "handler_finished", "swe_calls")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.route: Optional[str] = None
+        self.handler_started: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+        self.swe_calls = 0
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("jai_request_metrics", default=None)
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    """Measurements of the request being handled, if any"""
+    return _current_request.get()
+
+class Span:
+    """Time a block of code as a request processing stage"""
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self) -> "Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if METRICS_ENABLED:
+            STAGE_DURATION.observe(time.perf_counter() - self.started, self.stage)
+
+def swe_call(function: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Call a Swiss Ephemeris function, counting and timing the call"""
+    if not METRICS_ENABLED:
+        return fn(*args)
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        SWE_DURATION.observe(time.perf_counter() - started, function)
+        SWE_CALLS.inc(function)
+        request = _current_request.get()
+        if request is not None:
+            request.swe_calls += 1
+
+def count_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup"""
+    if METRICS_ENABLED:
+        CACHE_EVENTS.inc(cache, "hit" if hit else "miss")
+
+def count_provider_call(provider: str, outcome: str) -> None:
+    """Record a call to an external service ("success", "error", ...)"""
+    if METRICS_ENABLED:
+        PROVIDER_CALLS.inc(provider, outcome)
+
+def _timed_endpoint(endpoint: Callable[..., Any], route: str) -> Callable[..., Any]:
+    """Wrap a route endpoint to mark the start and end of the handler"""
+    def begin() -> Optional[RequestMetrics]:
+        request = _current_request.get()
+        if request is not None:
+            request.route = route
+            request.handler_started = time.perf_counter()
+        return request
+
+    def end(request: Optional[RequestMetrics]) -> None:
+        if request is not None:
+            request.handler_finished = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            request = begin()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                end(request)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            request = begin()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                end(request)
+    return timed
+
+def instrument_routes(routes: Iterable[Any]) -> None:
+    """
+    Time the handlers of API routes
+
+    The endpoint a route calls is replaced by a wrapper that records the route
+    template and the start and end of the handler, which splits the request
+    duration into validation, handler and serialization stages.
+    """
+    for route in routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is None or getattr(dependant.call, "__jai_timed__", False):
+            continue
+        dependant.call = _timed_endpoint(dependant.call, route.path)
+        dependant.call.__jai_timed__ = True
+
+def observe_request(request: RequestMetrics, method: str, status: int, response_started: Optional[float]) -> None:
+    """Record the measurements of a finished request"""
+    finished = time.perf_counter()
+    # Requests rejected before routing (shed, unknown paths) have no route
+    route = request.route or "unrouted"
+    REQUEST_DURATION.observe(finished - request.started, route, method, str(status))
+
+    if request.handler_started is not None:
+        # Request parsing and pydantic validation (including geocoding)
+        STAGE_DURATION.observe(request.handler_started - request.started, "validation")
+        if request.handler_finished is not None:
+            STAGE_DURATION.observe(request.handler_finished - request.handler_started, "handler")
+            if response_started is not None:
+                STAGE_DURATION.observe(response_started - request.handler_finished, "serialization")
+        SWE_CALLS_PER_REQUEST.observe(request.swe_calls, route)
+
+class MetricsMiddleware:
+    """ASGI middleware measuring API requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] != "http" or not scope["path"].startswith("/v1/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics(time.perf_counter())
+        token = _current_request.set(request)
+        status = 500
+        response_started: Optional[float] = None
+
+        async def send_wrapper(message):
+            nonlocal status, response_started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_started = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            observe_request(request, scope["method"], status, response_started)
@@ -0,0 +1,55 @@
+"""
+Binary encodings of response models
+
+MessagePack and CBOR bodies are encoded straight from the response models:
+the encoders walk the pydantic models through a `default` hook, one model at
+a time, instead of dumping the whole tree to a JSON-compatible dictionary
+(model_dump / jsonable_encoder) and encoding that. The result carries the
+same field names and values as the JSON body (CBOR keeps dates and datetimes
+as its standard tagged types).
+
+Both libraries are optional; a format is only offered when its library is
+installed (imported on first use).
+"""
+from typing import Any, Callable, Dict
+from datetime import date, datetime, time
+from enum import Enum
+import importlib.util
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+CBOR_MEDIA_TYPE = "application/cbor"
+
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+CBOR_AVAILABLE = importlib.util.find_spec("cbor2") is not None
+
+def _plain(value: Any) -> Any:
+    """One level of a value the encoders do not know natively"""
+    if isinstance(value, BaseModel):
+        return {name: getattr(value, name) for name in type(value).model_fields}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+def encode_msgpack(content: Any) -> bytes:
+    """MessagePack body of a response model (or plain content)"""
+    import msgpack
+
+    return msgpack.packb(content, default=_plain, use_bin_type=True)
+
+def encode_cbor(content: Any) -> bytes:
+    """CBOR body of a response model (or plain content)"""
+    import cbor2
+
+    return cbor2.dumps(content, default=lambda encoder, value: encoder.encode(_plain(value)))
+
+# Encoders by media type, for the installed libraries
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {}
+if MSGPACK_AVAILABLE:
+    ENCODERS[MSGPACK_MEDIA_TYPE] = encode_msgpack
+if CBOR_AVAILABLE:
+    ENCODERS[CBOR_MEDIA_TYPE] = encode_cbor
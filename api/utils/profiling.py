@@ -0,0 +1,339 @@
+"""
+On-demand and sampled profiling
+
+Single requests can be profiled in production by an administrator, without a
+redeploy. The request carries the admin token and a profile flag, either as a
+header or as a query parameter:
+
+    curl -H "X-JAI-Admin-Token: $JAI_ADMIN_TOKEN" -H "X-JAI-Profile: 1" ...
+    curl -H "X-JAI-Admin-Token: $JAI_ADMIN_TOKEN" ".../planets?jai_profile=sample"
+
+- "1" / "cprofile" runs the request under cProfile (deterministic) and stores a
+  .pstats file (python -m pstats, snakeviz, ...)
+- "sample" samples the event loop thread while the request runs and stores a
+  speedscope file (https://www.speedscope.app)
+
+The response carries the profile file name in X-JAI-Profile-Id. Profiles record
+everything running on the event loop while the request is handled, so other
+requests served concurrently show up as well. Only one request is profiled at a
+time; a flagged request arriving meanwhile is served without profiling.
+
+With JAI_PROFILE_SAMPLING=true, a background thread samples all threads of the
+process continuously and writes one speedscope file per JAI_PROFILE_PERIOD
+seconds. Profiles are written to JAI_PROFILE_DIR, keeping the newest
+JAI_PROFILE_KEEP files.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import logging
+
+# Configure logger
+logger = logging.getLogger("jai-api.profiling")
+
+# Profiling configuration
+ADMIN_TOKEN = os.environ.get("JAI_ADMIN_TOKEN", "")
+PROFILE_DIR = os.environ.get("JAI_PROFILE_DIR", "./cache/profiles")
+PROFILE_KEEP = int(os.environ.get("JAI_PROFILE_KEEP", "50"))
+SAMPLE_INTERVAL_MS = float(os.environ.get("JAI_PROFILE_INTERVAL_MS", "5"))
+SAMPLING_ENABLED = os.environ.get("JAI_PROFILE_SAMPLING", "false").lower() in ("1", "true", "yes")
+SAMPLING_PERIOD = float(os.environ.get("JAI_PROFILE_PERIOD", "60"))
+
+PROFILE_HEADER = b"x-jai-profile"
+PROFILE_QUERY_PARAMETER = "jai_profile"
+ADMIN_TOKEN_HEADER = b"x-jai-admin-token"
+PROFILE_ID_HEADER = b"x-jai-profile-id"
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+MODES = {"1": MODE_CPROFILE, "true": MODE_CPROFILE, MODE_CPROFILE: MODE_CPROFILE, MODE_SAMPLE: MODE_SAMPLE}
+
+# A frame of a sampled stack: (function name, file, first line)
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+_sequence = itertools.count(1)
+
+def new_profile_id(label: str = "") -> str:
+    """Unique, sortable name for a profile file (without extension)"""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    suffix = "".join(c if c.isalnum() else "_" for c in label).strip("_")[:60]
+    name = f"{stamp}-{os.getpid()}-{next(_sequence)}"
+    return f"{name}-{suffix}" if suffix else name
+
+def _frame_stack(frame) -> Stack:
+    """Stack of a thread, outermost frame first"""
+    stack: List[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+class StackSampler:
+    """Sampling profiler based on periodic snapshots of thread stacks"""
+
+    def __init__(self, interval_ms: float = SAMPLE_INTERVAL_MS, thread_ids: Optional[Set[int]] = None):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval_ms: Time between samples in milliseconds
+            thread_ids: Threads to sample (default: all threads but the sampler's)
+        """
+        self.interval = interval_ms / 1000.0
+        self._thread_ids = thread_ids
+        self._counts: "Counter[Stack]" = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = time.time()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="jai-profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(own_id)
+            self.on_sample()
+
+    def on_sample(self) -> None:
+        """Hook run after every sample (in the sampler thread)"""
+
+    def sample(self, own_id: Optional[int] = None) -> None:
+        """Take one snapshot of the sampled threads"""
+        frames = sys._current_frames()
+        stacks = [
+            _frame_stack(frame) for thread_id, frame in frames.items()
+            if thread_id != own_id and (self._thread_ids is None or thread_id in self._thread_ids)
+        ]
+        with self._lock:
+            for stack in stacks:
+                self._counts[stack] += 1
+
+    def take(self) -> Tuple[Dict[Stack, int], float, float]:
+        """
+        Return and reset the collected samples
+
+        Returns:
+            Tuple of (sample count by stack, start and end timestamp)
+        """
+        with self._lock:
+            counts, self._counts = dict(self._counts), Counter()
+        started, self.started_at = self.started_at, time.time()
+        return counts, started, self.started_at
+
+def to_speedscope(counts: Dict[Stack, int], interval: float, name: str, duration: float) -> Dict[str, Any]:
+    """Sampled stacks in the speedscope file format"""
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[Frame, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+        indexes = []
+        for frame in stack:
+            index = frame_index.get(frame)
+            if index is None:
+                index = frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            indexes.append(index)
+        samples.append(indexes)
+        weights.append(round(count * interval * 1000, 3))
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(max(duration * 1000, sum(weights)), 3),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "jai-api",
+    }
+
+def _profile_dir() -> Path:
+    directory = Path(PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+def _prune(directory: Path) -> None:
+    """Keep the newest PROFILE_KEEP profiles"""
+    files = sorted(
+        (path for path in directory.iterdir() if path.suffix in (".pstats", ".json")),
+        key=lambda path: path.stat().st_mtime
+    )
+    for path in files[:max(0, len(files) - PROFILE_KEEP)]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+def write_speedscope(profile_id: str, counts: Dict[Stack, int], interval: float, duration: float) -> Path:
+    """Store sampled stacks as a speedscope file"""
+    directory = _profile_dir()
+    path = directory / f"{profile_id}.speedscope.json"
+    with open(path, "w") as f:
+        json.dump(to_speedscope(counts, interval, profile_id, duration), f)
+    _prune(directory)
+    return path
+
+def write_pstats(profile_id: str, profiler: cProfile.Profile) -> Path:
+    """Store a cProfile run as a pstats file"""
+    directory = _profile_dir()
+    path = directory / f"{profile_id}.pstats"
+    profiler.dump_stats(str(path))
+    _prune(directory)
+    return path
+
+def requested_mode(scope: Dict[str, Any]) -> Optional[str]:
+    """
+    Profiling mode asked for by an authenticated administrator
+
+    Returns:
+        MODE_CPROFILE, MODE_SAMPLE, or None when the request is not to be
+        profiled (no flag, profiling disabled or the admin token is wrong)
+    """
+    headers = dict(scope.get("headers") or [])
+    flag = headers.get(PROFILE_HEADER, b"").decode("latin-1").strip().lower()
+    if not flag and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAMETER)
+        flag = values[0].strip().lower() if values else ""
+    if not flag:
+        return None
+
+    mode = MODES.get(flag)
+    token = headers.get(ADMIN_TOKEN_HEADER, b"")
+    if mode is None or not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN.encode()):
+        logger.warning(f"Ignoring profiling request for {scope['path']} (not authorized or unknown mode)")
+        return None
+    return mode
+
+# Only one request is profiled at a time (cProfile is per interpreter thread
+# and a profile would otherwise contain two profiled requests)
+_request_profile_lock = threading.Lock()
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling single API requests flagged by an administrator"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/v1/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        mode = requested_mode(scope)
+        if mode is None or not _request_profile_lock.acquire(blocking=False):
+            if mode is not None:
+                logger.info(f"Another request is being profiled, serving {scope['path']} unprofiled")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+
+        try:
+            if mode == MODE_SAMPLE:
+                await self._sampled(scope, receive, send_wrapper, profile_id)
+            else:
+                await self._deterministic(scope, receive, send_wrapper, profile_id)
+        finally:
+            _request_profile_lock.release()
+
+    async def _deterministic(self, scope, receive, send, profile_id: str) -> None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            path = write_pstats(profile_id, profiler)
+            logger.info(f"Profiled {scope['path']} to {path}")
+
+    async def _sampled(self, scope, receive, send, profile_id: str) -> None:
+        sampler = StackSampler(thread_ids={threading.get_ident()})
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            counts, started, ended = sampler.take()
+            path = write_speedscope(profile_id, counts, sampler.interval, ended - started)
+            logger.info(f"Profiled {scope['path']} to {path}")
+
+class PeriodicSampler(StackSampler):
+    """Samples all threads continuously and writes one profile per period"""
+
+    def __init__(self, period: float = SAMPLING_PERIOD, interval_ms: float = SAMPLE_INTERVAL_MS):
+        super().__init__(interval_ms)
+        self.period = period
+
+    def on_sample(self) -> None:
+        if time.time() - self.started_at >= self.period:
+            self.flush()
+
+    def flush(self) -> Optional[Path]:
+        """Write the samples collected since the last flush"""
+        counts, started, ended = self.take()
+        if not counts:
+            return None
+        try:
+            return write_speedscope(new_profile_id("sampled"), counts, self.interval, ended - started)
+        except Exception as e:
+            logger.error(f"Error writing sampled profile: {str(e)}")
+            return None
+
+    def stop(self) -> None:
+        super().stop()
+        self.flush()
+
+# Background sampler, created when the application starts with sampling enabled
+periodic_sampler: Optional[PeriodicSampler] = None
+
+def start_periodic_sampling() -> None:
+    """Start the global sampling profiler if JAI_PROFILE_SAMPLING is set"""
+    global periodic_sampler
+    if not SAMPLING_ENABLED or periodic_sampler is not None:
+        return
+    periodic_sampler = PeriodicSampler()
+    periodic_sampler.start()
+    logger.info(f"Sampling profiler writing to {PROFILE_DIR} every {SAMPLING_PERIOD:.0f}s")
+
+def stop_periodic_sampling() -> None:
+    """Stop the global sampling profiler, writing the last period"""
+    global periodic_sampler
+    if periodic_sampler is not None:
+        periodic_sampler.stop()
+        periodic_sampler = None
@@ -0,0 +1,121 @@
+"""
+Streaming NDJSON responses
+
+Long results - dasha trees, transit events over decades, chart batches - are
+produced by generators and sent as newline-delimited JSON (one document per
+line, `Accept: application/x-ndjson`) while they are computed, instead of
+being collected into one response model first. Memory stays flat however
+long the range, and clients can parse each line as it arrives:
+
+    return ndjson_response(period_records(...), headers={"ETag": etag})
+
+The first line is sent on its own so the client sees data immediately; later
+lines are gathered into chunks of about FLUSH_BYTES. If the generator fails
+part way, the stream ends with an error line (`"status": "error"`, with
+`error_code` and `error_message`) instead of being cut off silently.
+"""
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+from datetime import datetime
+import json
+import logging
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from api.utils.content_negotiation import NDJSON_MEDIA_TYPE
+from api.utils.deadline import DeadlineExceededError
+from api.utils.error_handling import ErrorCode
+
+# Configure logger
+logger = logging.getLogger("jai-api.streaming")
+
+# Bytes of NDJSON gathered before a chunk is sent
+FLUSH_BYTES = 16384
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+def ndjson_line(record: Any) -> bytes:
+    """One record (a response model or JSON-compatible content) as an NDJSON line"""
+    if isinstance(record, BaseModel):
+        return record.model_dump_json().encode() + b"\n"
+    return json.dumps(record, separators=(",", ":"), default=_default).encode() + b"\n"
+
+def _error_line(e: Exception) -> bytes:
+    if isinstance(e, DeadlineExceededError):
+        error_code = ErrorCode.REQUEST_TIMEOUT
+    else:
+        error_code = ErrorCode.CALCULATION_ERROR
+        logger.error(f"Error while streaming: {str(e)}", exc_info=True)
+    return ndjson_line({
+        "status": "error",
+        "generated_at": datetime.utcnow().isoformat(),
+        "error_code": error_code,
+        "error_message": str(e),
+    })
+
+class _Chunker:
+    """Gathers lines into chunks, sending the first line straight away"""
+
+    def __init__(self):
+        self.lines: List[bytes] = []
+        self.size = 0
+        self.sent = False
+
+    def add(self, line: bytes) -> Optional[bytes]:
+        self.lines.append(line)
+        self.size += len(line)
+        if not self.sent or self.size >= FLUSH_BYTES:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[bytes]:
+        if not self.lines:
+            return None
+        chunk = b"".join(self.lines)
+        self.lines, self.size, self.sent = [], 0, True
+        return chunk
+
+def ndjson_chunks(records: Iterable[Any]) -> Iterator[bytes]:
+    """NDJSON chunks of the records of a generator"""
+    chunker = _Chunker()
+    try:
+        for record in records:
+            chunk = chunker.add(ndjson_line(record))
+            if chunk:
+                yield chunk
+    except Exception as e:
+        chunker.add(_error_line(e))
+    chunk = chunker.flush()
+    if chunk:
+        yield chunk
+
+async def ndjson_chunks_async(records: AsyncIterable[Any]) -> AsyncIterator[bytes]:
+    """NDJSON chunks of the records of an asynchronous generator"""
+    chunker = _Chunker()
+    try:
+        async for record in records:
+            chunk = chunker.add(ndjson_line(record))
+            if chunk:
+                yield chunk
+    except Exception as e:
+        chunker.add(_error_line(e))
+    chunk = chunker.flush()
+    if chunk:
+        yield chunk
+
+def ndjson_response(
+    records: Union[Iterable[Any], AsyncIterable[Any]],
+    headers: Optional[Dict[str, str]] = None
+) -> StreamingResponse:
+    """
+    Stream the records of a generator as NDJSON
+
+    Synchronous generators run in the thread pool, so they may block on
+    ephemeris calculations.
+    """
+    if hasattr(records, "__aiter__"):
+        chunks = ndjson_chunks_async(records)
+    else:
+        chunks = ndjson_chunks(records)
+    return StreamingResponse(chunks, media_type=NDJSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,9 @@
+"""
+Benchmark suite for the JAI API
+
+Covers the calculation hot paths (with the mock and the real Swiss Ephemeris
+backends), the geocoding cache paths, pydantic model construction and
+end-to-end ASGI requests through an in-process client.
+
+Run with `python -m benchmarks run` (see benchmarks/__main__.py).
+"""
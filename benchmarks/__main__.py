@@ -0,0 +1,250 @@
+"""
+Benchmark runner
+
+    python -m benchmarks run                      # both backends, print results
+    python -m benchmarks run --backend mock -k calculation
+    python -m benchmarks run --save-baseline      # refresh benchmarks/baselines/*.json
+    python -m benchmarks run --compare            # fail (exit 1) on regressions
+    python -m benchmarks compare OLD.json NEW.json
+    python -m benchmarks precision                # latency/accuracy of each precision mode
+    python -m benchmarks formats                  # size/encode time of JSON, MessagePack and CBOR
+    python -m benchmarks startup --compare        # import/warm-up time against the baseline
+
+The ephemeris backend is chosen when the calculation module is imported, so
+every backend runs in its own interpreter.
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.startup import GATED_STARTUP, STARTUP_THRESHOLD
+
+BACKENDS = ("mock", "swisseph")
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCHMARK_DIR, "baselines")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+def _baseline_path(backend: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{backend}.json")
+
+def _configure_environment(backend: str, store_dir: str) -> None:
+    """Isolate the application from the machine before it is imported"""
+    os.environ["JAI_EPHEMERIS_BACKEND"] = backend
+    os.environ["JAI_ADMISSION_CONTROL"] = "false"
+    os.environ["JAI_CALC_WORKERS"] = "0"
+    os.environ["CHART_STORE_DIR"] = store_dir
+
+def _run_backend(args: argparse.Namespace) -> int:
+    """Run the benchmarks in this interpreter for a single backend"""
+    with tempfile.TemporaryDirectory() as store_dir:
+        _configure_environment(args.backend, store_dir)
+
+        from benchmarks import harness
+        # Importing the modules registers their benchmarks
+        from benchmarks import bench_calculation, bench_geocode, bench_models, bench_api  # noqa: F401
+        from api.services import calculation
+
+        if args.backend == "swisseph" and calculation.USING_MOCK:
+            print("Swiss Ephemeris (pyswisseph) is not installed, skipping", file=sys.stderr)
+            return 0
+
+        logging.getLogger().setLevel(args.log_level)
+
+        benches = harness.select(args.filter)
+        print(f"== backend: {args.backend} ({len(benches)} benchmarks)")
+        document = harness.run_all(benches, args.backend, rounds=args.rounds, min_time=args.min_time)
+        document["meta"]["log_level"] = args.log_level
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.backend}.json")
+    harness.save(document, output)
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        harness.save(document, _baseline_path(args.backend))
+        print(f"Baseline updated: {_baseline_path(args.backend)}")
+
+    if args.compare is not None:
+        baseline_path = args.compare or _baseline_path(args.backend)
+        if not os.path.exists(baseline_path):
+            print(f"No baseline at {baseline_path}", file=sys.stderr)
+            return 1
+        rows = harness.compare(harness.load(baseline_path), document, args.threshold)
+        print(harness.format_comparison(rows))
+        if any(row["status"] == "regression" for row in rows):
+            return 1
+    return 0
+
+def run(args: argparse.Namespace) -> int:
+    """Run the benchmarks, spawning one interpreter per backend if needed"""
+    if args.backend != "all":
+        return _run_backend(args)
+
+    status = 0
+    for backend in BACKENDS:
+        command = [sys.executable, "-m", "benchmarks"] + _child_arguments(args, backend)
+        status = max(status, subprocess.call(command))
+    return status
+
+def _child_arguments(args: argparse.Namespace, backend: str) -> list:
+    child = ["run", "--backend", backend, "--rounds", str(args.rounds),
+             "--min-time", str(args.min_time), "--threshold", str(args.threshold),
+             "--log-level", args.log_level]
+    for pattern in args.filter or []:
+        child += ["-k", pattern]
+    if args.save_baseline:
+        child.append("--save-baseline")
+    if args.compare is not None:
+        child.append("--compare")
+    return child
+
+def compare(args: argparse.Namespace) -> int:
+    from benchmarks import harness
+    rows = harness.compare(harness.load(args.baseline), harness.load(args.current), args.threshold)
+    print(harness.format_comparison(rows))
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+def precision(args: argparse.Namespace) -> int:
+    """Report the latency/accuracy tradeoff of the precision modes (Swiss Ephemeris backend)"""
+    with tempfile.TemporaryDirectory() as store_dir:
+        _configure_environment("swisseph", store_dir)
+        from benchmarks import harness
+        from benchmarks.precision import corpus, evaluate, format_report
+        from api.services import calculation
+
+        if calculation.USING_MOCK:
+            print("Swiss Ephemeris (pyswisseph) is not installed, skipping", file=sys.stderr)
+            return 0
+        logging.getLogger().setLevel(args.log_level)
+
+        document = evaluate(corpus(args.charts, args.seed), args.mode)
+        print(format_report(document))
+
+    output = args.output or os.path.join(RESULTS_DIR, "precision.json")
+    harness.save(document, output)
+    print(f"Results written to {output}")
+    return 0
+
+def formats(args: argparse.Namespace) -> int:
+    """Compare the payload size and encode time of the response formats"""
+    with tempfile.TemporaryDirectory() as store_dir:
+        _configure_environment(args.backend, store_dir)
+        from benchmarks import harness
+        from benchmarks.formats import evaluate, format_report
+
+        logging.getLogger().setLevel(args.log_level)
+        document = evaluate(args.min_time)
+        document["meta"] = {"backend": args.backend}
+        print(format_report(document))
+
+    output = args.output or os.path.join(RESULTS_DIR, "formats.json")
+    harness.save(document, output)
+    print(f"Results written to {output}")
+    return 0
+
+def startup(args: argparse.Namespace) -> int:
+    """Time importing the application and the warm-up in fresh interpreters"""
+    from benchmarks import harness
+    from benchmarks.startup import format_report, measure
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        environment = {
+            "JAI_EPHEMERIS_BACKEND": args.backend,
+            "JAI_ADMISSION_CONTROL": "false",
+            "JAI_CALC_WORKERS": "0",
+            "CHART_STORE_DIR": store_dir,
+        }
+        document = measure(args.runs, environment)
+    document["meta"]["backend"] = args.backend
+    print(format_report(document))
+
+    output = args.output or os.path.join(RESULTS_DIR, "startup.json")
+    harness.save(document, output)
+    print(f"Results written to {output}")
+
+    baseline_path = os.path.join(BASELINE_DIR, "startup.json")
+    if args.save_baseline:
+        harness.save(document, baseline_path)
+        print(f"Baseline updated: {baseline_path}")
+
+    status = 1 if document["deferred_imported"] else 0
+    if args.compare is not None:
+        baseline_path = args.compare or baseline_path
+        if not os.path.exists(baseline_path):
+            print(f"No baseline at {baseline_path}", file=sys.stderr)
+            return 1
+        rows = harness.compare(harness.load(baseline_path), document, args.threshold)
+        print(harness.format_comparison(rows))
+        if any(row["status"] == "regression" and row["name"] == GATED_STARTUP for row in rows):
+            status = 1
+    return status
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="JAI API benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument("--backend", choices=BACKENDS + ("all",), default="all",
+                            help="Ephemeris backend (default: all)")
+    run_parser.add_argument("-k", "--filter", action="append",
+                            help="Only run benchmarks whose name contains this (repeatable)")
+    run_parser.add_argument("--rounds", type=int, default=7, help="Timed rounds per benchmark")
+    run_parser.add_argument("--min-time", type=float, default=0.5,
+                            help="Approximate measuring time per benchmark in seconds")
+    run_parser.add_argument("--output", help="Result file (single backend only)")
+    run_parser.add_argument("--save-baseline", action="store_true",
+                            help="Also store the results as the backend's baseline")
+    run_parser.add_argument("--compare", nargs="?", const="", default=None,
+                            help="Compare with a baseline (default: the backend's stored baseline)")
+    run_parser.add_argument("--threshold", type=float, default=0.10,
+                            help="Relative slowdown of the median reported as a regression")
+    run_parser.add_argument("--log-level", default="WARNING",
+                            help="Application log level while benchmarking (default: WARNING)")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    compare_parser.set_defaults(handler=compare)
+
+    precision_parser = subparsers.add_parser("precision", help="Latency/accuracy of the precision modes")
+    precision_parser.add_argument("--charts", type=int, default=200, help="Charts in the corpus")
+    precision_parser.add_argument("--seed", type=int, default=42, help="Corpus random seed")
+    precision_parser.add_argument("--mode", action="append",
+                                  help="Only evaluate this precision mode (repeatable)")
+    precision_parser.add_argument("--output", help="Result file")
+    precision_parser.add_argument("--log-level", default="WARNING",
+                                  help="Application log level while benchmarking (default: WARNING)")
+    precision_parser.set_defaults(handler=precision)
+
+    formats_parser = subparsers.add_parser("formats", help="Size/encode time of the response formats")
+    formats_parser.add_argument("--backend", choices=BACKENDS, default="swisseph",
+                                help="Ephemeris backend (default: swisseph)")
+    formats_parser.add_argument("--min-time", type=float, default=0.5,
+                                help="Approximate measuring time per case and format in seconds")
+    formats_parser.add_argument("--output", help="Result file")
+    formats_parser.add_argument("--log-level", default="WARNING",
+                                help="Application log level while benchmarking (default: WARNING)")
+    formats_parser.set_defaults(handler=formats)
+
+    startup_parser = subparsers.add_parser("startup", help="Import and warm-up time of the application")
+    startup_parser.add_argument("--backend", choices=BACKENDS, default="swisseph",
+                                help="Ephemeris backend (default: swisseph)")
+    startup_parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    startup_parser.add_argument("--output", help="Result file")
+    startup_parser.add_argument("--save-baseline", action="store_true",
+                                help="Also store the results as the startup baseline")
+    startup_parser.add_argument("--compare", nargs="?", const="", default=None,
+                                help="Compare with a baseline (default: benchmarks/baselines/startup.json)")
+    startup_parser.add_argument("--threshold", type=float, default=STARTUP_THRESHOLD,
+                                help="Relative slowdown of the median reported as a regression")
+    startup_parser.set_defaults(handler=startup)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""End-to-end ASGI request benchmarks through an in-process client"""
+import itertools
+from fastapi.testclient import TestClient
+from benchmarks.harness import benchmark
+from benchmarks.fixtures import REQUEST_BODY, seed_geocode_cache
+from api.main import create_app
+
+_client = None
+
+def _get_client() -> TestClient:
+    """One client (and application) for all API benchmarks"""
+    global _client
+    if _client is None:
+        seed_geocode_cache()
+        _client = TestClient(create_app())
+    return _client
+
+def _post(client: TestClient, path: str, body=REQUEST_BODY, headers=None):
+    response = client.post(path, json=body, headers=headers)
+    assert response.status_code in (200, 304), f"{path}: {response.status_code} {response.text}"
+    return response
+
+@benchmark("api.health", group="api")
+def health():
+    client = _get_client()
+    return lambda: client.get("/v1/api/health")
+
+@benchmark("api.ascendant_stored_chart", group="api")
+def ascendant_stored_chart():
+    """Repeated birth data: geocode cache and chart store hits"""
+    client = _get_client()
+    return lambda: _post(client, "/v1/api/horoscope/ascendant")
+
+@benchmark("api.planets_stored_chart", group="api")
+def planets_stored_chart():
+    client = _get_client()
+    return lambda: _post(client, "/v1/api/horoscope/planets")
+
+@benchmark("api.planets_new_chart", group="api")
+def planets_new_chart():
+    """Every request is a new chart: full calculation and chart store write"""
+    client = _get_client()
+    counter = itertools.count()
+
+    def request():
+        seconds = next(counter) % 86400
+        body = dict(REQUEST_BODY, birth_time=f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}")
+        _post(client, "/v1/api/horoscope/planets", body=body)
+
+    return request
+
+@benchmark("api.planets_not_modified", group="api")
+def planets_not_modified():
+    """Conditional request for a stored chart answered with 304"""
+    client = _get_client()
+    chart_id = _post(client, "/v1/api/horoscope/planets").json()["chart_id"]
+    url = f"/v1/api/charts/{chart_id}"
+    etag = client.get(url).headers["ETag"]
+
+    def request():
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304, response.status_code
+
+    return request
+
+@benchmark("api.chart_dasha_levels_2", group="api")
+def chart_dasha():
+    client = _get_client()
+    chart_id = _post(client, "/v1/api/horoscope/planets").json()["chart_id"]
+    return lambda: client.get(f"/v1/api/charts/{chart_id}/dasha?levels=2")
+
+SERIES_BODY = {"start": "2024-01-01", "end": "2024-12-31", "step_days": 0.25}
+
+@benchmark("api.ephemeris_series_year_json", group="api")
+def ephemeris_series_json():
+    """A year of 6-hourly positions of all nine grahas, streamed and parsed as JSON"""
+    client = _get_client()
+    return lambda: _post(client, "/v1/api/ephemeris/series", body=SERIES_BODY).json()
+
+@benchmark("api.ephemeris_series_year_columnar", group="api")
+def ephemeris_series_columnar():
+    """The same series as a columnar container, decoded into NumPy arrays"""
+    from api.services import columnar
+
+    client = _get_client()
+    headers = {"Accept": "application/vnd.jai.columnar"}
+    return lambda: columnar.decode(_post(client, "/v1/api/ephemeris/series", body=SERIES_BODY, headers=headers).content)
+
+@benchmark("api.chart_batch_50_ndjson", group="api")
+def chart_batch_ndjson():
+    """Fifty new charts in one batch, streamed as NDJSON"""
+    client = _get_client()
+    counter = itertools.count()
+    headers = {"Accept": "application/x-ndjson"}
+
+    def request():
+        charts = []
+        for _ in range(50):
+            seconds = next(counter) % 86400
+            charts.append(dict(REQUEST_BODY, birth_time=f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"))
+        return _post(client, "/v1/api/charts/batch", body={"charts": charts}, headers=headers).text
+
+    return request
+
+@benchmark("jobs.run_500_records", group="api")
+def job_500_records():
+    """A batch job of 500 new charts, validated and calculated in the runner thread"""
+    import tempfile
+    import time
+    from api.services.jobs import COMPLETED, FAILED, JobRunner
+
+    seed_geocode_cache()
+    runner = JobRunner(tempfile.mkdtemp(prefix="jai-bench-jobs-"), workers=0, chunk_size=250)
+    counter = itertools.count()
+
+    def run():
+        job_id, path = runner.create("csv")
+        rows = ["birth_date,birth_time,place"]
+        for _ in range(500):
+            seconds = next(counter) % 86400
+            rows.append(f"{REQUEST_BODY['birth_date']},{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d},\"{REQUEST_BODY['place']}\"")
+        path.write_text("\n".join(rows) + "\n")
+        runner.submit(job_id, "csv")
+        while runner.status(job_id)["status"] not in (COMPLETED, FAILED):
+            time.sleep(0.001)
+        runner.discard(job_id)
+
+    return run
@@ -0,0 +1,144 @@
+"""Calculation hot path benchmarks (run once per ephemeris backend)"""
+from benchmarks.harness import benchmark
+from benchmarks.fixtures import AYANAMSA, BIRTH_DATE, BIRTH_TIME, CHART_ARGS, LATITUDE, LONGITUDE, TIMEZONE_OFFSET
+from api.services import calculation
+from api.services.chart_record import ChartRecord, decode, encode
+
+@benchmark("calculation.get_julian_day", group="calculation")
+def julian_day():
+    return lambda: calculation.get_julian_day(BIRTH_DATE, BIRTH_TIME, TIMEZONE_OFFSET)
+
+@benchmark("calculation.calculate_planet_position", group="calculation")
+def planet_position():
+    julian_day = calculation.get_julian_day(BIRTH_DATE, BIRTH_TIME, TIMEZONE_OFFSET)
+    calculation.set_ayanamsa("lahiri")
+    return lambda: calculation.calculate_planet_position(calculation.swe.MOON, julian_day)
+
+@benchmark("calculation.calculate_planets", group="calculation")
+def planets():
+    return lambda: calculation.calculate_planets(*CHART_ARGS)
+
+@benchmark("calculation.calculate_dasha_periods", group="calculation")
+def dasha_periods():
+    return lambda: calculation.calculate_dasha_periods(*CHART_ARGS)
+
+@benchmark("calculation.calculate_chart_record", group="calculation")
+def chart_record():
+    return lambda: calculation.calculate_chart_record(*CHART_ARGS)
+
+@benchmark("calculation.chart_record_round_trip", group="calculation")
+def chart_record_round_trip():
+    record = ChartRecord.from_dict(calculation.calculate_chart_record(*CHART_ARGS))
+    return lambda: decode(encode(record)).to_dict()
+
+@benchmark("calculation.calculate_chart_record_moshier", group="calculation")
+def chart_record_moshier():
+    return lambda: calculation.calculate_chart_record(*CHART_ARGS, precision=calculation.PRECISION_MOSHIER)
+
+@benchmark("calculation.calculate_chart_record_fast", group="calculation")
+def chart_record_fast():
+    return lambda: calculation.calculate_chart_record(*CHART_ARGS, precision=calculation.PRECISION_FAST)
+
+@benchmark("fast_ephemeris.sidereal_positions_1000", group="calculation")
+def fast_positions_vectorized():
+    import numpy as np
+    from api.services import fast_ephemeris
+
+    julian_days = calculation.get_julian_day(BIRTH_DATE, BIRTH_TIME, TIMEZONE_OFFSET) + np.arange(1000.0)
+    return lambda: fast_ephemeris.sidereal_positions(julian_days)
+
+@benchmark("panchanga.month", group="calculation")
+def panchanga_month():
+    from datetime import date
+    from api.services import panchanga
+
+    # Sunrises come from the cache after the first round, as for repeated cities
+    return lambda: panchanga.generate_panchanga(date(2024, 1, 1), 30, LATITUDE, LONGITUDE, TIMEZONE_OFFSET)
+
+@benchmark("panchanga.year_fast", group="calculation")
+def panchanga_year_fast():
+    from datetime import date
+    from api.services import panchanga
+
+    return lambda: panchanga.generate_panchanga(
+        date(2024, 1, 1), 366, LATITUDE, LONGITUDE, TIMEZONE_OFFSET, precision="fast"
+    )
+
+@benchmark("lagna.year", group="calculation")
+def lagna_year():
+    from datetime import date
+    from api.services import lagna
+
+    return lambda: lagna.lagna_table(date(2024, 1, 1), 366, LATITUDE, LONGITUDE, TIMEZONE_OFFSET)
+
+@benchmark("muhurta.search_30_days", group="calculation")
+def muhurta_search_30_days():
+    from datetime import date
+    from api.services import muhurta
+
+    constraints = [("nakshatra", ["Rohini", "Hasta", "Shravana"]), ("avoid", ["rahu_kaal"]), ("lagna", ["fixed"])]
+    return lambda: muhurta.search_muhurta(
+        date(2024, 1, 1), 30, LATITUDE, LONGITUDE, TIMEZONE_OFFSET, constraints
+    )
+
+@benchmark("birth_time.uncertainty_60", group="calculation")
+def birth_time_uncertainty_60():
+    from datetime import date
+    from api.services import birth_time
+
+    record = calculation.calculate_chart_record(*CHART_ARGS)
+    return lambda: birth_time.analyze_birth_time(record, 60, date(2024, 1, 1))
+
+@benchmark("ephemeris_series.year_hourly", group="calculation")
+def ephemeris_series_year_hourly():
+    from api.constants.planets import Planet
+    from api.services import ephemeris_series
+
+    start = calculation.get_julian_day("2024-01-01", "00:00:00", 0.0)
+
+    def run():
+        times, bodies = ephemeris_series.ephemeris_series(start, start + 366, 1 / 24, list(Planet))
+        return [columns for _, columns in bodies]
+    return run
+
+@benchmark("transit_events.decade", group="calculation")
+def transit_events_decade():
+    """Ingresses and stations of all nine grahas over ten years"""
+    from api.services.transit_events import transit_events
+
+    record = calculation.calculate_chart_record(*CHART_ARGS)
+    start = calculation.get_julian_day("2024-01-01", "00:00:00", 0.0)
+    return lambda: list(transit_events(record, start, start + 3653))
+
+@benchmark("transit_events.decade_first_event", group="calculation")
+def transit_events_decade_first_event():
+    """Time to the first event of the same range, as seen by a streaming client"""
+    from api.services.transit_events import transit_events
+
+    record = calculation.calculate_chart_record(*CHART_ARGS)
+    start = calculation.get_julian_day("2024-01-01", "00:00:00", 0.0)
+    return lambda: next(transit_events(record, start, start + 3653))
+
+@benchmark("calculation.dasha_tree_levels_3", group="calculation")
+def dasha_tree_levels_3():
+    record = calculation.calculate_chart_record(*CHART_ARGS)
+    mahadasha = calculation.dasha_periods_from_record(record)
+    return lambda: list(calculation.iter_dasha_periods(mahadasha, 3))
+
+@benchmark("bulk_charts.chunk_500", group="calculation")
+def bulk_charts_chunk_500():
+    """A jai-batch chunk of 500 charts with all vargas and mahadashas, written as columnar files"""
+    import tempfile
+    from api.services.bulk_charts import calculate_chunk
+    from constants.divisional_mappings import DIVISIONAL_MAPPINGS
+
+    chunk = []
+    for index in range(500):
+        seconds = index * 173
+        birth_time = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        task = (BIRTH_DATE, birth_time, LATITUDE, LONGITUDE, TIMEZONE_OFFSET, AYANAMSA, "standard")
+        chunk.append((index, f"{index:032x}", task, None, None))
+    settings = {"output_format": "jcol", "dasha_levels": 1,
+                "vargas": [division for division in DIVISIONAL_MAPPINGS if division != "D1"]}
+    output = tempfile.mkdtemp(prefix="jai-bench-bulk-")
+    return lambda: calculate_chunk(output, 0, chunk, settings)
@@ -0,0 +1,62 @@
+"""Geocoding cache path benchmarks (the provider is stubbed, no network)"""
+import itertools
+import tempfile
+from pathlib import Path
+import requests
+from benchmarks.harness import benchmark
+from benchmarks.fixtures import LATITUDE, LONGITUDE, PLACE, seed_geocode_cache
+from api.models import request as request_module
+
+class _ProviderResponse:
+    """Minimal stand-in for a Nominatim response"""
+    status_code = 200
+    text = ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return [{"lat": str(LATITUDE), "lon": str(LONGITUDE), "display_name": PLACE}]
+
+@benchmark("geocode.memo_hit", group="geocode")
+def memo_hit():
+    """Repeated place: served by the in-process lru_cache"""
+    seed_geocode_cache()
+    request_module.geocode_place(PLACE)
+    return lambda: request_module.geocode_place(PLACE)
+
+@benchmark("geocode.cache_hit", group="geocode")
+def cache_hit():
+    """Place known to the persistent geocode cache (lru_cache bypassed)"""
+    seed_geocode_cache()
+    return lambda: request_module.geocode_place.__wrapped__(PLACE)
+
+@benchmark("geocode.cache_miss", group="geocode")
+def cache_miss():
+    """Unknown place: provider call (stubbed), parsing and cache persistence"""
+    original_get = requests.get
+    original_file = request_module.GEO_CACHE_FILE
+    original_key = request_module.os.environ.pop("OPENCAGE_API_KEY", None)
+    directory = tempfile.TemporaryDirectory()
+    requests.get = lambda *args, **kwargs: _ProviderResponse()
+    request_module.GEO_CACHE_FILE = Path(directory.name) / "geocode_cache.json"
+    counter = itertools.count()
+
+    def miss():
+        place = f"benchmark place {next(counter)}"
+        request_module.geocode_place.__wrapped__(place)
+        request_module.GEOCODE_CACHE.pop(place, None)
+
+    try:
+        yield miss
+    finally:
+        requests.get = original_get
+        request_module.GEO_CACHE_FILE = original_file
+        if original_key is not None:
+            request_module.os.environ["OPENCAGE_API_KEY"] = original_key
+        directory.cleanup()
+
+@benchmark("geocode.timezone_cache_hit", group="geocode")
+def timezone_cache_hit():
+    seed_geocode_cache()
+    return lambda: request_module.get_timezone.__wrapped__(LATITUDE, LONGITUDE)
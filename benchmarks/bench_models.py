@@ -0,0 +1,36 @@
+"""Pydantic model construction and serialization benchmarks"""
+from datetime import datetime
+from benchmarks.harness import benchmark
+from benchmarks.fixtures import CHART_ARGS, REQUEST_BODY, seed_geocode_cache
+from api.models.request import HoroscopeRequest
+from api.models.response import PlanetsResponse
+from api.services import calculation
+
+@benchmark("models.horoscope_request", group="models")
+def horoscope_request():
+    """Request validation, including the (cached) geocoding validator"""
+    seed_geocode_cache()
+    return lambda: HoroscopeRequest(**REQUEST_BODY)
+
+def _planets_response() -> PlanetsResponse:
+    return PlanetsResponse(
+        generated_at=datetime.utcnow().isoformat(),
+        request_params=dict(REQUEST_BODY),
+        chart_id="0" * 32,
+        planets=calculation.calculate_planets(*CHART_ARGS)
+    )
+
+@benchmark("models.planets_response_build", group="models")
+def planets_response_build():
+    planets = calculation.calculate_planets(*CHART_ARGS)
+    return lambda: PlanetsResponse(
+        generated_at="2024-01-01T00:00:00",
+        request_params=REQUEST_BODY,
+        chart_id="0" * 32,
+        planets=planets
+    )
+
+@benchmark("models.planets_response_json", group="models")
+def planets_response_json():
+    response = _planets_response()
+    return lambda: response.model_dump_json()
@@ -0,0 +1,34 @@
+"""
+Shared benchmark inputs
+
+Benchmarks never touch the network: the benchmark place is seeded into the
+geocoding and timezone caches before any request model is built.
+"""
+from api.models import request as request_module
+
+BIRTH_DATE = "1990-01-01"
+BIRTH_TIME = "12:30:00"
+PLACE = "Benchmark City, India"
+LATITUDE = 13.0827
+LONGITUDE = 80.2707
+TIMEZONE_OFFSET = 5.5
+AYANAMSA = "lahiri"
+
+CHART_ARGS = (BIRTH_DATE, BIRTH_TIME, LATITUDE, LONGITUDE, TIMEZONE_OFFSET, AYANAMSA)
+
+REQUEST_BODY = {
+    "birth_date": BIRTH_DATE,
+    "birth_time": BIRTH_TIME,
+    "place": PLACE,
+    "ayanamsa": AYANAMSA,
+}
+
+def seed_geocode_cache() -> None:
+    """Put the benchmark place into the in-memory geocoding and timezone caches"""
+    request_module.GEOCODE_CACHE[PLACE.lower().strip()] = {
+        "lat": LATITUDE,
+        "lon": LONGITUDE,
+        "display_name": PLACE,
+        "source": "benchmark",
+    }
+    request_module.TIMEZONE_CACHE[f"{LATITUDE:.4f},{LONGITUDE:.4f}"] = TIMEZONE_OFFSET
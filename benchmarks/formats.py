@@ -0,0 +1,94 @@
+"""
+Response formats: payload size and encode time of JSON, MessagePack and CBOR
+
+    python -m benchmarks formats
+    python -m benchmarks formats --output formats.json
+
+Every case is a response model as an endpoint returns it. The JSON path is
+the one FastAPI takes for a returned model (jsonable_encoder, then
+JSONResponse rendering); the binary formats are encoded straight from the
+model by api.utils.model_encoding. Times are medians in microseconds.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import statistics
+import time
+
+# Name, request path, request body (None for GET), response model name
+CASES: List[Tuple[str, str, Any, str]] = [
+    ("planets", "/v1/api/horoscope/planets", "chart", "PlanetsResponse"),
+    ("dasha_levels_2", "/v1/api/charts/{chart_id}/dasha?levels=2", None, "DashaResponse"),
+    ("panchanga_month", "/v1/api/panchanga", {"start_date": "2024-01-01", "days": 30}, "PanchangaResponse"),
+    ("series_year_daily", "/v1/api/ephemeris/series",
+     {"start": "2024-01-01", "end": "2024-12-31", "step_days": 1.0}, "EphemerisSeriesResponse"),
+]
+
+def _json_path(model: Any) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    return JSONResponse(jsonable_encoder(model)).body
+
+def _models() -> Dict[str, Any]:
+    """The response model of every case, rebuilt from the endpoint's JSON body"""
+    from fastapi.testclient import TestClient
+    from benchmarks.fixtures import REQUEST_BODY, seed_geocode_cache
+    from api.main import create_app
+    from api.models import response as response_models
+
+    seed_geocode_cache()
+    client = TestClient(create_app())
+    chart_id = client.post("/v1/api/horoscope/planets", json=REQUEST_BODY).json()["chart_id"]
+    models = {}
+    for name, path, body, model_name in CASES:
+        if body is None:
+            result = client.get(path.format(chart_id=chart_id))
+        else:
+            body = REQUEST_BODY if body == "chart" else dict(body, place=REQUEST_BODY["place"])
+            result = client.post(path, json=body)
+        assert result.status_code == 200, f"{path}: {result.status_code} {result.text}"
+        models[name] = getattr(response_models, model_name).model_validate(result.json())
+    return models
+
+def _median_us(encode: Callable[[], bytes], min_time: float) -> float:
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < 5 or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        encode()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+def evaluate(min_time: float = 0.5) -> Dict[str, Any]:
+    """
+    Size and encode time of every case in every available format
+
+    Returns:
+        Document with, per case and format, bytes and median_us
+    """
+    from api.utils.content_negotiation import JSON_MEDIA_TYPE
+    from api.utils.model_encoding import ENCODERS
+
+    encoders = {JSON_MEDIA_TYPE: _json_path, **ENCODERS}
+    cases = {}
+    for name, model in _models().items():
+        cases[name] = {
+            media_type: {
+                "bytes": len(encode(model)),
+                "median_us": round(_median_us(lambda: encode(model), min_time), 2),
+            }
+            for media_type, encode in encoders.items()
+        }
+    return {"formats": list(encoders), "cases": cases}
+
+def format_report(document: Dict[str, Any]) -> str:
+    """Table of size and encode time per case, relative to JSON"""
+    json_type = document["formats"][0]
+    lines = [f"{'case':<20}{'format':<22}{'bytes':>10}{'size':>8}{'encode':>14}{'time':>8}"]
+    for name, results in document["cases"].items():
+        reference = results[json_type]
+        for media_type, result in results.items():
+            lines.append(
+                f"{name:<20}{media_type:<22}{result['bytes']:>10}{result['bytes'] / reference['bytes']:>8.0%}"
+                f"{result['median_us']:>11.1f} us{result['median_us'] / reference['median_us']:>8.0%}"
+            )
+    return "\n".join(lines)
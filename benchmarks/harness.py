@@ -0,0 +1,236 @@
+"""
+Benchmark harness
+
+Benchmarks are registered with the @benchmark decorator. The decorated function
+is a factory: it does the setup and returns (or yields, if teardown is needed)
+the zero-argument callable that is timed, so setup cost is never measured:
+
+    @benchmark("calculation.planets", group="calculation")
+    def planets():
+        args = (...)
+        return lambda: calculation.calculate_planets(*args)
+
+Each benchmark is calibrated so a round lasts long enough for the clock, then
+timed over several rounds. Results are written as JSON so runs can be compared
+against a stored baseline.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from datetime import datetime
+import gc
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Registered benchmarks by name
+BENCHMARKS: Dict[str, "Benchmark"] = {}
+
+# Default threshold for comparing against a baseline (relative change of the median)
+REGRESSION_THRESHOLD = 0.10
+
+class Benchmark:
+    """A registered benchmark"""
+
+    def __init__(self, name: str, group: str, factory: Callable[[], Any]):
+        self.name = name
+        self.group = group
+        self.factory = factory
+
+def benchmark(name: Optional[str] = None, group: str = "") -> Callable:
+    """Register a benchmark factory"""
+    def decorator(factory: Callable[[], Any]) -> Callable[[], Any]:
+        bench_name = name or factory.__name__
+        if bench_name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark name: {bench_name}")
+        BENCHMARKS[bench_name] = Benchmark(bench_name, group, factory)
+        return factory
+    return decorator
+
+def select(patterns: Optional[List[str]] = None) -> List[Benchmark]:
+    """Registered benchmarks whose name contains any of the patterns"""
+    benches = sorted(BENCHMARKS.values(), key=lambda b: b.name)
+    if not patterns:
+        return benches
+    return [b for b in benches if any(p in b.name for p in patterns)]
+
+def _calibrate(fn: Callable[[], Any], target: float) -> int:
+    """Number of calls per round so that a round takes at least `target` seconds"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= target or number >= 1_000_000:
+            return number
+        # Aim slightly above the target to avoid another iteration
+        number = max(number * 2, int(number * target * 1.2 / max(elapsed, 1e-9)))
+
+def time_callable(fn: Callable[[], Any], rounds: int = 7, min_time: float = 0.5) -> Dict[str, float]:
+    """
+    Time a callable
+
+    Args:
+        fn: Zero-argument callable
+        rounds: Number of timed rounds
+        min_time: Approximate total measuring time in seconds
+
+    Returns:
+        Statistics of the time per call, in microseconds
+    """
+    fn()  # warm-up (imports, caches, lazy initialization)
+    number = _calibrate(fn, min_time / rounds)
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - started) / number * 1e6)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    median = statistics.median(samples)
+    return {
+        "median_us": round(median, 3),
+        "mean_us": round(statistics.mean(samples), 3),
+        "min_us": round(min(samples), 3),
+        "max_us": round(max(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        "ops_per_sec": round(1e6 / median, 1) if median > 0 else 0.0,
+        "rounds": rounds,
+        "calls_per_round": number,
+    }
+
+def run_benchmark(bench: Benchmark, rounds: int = 7, min_time: float = 0.5) -> Dict[str, Any]:
+    """Set up, time and tear down a single benchmark"""
+    created = bench.factory()
+    if inspect.isgenerator(created):
+        fixture: Optional[Iterator] = created
+        fn = next(created)
+    else:
+        fixture, fn = None, created
+
+    try:
+        result = time_callable(fn, rounds=rounds, min_time=min_time)
+    finally:
+        if fixture is not None:
+            # Resume the factory after its yield to run the teardown
+            next(fixture, None)
+
+    result["group"] = bench.group
+    return result
+
+def environment(backend: str) -> Dict[str, Any]:
+    """Metadata describing where and on what a run was made"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+
+    return {
+        "created": datetime.utcnow().isoformat(),
+        "backend": backend,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+def run_all(
+    benches: List[Benchmark],
+    backend: str,
+    rounds: int = 7,
+    min_time: float = 0.5,
+    stream=sys.stdout
+) -> Dict[str, Any]:
+    """Run benchmarks and return the result document"""
+    results = {}
+    for bench in benches:
+        result = run_benchmark(bench, rounds=rounds, min_time=min_time)
+        results[bench.name] = result
+        print(
+            f"{bench.name:<45} {result['median_us']:>12.2f} us  "
+            f"(+/- {result['stdev_us']:.2f}, {result['ops_per_sec']:.0f} ops/s)",
+            file=stream
+        )
+    return {"meta": environment(backend), "results": results}
+
+def save(document: Dict[str, Any], path: str) -> None:
+    """Write a result document as JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load(path: str) -> Dict[str, Any]:
+    """Read a result document"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = REGRESSION_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Compare two result documents by median time per call
+
+    Returns:
+        One row per benchmark with the baseline and current medians, their
+        ratio and a status: "regression", "improvement", "ok", "new" or "missing"
+    """
+    base_results = baseline.get("results", {})
+    current_results = current.get("results", {})
+    rows = []
+
+    for name in sorted(set(base_results) | set(current_results)):
+        base = base_results.get(name)
+        cur = current_results.get(name)
+        row = {
+            "name": name,
+            "baseline_us": base["median_us"] if base else None,
+            "current_us": cur["median_us"] if cur else None,
+            "ratio": None,
+        }
+        if base is None:
+            row["status"] = "new"
+        elif cur is None:
+            row["status"] = "missing"
+        else:
+            ratio = cur["median_us"] / base["median_us"] if base["median_us"] else 1.0
+            row["ratio"] = round(ratio, 3)
+            if ratio > 1 + threshold:
+                row["status"] = "regression"
+            elif ratio < 1 - threshold:
+                row["status"] = "improvement"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+
+    return rows
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Human readable comparison table"""
+    lines = [f"{'benchmark':<45} {'baseline us':>12} {'current us':>12} {'ratio':>7}  status"]
+    for row in rows:
+        base = f"{row['baseline_us']:.2f}" if row["baseline_us"] is not None else "-"
+        cur = f"{row['current_us']:.2f}" if row["current_us"] is not None else "-"
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "-"
+        lines.append(f"{row['name']:<45} {base:>12} {cur:>12} {ratio:>7}  {row['status']}")
+    return "\n".join(lines)
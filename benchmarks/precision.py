@@ -0,0 +1,118 @@
+"""
+Precision mode tradeoff: latency and accuracy of each ephemeris mode
+
+    python -m benchmarks precision                 # 200 charts, 1900-2100
+    python -m benchmarks precision --charts 1000 --output precision.json
+
+Every mode computes the same corpus of charts (seeded, spread over 1900-2100
+and latitudes -60..60). Latency is the median time of calculate_chart_record;
+accuracy is measured against the file-based Swiss Ephemeris (Moshier when no
+files are installed) as the maximum and mean longitude error and the share of
+charts whose signs and nakshatras all agree.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import random
+import statistics
+import time
+
+# Julian days of 1900-01-01 and 2100-01-01
+CORPUS_START = 2415020.5
+CORPUS_END = 2488069.5
+
+NAKSHATRA_SPAN = 360.0 / 27
+
+ChartArgs = Tuple[str, str, float, float, float, str]
+
+def corpus(size: int = 200, seed: int = 42) -> List[ChartArgs]:
+    """Chart parameters (calculate_chart_record order, UTC birth times)"""
+    from api.services.chart_record import julian_day_to_datetime
+
+    rng = random.Random(seed)
+    charts = []
+    for _ in range(size):
+        birth = julian_day_to_datetime(rng.uniform(CORPUS_START, CORPUS_END))
+        charts.append((
+            birth.strftime("%Y-%m-%d"),
+            birth.strftime("%H:%M:%S"),
+            round(rng.uniform(-60.0, 60.0), 4),
+            round(rng.uniform(-180.0, 180.0), 4),
+            0.0,
+            rng.choice(("lahiri", "raman", "krishnamurti")),
+        ))
+    return charts
+
+def _angle(a: float, b: float) -> float:
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+def _longitudes(record: Dict[str, Any]) -> Dict[str, float]:
+    longitudes = {name: position["longitude"] for name, position in record["planets"].items()}
+    longitudes["Ascendant"] = record["ascendant"]
+    return longitudes
+
+def _time_mode(mode: str, charts: List[ChartArgs]) -> Tuple[List[Dict[str, Any]], float]:
+    """Records of a mode and the median calculation time in microseconds"""
+    from api.services import calculation
+
+    records, timings = [], []
+    for chart in charts:
+        started = time.perf_counter()
+        records.append(calculation.calculate_chart_record(*chart, precision=mode))
+        timings.append(time.perf_counter() - started)
+    return records, statistics.median(timings) * 1e6
+
+def evaluate(charts: List[ChartArgs], modes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Latency and accuracy of each mode over the charts
+
+    Returns:
+        Document with the reference mode and, per mode, median_us, the maximum
+        and mean longitude error by body (degrees) and sign/nakshatra agreement
+    """
+    from api.services import calculation
+
+    calculation.verify_ephemeris()
+    reference_mode = calculation.PRECISION_FILE if calculation.EPHEMERIS_FILES else calculation.PRECISION_MOSHIER
+    modes = modes or [calculation.PRECISION_FILE, calculation.PRECISION_MOSHIER, calculation.PRECISION_FAST]
+    if not calculation.EPHEMERIS_FILES and calculation.PRECISION_FILE in modes:
+        modes = [mode for mode in modes if mode != calculation.PRECISION_FILE]
+
+    # Warm up every mode (ephemeris files, NumPy) outside the timings
+    for mode in set(modes) | {reference_mode}:
+        calculation.calculate_chart_record(*charts[0], precision=mode)
+
+    reference = [_longitudes(record) for record in _time_mode(reference_mode, charts)[0]]
+    results = {}
+    for mode in modes:
+        records, median_us = _time_mode(mode, charts)
+        errors: Dict[str, List[float]] = {}
+        same_signs = same_nakshatras = 0
+        for expected, record in zip(reference, records):
+            actual = _longitudes(record)
+            for body, longitude in expected.items():
+                errors.setdefault(body, []).append(_angle(actual[body], longitude))
+            same_signs += all(int(actual[b] // 30) == int(expected[b] // 30) for b in expected)
+            same_nakshatras += all(
+                int(actual[b] // NAKSHATRA_SPAN) == int(expected[b] // NAKSHATRA_SPAN) for b in expected
+            )
+        results[mode] = {
+            "median_us": round(median_us, 2),
+            "max_error_deg": {body: round(max(values), 6) for body, values in errors.items()},
+            "mean_error_deg": {body: round(statistics.fmean(values), 6) for body, values in errors.items()},
+            "same_signs": round(same_signs / len(charts), 4),
+            "same_nakshatras": round(same_nakshatras / len(charts), 4),
+        }
+    return {"charts": len(charts), "reference": reference_mode, "modes": results}
+
+def format_report(document: Dict[str, Any]) -> str:
+    """Table of the tradeoff per mode"""
+    lines = [
+        f"{document['charts']} charts, errors against {document['reference']}",
+        f"{'mode':<10}{'median':>12}{'max error':>12}{'worst body':>12}{'signs':>9}{'nakshatras':>12}",
+    ]
+    for mode, result in document["modes"].items():
+        worst = max(result["max_error_deg"], key=result["max_error_deg"].get)
+        lines.append(
+            f"{mode:<10}{result['median_us']:>9.1f} us{result['max_error_deg'][worst]:>11.5f}°"
+            f"{worst:>12}{result['same_signs']:>9.1%}{result['same_nakshatras']:>12.1%}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+"""
+Startup budget: time to import the application and to warm it up
+
+    python -m benchmarks startup                   # 5 fresh interpreters, print results
+    python -m benchmarks startup --compare         # fail (exit 1) beyond the baseline
+    python -m benchmarks startup --save-baseline   # refresh benchmarks/baselines/startup.json
+
+Every run starts a new interpreter (imports are cached per process) that times
+importing api.main plus create_app() ("startup.import_app", what delays the
+server binding) and the deferred warm-up ("startup.warm_up", which runs after
+the bind). The interpreter runs with -X importtime so the slowest api.* modules
+are reported too. Results use the harness document format, so baselines are
+compared with harness.compare.
+"""
+from typing import Any, Dict, List, Optional
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Startup time grows noisily with the machine load; only flag clear regressions
+STARTUP_THRESHOLD = 0.25
+
+# The comparison fails on this benchmark only: it is what delays the bind
+GATED_STARTUP = "startup.import_app"
+
+# Modules that must not be imported just to start the server
+DEFERRED_MODULES = ("numpy", "requests")
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from api.main import create_app
+create_app()
+imported = time.perf_counter()
+deferred_imported = [name for name in %r if name in sys.modules]
+from api.services.warmup import warm_up, WarmupState
+state = WarmupState()
+warm_up(state)
+print(json.dumps({
+    "import_app_us": (imported - started) * 1e6,
+    "warm_up_us": (time.perf_counter() - imported) * 1e6,
+    "warm_up_error": state.error,
+    "deferred_imported": deferred_imported,
+}))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def _top_imports(stderr: str, prefix: str = "api.", limit: int = 10) -> Dict[str, int]:
+    """Cumulative import time (microseconds) of the slowest modules under a prefix"""
+    cumulative = {}
+    for match in _IMPORTTIME.finditer(stderr):
+        module = match.group(4)
+        if module.startswith(prefix):
+            cumulative[module] = max(cumulative.get(module, 0), int(match.group(2)))
+    return dict(sorted(cumulative.items(), key=lambda item: -item[1])[:limit])
+
+def measure_once(environment: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Import and warm-up timings of one fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD % (DEFERRED_MODULES,)],
+        capture_output=True, text=True, env={**os.environ, **(environment or {})},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup measurement failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["top_imports_us"] = _top_imports(completed.stderr)
+    return result
+
+def measure(runs: int = 5, environment: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Median startup timings over several fresh interpreters
+
+    Returns:
+        Harness result document ("results" by benchmark name with median_us,
+        min_us, max_us) plus the slowest api.* imports of the median run and
+        the deferred modules that were imported anyway
+    """
+    samples: List[Dict[str, Any]] = [measure_once(environment) for _ in range(runs)]
+    results = {}
+    for name, key in (("startup.import_app", "import_app_us"), ("startup.warm_up", "warm_up_us")):
+        values = [sample[key] for sample in samples]
+        results[name] = {
+            "group": "startup",
+            "median_us": round(statistics.median(values), 1),
+            "min_us": round(min(values), 1),
+            "max_us": round(max(values), 1),
+            "rounds": runs,
+        }
+    median_run = sorted(samples, key=lambda sample: sample["import_app_us"])[runs // 2]
+    return {
+        "meta": {"runs": runs},
+        "results": results,
+        "top_imports_us": median_run["top_imports_us"],
+        "deferred_imported": sorted({name for sample in samples for name in sample["deferred_imported"]}),
+        "warm_up_errors": sorted({sample["warm_up_error"] for sample in samples if sample["warm_up_error"]}),
+    }
+
+def format_report(document: Dict[str, Any]) -> str:
+    """Startup timings and the slowest application imports"""
+    lines = [f"{'benchmark':<22}{'median':>12}{'min':>12}{'max':>12}"]
+    for name, result in document["results"].items():
+        lines.append(
+            f"{name:<22}{result['median_us'] / 1000:>9.1f} ms{result['min_us'] / 1000:>9.1f} ms"
+            f"{result['max_us'] / 1000:>9.1f} ms"
+        )
+    lines.append("slowest application imports (cumulative):")
+    for module, micros in document["top_imports_us"].items():
+        lines.append(f"  {module:<40}{micros / 1000:>9.1f} ms")
+    if document["deferred_imported"]:
+        lines.append(f"imported at startup but should be deferred: {', '.join(document['deferred_imported'])}")
+    for error in document["warm_up_errors"]:
+        lines.append(f"warm-up error: {error}")
+    return "\n".join(lines)
@@ -5,19 +5,18 @@ Constants package exports and cache management.
 # Global cache for constants
 _CONSTANTS_CACHE = {}
 
-def load_all_constants():
-    """Load all constants into memory cache."""
-    # Load zodiac signs
+def _load_zodiac_signs():
     from .zodiac_signs import ZODIAC_SIGNS
     _CONSTANTS_CACHE['zodiac_signs'] = ZODIAC_SIGNS
-    
-    # Load planets
+
+def _load_planets():
     from .planets import PLANETS, PLANET_NAMES, SWE_CODE_TO_PLANET
     _CONSTANTS_CACHE['planets'] = PLANETS
     _CONSTANTS_CACHE['planet_names'] = PLANET_NAMES
     _CONSTANTS_CACHE['swe_code_to_planet'] = SWE_CODE_TO_PLANET
-    
-    # Load nakshatras from API constants
+
+def _load_nakshatras():
+    # Nakshatras come from the API constants
     from api.constants.nakshatras import (
         NAKSHATRAS, 
         get_nakshatra_from_longitude,
@@ -32,14 +31,14 @@ def load_all_constants():
     _CONSTANTS_CACHE['get_nakshatra_lord'] = get_nakshatra_lord
     _CONSTANTS_CACHE['get_nakshatra_pada'] = get_nakshatra_pada
     _CONSTANTS_CACHE['get_degrees_in_nakshatra'] = get_degrees_in_nakshatra
-    
-    # Load dasha years
+
+def _load_dasha_years():
     from .dasha_years import DASHA_YEARS, TOTAL_DASHA_YEARS, NAKSHATRA_LORDS
     _CONSTANTS_CACHE['dasha_years'] = DASHA_YEARS
     _CONSTANTS_CACHE['total_dasha_years'] = TOTAL_DASHA_YEARS
     _CONSTANTS_CACHE['nakshatra_lords'] = NAKSHATRA_LORDS
-    
-    # Load ayanamsa constants
+
+def _load_ayanamsa():
     from .ayanamsa import (
         AYANAMSA_LAHIRI, AYANAMSA_RAMAN, AYANAMSA_KRISHNAMURTI,
         DEFAULT_AYANAMSA, AYANAMSA_MAPPING, AYANAMSA_NAMES
@@ -50,10 +49,40 @@ def load_all_constants():
     _CONSTANTS_CACHE['default_ayanamsa'] = DEFAULT_AYANAMSA
     _CONSTANTS_CACHE['ayanamsa_mapping'] = AYANAMSA_MAPPING
     _CONSTANTS_CACHE['ayanamsa_names'] = AYANAMSA_NAMES
-    
-    # Load divisional mappings
+
+def _load_divisional_mappings():
     from .divisional_mappings import DIVISIONAL_MAPPINGS
     _CONSTANTS_CACHE['divisional_mappings'] = DIVISIONAL_MAPPINGS
+
+# Loader of each constant category; get_constant only loads (and validates)
+# the group it needs, load_all_constants loads everything
+_LOADERS = {
+    'zodiac_signs': _load_zodiac_signs,
+    'planets': _load_planets,
+    'planet_names': _load_planets,
+    'swe_code_to_planet': _load_planets,
+    'nakshatras': _load_nakshatras,
+    'get_nakshatra_from_longitude': _load_nakshatras,
+    'get_nakshatra_name': _load_nakshatras,
+    'get_nakshatra_lord': _load_nakshatras,
+    'get_nakshatra_pada': _load_nakshatras,
+    'get_degrees_in_nakshatra': _load_nakshatras,
+    'dasha_years': _load_dasha_years,
+    'total_dasha_years': _load_dasha_years,
+    'nakshatra_lords': _load_dasha_years,
+    'ayanamsa_lahiri': _load_ayanamsa,
+    'ayanamsa_raman': _load_ayanamsa,
+    'ayanamsa_krishnamurti': _load_ayanamsa,
+    'default_ayanamsa': _load_ayanamsa,
+    'ayanamsa_mapping': _load_ayanamsa,
+    'ayanamsa_names': _load_ayanamsa,
+    'divisional_mappings': _load_divisional_mappings,
+}
+
+def load_all_constants():
+    """Load all constants into memory cache."""
+    for loader in dict.fromkeys(_LOADERS.values()):
+        loader()
     
     # Validate all loaded constants
     _validate_constants()
@@ -64,6 +93,7 @@ def _validate_constants():
     """
     Validate that all constants are properly defined.
     This helps catch any issues at startup rather than during runtime.
+    Categories that are not loaded yet are skipped.
     """
     # Make sure zodiac signs are numbered 1-12
     zodiac_signs = _CONSTANTS_CACHE.get('zodiac_signs', {})
@@ -94,7 +124,7 @@ def _validate_constants():
 
 def get_constant(category, key=None):
     """
-    Get constant from cache.
+    Get constant from cache, loading its category on first use.
     
     Args:
         category: Constant category name
@@ -103,8 +133,9 @@ def get_constant(category, key=None):
     Returns:
         Requested constant or None if not found
     """
-    if not _CONSTANTS_CACHE:
-        load_all_constants()
+    if category not in _CONSTANTS_CACHE and category in _LOADERS:
+        _LOADERS[category]()
+        _validate_constants()
     
     if key is None:
         return _CONSTANTS_CACHE.get(category)
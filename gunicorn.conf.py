@@ -11,6 +11,12 @@ workers = 2
 worker_class = "uvicorn.workers.UvicornWorker"
 preload_app = True
 
+# Calculation worker processes per HTTP worker (see api/services/worker_pool.py):
+# each HTTP worker starts its own pool, so the server runs workers x
+# JAI_CALC_WORKERS of them. By default the CPU cores are shared between the
+# HTTP workers; lower JAI_CALC_WORKERS when raising workers.
+os.environ.setdefault("JAI_CALC_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
 # Timeout configuration
 timeout = 120
 keepalive = 5
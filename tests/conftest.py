@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Import constants loader
 from jai_api.constants import load_all_constants
+from api.utils.admission import admission_controller
 
 @pytest.fixture(scope="session", autouse=True)
 def load_constants():
@@ -18,6 +19,12 @@ def load_constants():
     load_all_constants()
     return True
 
+@pytest.fixture(autouse=True)
+def admission():
+    """Full client budgets for every test: all test clients have the same address"""
+    admission_controller.reset()
+    yield
+
 # Create a dummy logger fixture
 @pytest.fixture
 def mock_logger(monkeypatch):
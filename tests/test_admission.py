@@ -0,0 +1,96 @@
+"""Tests for admission control and load shedding"""
+
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.utils.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    Lane,
+    OverloadedError,
+    TokenBuckets,
+    classify_path,
+    HEAVY_LANE,
+    LIGHT_LANE,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_refills():
+    """A client over budget is told how long to wait, and recovers"""
+    clock = FakeClock()
+    buckets = TokenBuckets(rate=1.0, burst=5, clock=clock)
+    assert buckets.take("a", cost=5) == 0
+    assert buckets.take("a", cost=2) == pytest.approx(2.0)
+    assert buckets.take("b", cost=1) == 0  # clients are independent
+    clock.now = 2.0
+    assert buckets.take("a", cost=2) == 0
+
+def test_paths_are_classified_into_lanes():
+    """Long-range endpoints use the heavy lane, health checks are exempt"""
+    assert classify_path("/v1/api/horoscope/ascendant") == LIGHT_LANE
+    assert classify_path("/v1/api/horoscope/calculate") == HEAVY_LANE
+    assert classify_path("/v1/api/charts/abc/dasha") == HEAVY_LANE
+    assert classify_path("/v1/api/health") is None
+
+def test_saturated_lane_sheds_requests():
+    """Requests beyond the queue limit are shed with 503 instead of queueing"""
+    async def run():
+        lane = Lane("heavy", concurrency=1, max_queue=1, max_wait_ms=200)
+        await lane.acquire()
+        queued = asyncio.ensure_future(lane.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as shed:
+            await lane.acquire()
+        lane.release()  # hands the slot to the queued request
+        await queued
+        assert lane.active == 1 and lane.queued == 0
+        return shed.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.retry_after >= 1
+
+def test_middleware_returns_retry_after():
+    """Clients over budget get a 429 with Retry-After"""
+    app = FastAPI()
+
+    @app.get("/v1/api/horoscope/ascendant")
+    async def ascendant():
+        return {"status": "success"}
+
+    controller = AdmissionController(buckets=TokenBuckets(rate=0.5, burst=1))
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    client = TestClient(app)
+
+    assert client.get("/v1/api/horoscope/ascendant").status_code == 200
+    response = client.get("/v1/api/horoscope/ascendant")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert response.json()["error_code"] == "RATE_LIMIT_EXCEEDED"
+
+def test_clients_cannot_choose_their_key():
+    """Forged forwarding headers and unsigned client IDs do not change the key"""
+    from ipaddress import ip_network
+    from api.utils.admission import client_key, sign_client_id
+
+    def scope(peer, **headers):
+        return {"client": (peer, 50000), "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]}
+
+    proxies = [ip_network("10.0.0.0/8")]
+    assert client_key(scope("203.0.113.7", x_forwarded_for="198.51.100.1"), proxies, "") == "203.0.113.7"
+    assert client_key(scope("203.0.113.7", x_client_id="anyone"), proxies, "") == "203.0.113.7"
+    # Behind trusted proxies, the rightmost hop that is not one of them
+    forwarded = scope("10.0.0.2", x_forwarded_for="198.51.100.1, 203.0.113.7, 10.0.0.1")
+    assert client_key(forwarded, proxies, "") == "203.0.113.7"
+
+    signed = sign_client_id("partner-1", "secret")
+    assert client_key(scope("203.0.113.7", x_client_id=signed), proxies, "secret") == "id:partner-1"
+    assert client_key(scope("203.0.113.7", x_client_id="partner-1." + "0" * 64), proxies, "secret") == "203.0.113.7"
+    assert client_key(scope("203.0.113.7", x_client_id=signed), proxies, "") == "203.0.113.7"
@@ -0,0 +1,54 @@
+"""Tests for the benchmark harness"""
+
+from benchmarks.harness import Benchmark, compare, run_benchmark, time_callable
+
+def _document(**medians):
+    return {"results": {name: {"median_us": value} for name, value in medians.items()}}
+
+def test_time_callable_reports_statistics():
+    """Timing returns per-call statistics in microseconds"""
+    stats = time_callable(lambda: sum(range(100)), rounds=3, min_time=0.03)
+    assert stats["rounds"] == 3
+    assert 0 < stats["min_us"] <= stats["median_us"] <= stats["max_us"]
+
+def test_generator_factories_are_torn_down():
+    """Factories that yield the timed callable get their teardown run"""
+    events = []
+
+    def factory():
+        events.append("setup")
+        yield lambda: None
+        events.append("teardown")
+
+    result = run_benchmark(Benchmark("noop", "test", factory), rounds=2, min_time=0.01)
+    assert events == ["setup", "teardown"]
+    assert result["group"] == "test"
+
+def test_compare_flags_regressions():
+    """Medians beyond the threshold are reported as regressions or improvements"""
+    rows = {
+        row["name"]: row
+        for row in compare(
+            _document(same=100.0, slower=100.0, faster=100.0, removed=5.0),
+            _document(same=105.0, slower=125.0, faster=50.0, added=1.0),
+            threshold=0.10
+        )
+    }
+    assert rows["same"]["status"] == "ok"
+    assert rows["slower"]["status"] == "regression"
+    assert rows["slower"]["ratio"] == 1.25
+    assert rows["faster"]["status"] == "improvement"
+    assert rows["added"]["status"] == "new"
+    assert rows["removed"]["status"] == "missing"
+
+def test_startup_import_profile_is_parsed():
+    """The slowest application modules are read from -X importtime output"""
+    from benchmarks.startup import _top_imports
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   api.utils.metrics\n"
+        "import time:      5000 |     250000 | fastapi\n"
+        "import time:       300 |       9000 | api.services.calculation\n"
+        "import time:        50 |      40000 | api.main\n"
+    )
+    assert list(_top_imports(stderr, limit=2)) == ["api.main", "api.services.calculation"]
@@ -0,0 +1,73 @@
+"""Tests for the birth-time uncertainty analysis"""
+
+from datetime import date, datetime, timedelta
+import pytest
+from api.constants.planets import Planet
+from api.services import birth_time, calculation
+
+BIRTH = ("1990-01-01", "12:30:00", 13.0827, 80.2707, 5.5, "lahiri")
+
+def _shifted_record(minutes):
+    """Chart record recomputed with the birth time shifted by some minutes"""
+    moment = datetime.strptime(f"{BIRTH[0]} {BIRTH[1]}", "%Y-%m-%d %H:%M:%S") + timedelta(minutes=minutes)
+    return calculation.calculate_chart_record(moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M:%S"), *BIRTH[2:])
+
+def _facts(record):
+    """Chart facts computed directly from a record"""
+    ascendant = calculation.ascendant_from_record(record)
+    facts = {"ascendant.sign": ascendant.sign, "ascendant.nakshatra": ascendant.nakshatra,
+             "ascendant.pada": ascendant.nakshatra_pada}
+    for planet in calculation.planets_from_record(record):
+        name = next(p.value for p in Planet if calculation.PLANET_NAMES[p] == planet.name)
+        facts.update({f"{name}.sign": planet.sign, f"{name}.nakshatra": planet.nakshatra,
+                      f"{name}.pada": planet.nakshatra_pada, f"{name}.house": planet.house})
+    return facts
+
+def test_planet_padas_from_speed():
+    """Crossings are solved from the longitude and speed, in both directions"""
+    span = birth_time.PADA_SPAN
+    times, values = birth_time._planet_padas(span - 0.1, 13.0, 0.0, -0.02, 0.02)
+    assert values == [0, 1] and times[0] == pytest.approx(0.1 / 13.0)
+
+    # Retrograde across a nakshatra boundary and the start of the zodiac
+    times, values = birth_time._planet_padas(0.05, -0.5, 0.0, -0.05, 0.5)
+    assert values == [0, 107] and times[0] == pytest.approx(0.1)
+
+    times, values = birth_time._planet_padas(101.0, 1.0, 0.0, -0.01, 0.01)
+    assert len(times) == 0 and values == [30]
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_segments_match_recomputed_charts():
+    """Inside every segment a chart recomputed at that time has the segment's value"""
+    record = calculation.calculate_chart_record(*BIRTH)
+    analysis = birth_time.analyze_birth_time(record, 60, date(2024, 6, 1))
+    assert not analysis["stable"] and "ascendant.sign" in analysis["unstable_facts"]
+
+    facts = {fact["fact"]: fact for fact in analysis["facts"]}
+    assert all(fact["value"] == value for name, value in _facts(record).items() for fact in [facts[name]])
+    for fact in analysis["facts"]:
+        if fact["fact"].startswith("dasha"):
+            continue
+        for segment in fact["segments"]:
+            middle = (segment["start_offset_minutes"] + segment["end_offset_minutes"]) / 2
+            assert _facts(_shifted_record(middle))[fact["fact"]] == segment["value"], fact["fact"]
+            # Boundaries are exact to about a second
+            if segment["start_offset_minutes"] > -60:
+                shortly_after = _shifted_record(segment["start_offset_minutes"] + 0.05)
+                assert _facts(shortly_after)[fact["fact"]] == segment["value"], fact["fact"]
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_running_dasha_matches_dasha_periods():
+    """The running dasha segments agree with the dasha periods of shifted charts"""
+    record = calculation.calculate_chart_record(*BIRTH)
+    analysis = birth_time.analyze_birth_time(record, 120, date(2024, 6, 1))
+    facts = {fact["fact"]: fact for fact in analysis["facts"]}
+    segments = facts["dasha.antardasha"]["segments"]
+    assert len(segments) == 2
+
+    for segment in segments:
+        minutes = (segment["start_offset_minutes"] + segment["end_offset_minutes"]) / 2
+        shifted = _shifted_record(minutes)
+        periods = calculation.antardasha_periods(calculation.dasha_periods_from_record(shifted))
+        running = next(period for period in periods if period.start_date <= "2024-06-01" < period.end_date)
+        assert running.planet == segment["value"]
@@ -0,0 +1,98 @@
+"""Tests for the jai-batch command"""
+
+import json
+from unittest.mock import patch
+import pytest
+from api.services import bulk_charts, calculation, columnar
+
+RECORDS = [
+    {"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai"},
+    {"birth_date": "1985-06-15", "birth_time": "06:45:00", "place": "Chennai", "ayanamsa": "raman"},
+    {"birth_date": "not a date", "birth_time": "12:30:00", "place": "Chennai"},
+    {"birth_date": "2001-11-30", "birth_time": "23:10:00", "place": "Chennai"},
+    {"birth_date": "1972-03-08", "birth_time": "04:05:00", "place": "Chennai"},
+]
+
+@pytest.fixture(autouse=True)
+def geocoding():
+    with patch("api.models.request.resolve_place", return_value=(13.0827, 80.2707, 5.5)):
+        yield
+
+@pytest.fixture
+def births(tmp_path):
+    path = tmp_path / "births.ndjson"
+    path.write_text("".join(json.dumps(record) + "\n" for record in RECORDS))
+    return path
+
+def _table(path):
+    return columnar.decode(path.read_bytes())[1]
+
+def test_columns_match_the_chart_endpoints(tmp_path, births, capsys):
+    """Every column agrees with what the API derives from the same chart record"""
+    output = tmp_path / "out"
+    assert bulk_charts.main([str(births), "-o", str(output), "--chunk-size", "2", "--workers", "2",
+                             "--vargas", "D9,D10", "--dasha-levels", "2"]) == 0
+    assert "5 records: 4 charts, 1 errors" in capsys.readouterr().out
+
+    charts = [_table(output / f"charts-{shard:05d}.jcol") for shard in range(3)]
+    rows = {int(index): (table, row) for table in charts for row, index in enumerate(table["index"])}
+    assert sorted(rows) == [0, 1, 2, 3, 4]
+    table, row = rows[2]
+    assert table["error_code"][row] == "VALIDATION_ERROR" and table["ascendant.sign"][row] == 0
+
+    dashas = [_table(output / f"dashas-{shard:05d}.jcol") for shard in range(3)]
+    for index in (0, 1, 3, 4):
+        table, row = rows[index]
+        entry = dict(RECORDS[index])
+        record = calculation.calculate_chart_record(
+            entry["birth_date"], entry["birth_time"], 13.0827, 80.2707, 5.5, entry.get("ayanamsa", "lahiri")
+        )
+        assert table["error_code"][row] == ""
+        assert str(table["birth_date"][row]) == entry["birth_date"]
+        assert table["ascendant.sign"][row] == calculation.ascendant_from_record(record).sign_id
+        for name, planet in zip((planet.value for planet in calculation.PLANETS), calculation.planets_from_record(record)):
+            assert table[f"{name}.longitude"][row] == pytest.approx(planet.longitude, abs=1e-6)
+            assert table[f"{name}.sign"][row] == planet.sign_id
+            assert table[f"{name}.house"][row] == planet.house
+            assert table[f"{name}.nakshatra"][row] == planet.nakshatra_id
+            assert table[f"{name}.pada"][row] == planet.nakshatra_pada
+            assert table[f"{name}.retrograde"][row] == planet.is_retrograde
+        for division in ("D9", "D10"):
+            ascendant, planets = calculation.divisional_chart_from_record(record, division)
+            assert table[f"{division}.ascendant.sign"][row] == ascendant.sign_id
+            assert [table[f"{division}.{planet.value}.sign"][row] for planet in calculation.PLANETS] == \
+                [planet.sign_id for planet in planets]
+        assert "D3.Sun.sign" not in table
+
+        periods = list(calculation.iter_dasha_periods(calculation.dasha_periods_from_record(record), 2))
+        shard = dashas[index // 2]
+        rows_of_chart = shard["index"] == index
+        assert list(shard["level"][rows_of_chart]) == [level for level, _ in periods]
+        assert list(shard["planet"][rows_of_chart]) == [period.planet for _, period in periods]
+        assert [str(date) for date in shard["end_date"][rows_of_chart]] == [period.end_date for _, period in periods]
+
+def test_rerun_resumes_at_missing_chunks(tmp_path, births):
+    """Finished chunks are kept; only chunks without a charts file are calculated"""
+    output = tmp_path / "out"
+    settings = {"chunk_size": 2, "vargas": ["D9"], "dasha_levels": 1, "output_format": "jcol",
+                "ayanamsa": "lahiri", "precision": "standard"}
+    bulk_charts.run(births, output, "ndjson", settings, workers=0)
+    first = (output / "charts-00000.jcol").stat().st_mtime_ns
+    expected = _table(output / "charts-00001.jcol")
+    # Interrupted after writing the dashas of the second chunk
+    (output / "charts-00001.jcol").unlink()
+
+    with patch.object(bulk_charts, "calculate_chunk", wraps=bulk_charts.calculate_chunk) as calculate:
+        summary = bulk_charts.run(births, output, "ndjson", settings, workers=0)
+    assert [call.args[1] for call in calculate.call_args_list] == [1]
+    assert (summary["records"], summary["charts"], summary["skipped_chunks"]) == (5, 1, 2)
+    assert summary["charts_per_second"] > 0
+    assert (output / "charts-00000.jcol").stat().st_mtime_ns == first
+    resumed = _table(output / "charts-00001.jcol")
+    assert resumed.keys() == expected.keys()
+    assert all((resumed[name] == expected[name]).all() for name in expected if name.endswith(".sign"))
+
+    # Chunks of other settings are not mixed in
+    assert bulk_charts.main([str(births), "-o", str(output), "--chunk-size", "3", "--workers", "0"]) == 1
+    with pytest.raises(SystemExit):
+        bulk_charts.main([str(births), "-o", str(tmp_path / "other"), "--vargas", "D5"])
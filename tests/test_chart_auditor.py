@@ -0,0 +1,37 @@
+"""Tests for the background D1 chart auditor"""
+
+import json
+from api.services import calculation
+from api.services.chart_auditor import AUDITS, ChartAuditor, audit_record, replay
+from api.services.chart_record import ChartRecord, decode, encode
+
+def _record():
+    raw = calculation.calculate_chart_record("1990-01-01", "12:00:00", 13.0827, 80.2707, 5.5, "lahiri")
+    return decode(encode(ChartRecord.from_dict(raw))).to_dict()
+
+def test_consistent_chart_passes():
+    """A calculated chart has no mismatches"""
+    assert audit_record(_record()) == {"houses": [], "planets": []}
+
+def test_sampling_and_mismatch_storage(tmp_path, monkeypatch):
+    """Only sampled charts are checked; failures are stored for replay"""
+    record = _record()
+    skipped = ChartAuditor(sample_rate=0.0, directory=str(tmp_path))
+    assert not skipped.submit("a" * 32, record)
+
+    # Make the chart look inconsistent to the check
+    monkeypatch.setattr(calculation, "d1_chart_mismatches", lambda *args: {"houses": [3], "planets": ["Sun"]})
+    mismatches = AUDITS.value("mismatch")
+    auditor = ChartAuditor(sample_rate=1.0, directory=str(tmp_path))
+    assert auditor.submit("b" * 32, record)
+    auditor.join()
+    auditor.stop()
+
+    assert AUDITS.value("mismatch") == mismatches + 1
+    stored = json.loads((tmp_path / ("b" * 32 + ".json")).read_text())
+    assert stored["mismatches"] == {"houses": [3], "planets": ["Sun"]}
+    assert stored["params"]["birth_date"] == "1990-01-01"
+
+    # Replaying recalculates the chart from the stored parameters
+    monkeypatch.undo()
+    assert replay(str(tmp_path / ("b" * 32 + ".json"))) == {"houses": [], "planets": []}
@@ -0,0 +1,97 @@
+"""Tests for the compact binary chart record format"""
+
+import random
+import pytest
+from api.constants.planets import Planet
+from api.services.chart_record import (
+    ChartRecord,
+    RECORD_SIZE,
+    NUMPY_AVAILABLE,
+    FLAG_MOCK_EPHEMERIS,
+    encode,
+    decode,
+    encode_many,
+    decode_many,
+    as_numpy,
+)
+
+def _chart(offset=0.0):
+    return {
+        "birth_date": "1988-12-01",
+        "birth_time": "21:47:00",
+        "latitude": 13.0827,
+        "longitude": 80.2707,
+        "timezone_offset": 5.5,
+        "ayanamsa": "raman",
+        "julian_day": 2447497.178472222,
+        "ascendant": 95.5 + offset,
+        "planets": {
+            planet.value: {
+                "longitude": (40.0 * index + offset) % 360,
+                "latitude": 0.25,
+                "speed": -0.05 if planet == Planet.RAHU else 1.0,
+            }
+            for index, planet in enumerate(Planet)
+        },
+        "flags": FLAG_MOCK_EPHEMERIS,
+    }
+
+def test_record_size():
+    """The fixed-width record stays compact"""
+    assert RECORD_SIZE == 236
+    assert len(encode(ChartRecord.from_dict(_chart()))) == RECORD_SIZE
+
+def test_round_trip_preserves_chart():
+    """Encoding then decoding restores the chart and its birth inputs"""
+    record = ChartRecord.from_dict(_chart())
+    restored = decode(encode(record))
+    assert restored == record
+
+    chart = restored.to_dict()
+    assert chart["birth_date"] == "1988-12-01"
+    assert chart["birth_time"] == "21:47:00"
+    assert chart["ayanamsa"] == "raman"
+    assert chart["planets"]["Rahu"]["is_retrograde"]
+    assert not chart["planets"]["Sun"]["is_retrograde"]
+    assert restored.flags & FLAG_MOCK_EPHEMERIS
+
+def test_birth_inputs_survive_round_trip_exactly():
+    """Birth date, time and precision are stored, not rebuilt from the Julian day"""
+    rng = random.Random(7)
+    for _ in range(200):
+        chart = dict(
+            _chart(),
+            birth_date=f"{rng.randint(1900, 2099)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            birth_time=f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+            # Approximate offsets from the longitude have fractional seconds
+            timezone_offset=round(rng.uniform(-12, 14), 4),
+            precision=rng.choice(["standard", "file", "moshier", "fast"])
+        )
+        restored = decode(encode(ChartRecord.from_dict(chart))).to_dict()
+        assert (restored["birth_date"], restored["birth_time"]) == (chart["birth_date"], chart["birth_time"])
+        assert restored["precision"] == chart["precision"]
+        assert restored["params"].get("precision") == (None if chart["precision"] == "standard" else chart["precision"])
+
+    midnight = decode(encode(ChartRecord.from_dict(dict(_chart(), birth_date="1990-01-01", birth_time="00:00:00"))))
+    assert midnight.to_dict()["birth_date"] == "1990-01-01"
+
+def test_bulk_encode_decode():
+    """Bulk buffers hold back-to-back records and decode from any offset"""
+    records = [ChartRecord.from_dict(_chart(offset=i)) for i in range(5)]
+    buffer = encode_many(records)
+    assert len(buffer) == 5 * RECORD_SIZE
+    assert decode_many(buffer) == records
+    assert decode(memoryview(buffer), offset=3 * RECORD_SIZE) == records[3]
+
+def test_decode_rejects_foreign_data():
+    """Buffers without the record magic are rejected"""
+    with pytest.raises(ValueError):
+        decode(bytes(RECORD_SIZE))
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="NumPy not installed")
+def test_numpy_view_is_columnar():
+    """The NumPy view exposes columns without copying the buffer"""
+    records = [ChartRecord.from_dict(_chart(offset=i)) for i in range(3)]
+    array = as_numpy(encode_many(records))
+    assert list(array["ascendant"]) == [95.5, 96.5, 97.5]
+    assert array["longitudes"].shape == (3, 9)
@@ -0,0 +1,93 @@
+"""Tests for the two-tier chart store"""
+
+import threading
+import time
+from unittest.mock import patch
+import pytest
+from api.constants.planets import Planet
+from api.services.chart_record import ChartRecord
+from api.services.chart_store import ChartStore, make_chart_id, is_valid_chart_id
+
+PARAMS = {
+    "birth_date": "1990-01-01",
+    "birth_time": "12:00:00",
+    "latitude": 13.083694,
+    "longitude": 80.270186,
+    "timezone_offset": 5.5,
+    "ayanamsa": "lahiri",
+}
+
+def _record(ascendant=10.0):
+    return {
+        "birth_date": "1990-01-01",
+        "birth_time": "12:00:00",
+        "latitude": 13.083694,
+        "longitude": 80.270186,
+        "timezone_offset": 5.5,
+        "ayanamsa": "lahiri",
+        "julian_day": 2447892.770833333,
+        "ascendant": ascendant,
+        "planets": {
+            planet.value: {"longitude": 30.0 * index, "latitude": 0.0, "speed": 1.0}
+            for index, planet in enumerate(Planet)
+        },
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    return ChartStore(directory=str(tmp_path), max_items=2, ttl_seconds=60)
+
+def test_chart_id_is_deterministic():
+    """The chart ID only depends on the normalized parameters"""
+    chart_id = make_chart_id(PARAMS)
+    assert chart_id == make_chart_id(dict(PARAMS))
+    assert is_valid_chart_id(chart_id)
+    assert not is_valid_chart_id("../../etc/passwd")
+
+def test_get_or_create_computes_once(store):
+    """A second lookup with the same parameters reuses the stored record"""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return _record()
+
+    first_id, record = store.get_or_create(PARAMS, compute)
+    second_id, _ = store.get_or_create(PARAMS, compute)
+    assert first_id == second_id
+    assert len(calls) == 1
+    assert record["params"] == PARAMS
+
+def test_disk_tier_survives_memory_eviction(store, tmp_path):
+    """Records evicted from the LRU are reloaded from disk"""
+    store.put("a" * 32, ChartRecord.from_dict(_record(1.0)))
+    store.put("b" * 32, ChartRecord.from_dict(_record(2.0)))
+    store.put("c" * 32, ChartRecord.from_dict(_record(3.0)))  # evicts "a" from memory
+
+    fresh = ChartStore(directory=str(tmp_path), max_items=2, ttl_seconds=60)
+    assert store.get("a" * 32)["ascendant"] == 1.0
+    assert fresh.get("c" * 32)["ascendant"] == 3.0
+
+def test_expired_records_are_dropped(tmp_path):
+    """Records older than the TTL are not returned and are swept from disk"""
+    store = ChartStore(directory=str(tmp_path), max_items=2, ttl_seconds=0)
+    store.put("d" * 32, ChartRecord.from_dict(_record()))
+    time.sleep(0.01)
+    assert store.get("d" * 32) is None
+    assert store.evict_expired() == 0
+    assert not list(tmp_path.glob("*.chart"))
+
+def test_concurrent_writers_of_one_chart(tmp_path):
+    """Writers storing the same chart never publish a partial file or leave temporaries"""
+    stores = [ChartStore(directory=str(tmp_path), max_items=2, ttl_seconds=60) for _ in range(8)]
+    record = ChartRecord.from_dict(_record())
+    threads = [threading.Thread(target=lambda s=s: [s.put("e" * 32, record) for _ in range(50)]) for s in stores]
+    with patch("api.services.chart_store.logger") as logger:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert not logger.error.called
+    assert [path.name for path in tmp_path.iterdir()] == ["e" * 32 + ".chart"]
+    assert ChartStore(directory=str(tmp_path)).get("e" * 32)["ascendant"] == record.ascendant
@@ -0,0 +1,75 @@
+"""Tests for the columnar container and content negotiation"""
+
+from unittest.mock import patch
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from api.main import create_app
+from api.services import columnar
+from api.utils.content_negotiation import COLUMNAR_MEDIA_TYPE, JSON_MEDIA_TYPE, preferred_media_type
+
+COLUMNAR = {"Accept": COLUMNAR_MEDIA_TYPE}
+
+def test_round_trip_is_zero_copy_and_aligned():
+    """Columns decode as read-only views of the buffer, each 8-byte aligned"""
+    columns = {
+        "julian_day": np.array([2460310.5, 2460311.0]),
+        "sign": np.array([1, 12], dtype="u1"),
+        "count": np.array([3, -4], dtype=">i4"),
+        "planet": np.array(["Sun", "Jupiter"]),
+        "start_date": np.array(["2024-01-01", "2039-05-17"], dtype="datetime64[D]"),
+        "empty": np.array([], dtype="f8"),
+    }
+    data = columnar.encode(columns, {"chart_id": "abc"})
+    metadata, decoded = columnar.decode(data)
+    assert metadata == {"chart_id": "abc"} and list(decoded) == list(columns)
+    for name, array in columns.items():
+        assert np.array_equal(decoded[name], array) and decoded[name].dtype.byteorder in ("=", "<", "|")
+    assert not decoded["julian_day"].flags.writeable
+    assert all(array.ctypes.data % 8 == decoded["julian_day"].ctypes.data % 8 for array in decoded.values())
+
+    with pytest.raises(ValueError):
+        columnar.decode(b"JSON" + data[4:])
+    with pytest.raises(ValueError):
+        columnar.encode({"objects": np.array([{}, None])})
+    with pytest.raises(ValueError):
+        b"".join(columnar.encode_stream([("a", "<f8", 3)], [np.zeros(2)]))
+
+def test_accept_header_negotiation():
+    """JSON stays the default; quality values and wildcards pick the type"""
+    offered = (JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE)
+    assert preferred_media_type(None, offered) == JSON_MEDIA_TYPE
+    assert preferred_media_type("*/*", offered) == JSON_MEDIA_TYPE
+    assert preferred_media_type(COLUMNAR_MEDIA_TYPE, offered) == COLUMNAR_MEDIA_TYPE
+    assert preferred_media_type(f"application/json;q=0.5, {COLUMNAR_MEDIA_TYPE}", offered) == COLUMNAR_MEDIA_TYPE
+    assert preferred_media_type("application/*;q=0.2, application/json;q=0", offered) == COLUMNAR_MEDIA_TYPE
+    assert preferred_media_type("text/html", offered) is None
+
+def test_columnar_endpoints_match_json():
+    """The dasha and series endpoints return the JSON content as columns"""
+    client = TestClient(create_app())
+    with patch("api.models.request.resolve_place", return_value=(13.0827, 80.2707, 5.5)):
+        chart = client.post("/v1/api/horoscope/planets",
+                            json={"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai"})
+    url = f"/v1/api/charts/{chart.json()['chart_id']}/dasha?levels=2"
+
+    dasha = client.get(url).json()
+    response = client.get(url, headers=COLUMNAR)
+    assert response.headers["content-type"] == COLUMNAR_MEDIA_TYPE and response.headers["vary"] == "Accept"
+    metadata, table = columnar.decode(response.content)
+    assert metadata["request_params"] == dasha["request_params"]
+    periods = dasha["mahadasha"] + dasha["antardasha"]
+    assert table["planet"].tolist() == [period["planet"] for period in periods]
+    assert table["start_date"].astype(str).tolist() == [period["start_date"] for period in periods]
+    assert int(np.sum(table["level"] == 2)) == len(dasha["antardasha"])
+    assert client.get(url, headers={**COLUMNAR, "If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 200
+    assert client.get(url, headers={"Accept": "text/csv"}).status_code == 406
+
+    body = {"start": "2024-01-01", "end": "2024-01-10", "step_days": 0.5, "bodies": ["Moon"], "precision": "fast"}
+    series = client.post("/v1/api/ephemeris/series", json=body).json()
+    metadata, table = columnar.decode(client.post("/v1/api/ephemeris/series", json=body, headers=COLUMNAR).content)
+    assert metadata["count"] == series["count"] == 19
+    assert table["julian_day"].tolist() == series["julian_day"]
+    assert table["Moon.longitude"].tolist() == series["bodies"]["Moon"]["longitude"]
+    assert table["Moon.nakshatra"].tolist() == series["bodies"]["Moon"]["nakshatra"]
@@ -0,0 +1,108 @@
+"""Tests for request deadlines and cooperative cancellation"""
+
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from api.services.worker_pool import DEADLINE_EXPIRED, calculate_batch
+from api.utils.deadline import (
+    DeadlineExceededError,
+    DeadlineMiddleware,
+    check_deadline,
+    clamp_timeout,
+    deadline_exceeded_handler,
+    deadline_scope,
+    sleep_within_deadline,
+)
+
+def test_checks_are_noops_outside_requests():
+    """Code called outside a request is never interrupted"""
+    check_deadline("anything")
+    assert clamp_timeout(5) == 5
+
+def test_checks_raise_once_overdue():
+    """Cooperative checks stop work after the deadline"""
+    with deadline_scope(0.3) as deadline:
+        check_deadline("start")
+        assert clamp_timeout(5) <= 0.3
+        with pytest.raises(DeadlineExceededError):
+            sleep_within_deadline(1.0, "retry back-off")
+        time.sleep(0.31)
+        with pytest.raises(DeadlineExceededError) as exc:
+            check_deadline("ephemeris")
+        assert exc.value.stage == "ephemeris"
+        assert deadline.expired
+
+def test_workers_skip_overdue_tasks():
+    """Tasks whose request is already overdue are not calculated"""
+    task = ("1990-01-01", "12:00:00", 13.0827, 80.2707, 5.5, "lahiri")
+    _, errors = calculate_batch([task, task], [time.time() - 1, None])
+    assert list(errors) == [0]
+    assert isinstance(errors[0], ValueError) and str(errors[0]) == DEADLINE_EXPIRED
+
+def _app():
+    app = FastAPI()
+    app.add_exception_handler(DeadlineExceededError, deadline_exceeded_handler)
+    app.add_middleware(DeadlineMiddleware)
+
+    @app.get("/v1/api/slow")
+    async def slow():
+        await asyncio.sleep(5)
+        return {"status": "success"}
+
+    @app.get("/v1/api/loop")
+    async def loop():
+        while True:
+            check_deadline("loop")
+            time.sleep(0.01)
+
+    @app.get("/v1/api/stream")
+    async def stream():
+        def lines():
+            for index in range(5):
+                check_deadline("stream")
+                time.sleep(0.05)
+                yield f"{index}\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/v1/api/jobs")
+    async def upload():
+        await asyncio.sleep(0.3)
+        return {"status": "success"}
+
+    @app.get("/v1/api/fast")
+    async def fast():
+        return {"status": "success"}
+
+    return app
+
+def test_middleware_cancels_overdue_requests():
+    """Waiting routes are cancelled and answered with 504 at the deadline"""
+    client = TestClient(_app())
+    started = time.monotonic()
+    response = client.get("/v1/api/slow", headers={"X-Request-Timeout": "0.2"})
+    assert response.status_code == 504
+    assert response.json()["error_code"] == "REQUEST_TIMEOUT"
+    assert time.monotonic() - started < 2
+
+def test_cooperative_checks_answer_with_504():
+    """CPU loops stop at their next check and the request gets a 504"""
+    client = TestClient(_app())
+    response = client.get("/v1/api/loop", headers={"X-Request-Timeout": "0.1"})
+    assert response.status_code == 504
+    assert client.get("/v1/api/fast").status_code == 200
+
+def test_started_streams_outlive_the_deadline():
+    """Once the headers are sent, a stream is neither cut off nor turned into an error"""
+    client = TestClient(_app())
+    response = client.get("/v1/api/stream", headers={"X-Request-Timeout": "0.1"})
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["0", "1", "2", "3", "4"]
+
+def test_job_uploads_have_no_deadline():
+    """Uploads are bounded by their size, not by the request deadline"""
+    client = TestClient(_app())
+    response = client.post("/v1/api/jobs", headers={"X-Request-Timeout": "0.1"})
+    assert response.status_code == 200
@@ -0,0 +1,39 @@
+"""Tests for the ephemeris file footprint manager"""
+
+import pytest
+from api.services import ephemeris_files
+
+def _touch(directory, *names):
+    for name in names:
+        (directory / name).write_bytes(b"x" * 100)
+
+def test_required_files_follow_the_year_range():
+    """1900-2100 needs one planet and one Moon file; wider ranges need every block"""
+    assert ephemeris_files.required_files() == ["sepl_18.se1", "semo_18.se1"]
+    assert ephemeris_files.required_files(1700, 2500) == [
+        "sepl_12.se1", "semo_12.se1", "sepl_18.se1", "semo_18.se1", "sepl_24.se1", "semo_24.se1"
+    ]
+
+def test_trim_copies_only_the_needed_files(tmp_path):
+    """Trimming keeps the range's files and the support files, and fails on missing files"""
+    source = tmp_path / "ephemeris" / "ephe"
+    source.mkdir(parents=True)
+    _touch(source, "sepl_18.se1", "semo_18.se1", "sepl_24.se1", "seas_18.se1", "sefstars.txt")
+    assert ephemeris_files.resolve_directory(tmp_path / "ephemeris") == source
+
+    destination = tmp_path / "trimmed"
+    copied = ephemeris_files.trim(source, destination)
+    assert sorted(copied) == ["sefstars.txt", "semo_18.se1", "sepl_18.se1"]
+    assert sorted(f.name for f in destination.iterdir()) == sorted(copied)
+    assert ephemeris_files.prewarm(destination, ephemeris_files.required_files() + ["absent.se1"]) == 200
+
+    with pytest.raises(FileNotFoundError):
+        ephemeris_files.trim(source, tmp_path / "other", 1700, 1900)
+
+def test_access_counts():
+    """Charts are counted against the planet and Moon files they used"""
+    before = ephemeris_files.access_counts().get("semo_18.se1", 0)
+    ephemeris_files.count_access(2447497.0)
+    counts = ephemeris_files.access_counts()
+    assert counts["semo_18.se1"] == before + 1
+    assert counts["sepl_18.se1"] >= 1
@@ -0,0 +1,59 @@
+"""Tests for the planetary longitude time series"""
+
+import json
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from api.constants.planets import Planet
+from api.main import create_app
+from api.routes import ephemeris
+from api.services import calculation, ephemeris_series
+
+START = 2460310.5  # 2024-01-01 0h UT
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_interpolation_matches_swiss_ephemeris():
+    """Samples between the nodes agree with direct calc_ut positions"""
+    times, bodies = ephemeris_series.ephemeris_series(START, START + 120, 0.1, list(Planet))
+    columns = dict(bodies)
+    calculation.set_ayanamsa("lahiri")
+    for index in range(3, len(times), 97):
+        for planet in Planet:
+            position = calculation.calculate_planet_position(calculation.PLANETS[planet], float(times[index]))
+            error = (columns[planet]["longitude"][index] - position["longitude"] + 180.0) % 360.0 - 180.0
+            assert abs(error) < 0.0005, planet
+            if planet != Planet.KETU:
+                assert columns[planet]["speed"][index] == pytest.approx(position["speed"], abs=0.001)
+            assert columns[planet]["sign"][index] == int(position["longitude"] // 30) + 1
+
+def test_fast_series_and_limits():
+    """The fast precision interpolates the analytical ephemeris; ranges are bounded"""
+    times, bodies = ephemeris_series.ephemeris_series(START, START + 30, 0.25, [Planet.MOON], precision="fast")
+    assert len(times) == 121 and times[-1] == START + 30
+    (planet, columns), = list(bodies)
+    exact = ephemeris_series.fast_ephemeris.sidereal_positions(times, "lahiri")[Planet.MOON]
+    error = (columns["longitude"] - exact["longitude"] + 180.0) % 360.0 - 180.0
+    assert np.max(np.abs(error)) < 0.0005
+    assert set(np.diff(columns["nakshatra"].astype(int)) % 27) <= {0, 1}
+
+    with pytest.raises(ValueError):
+        ephemeris_series.sample_times(START, START + ephemeris_series.MAX_SERIES_DAYS + 1, 1.0)
+    with pytest.raises(ValueError):
+        ephemeris_series.sample_times(START, START + 10, 10.0 / ephemeris_series.MAX_SERIES_SAMPLES)
+
+def test_streamed_series_matches_response_model(monkeypatch):
+    """A streamed series is the same JSON document as a small one"""
+    client = TestClient(create_app())
+    body = {"start": "2024-01-01", "end": "2024-01-05T12:00", "step_days": 0.125, "bodies": ["moon", "Sun"],
+            "precision": "fast"}
+    small = client.post("/v1/api/ephemeris/series", json=body)
+    monkeypatch.setattr(ephemeris, "STREAM_THRESHOLD", 10)
+    monkeypatch.setattr(ephemeris, "STREAM_CHUNK", 7)
+    streamed = client.post("/v1/api/ephemeris/series", json=body)
+    assert small.status_code == streamed.status_code == 200
+
+    small, streamed = small.json(), json.loads(streamed.content)
+    assert small.pop("generated_at") and streamed.pop("generated_at")
+    assert streamed == small
+    assert small["count"] == 37 and list(small["bodies"]) == ["Moon", "Sun"]
+    assert small["request_params"]["end"] == "2024-01-05T12:00:00"
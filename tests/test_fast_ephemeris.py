@@ -0,0 +1,69 @@
+"""Tests for the fast analytical ephemeris (precision=fast)"""
+
+import numpy as np
+import pytest
+from api.constants.planets import Planet
+from api.services import calculation, fast_ephemeris
+from api.services.chart_record import FLAG_FAST_EPHEMERIS, ChartRecord
+
+# Maximum longitude error against Swiss Ephemeris over 1900-2100 (degrees)
+TOLERANCE = {
+    Planet.SUN: 0.05,
+    Planet.MOON: 0.05,
+    Planet.MERCURY: 0.05,
+    Planet.VENUS: 0.05,
+    Planet.MARS: 0.1,
+    Planet.JUPITER: 0.25,
+    Planet.SATURN: 0.5,
+    Planet.RAHU: 0.01,
+    Planet.KETU: 0.01,
+}
+
+CHART_ARGS = ("1988-12-01", "21:47:00", 13.0827, 80.2707, 5.5, "lahiri")
+
+def _angle(a, b):
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_positions_match_swiss_ephemeris():
+    """Longitudes, speeds and the ascendant agree with Swiss Ephemeris over 1900-2100"""
+    rng = np.random.default_rng(7)
+    julian_days = rng.uniform(2415020.5, 2488070.0, 200)
+    positions = fast_ephemeris.sidereal_positions(julian_days, "lahiri")
+
+    for index, julian_day in enumerate(julian_days):
+        calculation.set_ayanamsa("lahiri")
+        for planet, planet_id in calculation.PLANETS.items():
+            expected = calculation.calculate_planet_position(
+                calculation.swe.MEAN_NODE if planet == Planet.KETU else planet_id, julian_day
+            )
+            longitude = expected["longitude"] + (180.0 if planet == Planet.KETU else 0.0)
+            assert _angle(positions[planet]["longitude"][index], longitude) < TOLERANCE[planet], planet
+            assert abs(positions[planet]["speed"][index] - expected["speed"]) < 0.01, planet
+
+        latitude, longitude = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        expected_ascendant = calculation.get_ascendant_longitude(julian_day, latitude, longitude)
+        assert _angle(fast_ephemeris.ascendant(julian_day, latitude, longitude), expected_ascendant) < 0.02
+
+def test_vectorized_matches_scalar():
+    """A batch of Julian days gives the same positions as one call per day"""
+    julian_days = np.array([2415020.5, 2451545.0, 2488070.0])
+    batch = fast_ephemeris.sidereal_positions(julian_days, "raman")
+    for index, julian_day in enumerate(julian_days):
+        single = fast_ephemeris.sidereal_positions(julian_day, "raman")
+        for planet in Planet:
+            assert batch[planet]["longitude"][index] == pytest.approx(float(single[planet]["longitude"]))
+
+def test_fast_chart_record():
+    """precision=fast produces a flagged record that survives the binary format"""
+    record = calculation.calculate_chart_record(*CHART_ARGS, precision=calculation.PRECISION_FAST)
+    assert record["flags"] == FLAG_FAST_EPHEMERIS
+    assert set(record["planets"]) == {planet.value for planet in Planet}
+    assert _angle(record["planets"]["Ketu"]["longitude"], record["planets"]["Rahu"]["longitude"]) == pytest.approx(180.0)
+
+    decoded = ChartRecord.from_dict(record).to_dict()
+    assert decoded["flags"] & FLAG_FAST_EPHEMERIS
+    assert decoded["params"]["precision"] == "fast"
+
+    with pytest.raises(ValueError):
+        calculation.calculate_chart_record(*CHART_ARGS, precision="exact")
@@ -0,0 +1,67 @@
+"""Tests for chart fingerprinting and conditional request helpers"""
+
+import pytest
+from api.utils.http_cache import (
+    normalize_chart_params,
+    chart_fingerprint,
+    make_etag,
+    etag_matches,
+)
+
+def _params(**overrides):
+    params = {
+        "birth_date": "1990-01-01",
+        "birth_time": "12:00:00",
+        "latitude": 13.0836939,
+        "longitude": 80.270186,
+        "timezone_offset": 5.5,
+        "ayanamsa": "lahiri",
+    }
+    params.update(overrides)
+    return normalize_chart_params(**params)
+
+def test_fingerprint_is_deterministic():
+    """Same inputs always produce the same fingerprint"""
+    assert chart_fingerprint(_params()) == chart_fingerprint(_params())
+
+def test_fingerprint_ignores_float_noise_and_case():
+    """Geocoding float noise and ayanamsa casing do not change the fingerprint"""
+    noisy = _params(latitude=13.08369390000001, ayanamsa=" Lahiri ")
+    assert chart_fingerprint(noisy) == chart_fingerprint(_params())
+
+def test_fingerprint_changes_with_inputs_and_scope():
+    """Different inputs or scopes produce different fingerprints"""
+    base = chart_fingerprint(_params())
+    assert chart_fingerprint(_params(birth_time="12:00:01")) != base
+    assert chart_fingerprint(_params(ayanamsa="raman")) != base
+    assert chart_fingerprint(_params(), scope="planets") != base
+
+def test_etag_matching():
+    """If-None-Match uses weak comparison and supports lists and wildcards"""
+    etag = make_etag("abc123")
+    assert etag == 'W/"abc123"'
+    assert etag_matches('W/"abc123"', etag)
+    assert etag_matches('"abc123"', etag)
+    assert etag_matches('"other", W/"abc123"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+def test_only_get_requests_are_answered_not_modified():
+    """POST chart routes ignore If-None-Match and are not publicly cacheable"""
+    from unittest.mock import patch
+    from fastapi.testclient import TestClient
+    from api.main import create_app
+
+    chart = {"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai"}
+    with patch("api.models.request.resolve_place", return_value=(13.0827, 80.2707, 5.5)):
+        client = TestClient(create_app())
+        posted = client.post("/v1/api/horoscope/planets", json=chart)
+        assert posted.headers["cache-control"] == "private"
+        repeated = client.post("/v1/api/horoscope/planets", json=chart, headers={"If-None-Match": posted.headers["etag"]})
+        assert repeated.status_code == 200
+
+        url = f"/v1/api/charts/{posted.json()['chart_id']}"
+        stored = client.get(url)
+        assert "immutable" in stored.headers["cache-control"]
+        assert client.get(url, headers={"If-None-Match": stored.headers["etag"]}).status_code == 304
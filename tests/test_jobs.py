@@ -0,0 +1,120 @@
+"""Tests for batch jobs"""
+
+import gzip
+import json
+import time
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from api.main import create_app
+from api.services import jobs
+from api.services.jobs import COMPLETED, RUNNING, JobRunner, read_results, shard_name
+
+CHART = {"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai"}
+
+RECORDS = [
+    CHART,
+    dict(CHART, birth_time="06:45:00"),
+    dict(CHART, birth_date="not a date"),
+    dict(CHART, ayanamsa="raman"),
+    dict(CHART, birth_date="2001-11-30"),
+]
+
+CSV = "birth_date,birth_time,place,ayanamsa\n1990-01-01,12:30:00,Chennai,\n1985-06-15,06:45,\"Chennai, India\",raman\n"
+
+@pytest.fixture(autouse=True)
+def geocoding():
+    with patch("api.models.request.resolve_place", return_value=(13.0827, 80.2707, 5.5)):
+        yield
+
+def _wait(runner, job_id, state=COMPLETED, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = runner.status(job_id)
+        if status["status"] == state:
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} is {status['status']}")
+
+def _submit(runner, records):
+    job_id, path = runner.create("ndjson")
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return runner.submit(job_id, "ndjson")["job_id"]
+
+def test_job_writes_result_shards_in_input_order(tmp_path):
+    """Records are calculated in chunks; invalid records get error results"""
+    runner = JobRunner(str(tmp_path), workers=0, chunk_size=2)
+    try:
+        job_id = _submit(runner, RECORDS)
+        state = _wait(runner, job_id)
+    finally:
+        runner.shutdown()
+
+    assert state["total"] == 5 and sorted(state["shards"]) == ["0", "1", "2"]
+    results = [result for shard in range(3) for result in read_results(tmp_path / job_id / shard_name(shard))]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["status"] for result in results] == ["success", "success", "error", "success", "success"]
+    assert results[2]["error_code"] == "VALIDATION_ERROR"
+    # Same chart IDs as the chart endpoints give
+    assert results[0]["chart_id"] != results[1]["chart_id"] != results[3]["chart_id"]
+
+def test_interrupted_job_resumes_at_first_missing_shard(tmp_path):
+    """Recorded shards are kept, unrecorded ones are read back, missing ones calculated"""
+    runner = JobRunner(str(tmp_path), workers=0, chunk_size=2)
+    try:
+        job_id = _submit(runner, RECORDS)
+        expected = _wait(runner, job_id)["shards"]
+    finally:
+        runner.shutdown()
+    job_dir = tmp_path / job_id
+    first = (job_dir / shard_name(0)).stat().st_mtime_ns
+    expected_results = list(read_results(job_dir / shard_name(1)))
+
+    # Crashed after writing shard 2, before recording it, while shard 1 was calculated
+    state = json.loads((job_dir / "job.json").read_text())
+    state.update(status=RUNNING, shards={"0": state["shards"]["0"]})
+    (job_dir / "job.json").write_text(json.dumps(state))
+    (job_dir / shard_name(1)).unlink()
+
+    runner = JobRunner(str(tmp_path), workers=0, chunk_size=3)
+    with patch.object(jobs, "validate_entry", wraps=jobs.validate_entry) as validate:
+        runner.start()
+        try:
+            state = _wait(runner, job_id)
+        finally:
+            runner.shutdown()
+    assert state["shards"] == expected and state["chunk_size"] == 2
+    assert validate.call_count == 2
+    assert (job_dir / shard_name(0)).stat().st_mtime_ns == first
+    assert list(read_results(job_dir / shard_name(1))) == expected_results
+
+def test_job_endpoints(tmp_path):
+    """Upload, poll and download; malformed uploads are rejected"""
+    runner = JobRunner(str(tmp_path), workers=0, chunk_size=1)
+    client = TestClient(create_app())
+    with patch("api.routes.jobs.job_runner", runner):
+        try:
+            response = client.post("/v1/api/jobs", content=CSV, headers={"Content-Type": "text/csv"})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            assert response.headers["location"] == f"/v1/api/jobs/{job_id}"
+            _wait(runner, job_id)
+            status = client.get(f"/v1/api/jobs/{job_id}").json()
+        finally:
+            runner.shutdown()
+
+        assert (status["state"], status["total"], status["processed"], status["failed"]) == (COMPLETED, 2, 2, 0)
+        assert status["progress"] == 1.0
+        lines = [json.loads(line) for shard in status["results"] for line in client.get(shard).text.splitlines()]
+        assert [line["index"] for line in lines] == [0, 1]
+        assert lines[0]["chart_id"] == client.post("/v1/api/horoscope/planets", json=CHART).json()["chart_id"]
+        with gzip.open(tmp_path / job_id / shard_name(1), "rt") as f:
+            assert json.loads(f.read()) == lines[1]
+
+        assert client.get(f"/v1/api/jobs/{job_id}/results/5").status_code == 404
+        assert client.get("/v1/api/jobs/0123456789abcdef0123456789abcdef").status_code == 404
+        response = client.post("/v1/api/jobs", content='{"birth_date": "1990-01-01"}\n[1]\n',
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 422 and "Line 2" in response.json()["detail"]["error_message"]
+        assert client.post("/v1/api/jobs", content="{}", headers={"Content-Type": "application/json"}).status_code == 415
+        assert [path.name for path in tmp_path.iterdir()] == [job_id]
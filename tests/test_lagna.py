@@ -0,0 +1,69 @@
+"""Tests for the lagna (rising sign) tables"""
+
+from datetime import date, datetime
+import numpy as np
+import pytest
+from api.services import calculation, fast_ephemeris, lagna
+
+CHENNAI = (13.0827, 80.2707, 5.5)
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_rises_match_swiss_ephemeris_ascendant():
+    """At each rise time the Swiss Ephemeris ascendant is on the sign's first point"""
+    calculation.verify_ephemeris()
+    calculation.swe.set_sid_mode(calculation.swe.SIDM_LAHIRI)
+    midnight = 2460310.5  # 2024-01-01 0h UT
+    (times, signs), = lagna.sign_rises(np.array([midnight]), 51.5, -0.13)
+    assert sorted(signs.tolist()) == list(range(1, 13))
+    for time, sign in zip(times, signs):
+        _, ascmc = calculation.swe.houses_ex(float(time), 51.5, -0.13, b'P', calculation.swe.FLG_SIDEREAL)
+        # A hundredth of a degree is a few seconds of time
+        assert abs((ascmc[0] - (sign - 1) * 30.0 + 180.0) % 360.0 - 180.0) < 0.01
+
+def test_table_chains_through_the_day():
+    """Each day starts with the sign rising at midnight and the signs follow in order"""
+    table = lagna.lagna_table(date(2024, 1, 1), 3, *CHENNAI)
+    assert [day["date"] for day in table] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    for day in table:
+        spans = day["lagnas"]
+        assert len(spans) in (13, 14)
+        assert datetime.fromisoformat(spans[0]["starts_at"]) <= datetime.fromisoformat(day["date"] + "T00:00:00+05:30")
+        for current, following in zip(spans, spans[1:]):
+            assert current["ends_at"] == following["starts_at"]
+            assert following["number"] == current["number"] % 12 + 1
+        # Signs of short ascension rise quickly in the tropics
+        assert 80 < min(span["duration_minutes"] for span in spans) < max(span["duration_minutes"] for span in spans) < 150
+    assert table[0]["lagnas"][-1] == table[1]["lagnas"][0]
+
+    with pytest.raises(ValueError):
+        lagna.lagna_table(date(2024, 1, 1), lagna.MAX_LAGNA_DAYS + 1, *CHENNAI)
+    with pytest.raises(ValueError):
+        lagna.lagna_table(date(2024, 1, 1), 1, 69.65, 18.96, 1.0)
+
+def test_cache_per_location_cell_and_ayanamsa():
+    """Rise days are cached per cell, UT date and ayanamsa"""
+    cache = lagna.LagnaTableCache(max_entries=4)
+    days = [date(2024, 6, 21), date(2024, 6, 22)]
+    times, signs = cache.get_many(13.0827, 80.2707, days)
+    assert len(cache) == 2 and len(times) >= 24
+    assert np.all(np.diff(times) > 0)
+    assert np.all(fast_ephemeris.ascendant(times + 1e-4, 13.0827, 80.2707) // 30 + 1 == signs)
+
+    again, _ = cache.get_many(13.0829, 80.2711, days)
+    assert len(cache) == 2 and np.array_equal(again, times)
+
+    cache.get_many(13.0827, 80.2707, days, "raman")
+    assert len(cache) == 4
+
+def test_request_schema_bounds_the_range():
+    """The request model rejects the ranges the table would, and says so in its schema"""
+    from pydantic import ValidationError
+    from unittest.mock import patch
+    from api.models.request import LagnaTableRequest
+
+    assert LagnaTableRequest.model_json_schema()["properties"]["days"]["maximum"] == lagna.MAX_LAGNA_DAYS
+    with patch("api.models.request.resolve_place", return_value=CHENNAI):
+        with pytest.raises(ValidationError):
+            LagnaTableRequest(place="Chennai", start_date="01-01-2024", days=lagna.MAX_LAGNA_DAYS + 1)
+        request = LagnaTableRequest(place="Chennai", start_date="01-01-2024")
+    assert (request.start_date, request.days, request.timezone_offset) == ("2024-01-01", 1, 5.5)
@@ -0,0 +1,78 @@
+"""Tests for the queue-based, structured logging configuration"""
+
+import io
+import json
+import logging
+import os
+import threading
+import pytest
+from api.utils import logging_config
+from api.utils.logging_config import (
+    configure_logging,
+    diagnostics_enabled,
+    log_event,
+    parse_levels,
+    stop_logging,
+)
+
+def test_parse_levels_skips_invalid_entries():
+    """Per-logger levels come from a comma-separated list"""
+    levels = parse_levels("jai-api.calculation=debug, jai-api.request=WARNING,bad,x=NOPE")
+    assert levels == {"jai-api.calculation": logging.DEBUG, "jai-api.request": logging.WARNING}
+
+def test_records_are_written_by_the_listener_thread():
+    """Events are formatted and written off the calling thread, as JSON if asked"""
+    stream = io.StringIO()
+    writers = []
+
+    class RecordingStream(io.StringIO):
+        def write(self, text):
+            writers.append(threading.current_thread().name)
+            return stream.write(text)
+
+    configure_logging(level="INFO", levels="jai-api.test-logging=DEBUG", log_format="json", stream=RecordingStream())
+    try:
+        logger = logging.getLogger("jai-api.test-logging")
+        log_event(logger, "planet_position", planet="Sun", house=5)
+        logging.getLogger("jai-api.test-quiet").debug("not emitted %s", "at all")
+    finally:
+        stop_logging()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["message"] == "planet_position"
+    assert lines[0]["planet"] == "Sun" and lines[0]["house"] == 5
+    assert threading.main_thread().name not in writers
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_children_write_their_records(tmp_path):
+    """A child forked after configuration (gunicorn preload_app) has a working writer"""
+    path = tmp_path / "log.jsonl"
+    with open(path, "a", buffering=1) as stream:
+        configure_logging(level="INFO", log_format="json", stream=stream)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    logging.getLogger("jai-api.test-fork").info("from the child")
+                    stop_logging()
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+            logging.getLogger("jai-api.test-fork").info("from the parent")
+        finally:
+            stop_logging()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert sorted(line["message"] for line in lines) == ["from the child", "from the parent"]
+
+def test_diagnostics_are_sampled_debug_events():
+    """Verbose diagnostics need debug logging and pass the sample rate"""
+    logger = logging.getLogger("jai-api.test-diagnostics")
+    logger.setLevel(logging.INFO)
+    assert not diagnostics_enabled(logger, sample_rate=1.0)
+
+    logger.setLevel(logging.DEBUG)
+    assert diagnostics_enabled(logger, sample_rate=1.0)
+    assert not diagnostics_enabled(logger, sample_rate=0.0)
+    assert logging_config.DIAGNOSTICS_SAMPLE_RATE >= 0
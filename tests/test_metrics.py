@@ -0,0 +1,107 @@
+"""Tests for the request metrics and the Prometheus endpoint"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.utils.metrics import (
+    MetricsMiddleware,
+    Registry,
+    STAGE_DURATION,
+    SWE_CALLS_PER_REQUEST,
+    instrument_routes,
+    Span,
+    swe_call,
+)
+
+def test_histogram_renders_cumulative_buckets():
+    """Observations land in cumulative buckets with sum and count"""
+    registry = Registry()
+    histogram = registry.histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "geocode")
+
+    text = registry.render()
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{stage="geocode",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="geocode",le="1"} 2' in text
+    assert 'test_seconds_bucket{stage="geocode",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="geocode"} 3' in text
+    assert histogram.total("geocode") == 5.55
+
+def test_registry_runs_collectors_and_rejects_duplicates():
+    """Collectors update gauges at scrape time; metric names are unique"""
+    registry = Registry()
+    gauge = registry.gauge("test_queue", "Queued", ("lane",))
+    registry.register_collector(lambda: gauge.set(3, "heavy"))
+    assert 'test_queue{lane="heavy"} 3' in registry.render()
+
+    with pytest.raises(ValueError):
+        registry.counter("test_queue", "Again")
+
+def test_span_and_swe_call_record_stages():
+    """Spans feed the stage histogram, ephemeris calls are counted per request"""
+    before = STAGE_DURATION.count("unit_test_stage")
+    with Span("unit_test_stage"):
+        pass
+    assert STAGE_DURATION.count("unit_test_stage") == before + 1
+
+    app = FastAPI()
+
+    @app.get("/v1/api/swe")
+    async def swe():
+        for _ in range(3):
+            swe_call("calc_ut", lambda jd: jd, 2451545.0)
+        return {"ok": True}
+
+    instrument_routes(app.routes)
+    app.add_middleware(MetricsMiddleware)
+
+    before = SWE_CALLS_PER_REQUEST.total("/v1/api/swe")
+    handlers = STAGE_DURATION.count("handler")
+    response = TestClient(app).get("/v1/api/swe")
+    assert response.status_code == 200
+    assert SWE_CALLS_PER_REQUEST.total("/v1/api/swe") == before + 3
+    assert STAGE_DURATION.count("handler") == handlers + 1
+
+def test_metrics_endpoint():
+    """The endpoint serves the Prometheus text format"""
+    from api.routes.metrics import router
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).get("/v1/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE jai_request_duration_seconds histogram" in response.text
+    assert "jai_admission_active_requests" in response.text
+    assert "# TYPE jai_admission_requests_total counter" in response.text
+
+def test_metrics_endpoint_requires_the_admin_token_when_set(monkeypatch):
+    """With JAI_ADMIN_TOKEN set, scrapers must send it"""
+    from api.routes import metrics
+    from api.routes.metrics import router
+
+    monkeypatch.setattr(metrics, "ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    assert client.get("/v1/api/metrics").status_code == 401
+    assert client.get("/v1/api/metrics", headers={"X-JAI-Admin-Token": "wrong"}).status_code == 401
+    assert client.get("/v1/api/metrics", headers={"X-JAI-Admin-Token": "secret"}).status_code == 200
+    assert client.get("/v1/api/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+def test_memoized_geocode_lookups_count_as_cache_hits():
+    """Lookups answered by the lru memo are counted like file cache hits"""
+    from api.models import request as request_module
+    from api.utils.metrics import CACHE_EVENTS, METRICS_ENABLED
+
+    if not METRICS_ENABLED:
+        pytest.skip("metrics disabled")
+    request_module.GEOCODE_CACHE["metrics test place"] = {"lat": 1.0, "lon": 2.0}
+    request_module.geocode_place.cache_clear()
+    hits, misses = CACHE_EVENTS.value("geocode", "hit"), CACHE_EVENTS.value("geocode", "miss")
+    for _ in range(3):
+        assert request_module.geocode_place("Metrics Test Place")["lat"] == 1.0
+    assert CACHE_EVENTS.value("geocode", "hit") == hits + 3
+    assert CACHE_EVENTS.value("geocode", "miss") == misses
+    assert request_module.geocode_place.cache_info().hits == 2
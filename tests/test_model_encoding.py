@@ -0,0 +1,65 @@
+"""Tests for MessagePack and CBOR responses"""
+
+from datetime import date
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from api.main import create_app
+from api.constants.planets import Planet
+from api.models.response import DashaPeriod
+from api.utils.model_encoding import CBOR_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encode_cbor, encode_msgpack
+
+msgpack = pytest.importorskip("msgpack")
+cbor2 = pytest.importorskip("cbor2")
+
+DECODERS = {MSGPACK_MEDIA_TYPE: msgpack.unpackb, CBOR_MEDIA_TYPE: cbor2.loads}
+
+CHART = {"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai"}
+
+def _content(body):
+    """Response content without the generation time"""
+    body.pop("generated_at", None)
+    return body
+
+@pytest.fixture(scope="module")
+def client():
+    with patch("api.models.request.resolve_place", return_value=(13.0827, 80.2707, 5.5)):
+        yield TestClient(create_app())
+
+def test_models_encode_like_json():
+    """Nested models, enums and dates encode to the values of their JSON form"""
+    period = DashaPeriod(planet="Sun", start_date="2024-01-01", end_date="2030-01-01", years=6.0)
+    content = {"periods": [period], "lord": Planet.SUN, "day": date(2024, 1, 1)}
+    expected = {"periods": [period.model_dump(mode="json")], "lord": "Sun", "day": "2024-01-01"}
+    assert msgpack.unpackb(encode_msgpack(content)) == expected
+    # CBOR has a standard tag for dates
+    assert cbor2.loads(encode_cbor(content)) == dict(expected, day=date(2024, 1, 1))
+
+@pytest.mark.parametrize("media_type", [MSGPACK_MEDIA_TYPE, CBOR_MEDIA_TYPE])
+def test_endpoints_negotiate_binary_formats(client, media_type):
+    """Chart endpoints answer in the accepted format with the same content as JSON"""
+    headers = {"Accept": media_type}
+    planets = client.post("/v1/api/horoscope/planets", json=CHART)
+    binary = client.post("/v1/api/horoscope/planets", json=CHART, headers=headers)
+    assert binary.headers["content-type"] == media_type and binary.headers["vary"] == "Accept"
+    assert _content(DECODERS[media_type](binary.content)) == _content(planets.json())
+
+    url = f"/v1/api/charts/{planets.json()['chart_id']}/dasha?levels=2"
+    dasha = client.get(url)
+    binary = client.get(url, headers=headers)
+    assert _content(DECODERS[media_type](binary.content)) == _content(dasha.json())
+    # Every representation has its own validator
+    assert binary.headers["etag"] != dasha.headers["etag"]
+    assert client.get(url, headers={**headers, "If-None-Match": binary.headers["etag"]}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": binary.headers["etag"]}).status_code == 200
+
+    body = {"place": "Chennai", "start_date": "2024-01-01", "days": 2}
+    panchanga = client.post("/v1/api/panchanga", json=body)
+    binary = client.post("/v1/api/panchanga", json=body, headers=headers)
+    assert _content(DECODERS[media_type](binary.content)) == _content(panchanga.json())
+
+def test_unaccepted_formats_fall_back_to_json(client):
+    """Endpoints without an explicit negotiation keep answering in JSON"""
+    response = client.post("/v1/api/horoscope/planets", json=CHART, headers={"Accept": "text/html"})
+    assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+    assert response.headers["vary"] == "Accept"
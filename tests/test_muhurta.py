@@ -0,0 +1,93 @@
+"""Tests for the muhurta search"""
+
+from datetime import date
+import numpy as np
+import pytest
+from api.services import fast_ephemeris, lagna, muhurta, panchanga
+
+CHENNAI = (13.0827, 80.2707, 5.5)
+
+def test_interval_operations():
+    """Interval sets merge, intersect and subtract like sets of points"""
+    merged = muhurta._merge(np.array([[5.0, 6.0], [1.0, 3.0], [2.0, 4.0], [4.0, 4.5], [7.0, 7.0]]))
+    assert merged.tolist() == [[1.0, 4.5], [5.0, 6.0]]
+
+    other = np.array([[0.0, 2.0], [3.0, 5.5]])
+    assert muhurta._intersect(merged, other).tolist() == [[1.0, 2.0], [3.0, 4.5], [5.0, 5.5]]
+    assert muhurta._subtract(merged, other).tolist() == [[2.0, 3.0], [5.5, 6.0]]
+    assert muhurta._intersect(merged, np.empty((0, 2))).shape == (0, 2)
+
+def test_constraint_values():
+    """Names, numbers, pakshas and sign qualities resolve to element numbers"""
+    assert muhurta.parse_constraint("nakshatra", ["rohini", 13]) == ("nakshatra", {4, 13})
+    assert muhurta.parse_constraint("tithi", ["Ekadashi"]) == ("tithi", {11, 26})
+    assert muhurta.parse_constraint("tithi", ["Krishna Ekadashi", "Amavasya"]) == ("tithi", {26, 30})
+    assert muhurta.parse_constraint("lagna", ["fixed"]) == ("lagna", {2, 5, 8, 11})
+    assert muhurta.parse_constraint("lagna", ["Mesha", "Libra", "12"]) == ("lagna", {1, 7, 12})
+    assert muhurta.parse_constraint("weekday", ["Thursday", "Shukravara"]) == ("weekday", {5, 6})
+    assert muhurta.parse_constraint("avoid", ["Rahu Kaal"]) == ("avoid", {"rahu_kaal"})
+    assert muhurta.parse_constraint("daylight") == ("daylight", set())
+
+    for kind, values in [("planet", ["Sun"]), ("nakshatra", []), ("nakshatra", [28]), ("lagna", ["fiery"])]:
+        with pytest.raises(ValueError):
+            muhurta.parse_constraint(kind, values)
+
+def test_day_periods():
+    """Rahu Kaal is the 2nd eighth of Monday's daytime and the 8th of Sunday's"""
+    rises, sets = np.array([0.25, 10.25]), np.array([0.75, 10.75])
+    periods = muhurta.day_periods(rises, sets, np.array([1, 0]), "rahu_kaal")
+    assert np.allclose(periods, [[0.3125, 0.375], [10.6875, 10.75]])
+    # No daytime (polar night): no period
+    assert len(muhurta.day_periods(np.array([np.nan]), np.array([np.nan]), np.array([3]), "yamaganda")) == 0
+
+def test_search_matches_minute_sampling():
+    """The windows are exactly the minutes that satisfy every constraint"""
+    constraints = [("nakshatra", ["Hasta", "Chitra"]), ("avoid", ["rahu_kaal"]), ("lagna", ["fixed"]), ("daylight", None)]
+    windows = muhurta.search_muhurta(date(2024, 1, 1), 7, *CHENNAI, constraints, precision="fast")
+    assert windows and all(window["nakshatra"]["name"] in ("Hasta", "Chitra") for window in windows)
+    assert all(window["lagna"]["number"] in (2, 5, 8, 11) for window in windows)
+
+    # Brute force over the same week
+    start = panchanga.midnight_julian_day(date(2024, 1, 1)) - CHENNAI[2] / 24
+    minutes = start + (np.arange(7 * 1440) + 0.5) / 1440
+    days = [date(2024, 1, day) for day in range(1, 8)]
+    rises, sets = panchanga.sunrise_cache.get_many(CHENNAI[0], CHENNAI[1], days)
+    day = np.searchsorted(rises, minutes) - 1
+    rahu = muhurta.day_periods(rises, sets, np.array([(d.weekday() + 1) % 7 for d in days]), "rahu_kaal")
+    ok = (
+        np.isin(panchanga.element_numbers(minutes)["nakshatra"], [13, 14])
+        & np.isin(fast_ephemeris.ascendant(minutes, CHENNAI[0], CHENNAI[1]) // 30 + 1, [2, 5, 8, 11])
+        & (day >= 0) & (minutes < sets[np.maximum(day, 0)])
+        & ~((minutes[:, None] > rahu[:, 0]) & (minutes[:, None] < rahu[:, 1])).any(axis=1)
+    )
+    total = sum(window["duration_minutes"] for window in windows)
+    assert abs(total - ok.sum()) <= 2 * len(windows)
+
+def test_lagna_intervals_follow_the_ascendant():
+    """Sign intervals tile the windows and hold the rising sign inside them"""
+    start = panchanga.midnight_julian_day(date(2024, 3, 1))
+    windows = np.array([[start, start + 1.0], [start + 2.3, start + 2.4]])
+    intervals = lagna.sign_intervals(windows, 28.61, 77.21)
+    assert 12 <= len(intervals) <= 16
+    assert intervals[0][0] == start and intervals[-1][1] == start + 2.4
+
+    for first, last, sign in intervals:
+        inside = np.linspace(first, last, 7)[1:-1]
+        assert np.all(fast_ephemeris.ascendant(inside, 28.61, 77.21) // 30 + 1 == sign)
+        # The boundaries are where the sign changes, to within a second
+        if first not in windows[:, 0]:
+            assert fast_ephemeris.ascendant(first + 1e-5, 28.61, 77.21) // 30 + 1 == sign
+
+def test_request_schema_bounds_the_search():
+    """The request model rejects the ranges the search would, and says so in its schema"""
+    from pydantic import ValidationError
+    from unittest.mock import patch
+    from api.models.request import MuhurtaRequest
+
+    assert MuhurtaRequest.model_json_schema()["properties"]["days"]["maximum"] == muhurta.MAX_MUHURTA_DAYS
+    body = {"place": "Chennai", "start_date": "01-01-2024", "constraints": [{"type": "daylight"}]}
+    with patch("api.models.request.resolve_place", return_value=CHENNAI):
+        with pytest.raises(ValidationError):
+            MuhurtaRequest(**body, days=muhurta.MAX_MUHURTA_DAYS + 1)
+        request = MuhurtaRequest(**body, precision="FAST")
+    assert (request.start_date, request.precision, request.timezone_offset) == ("2024-01-01", "fast", 5.5)
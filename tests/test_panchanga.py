@@ -0,0 +1,90 @@
+"""Tests for the panchanga engine"""
+
+from datetime import date, datetime
+import numpy as np
+import pytest
+from api.constants.panchanga import karana_name, paksha_name, tithi_name
+from api.services import calculation, panchanga
+
+CHENNAI = (13.0827, 80.2707, 5.5)
+
+# 2024-01-01 to 2024-03-01 (UT)
+RANGE = (2460310.5, 2460371.5)
+
+def _angle(a, b):
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+def test_element_names():
+    """Tithis, pakshas and the fixed and movable karanas are named correctly"""
+    assert tithi_name(1) == "Pratipada" and tithi_name(15) == "Purnima" and tithi_name(30) == "Amavasya"
+    assert tithi_name(16) == "Pratipada" and paksha_name(15) == "Shukla" and paksha_name(16) == "Krishna"
+    assert [karana_name(n) for n in (1, 2, 8, 9, 57, 58, 59, 60)] == [
+        "Kimstughna", "Bava", "Vishti", "Bava", "Vishti", "Shakuni", "Chatushpada", "Naga"
+    ]
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_transitions_match_swiss_ephemeris():
+    """Standard boundaries sit on the element edges; fast ones within a few minutes"""
+    calculation.verify_ephemeris()
+    standard = panchanga.transitions(*RANGE, precision="standard")
+    fast = panchanga.transitions(*RANGE, precision="fast")
+
+    calculation.set_ayanamsa("lahiri")
+    times, numbers = standard["tithi"]
+    assert 58 <= len(times) <= 64
+    for time, number in zip(times[:10], numbers[:10]):
+        sun = calculation.calculate_planet_position(calculation.swe.SUN, float(time))
+        moon = calculation.calculate_planet_position(calculation.swe.MOON, float(time))
+        assert _angle(moon["longitude"] - sun["longitude"], (number - 1) * 12.0) < 0.001
+
+    for name, (times, numbers) in standard.items():
+        assert np.array_equal(fast[name][1], numbers), name
+        assert np.max(np.abs(fast[name][0] - times)) * 1440 < 5, name
+
+def test_days_chain_from_sunrise_to_sunrise():
+    """Every day starts with the elements in force at sunrise and they follow each other"""
+    days = panchanga.generate_panchanga(date(2024, 1, 1), 10, *CHENNAI, precision="fast")
+    assert [day["date"] for day in days][:2] == ["2024-01-01", "2024-01-02"]
+    assert days[0]["vara"]["name"] == "Somavara"
+
+    counts = {"tithi": 30, "karana": 60, "nakshatra": 27, "yoga": 27}
+    for day in days:
+        sunrise = datetime.fromisoformat(day["sunrise"])
+        assert sunrise.strftime("%H") == "06"
+        assert datetime.fromisoformat(day["sunset"]).strftime("%H") == "17"
+        for name, count in counts.items():
+            elements = day[name]
+            assert datetime.fromisoformat(elements[0]["starts_at"]) <= sunrise < datetime.fromisoformat(elements[0]["ends_at"])
+            for current, following in zip(elements, elements[1:]):
+                assert current["ends_at"] == following["starts_at"]
+                assert following["number"] == current["number"] % count + 1
+
+    with pytest.raises(ValueError):
+        panchanga.generate_panchanga(date(2024, 1, 1), panchanga.MAX_PANCHANGA_DAYS + 1, *CHENNAI)
+
+def test_sunrise_cache_per_location_cell():
+    """Sunrises are cached per cell and date; polar nights have none"""
+    cache = panchanga.SunriseCache(max_entries=3)
+    days = [date(2024, 6, 21), date(2024, 6, 22)]
+    rises, sets = cache.get_many(13.0827, 80.2707, days)
+    assert len(cache) == 2
+    assert np.all(sets - rises > 0.5)
+
+    again, _ = cache.get_many(13.0829, 80.2711, days)
+    assert len(cache) == 2 and np.array_equal(again, rises)
+
+    polar, _ = cache.get_many(-78.0, 166.0, days)
+    assert len(cache) == 3 and np.all(np.isnan(polar))
+
+def test_request_schema_bounds_the_range():
+    """The request model rejects the ranges the engine would, and says so in its schema"""
+    from pydantic import ValidationError
+    from unittest.mock import patch
+    from api.models.request import PanchangaRequest
+
+    assert PanchangaRequest.model_json_schema()["properties"]["days"]["maximum"] == panchanga.MAX_PANCHANGA_DAYS
+    with patch("api.models.request.resolve_place", return_value=CHENNAI):
+        with pytest.raises(ValidationError):
+            PanchangaRequest(place="Chennai", start_date="2024-01-01", days=panchanga.MAX_PANCHANGA_DAYS + 1)
+        request = PanchangaRequest(place="Chennai", start_date="01-01-2024", precision="FAST")
+    assert (request.start_date, request.precision, request.latitude) == ("2024-01-01", "fast", CHENNAI[0])
@@ -0,0 +1,57 @@
+"""Tests for the ephemeris precision modes and their fallback"""
+
+import pytest
+from api.services import calculation
+from api.services.chart_record import FLAG_MOSHIER_EPHEMERIS, ChartRecord
+from benchmarks.precision import corpus, evaluate
+
+CHART_ARGS = ("1988-12-01", "21:47:00", 13.0827, 80.2707, 5.5, "lahiri")
+
+# Julian days in 1988 and mid-3000
+JD_1988 = 2447497.0
+JD_3000 = 2817000.0
+
+def test_ephemeris_file_names():
+    """Files cover 600-year blocks, with an m prefix before year 0"""
+    assert calculation.ephemeris_file_names(JD_1988) == ("sepl_18.se1", "semo_18.se1")
+    assert calculation.ephemeris_file_names(JD_3000) == ("sepl_30.se1", "semo_30.se1")
+    assert calculation.ephemeris_file_names(1611470.0) == ("seplm06.se1", "semom06.se1")
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_standard_falls_back_to_moshier(monkeypatch):
+    """Without files for the date, standard uses Moshier and file precision fails"""
+    calculation.verify_ephemeris()
+    monkeypatch.setattr(calculation, "EPHEMERIS_FILES", frozenset({"sepl_18.se1", "semo_18.se1"}))
+    assert calculation.resolve_precision("standard", JD_1988) == "file"
+    before = calculation.EPHEMERIS_FALLBACKS.value()
+    assert calculation.resolve_precision("standard", JD_3000) == "moshier"
+    assert calculation.EPHEMERIS_FALLBACKS.value() == before + 1
+
+    with pytest.raises(calculation.EphemerisUnavailableError):
+        calculation.resolve_precision("file", JD_3000)
+    with pytest.raises(ValueError):
+        calculation.resolve_precision("exact", JD_1988)
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_moshier_chart_record():
+    """Moshier charts are flagged and agree closely with the file ephemeris"""
+    calculation.verify_ephemeris()
+    record = calculation.calculate_chart_record(*CHART_ARGS, precision="moshier")
+    assert record["flags"] & FLAG_MOSHIER_EPHEMERIS
+    assert ChartRecord.from_dict(record).to_dict()["params"]["precision"] == "moshier"
+
+    if calculation.EPHEMERIS_FILES:
+        reference = calculation.calculate_chart_record(*CHART_ARGS, precision="file")
+        assert not reference["flags"] & FLAG_MOSHIER_EPHEMERIS
+        for name, position in reference["planets"].items():
+            assert record["planets"][name]["longitude"] == pytest.approx(position["longitude"], abs=0.01)
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_precision_tradeoff_report():
+    """The tradeoff benchmark reports latency and accuracy per mode"""
+    document = evaluate(corpus(5), ["moshier", "fast"])
+    assert document["charts"] == 5
+    assert set(document["modes"]) == {"moshier", "fast"}
+    fast = document["modes"]["fast"]
+    assert fast["median_us"] > 0
+    assert fast["max_error_deg"]["Moon"] < 0.1
@@ -0,0 +1,80 @@
+"""Tests for on-demand and sampled request profiling"""
+
+import pstats
+import json
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.utils import profiling
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/api/work")
+    async def work():
+        total = 0
+        for i in range(20000):
+            total += i * i
+        time.sleep(0.02)
+        return {"total": total}
+
+    app.add_middleware(profiling.ProfilingMiddleware)
+    return app
+
+def test_profiling_requires_the_admin_token(tmp_path, monkeypatch):
+    """Flagged requests without the right token are served unprofiled"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    client = TestClient(_app())
+
+    response = client.get("/v1/api/work", headers={"X-JAI-Profile": "1", "X-JAI-Admin-Token": "wrong"})
+    assert response.status_code == 200
+    assert "x-jai-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+    # Without a configured token profiling is disabled altogether
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "")
+    response = client.get("/v1/api/work", headers={"X-JAI-Profile": "1", "X-JAI-Admin-Token": ""})
+    assert "x-jai-profile-id" not in response.headers
+
+def test_deterministic_profile_is_stored_as_pstats(tmp_path, monkeypatch):
+    """X-JAI-Profile: 1 stores a cProfile run of the request"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+
+    response = TestClient(_app()).get("/v1/api/work", headers={"X-JAI-Profile": "1", "X-JAI-Admin-Token": "secret"})
+    assert response.status_code == 200
+    path = tmp_path / (response.headers["x-jai-profile-id"] + ".pstats")
+    stats = pstats.Stats(str(path))
+    assert any(function == "work" for _, _, function in stats.stats)
+
+def test_sampled_profile_is_stored_as_speedscope(tmp_path, monkeypatch):
+    """?jai_profile=sample stores a speedscope file"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+
+    response = TestClient(_app()).get("/v1/api/work?jai_profile=sample", headers={"X-JAI-Admin-Token": "secret"})
+    assert response.status_code == 200
+    path = tmp_path / (response.headers["x-jai-profile-id"] + ".speedscope.json")
+    document = json.loads(path.read_text())
+    profile = document["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"]) > 0
+    assert all(index < len(document["shared"]["frames"]) for stack in profile["samples"] for index in stack)
+
+def test_periodic_sampler_writes_and_prunes(tmp_path, monkeypatch):
+    """Global sampling writes one profile per period, keeping the newest files"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_KEEP", 2)
+
+    sampler = profiling.PeriodicSampler(period=0.05, interval_ms=1)
+    sampler.start()
+    deadline = time.time() + 2
+    while len(list(tmp_path.iterdir())) < 2 and time.time() < deadline:
+        sum(i for i in range(10000))
+    time.sleep(0.1)
+    sampler.stop()
+
+    files = list(tmp_path.iterdir())
+    assert 1 <= len(files) <= 2
+    assert all(path.name.endswith(".speedscope.json") for path in files)
@@ -0,0 +1,80 @@
+"""Tests for the deferred startup work and the warm-up"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import pytest
+from api.models import request
+from api.services import warmup
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+def test_import_defers_heavy_work(tmp_path):
+    """Importing the application neither loads NumPy/requests nor touches the cache directory"""
+    script = (
+        "import json, sys\n"
+        "from api.main import create_app\n"
+        "create_app()\n"
+        "import constants\n"
+        "print(json.dumps({'modules': [m for m in ('numpy', 'requests') if m in sys.modules],"
+        " 'constants': sorted(constants._CONSTANTS_CACHE)}))\n"
+    )
+    environment = {**os.environ, "PYTHONPATH": str(REPO_ROOT), "JAI_CALC_WORKERS": "0",
+                   "CHART_STORE_DIR": str(tmp_path / "charts")}
+    completed = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=environment,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert result["modules"] == []
+    assert "divisional_mappings" not in result["constants"]
+    assert not (tmp_path / "cache").exists()
+
+def test_cache_files_load_once_without_overwriting(tmp_path, monkeypatch):
+    """Cache files are merged on first use; entries already in memory win"""
+    geocode_file = tmp_path / "geocode_cache.json"
+    geocode_file.write_text(json.dumps({"chennai, india": {"latitude": 1.0}, "delhi, india": {"latitude": 2.0}}))
+    monkeypatch.setattr(request, "GEO_CACHE_FILE", geocode_file)
+    monkeypatch.setattr(request, "TZ_CACHE_FILE", tmp_path / "missing.json")
+    monkeypatch.setattr(request, "GEOCODE_CACHE", {"chennai, india": {"latitude": 13.0827}})
+    monkeypatch.setattr(request, "TIMEZONE_CACHE", {})
+    monkeypatch.setattr(request, "_caches_loaded", False)
+
+    request.load_caches()
+    assert request.GEOCODE_CACHE["chennai, india"]["latitude"] == 13.0827
+    assert request.GEOCODE_CACHE["delhi, india"]["latitude"] == 2.0
+
+    geocode_file.write_text(json.dumps({"mumbai, india": {"latitude": 3.0}}))
+    request.load_caches()
+    assert "mumbai, india" not in request.GEOCODE_CACHE
+
+def test_warm_up_reports_progress(monkeypatch):
+    """The warm-up records its duration, and failures don't escape it"""
+    state = warmup.WarmupState()
+    warmup.warm_up(state)
+    assert state.finished and state.wait(0)
+    assert state.error is None
+    assert state.as_dict()["duration_ms"] >= 0
+
+    monkeypatch.setattr(warmup, "WARMUP_CHART", ("not-a-date",) + warmup.WARMUP_CHART[1:])
+    failed = warmup.WarmupState()
+    warmup.warm_up(failed)
+    assert failed.finished and failed.error
+
+def test_charts_in_other_threads_use_the_ephemeris_files():
+    """Swiss Ephemeris settings are per thread; the path is set in each calculating thread"""
+    from api.services import calculation
+
+    if calculation.USING_MOCK or not calculation.EPHEMERIS_FILES:
+        pytest.skip("needs Swiss Ephemeris data files")
+    expected = calculation.calculate_chart_record(*warmup.WARMUP_CHART, precision=calculation.PRECISION_FILE)
+    records = []
+    thread = threading.Thread(target=lambda: records.append(
+        calculation.calculate_chart_record(*warmup.WARMUP_CHART, precision=calculation.PRECISION_FILE)
+    ))
+    thread.start()
+    thread.join()
+    # Without the path the thread would silently get (slightly different) Moshier positions
+    assert records == [expected]
@@ -0,0 +1,107 @@
+"""Tests for the dasha, transit event and batch generators and NDJSON streaming"""
+
+import json
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from api.main import create_app
+from api.services import calculation
+from api.utils import streaming
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+CHART = {"birth_date": "1990-01-01", "birth_time": "12:30:00", "place": "Chennai"}
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+@pytest.fixture(scope="module")
+def client():
+    with patch("api.models.request.resolve_place", return_value=(13.0827, 80.2707, 5.5)):
+        yield TestClient(create_app())
+
+def test_dasha_tree_subdivides_each_period():
+    """Depth-first levels agree with antardasha_periods and tile their parents"""
+    mahadasha = calculation.dasha_periods_from_moon(45.6, datetime(1990, 1, 1, 12, 30))
+    tree = list(calculation.iter_dasha_periods(mahadasha, 3))
+    assert [period for level, period in tree if level == 2] == calculation.antardasha_periods(mahadasha)
+
+    parent = None
+    children = []
+    for level, period in tree + [(2, None)]:
+        if level == 3:
+            assert (period.maha_planet, period.antar_planet) == (parent.maha_planet, parent.planet)
+            children.append(period)
+            continue
+        if children:
+            assert children[0].start_date == parent.start_date and children[-1].end_date == parent.end_date
+            assert all(a.end_date == b.start_date for a, b in zip(children, children[1:]))
+        parent, children = period, []
+    # The first mahadasha is a balance at birth, so its first sub-periods are dropped
+    assert sum(level == 3 for level, _ in tree) < 729
+
+def test_ndjson_chunks_flush_first_line_and_report_errors():
+    """The first record is sent alone; a failing generator ends with an error line"""
+    def records():
+        yield {"n": 0}
+        yield {"n": 1}
+        raise ValueError("boom")
+
+    chunks = list(streaming.ndjson_chunks(records()))
+    assert chunks[0] == b'{"n":0}\n'
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert lines[1] == {"n": 1}
+    assert lines[-1]["status"] == "error" and lines[-1]["error_message"] == "boom"
+
+@pytest.mark.skipif(calculation.USING_MOCK, reason="needs Swiss Ephemeris")
+def test_transit_events_match_ephemeris():
+    """Ingresses land on sign boundaries in time order; stations alternate"""
+    from api.services.transit_events import transit_events
+
+    record = calculation.calculate_chart_record("1990-01-01", "12:30:00", 13.0827, 80.2707, 5.5, "lahiri")
+    start = calculation.get_julian_day("2024-01-01", "00:00:00", 5.5)
+    events = list(transit_events(record, start, start + 366))
+    assert [event.julian_day for event in events] == sorted(event.julian_day for event in events)
+    assert sum(event.planet == "Surya" and event.event == "ingress" for event in events) == 12
+
+    planet_ids = {name: calculation.PLANETS[planet] for planet, name in calculation.PLANET_NAMES.items()}
+    calculation.set_ayanamsa("lahiri")
+    for event in events:
+        if event.event != "ingress" or event.planet in ("Rahu", "Ketu"):
+            continue
+        # A few minutes after the ingress the planet is in the new sign
+        later = calculation.calculate_planet_position(planet_ids[event.planet], event.julian_day + 0.003)
+        assert int(later["longitude"] // 30) + 1 == event.sign_id, event
+    mercury = [event.event for event in events if event.planet == "Budha" and event.event != "ingress"]
+    assert mercury and all(a != b for a, b in zip(mercury, mercury[1:]))
+
+    with pytest.raises(ValueError):
+        transit_events(record, start, start + 40000)
+
+def test_ndjson_endpoints_stream_the_json_content(client):
+    """Dasha, transit event and batch endpoints stream what they return as JSON"""
+    chart_id = client.post("/v1/api/horoscope/planets", json=CHART).json()["chart_id"]
+
+    url = f"/v1/api/charts/{chart_id}/dasha?levels=3"
+    dasha = client.get(url).json()
+    stream = client.get(url, headers=NDJSON)
+    assert stream.headers["content-type"] == "application/x-ndjson" and stream.headers["vary"] == "Accept"
+    lines = _lines(stream)
+    assert [line for line in lines if line["level"] == 1] == [dict(period, level=1) for period in dasha["mahadasha"]]
+    assert [line for line in lines if line["level"] == 3] == [dict(period, level=3) for period in dasha["pratyantardasha"]]
+    assert stream.headers["etag"] != client.get(url).headers["etag"]
+    assert client.get(url, headers={**NDJSON, "If-None-Match": stream.headers["etag"]}).status_code == 304
+
+    url = f"/v1/api/charts/{chart_id}/transits/events?start=2024-01-01&end=2024-02-29&bodies=Sun,Mercury&precision=fast"
+    events = client.get(url).json()["events"]
+    assert events and _lines(client.get(url, headers=NDJSON)) == events
+    assert client.get(url.replace("Mercury", "Pluto")).status_code == 422
+
+    charts = [CHART, dict(CHART, birth_date="not a date"), dict(CHART, birth_time="06:45:00")]
+    results = _lines(client.post("/v1/api/charts/batch", json={"charts": charts}, headers=NDJSON))
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["status"] for result in results] == ["success", "error", "success"]
+    assert results[0]["chart_id"] == chart_id and results[1]["error_code"] == "VALIDATION_ERROR"
+    batch = client.post("/v1/api/charts/batch", json={"charts": charts}).json()
+    assert batch["count"] == 3 and batch["results"] == results
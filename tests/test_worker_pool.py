@@ -0,0 +1,82 @@
+"""Tests for the calculation worker pool"""
+
+import asyncio
+import pytest
+from api.services import calculation
+from api.services.chart_record import ChartRecord, decode, encode
+from api.services.worker_pool import CalculationPool
+
+CHARTS = [
+    ("1990-01-01", "12:00:00", 13.0827, 80.2707, 5.5, "lahiri"),
+    ("1985-06-15", "06:30:00", 28.6139, 77.2090, 5.5, "raman"),
+    ("2001-11-30", "23:59:00", 51.5074, -0.1278, 0.0, "krishnamurti"),
+    ("1975-03-21", "00:15:00", 40.7128, -74.0060, -5.0, "lahiri"),
+]
+
+@pytest.fixture
+def pool():
+    pool = CalculationPool(workers=2, batch_window_ms=20, max_batch_size=64)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+def _inline(chart):
+    """The record calculated in-process, as it looks after the binary round trip"""
+    return decode(encode(ChartRecord.from_dict(calculation.calculate_chart_record(*chart))))
+
+async def _calculate_all(pool, charts):
+    return await asyncio.gather(*(pool.calculate_chart(*chart) for chart in charts))
+
+def test_pool_matches_inline_calculation(pool):
+    """Worker results are identical to calculating in-process"""
+    results = asyncio.run(_calculate_all(pool, CHARTS))
+    for chart, result in zip(CHARTS, results):
+        assert result == _inline(chart)
+
+def test_requests_are_micro_batched(pool):
+    """Concurrent requests share one message per worker"""
+    asyncio.run(_calculate_all(pool, CHARTS))
+    assert pool.charts_calculated == len(CHARTS)
+    assert pool.batches_dispatched == pool.workers
+
+def test_calculation_errors_are_per_request(pool):
+    """A failing chart does not fail the rest of its batch"""
+    async def run():
+        return await asyncio.gather(
+            pool.calculate_chart(*CHARTS[0]),
+            pool.calculate_chart("not-a-date", "12:00:00", 0.0, 0.0, 0.0, "lahiri"),
+            return_exceptions=True
+        )
+
+    good, bad = asyncio.run(run())
+    assert isinstance(good, ChartRecord)
+    assert isinstance(bad, ValueError)
+
+def test_disabled_pool_calculates_inline():
+    """Without workers the chart is calculated in the calling process"""
+    pool = CalculationPool(workers=0)
+    pool.start()
+    assert not pool.enabled
+    result = asyncio.run(pool.calculate_chart(*CHARTS[0]))
+    assert encode(result) == encode(_inline(CHARTS[0]))
+
+def test_broken_pool_is_replaced_once(pool):
+    """Batches failed by the same crashed executor restart the pool only once"""
+    from concurrent.futures.process import BrokenProcessPool
+
+    broken = pool._executor
+    pool._fail([], BrokenProcessPool("worker crashed"), broken)
+    replacement = pool._executor
+    assert replacement is not None and replacement is not broken
+    pool._fail([], BrokenProcessPool("worker crashed"), broken)
+    assert pool._executor is replacement
+    assert asyncio.run(pool.calculate_chart(*CHARTS[0])) == _inline(CHARTS[0])
+
+def test_tasks_overdue_in_the_worker_raise_deadline_exceeded(pool):
+    """A task that expires while batched is answered like any overdue request"""
+    from api.utils.deadline import DeadlineExceededError, deadline_scope
+
+    with deadline_scope(0.005):
+        with pytest.raises(DeadlineExceededError) as exc:
+            asyncio.run(pool.calculate_chart(*CHARTS[0]))
+    assert exc.value.stage == "calculation"